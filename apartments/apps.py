@@ -5,3 +5,5 @@ class ApartmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apartments'
 
+    def ready(self):
+        import apartments.signals
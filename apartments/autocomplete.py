@@ -0,0 +1,209 @@
+"""
+In-memory autocomplete index for apartment search suggestions.
+Business Context: Suggestions are requested on every keystroke in the search box,
+so they are served from a sorted prefix array held in each process instead of
+querying PostgreSQL per request.
+
+The index is built from popular search terms, building names and neighborhoods,
+published as a serialized snapshot in the shared cache (Redis in deployed
+environments) and reloaded by each worker when a newer snapshot appears.
+"""
+
+from bisect import bisect_left
+import heapq
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'apartments:autocomplete:snapshot'
+SNAPSHOT_TTL = 60 * 60 * 24  # Snapshots are refreshed by Celery beat long before this
+LOCAL_CHECK_INTERVAL = 60  # Seconds between checks for a newer shared snapshot
+MAX_POPULAR_TERMS = 5000
+
+# Source priority used to break ties between equally weighted suggestions,
+# matching the original ordering: popular terms, then buildings, then neighborhoods.
+SOURCE_POPULAR = 0
+SOURCE_BUILDING = 1
+SOURCE_NEIGHBORHOOD = 2
+
+
+class AutocompleteIndex:
+    """
+    Sorted-array prefix index over weighted suggestion labels.
+
+    Every word position of a label is indexed, so "slo" matches "Park Slope"
+    the same way the old ``icontains`` building lookup did, while lookups stay
+    two binary searches plus a top-k selection over the matching range.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, int, int]] = ()):
+        """
+        Args:
+            entries: Iterable of (label, weight, source) tuples
+        """
+        labels = {}
+        for label, weight, source in entries:
+            label = (label or '').strip()
+            if not label:
+                continue
+            normalized = label.lower()
+            existing = labels.get(normalized)
+            # Keep one label per case-insensitive spelling, preferring the best ranked one
+            if existing is None or (-weight, source) < (-existing[1], existing[2]):
+                labels[normalized] = (label, weight, source)
+
+        self.entries = list(labels.values())
+
+        postings = []
+        for position, (label, weight, source) in enumerate(self.entries):
+            words = label.lower().split()
+            for start in range(len(words)):
+                postings.append((' '.join(words[start:]), position))
+        postings.sort()
+
+        self._keys = [key for key, _ in postings]
+        self._positions = [position for _, position in postings]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Return up to ``limit`` labels with a word starting with ``prefix``, best first."""
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + '\uffff', lo=start)
+        matches = {self._positions[i] for i in range(start, end)}
+
+        best = heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda position: self._rank_key(self.entries[position]),
+        )
+        return [self.entries[position][0] for position in best]
+
+    @staticmethod
+    def _rank_key(entry):
+        label, weight, source = entry
+        return (-weight, source, label.lower())
+
+    def to_snapshot(self) -> dict:
+        """Serialize the index into a compact, cache-friendly structure."""
+        return {
+            'built_at': time.time(),
+            'entries': self.entries,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> 'AutocompleteIndex':
+        return cls(snapshot.get('entries', []))
+
+
+def collect_suggestion_entries() -> List[Tuple[str, int, int]]:
+    """
+    Load every suggestion source from the database.
+    Popular terms are weighted by how often they are searched; building names and
+    neighborhoods inherit the weight of a matching popular term when there is one.
+    """
+    from buildings.models import Building
+    from .search_models import PopularSearchTerm
+
+    popular = list(
+        PopularSearchTerm.objects.filter(search_count__gt=0)
+        .order_by('-search_count')
+        .values_list('term', 'search_count')[:MAX_POPULAR_TERMS]
+    )
+    popularity = {term.lower(): count for term, count in popular}
+
+    entries = [(term, count, SOURCE_POPULAR) for term, count in popular]
+
+    building_names = Building.objects.exclude(name='').values_list('name', flat=True).distinct()
+    for name in building_names:
+        entries.append((name, popularity.get(name.lower(), 0), SOURCE_BUILDING))
+
+    for _, name in Building.NEIGHBORHOOD_CHOICES:
+        entries.append((name, popularity.get(name.lower(), 0), SOURCE_NEIGHBORHOOD))
+
+    return entries
+
+
+def build_autocomplete_index() -> AutocompleteIndex:
+    """Build a fresh index from the database."""
+    return AutocompleteIndex(collect_suggestion_entries())
+
+
+_local_lock = threading.Lock()
+_local_index: Optional[AutocompleteIndex] = None
+_local_built_at = 0.0
+_local_checked_at = 0.0
+
+
+def _install(index: AutocompleteIndex, built_at: float):
+    global _local_index, _local_built_at, _local_checked_at
+    _local_index = index
+    _local_built_at = built_at
+    _local_checked_at = time.monotonic()
+
+
+def refresh_autocomplete_index() -> AutocompleteIndex:
+    """
+    Rebuild the index from the database and publish the snapshot for all workers.
+    Called periodically by Celery beat and whenever no snapshot exists yet.
+    """
+    index = build_autocomplete_index()
+    snapshot = index.to_snapshot()
+    try:
+        cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_TTL)
+    except Exception as e:
+        logger.warning(f"Failed to publish autocomplete snapshot: {e}")
+
+    with _local_lock:
+        _install(index, snapshot['built_at'])
+
+    logger.info(f"Autocomplete index rebuilt with {len(index)} suggestions")
+    return index
+
+
+def get_autocomplete_index() -> AutocompleteIndex:
+    """
+    Return this process's index, reloading from the shared snapshot at most once
+    per LOCAL_CHECK_INTERVAL. The database is only queried when no snapshot exists.
+    """
+    now = time.monotonic()
+    if _local_index is not None and now - _local_checked_at < LOCAL_CHECK_INTERVAL:
+        return _local_index
+
+    with _local_lock:
+        if _local_index is not None and time.monotonic() - _local_checked_at < LOCAL_CHECK_INTERVAL:
+            return _local_index
+
+        try:
+            snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read autocomplete snapshot: {e}")
+            snapshot = None
+
+        if snapshot:
+            if _local_index is None or snapshot['built_at'] > _local_built_at:
+                _install(AutocompleteIndex.from_snapshot(snapshot), snapshot['built_at'])
+            else:
+                _install(_local_index, _local_built_at)
+            return _local_index
+
+    return refresh_autocomplete_index()
+
+
+def reset_local_autocomplete_index():
+    """Drop the in-process copy so the next lookup reloads it (used by tests)."""
+    global _local_index, _local_built_at, _local_checked_at
+    with _local_lock:
+        _local_index = None
+        _local_built_at = 0.0
+        _local_checked_at = 0.0
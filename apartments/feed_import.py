@@ -0,0 +1,531 @@
+"""
+Bulk import of the external listings feed (data/Apartments_from_search.tsv).
+Business Context: Keeps inventory in sync with the upstream listing system in a
+single batched pass instead of entering units one at a time through the
+multi-step apartment wizard.
+
+The feed is a tab-separated export whose Description column may span several
+lines and whose Concessions/Locks/FreeStuff columns hold JSON. Rows are parsed
+as a stream, compared against the database, and only new or changed listings
+are written - in batched transactions using PostgreSQL upserts.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from datetime import date
+import json
+import logging
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from buildings.models import Building
+from .models import Apartment, ApartmentAmenity, ApartmentConcession
+from .models_extended import ApartmentAvailability
+from .search_indexer import refresh_index_rows
+
+logger = logging.getLogger(__name__)
+
+NULL_VALUES = {'', 'null', 'None'}
+
+STATUS_MAP = {
+    'Vacant': 'available',
+    'Occupied': 'rented',
+}
+
+APARTMENT_TYPE_MAP = {
+    'multi-family': 'multi_family',
+    'duplex': 'duplex',
+    'plex': 'multi_family',
+}
+
+# Apartment columns written by the importer (everything else is left untouched)
+APARTMENT_FIELDS = [
+    'building_id', 'unit_number', 'bedrooms', 'bathrooms', 'square_feet',
+    'apartment_type', 'rent_price', 'net_price', 'deposit_price', 'description',
+    'status', 'lock_type', 'broker_fee_required', 'paid_months', 'lease_duration',
+    'holding_deposit', 'free_stuff', 'required_documents',
+]
+
+
+class FeedFormatError(ValueError):
+    """Raised when a feed record cannot be split into the expected columns."""
+
+
+def iter_feed_records(path: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Stream (record_number, row) pairs from the TSV feed.
+
+    Quoted fields in this export are not escaped and Description may contain
+    newlines, so a physical line is buffered until it holds a full record's
+    worth of tab separators.
+    """
+    with open(path, encoding='utf-8', newline='') as handle:
+        header = handle.readline().rstrip('\r\n').split('\t')
+        separators = len(header) - 1
+        buffer = ''
+        record_number = 0
+
+        for line in handle:
+            buffer += line
+            if buffer.count('\t') < separators:
+                continue
+
+            values = buffer.rstrip('\r\n').split('\t')
+            buffer = ''
+            if len(values) != len(header):
+                raise FeedFormatError(
+                    f"Record {record_number + 1} has {len(values)} columns, expected {len(header)}"
+                )
+
+            record_number += 1
+            yield record_number, dict(zip(header, (_unquote(v) for v in values)))
+
+        if buffer.strip():
+            raise FeedFormatError(f"Truncated record after record {record_number}")
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _text(value: str) -> Optional[str]:
+    value = (value or '').strip()
+    return None if value in NULL_VALUES else value
+
+
+def _decimal(value: str, zero_is_null: bool = False, places: str = '0.01') -> Optional[Decimal]:
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        number = Decimal(value).quantize(Decimal(places))
+    except InvalidOperation:
+        return None
+    if zero_is_null and number == 0:
+        return None
+    return number
+
+
+def _int(value: str, zero_is_null: bool = False) -> Optional[int]:
+    number = _decimal(value)
+    if number is None or (zero_is_null and number == 0):
+        return None
+    return int(number)
+
+
+def _date(value: str) -> Optional[date]:
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def _json_list(value: str) -> list:
+    value = _text(value)
+    if value is None:
+        return []
+    try:
+        decoded = json.loads(value)
+    except json.JSONDecodeError:
+        return []
+    return decoded if isinstance(decoded, list) else []
+
+
+def _csv_list(value: str) -> List[str]:
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def address_key(street: str, zip_code: str) -> Tuple[str, str]:
+    """Normalized (street, zip) pair used to match feed rows to buildings."""
+    return (' '.join((street or '').lower().split()), (zip_code or '').strip()[:5])
+
+
+@dataclass
+class FeedListing:
+    """One decoded feed row, ready to compare against and write to the database."""
+    record_number: int
+    external_id: int
+    building: dict
+    apartment: dict
+    amenities: List[str] = field(default_factory=list)
+    concessions: List[dict] = field(default_factory=list)
+    available_from: Optional[date] = None
+    pictures: List[str] = field(default_factory=list)
+
+    @property
+    def building_key(self):
+        return address_key(self.building['street_address_1'], self.building['zip_code'])
+
+    @property
+    def label(self):
+        return f"{self.building['street_address_1']} #{self.apartment['unit_number']}"
+
+
+def parse_listing(record_number: int, row: Dict[str, str]) -> FeedListing:
+    """Decode a raw feed row into model field values."""
+    neighborhood = _text(row.get('Neighborhood'))
+    valid_neighborhoods = {code for code, _ in Building.NEIGHBORHOOD_CHOICES}
+
+    building = {
+        'name': _text(row.get('Street')) or '',
+        'street_address_1': _text(row.get('Street')) or '',
+        'city': _text(row.get('City')) or '',
+        'state': (_text(row.get('State')) or 'NY')[:2],
+        'zip_code': _text(row.get('ZipCode')) or '',
+        'neighborhood': neighborhood if neighborhood in valid_neighborhoods else None,
+        'latitude': _coordinate(row.get('Latitude')),
+        'longitude': _coordinate(row.get('Longitude')),
+    }
+
+    locks = _json_list(row.get('ApartmentLocks'))
+    free_stuff = [item.get('Name') for item in _json_list(row.get('ApartmentFreeStuff'))
+                  if isinstance(item, dict) and item.get('Name')]
+
+    apartment = {
+        'unit_number': (_text(row.get('Unit')) or '')[:10],
+        'bedrooms': _decimal(row.get('BedroomQuantity'), places='0.1'),
+        'bathrooms': _decimal(row.get('BathroomQuantity'), places='0.1'),
+        'square_feet': _int(row.get('SquareFeet'), zero_is_null=True),
+        'apartment_type': APARTMENT_TYPE_MAP.get(_text(row.get('ApartmentType')), 'multi_family'),
+        'rent_price': _decimal(row.get('LeasePrice')),
+        'net_price': _decimal(row.get('NetPrice'), zero_is_null=True),
+        'deposit_price': _decimal(row.get('DepositPrice')),
+        'description': _text(row.get('Description')),
+        'status': STATUS_MAP.get(_text(row.get('Status')), 'unavailable'),
+        'lock_type': (locks[0].get('ConnectionType') if locks and isinstance(locks[0], dict) else None),
+        'broker_fee_required': _text(row.get('BrokerFeeRequired')) == 'True',
+        'paid_months': _int(row.get('PaidMonths')),
+        'lease_duration': (_text(row.get('LeaseDurations')) or '')[:50] or None,
+        'holding_deposit': _decimal(row.get('HoldingDepositAmount')),
+        'free_stuff': ', '.join(free_stuff)[:255] or None,
+        'required_documents': _text(row.get('ApartmentRequiredDocuments')),
+    }
+
+    concessions = []
+    for item in _json_list(row.get('ApartmentConcessions')):
+        if not isinstance(item, dict):
+            continue
+        months_free = item.get('MonthsFree')
+        concessions.append({
+            'special_offer_id': item.get('SpecialOfferId'),
+            'months_free': Decimal(str(months_free)).quantize(Decimal('0.1')) if months_free is not None else None,
+            'lease_terms': (item.get('LeaseTerms') or '')[:50] or None,
+            'name': (item.get('Name') or '')[:100] or None,
+        })
+
+    external_id = _int(row.get('ApartmentId'))
+    if external_id is None:
+        raise FeedFormatError(f"Record {record_number} has no ApartmentId")
+
+    return FeedListing(
+        record_number=record_number,
+        external_id=external_id,
+        building=building,
+        apartment=apartment,
+        amenities=[name[:100] for name in _csv_list(row.get('ApartmentAmenities'))],
+        concessions=concessions,
+        available_from=_date(row.get('AvailableFrom')),
+        pictures=_csv_list(row.get('ApartmentPictures')),
+    )
+
+
+def _coordinate(value: str) -> Optional[Decimal]:
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        return Decimal(value).quantize(Decimal('0.0000001'))
+    except InvalidOperation:
+        return None
+
+
+@dataclass
+class ImportStats:
+    """Counters reported at the end of an import run."""
+    processed: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    buildings_created: int = 0
+    indexed: int = 0
+    errors: List[str] = field(default_factory=list)
+    changes: List[str] = field(default_factory=list)
+
+
+class ListingFeedImporter:
+    """
+    Upserts feed listings in batches.
+    Each batch is one transaction; unchanged listings cost no writes and only
+    changed apartments have their search index rebuilt. Bulk writes send no
+    post_save, so each batch invalidates the public broker pages of the
+    buildings it touched itself.
+    """
+
+    def __init__(self, batch_size: int = 500, dry_run: bool = False, stats: Optional[ImportStats] = None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = stats or ImportStats()
+        self._amenity_ids = None
+
+    def import_listings(self, listings: List[FeedListing]) -> List[int]:
+        """
+        Import listings in batches of ``batch_size``, one transaction each.
+        Returns the IDs of apartments that were created or changed.
+        """
+        changed_ids = []
+        for start in range(0, len(listings), self.batch_size):
+            changed_ids.extend(self._import_batch(listings[start:start + self.batch_size]))
+        return changed_ids
+
+    def _import_batch(self, listings: List[FeedListing]) -> List[int]:
+        existing = {
+            apartment.external_id: apartment
+            for apartment in Apartment.objects.filter(
+                external_id__in=[listing.external_id for listing in listings]
+            ).prefetch_related('amenities', 'concessions')
+        }
+        building_ids = self._resolve_buildings(listings)
+
+        pending = []
+        touched_buildings = set()
+        for listing in listings:
+            self.stats.processed += 1
+            current = existing.get(listing.external_id)
+            building_id = building_ids.get(listing.building_key)
+            diff = self._diff(listing, current, building_id)
+
+            if current is not None and not diff:
+                self.stats.unchanged += 1
+                continue
+
+            apartment = Apartment(external_id=listing.external_id, **listing.apartment)
+            apartment.building_id = building_id
+            try:
+                # Same rules Apartment.save() enforces, minus the per-row uniqueness queries
+                apartment.clean_fields(exclude=['building', 'external_id'])
+                apartment.clean()
+            except ValidationError as e:
+                self.stats.invalid += 1
+                self.stats.errors.append(f"{listing.label} (feed ID {listing.external_id}): {e}")
+                continue
+
+            if current is None:
+                self.stats.created += 1
+                self.stats.changes.append(f"+ {listing.label} (feed ID {listing.external_id})")
+            else:
+                self.stats.updated += 1
+                self.stats.changes.append(
+                    f"~ {listing.label} (feed ID {listing.external_id}): " + '; '.join(diff)
+                )
+                touched_buildings.add(current.building_id)  # Its old building if it moved
+            touched_buildings.add(building_id)
+            pending.append((listing, apartment))
+
+        if self.dry_run or not pending:
+            return []
+
+        changed_ids = self._write(pending)
+        self._invalidate_public_profiles(touched_buildings)
+        return changed_ids
+
+    def _diff(self, listing: FeedListing, current: Optional[Apartment], building_id) -> List[str]:
+        """Human-readable field changes between the feed row and the stored apartment."""
+        if current is None:
+            return ['new']
+
+        changes = []
+        incoming = dict(listing.apartment, building_id=building_id)
+        for name in APARTMENT_FIELDS:
+            old, new = getattr(current, name), incoming.get(name)
+            if old != new:
+                changes.append(f"{name}: {old!r} -> {new!r}")
+
+        current_amenities = {a.name.lower() for a in current.amenities.all()}
+        if current_amenities != {name.lower() for name in listing.amenities}:
+            changes.append('amenities')
+
+        current_offers = {
+            (c.special_offer_id, c.months_free, c.lease_terms, c.name)
+            for c in current.concessions.all()
+        }
+        incoming_offers = {
+            (c['special_offer_id'], c['months_free'], c['lease_terms'], c['name'])
+            for c in listing.concessions
+        }
+        if current_offers != incoming_offers:
+            changes.append('concessions')
+
+        return changes
+
+    def _resolve_buildings(self, listings: List[FeedListing]) -> Dict[Tuple[str, str], int]:
+        """Match listings to buildings by address, creating any that are missing."""
+        wanted = {listing.building_key: listing.building for listing in listings}
+        zips = {key[1] for key in wanted}
+
+        found = {}
+        to_update = []
+        for building in Building.objects.filter(zip_code__in=zips):
+            key = address_key(building.street_address_1, building.zip_code)
+            if key not in wanted or key in found:
+                continue
+            found[key] = building.id
+
+            data = wanted[key]
+            changed = False
+            for name in ('latitude', 'longitude', 'neighborhood'):
+                if data[name] is not None and getattr(building, name) != data[name]:
+                    setattr(building, name, data[name])
+                    changed = True
+            if changed:
+                to_update.append(building)
+
+        missing = [key for key in wanted if key not in found]
+        if self.dry_run:
+            for key in missing:
+                self.stats.buildings_created += 1
+                self.stats.changes.append(f"+ building {wanted[key]['street_address_1']}")
+            return found
+
+        if to_update:
+            Building.objects.bulk_update(to_update, ['latitude', 'longitude', 'neighborhood'])
+            self._invalidate_public_profiles(building.id for building in to_update)
+
+        if missing:
+            created = Building.objects.bulk_create([Building(**wanted[key]) for key in missing])
+            for key, building in zip(missing, created):
+                found[key] = building.id
+            self.stats.buildings_created += len(created)
+
+        return found
+
+    @staticmethod
+    def _invalidate_public_profiles(building_ids):
+        """Drop cached broker pages listing these buildings once the write commits."""
+        from users.public_profiles import PublicBrokerProfileService
+
+        building_ids = {building_id for building_id in building_ids if building_id}
+        if building_ids:
+            transaction.on_commit(lambda: PublicBrokerProfileService.invalidate_buildings(building_ids))
+
+    def _amenity_id_map(self, names: List[str]) -> Dict[str, int]:
+        """Case-insensitive amenity name -> ID, creating unknown amenities in one insert."""
+        if self._amenity_ids is None:
+            self._amenity_ids = {}
+            for amenity_id, name in ApartmentAmenity.objects.order_by('id').values_list('id', 'name'):
+                self._amenity_ids.setdefault(name.lower(), amenity_id)
+
+        missing = {}
+        for name in names:
+            if name.lower() not in self._amenity_ids:
+                missing.setdefault(name.lower(), name)
+
+        if missing:
+            created = ApartmentAmenity.objects.bulk_create(
+                [ApartmentAmenity(name=name) for name in missing.values()]
+            )
+            for amenity in created:
+                self._amenity_ids[amenity.name.lower()] = amenity.id
+
+        return self._amenity_ids
+
+    def _write(self, pending: List[Tuple[FeedListing, Apartment]]) -> List[int]:
+        with transaction.atomic():
+            saved = Apartment.objects.bulk_create(
+                [apartment for _, apartment in pending],
+                update_conflicts=True,
+                unique_fields=['external_id'],
+                update_fields=APARTMENT_FIELDS + ['last_modified'],
+            )
+            apartment_ids = {listing.external_id: apartment.pk
+                             for (listing, _), apartment in zip(pending, saved)}
+            changed_ids = list(apartment_ids.values())
+
+            self._write_amenities(pending, apartment_ids)
+            self._write_concessions(pending, apartment_ids)
+            self._write_availability(pending, apartment_ids)
+
+        return changed_ids
+
+    def _write_amenities(self, pending, apartment_ids):
+        through = Apartment.amenities.through
+        amenity_ids = self._amenity_id_map([name for listing, _ in pending for name in listing.amenities])
+
+        links = {
+            (apartment_ids[listing.external_id], amenity_ids[name.lower()])
+            for listing, _ in pending
+            for name in listing.amenities
+        }
+
+        # Replace the links of changed apartments wholesale: one delete, one insert
+        through.objects.filter(apartment_id__in=apartment_ids.values()).delete()
+        through.objects.bulk_create(
+            [through(apartment_id=a, apartmentamenity_id=b) for a, b in links],
+            ignore_conflicts=True,
+        )
+
+    def _write_concessions(self, pending, apartment_ids):
+        concessions = [
+            ApartmentConcession(apartment_id=apartment_ids[listing.external_id], **data)
+            for listing, _ in pending
+            for data in listing.concessions
+            if data['special_offer_id'] is not None
+        ]
+        offer_ids = defaultdict(list)
+        for concession in concessions:
+            offer_ids[concession.apartment_id].append(concession.special_offer_id)
+
+        # Each apartment keeps only its own offers: an offer another unit in
+        # the batch still has is no reason to keep it here
+        stale = Q()
+        for apartment_id in apartment_ids.values():
+            stale |= Q(apartment_id=apartment_id) & ~Q(special_offer_id__in=offer_ids[apartment_id])
+        ApartmentConcession.objects.filter(stale).delete()
+
+        if concessions:
+            ApartmentConcession.objects.bulk_create(
+                concessions,
+                update_conflicts=True,
+                unique_fields=['apartment', 'special_offer_id'],
+                update_fields=['months_free', 'lease_terms', 'name'],
+            )
+
+    def _write_availability(self, pending, apartment_ids):
+        today = timezone.now().date()
+        upcoming = {
+            apartment_ids[listing.external_id]: listing.available_from
+            for listing, _ in pending
+            if listing.available_from and listing.available_from >= today
+        }
+
+        # Feed-managed apartments keep a single open availability window;
+        # reservations made on the platform are never touched.
+        ApartmentAvailability.objects.filter(
+            apartment_id__in=apartment_ids.values(), is_reserved=False
+        ).delete()
+        ApartmentAvailability.objects.bulk_create([
+            ApartmentAvailability(apartment_id=apartment_id, available_date=available_date)
+            for apartment_id, available_date in upcoming.items()
+        ])
+
+
+def refresh_search_index(apartment_ids: List[int]) -> int:
+    """Rebuild search index rows for the given apartments only."""
+    return refresh_index_rows(apartment_ids)
+
+
+def feed_fingerprint(path: str) -> dict:
+    """Identify a feed file so a checkpoint is only resumed against the same export."""
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
@@ -0,0 +1,158 @@
+"""
+Management command to sync apartments from the external listings feed.
+Business Context: Replaces one-at-a-time listing entry through the apartment
+wizard with a batched, resumable import of the whole feed export.
+
+Usage:
+    python manage.py import_listings
+    python manage.py import_listings data/Apartments_from_search.tsv --dry-run -v 2
+    python manage.py import_listings --resume
+"""
+
+from itertools import islice
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apartments.feed_import import (
+    FeedFormatError,
+    ImportStats,
+    ListingFeedImporter,
+    feed_fingerprint,
+    iter_feed_records,
+    parse_listing,
+    refresh_search_index,
+)
+
+
+class Command(BaseCommand):
+    help = 'Import/refresh apartments from the listings feed TSV export'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'Apartments_from_search.tsv'),
+            help='Path to the TSV feed (defaults to data/Apartments_from_search.tsv)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of listings written per transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything (use -v 2 for a full diff)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue from the last committed batch of an interrupted run',
+        )
+        parser.add_argument(
+            '--state-file',
+            help='Checkpoint file for --resume (defaults to <path>.progress)',
+        )
+        parser.add_argument(
+            '--skip-index',
+            action='store_true',
+            help='Do not refresh the search index for changed apartments',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        verbosity = options['verbosity']
+        state_file = options['state_file'] or f"{path}.progress"
+
+        if not os.path.exists(path):
+            raise CommandError(f'Feed file not found: {path}')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        fingerprint = feed_fingerprint(path)
+        skip = 0
+        if options['resume'] and not dry_run:
+            skip = self._load_checkpoint(state_file, fingerprint)
+            if skip:
+                self.stdout.write(f'Resuming after record {skip}')
+
+        stats = ImportStats()
+        importer = ListingFeedImporter(batch_size=batch_size, dry_run=dry_run, stats=stats)
+        started = time.monotonic()
+        records_done = skip
+
+        try:
+            records = islice(iter_feed_records(path), skip, None)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                listings = []
+                for record_number, row in batch:
+                    try:
+                        listings.append(parse_listing(record_number, row))
+                    except FeedFormatError as e:
+                        stats.invalid += 1
+                        stats.errors.append(str(e))
+
+                changed_ids = importer.import_listings(listings)
+                records_done = batch[-1][0]
+
+                if changed_ids and not options['skip_index']:
+                    stats.indexed += refresh_search_index(changed_ids)
+
+                if not dry_run:
+                    self._save_checkpoint(state_file, fingerprint, records_done)
+
+                if verbosity >= 1:
+                    self.stdout.write(
+                        f'Processed {records_done} records '
+                        f'({stats.created} new, {stats.updated} changed, {stats.unchanged} unchanged)'
+                    )
+        except FeedFormatError as e:
+            raise CommandError(f'{e} - fix the feed and re-run with --resume')
+
+        elapsed = time.monotonic() - started
+
+        if dry_run or verbosity >= 2:
+            for line in stats.changes:
+                self.stdout.write(line)
+        for error in stats.errors:
+            self.stdout.write(self.style.WARNING(f'Skipped {error}'))
+
+        if not dry_run and os.path.exists(state_file):
+            os.remove(state_file)
+
+        prefix = 'DRY RUN - ' if dry_run else ''
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n{prefix}Import complete in {elapsed:.1f}s. '
+                f'Listings: {stats.processed} processed, {stats.created} new, '
+                f'{stats.updated} changed, {stats.unchanged} unchanged, {stats.invalid} skipped. '
+                f'Buildings created: {stats.buildings_created}. '
+                f'Search index rows refreshed: {stats.indexed}.'
+            )
+        )
+
+    def _load_checkpoint(self, state_file, fingerprint):
+        """Return the number of records already committed for this exact feed file."""
+        if not os.path.exists(state_file):
+            return 0
+        with open(state_file) as handle:
+            state = json.load(handle)
+        if state.get('feed') != fingerprint:
+            self.stdout.write(self.style.WARNING('Feed file changed since the checkpoint; starting over'))
+            return 0
+        return state.get('records_done', 0)
+
+    def _save_checkpoint(self, state_file, fingerprint, records_done):
+        with open(state_file, 'w') as handle:
+            json.dump({'feed': fingerprint, 'records_done': records_done}, handle)
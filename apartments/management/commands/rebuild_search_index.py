@@ -2,11 +2,19 @@
 Management command to rebuild apartment search index.
 Business Context: Maintains search accuracy and performance.
 Should be run after bulk imports or major data changes.
+
+The index is built set-based into a shadow table and swapped in atomically,
+so search keeps serving the previous index for the whole rebuild.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --parallel 4
+    python manage.py rebuild_search_index --building-id 12
 """
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
 from apartments.models import Apartment
+from apartments.search_indexer import rebuild_search_index
 from apartments.search_models import ApartmentSearchIndex
 import logging
 
@@ -15,12 +23,12 @@ logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
     help = 'Rebuild the full-text search index for all apartments'
-    
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--clear',
             action='store_true',
-            help='Clear existing index before rebuilding',
+            help='Kept for compatibility: every rebuild now replaces the index atomically',
         )
         parser.add_argument(
             '--building-id',
@@ -31,83 +39,50 @@ class Command(BaseCommand):
             '--batch-size',
             type=int,
             default=100,
-            help='Number of apartments to process in each batch',
+            help='Kept for compatibility: the index is now built in a single set-based pass',
         )
-    
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            default=1,
+            help='Number of workers building the index, sharded by building ID',
+        )
+
     def handle(self, *args, **options):
         """Execute the command"""
-        clear_existing = options['clear']
         building_id = options.get('building_id')
-        batch_size = options['batch_size']
-        
-        # Clear existing index if requested
-        if clear_existing:
-            self.stdout.write('Clearing existing search index...')
-            ApartmentSearchIndex.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Index cleared'))
-        
-        # Get apartments to index
-        apartments = Apartment.objects.all()
+        parallel = options['parallel']
+
+        if parallel < 1:
+            raise CommandError('--parallel must be at least 1')
         if building_id:
-            apartments = apartments.filter(building_id=building_id)
             self.stdout.write(f'Filtering to building ID {building_id}')
-        
-        total_count = apartments.count()
-        self.stdout.write(f'Found {total_count} apartments to index')
-        
-        # Process in batches for better performance
-        processed = 0
-        errors = 0
-        
-        for apartment in apartments.iterator(chunk_size=batch_size):
-            try:
-                with transaction.atomic():
-                    # Get or create search index
-                    search_index, created = ApartmentSearchIndex.objects.get_or_create(
-                        apartment=apartment
-                    )
-                    
-                    # Rebuild the index
-                    search_index.rebuild_index()
-                    
-                    processed += 1
-                    
-                    # Progress update
-                    if processed % batch_size == 0:
-                        self.stdout.write(
-                            f'Processed {processed}/{total_count} apartments '
-                            f'({processed * 100 // total_count}%)'
-                        )
-                        
-            except Exception as e:
-                errors += 1
-                logger.error(f"Error indexing apartment {apartment.id}: {e}")
-                self.stdout.write(
-                    self.style.ERROR(f'Error indexing apartment {apartment.id}: {e}')
-                )
-        
-        # Final summary
+
+        try:
+            stats = rebuild_search_index(building_id=building_id, parallel=parallel)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nIndexing complete! '
-                f'Successfully indexed {processed - errors} apartments. '
-                f'Errors: {errors}'
+                f'Indexed {stats.rows} apartments in {stats.elapsed:.2f}s '
+                f'({stats.rows_per_second:.0f} apartments/s, {stats.shards} worker(s); '
+                f'build {stats.build_seconds:.2f}s, swap {stats.swap_seconds:.2f}s)'
             )
         )
-        
+
         # Update statistics
         self._update_search_statistics()
-    
+
     def _update_search_statistics(self):
         """Update search-related statistics"""
-        from django.db.models import Count
-        
         # Count indexed apartments
         indexed_count = ApartmentSearchIndex.objects.count()
         available_count = Apartment.objects.filter(status='available').count()
-        
+
         self.stdout.write(
             f'\nStatistics:\n'
             f'- Total indexed: {indexed_count}\n'
             f'- Available apartments: {available_count}\n'
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0011_auto_20260102_0824'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='external_id',
+            field=models.IntegerField(blank=True, help_text='Listing ID in the external listings feed (set by import_listings)', null=True, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='apartmentconcession',
+            constraint=models.UniqueConstraint(fields=('apartment', 'special_offer_id'), name='unique_apartment_special_offer'),
+        ),
+    ]
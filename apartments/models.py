@@ -132,6 +132,12 @@ class Apartment(models.Model):
     required_documents = models.TextField(blank=True, null=True)
 
     # System Fields
+    external_id = models.IntegerField(
+        blank=True,
+        null=True,
+        unique=True,
+        help_text="Listing ID in the external listings feed (set by import_listings)"
+    )
     last_modified = models.DateTimeField(auto_now=True)
 
     @property
@@ -362,6 +368,15 @@ class ApartmentConcession(models.Model):
     special_offer_id = models.IntegerField(blank=True, null=True)  # External system tracking ID
     name = models.CharField(max_length=100, blank=True, null=True)  # Marketing name for the offer
     
+    class Meta:
+        constraints = [
+            # Lets the listings feed import upsert offers by their external ID
+            models.UniqueConstraint(
+                fields=['apartment', 'special_offer_id'],
+                name='unique_apartment_special_offer'
+            ),
+        ]
+    
     def clean(self):
         """Validate concession logic"""
         super().clean()
@@ -0,0 +1,160 @@
+"""
+Preference Filters
+==================
+
+Default apartment-list filters derived from an applicant's saved preferences.
+
+When an applicant opens the listings with no query string, their budget,
+bedroom/bathroom range, neighborhoods and amenities are applied as filters.
+Resolving neighborhood and amenity names to filter values used to cost a
+query per preference on every page load. Instead:
+
+- building amenity name -> id lookups come from one cached table, cleared
+  when an Amenity row changes; neighborhood names resolve against the static
+  Building.NEIGHBORHOOD_CHOICES
+- each applicant's resolved filter set is stored on
+  Applicant.listing_filter_defaults, refreshed once per transaction when the
+  applicant or their preferences change (NULL = not resolved yet)
+
+The move-in filter depends on today's date, so it is derived from
+desired_move_in_date on every load rather than stored.
+"""
+
+from datetime import date
+import logging
+
+from django.core.cache import cache
+from django.http import QueryDict
+
+from buildings.models import Amenity, Building
+from realestate.transactions import run_once_on_commit
+
+logger = logging.getLogger(__name__)
+
+AMENITY_LOOKUP_CACHE_KEY = 'apartments:amenity_ids_by_name'
+
+# Applicant fields copied into the default filters, by filter name
+RANGE_FILTERS = {
+    'max_price': 'max_rent_budget',
+    'min_bedrooms': 'min_bedrooms',
+    'max_bedrooms': 'max_bedrooms',
+    'min_bathrooms': 'min_bathrooms',
+    'max_bathrooms': 'max_bathrooms',
+}
+
+# Lower-cased neighborhood label or value -> filter value (first choice wins)
+NEIGHBORHOOD_VALUES = {}
+for _value, _label in Building.NEIGHBORHOOD_CHOICES:
+    NEIGHBORHOOD_VALUES.setdefault(_label.lower(), _value)
+    NEIGHBORHOOD_VALUES.setdefault(_value.lower(), _value)
+
+
+class PreferenceFilterService:
+    """
+    Resolve, store and apply applicants' default listing filters.
+    """
+
+    @staticmethod
+    def amenity_ids_by_name():
+        """Lower-cased building amenity name -> id (lowest id for duplicate names), cached."""
+        lookup = cache.get(AMENITY_LOOKUP_CACHE_KEY)
+        if lookup is None:
+            lookup = {}
+            for pk, name in Amenity.objects.order_by('-pk').values_list('pk', 'name'):
+                lookup[name.lower()] = pk
+            cache.set(AMENITY_LOOKUP_CACHE_KEY, lookup, None)
+        return lookup
+
+    @staticmethod
+    def invalidate_amenity_lookup():
+        """Amenity rows changed: drop the lookup and every stored filter set that used it."""
+        from applicants.models import Applicant
+
+        cache.delete(AMENITY_LOOKUP_CACHE_KEY)
+        Applicant.objects.filter(listing_filter_defaults__isnull=False).update(listing_filter_defaults=None)
+
+    @staticmethod
+    def resolve(applicant):
+        """
+        Build an applicant's default filters as {filter name: [values]},
+        excluding the date-dependent move-in filter.
+        """
+        filters = {}
+        for name, field in RANGE_FILTERS.items():
+            value = getattr(applicant, field)
+            if value:
+                filters[name] = [str(int(value)) if name == 'max_price' else str(value)]
+
+        # Neighborhoods (legacy + ranked preferences)
+        names = list(applicant.neighborhood_preferences.values_list('name', flat=True))
+        names += applicant.ranked_neighborhood_preferences.values_list('name', flat=True)
+        neighborhoods = {NEIGHBORHOOD_VALUES[name.lower()] for name in names if name.lower() in NEIGHBORHOOD_VALUES}
+        if neighborhoods:
+            filters['neighborhoods'] = sorted(neighborhoods)
+
+        # Amenities (legacy + ranked building and apartment preferences), matched by name
+        names = list(applicant.amenities.values_list('name', flat=True))
+        names += applicant.building_amenity_preferences.values_list('amenity__name', flat=True)
+        names += applicant.apartment_amenity_preferences.values_list('amenity__name', flat=True)
+        lookup = PreferenceFilterService.amenity_ids_by_name()
+        amenity_ids = {lookup[name.lower()] for name in names if name.lower() in lookup}
+        if amenity_ids:
+            filters['amenities'] = [str(pk) for pk in sorted(amenity_ids)]
+        return filters
+
+    @staticmethod
+    def refresh(applicant):
+        """Resolve and store an applicant's default filters; writes only when they changed."""
+        from applicants.models import Applicant
+
+        filters = PreferenceFilterService.resolve(applicant)
+        if filters != applicant.listing_filter_defaults:
+            Applicant.objects.filter(pk=applicant.pk).update(listing_filter_defaults=filters)
+            applicant.listing_filter_defaults = filters
+        return filters
+
+    @staticmethod
+    def schedule_refresh(applicant_id):
+        """
+        Refresh an applicant's stored filters once the current transaction
+        commits. A profile save touching many preference rows schedules many
+        times; the applicant is refreshed once (see run_once_on_commit).
+        """
+        if not applicant_id:
+            return
+
+        def run():
+            from applicants.models import Applicant
+
+            applicant = Applicant.objects.filter(pk=applicant_id).first()
+            if applicant is not None:
+                try:
+                    PreferenceFilterService.refresh(applicant)
+                except Exception as e:
+                    logger.error(f"Failed to refresh listing filters for applicant {applicant_id}: {e}")
+
+        run_once_on_commit(('listing_filters', applicant_id), run)
+
+    @staticmethod
+    def default_query(applicant):
+        """
+        QueryDict of the applicant's default listing filters, resolving and
+        storing them first if they were never resolved.
+        """
+        filters = applicant.listing_filter_defaults
+        if filters is None:
+            filters = PreferenceFilterService.refresh(applicant)
+
+        query = QueryDict(mutable=True)
+        for name, values in filters.items():
+            query.setlist(name, values)
+
+        if applicant.desired_move_in_date:
+            days_until_move = (applicant.desired_move_in_date - date.today()).days
+            if days_until_move <= 0:
+                query['move_in_date'] = 'available_now'
+            elif days_until_move <= 30:
+                query['move_in_date'] = 'within_30'
+            elif days_until_move <= 60:
+                query['move_in_date'] = 'within_60'
+        return query
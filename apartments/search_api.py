@@ -24,9 +24,9 @@ from .search_models import (
 from .search_utils import (
     ApartmentSearchEngine,
     record_search,
-    get_search_suggestions,
     calculate_distance
 )
+from .autocomplete import get_autocomplete_index
 
 logger = logging.getLogger(__name__)
 
@@ -184,34 +184,11 @@ def search_suggestions_api(request):
         if len(query) < 2:
             return JsonResponse({'suggestions': []})
         
-        suggestions = get_search_suggestions(query, limit=10)
-        
-        # Also add building names that match
-        from buildings.models import Building
-        buildings = Building.objects.filter(
-            name__icontains=query
-        ).values_list('name', flat=True)[:5]
-        
-        suggestions.extend(buildings)
-        
-        # Add neighborhoods that match
-        neighborhoods = []
-        for code, name in Building.NEIGHBORHOOD_CHOICES:
-            if query.lower() in name.lower():
-                neighborhoods.append(name)
-        
-        suggestions.extend(neighborhoods)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_suggestions = []
-        for s in suggestions:
-            if s not in seen:
-                seen.add(s)
-                unique_suggestions.append(s)
+        # Served from the in-memory prefix index; no database queries per keystroke
+        suggestions = get_autocomplete_index().suggest(query, limit=10)
         
         return JsonResponse({
-            'suggestions': unique_suggestions[:10]
+            'suggestions': suggestions
         })
         
     except Exception as e:
@@ -416,17 +393,9 @@ def rebuild_search_index_api(request):
         if not request.user.is_authenticated or not request.user.is_staff:
             return JsonResponse({'error': 'Permission denied'}, status=403)
         
-        # Rebuild index for all apartments
-        apartments = Apartment.objects.all()
-        rebuilt_count = 0
-        
-        for apartment in apartments:
-            # Get or create search index
-            search_index, created = ApartmentSearchIndex.objects.get_or_create(
-                apartment=apartment
-            )
-            search_index.rebuild_index()
-            rebuilt_count += 1
+        # Rebuild index for all apartments (shadow table + atomic swap)
+        from .search_indexer import rebuild_search_index
+        rebuilt_count = rebuild_search_index().rows
         
         return JsonResponse({
             'success': True,
@@ -0,0 +1,294 @@
+"""
+Set-based builder for the apartment full-text search index.
+Business Context: Search runs off ApartmentSearchIndex, so a full reindex after a
+bulk import has to be fast and must never leave search empty while it runs.
+
+Index rows are produced by a single INSERT ... SELECT that assembles the same
+text as ApartmentSearchIndex.rebuild_index() and computes the weighted
+tsvector in the same pass. Full rebuilds write into an unlogged shadow table
+(optionally sharded by building ID across parallel workers) and then replace
+the live rows in one short transaction, so searches keep seeing the previous
+index until the new one is committed.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import logging
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock key so two full rebuilds never share the shadow table
+REBUILD_LOCK_ID = 7_340_021
+
+UTILITY_LABELS = [
+    ('water_included', 'Water'),
+    ('gas_included', 'Gas'),
+    ('electricity_included', 'Electricity'),
+    ('heat_included', 'Heat'),
+    ('hot_water_included', 'Hot Water'),
+    ('trash_included', 'Trash'),
+    ('sewer_included', 'Sewer'),
+    ('internet_included', 'Internet'),
+    ('cable_included', 'Cable'),
+]
+
+INDEX_COLUMNS = [
+    'apartment_id', 'building_name', 'building_address', 'neighborhood', 'full_text',
+    'amenities_text', 'latitude', 'longitude', 'last_updated', 'search_vector',
+]
+
+
+@dataclass
+class IndexRebuildStats:
+    rows: int = 0
+    shards: int = 1
+    build_seconds: float = 0.0
+    swap_seconds: float = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return self.build_seconds + self.swap_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else float(self.rows)
+
+
+def _choice_case(column: str, choices) -> Tuple[str, list]:
+    """SQL CASE mapping stored choice values to their display labels."""
+    whens = []
+    params = []
+    for value, label in choices:
+        whens.append('WHEN %s THEN %s')
+        params.extend([value, str(label)])
+    return f"(CASE {column} {' '.join(whens)} ELSE {column} END)", params
+
+
+def index_select_sql(where: str = 'TRUE', where_params: Iterable = ()) -> Tuple[str, list]:
+    """
+    SELECT producing one search index row per apartment matching ``where``
+    (written against the apartment alias ``a``), columns in INDEX_COLUMNS order.
+    Mirrors ApartmentSearchIndex.rebuild_index() so both paths index the same text.
+    """
+    from buildings.models import Building
+    from .models import Apartment
+    from .models_extended import ApartmentParking, ApartmentUtilities
+
+    neighborhood_sql, neighborhood_params = _choice_case('b.neighborhood', Building.NEIGHBORHOOD_CHOICES)
+    type_sql, type_params = _choice_case('a.apartment_type', Apartment.APARTMENT_TYPE_CHOICES)
+    parking_sql, parking_params = _choice_case('p.parking_type', ApartmentParking.PARKING_TYPES)
+    utilities_sql = ', '.join(
+        f"CASE WHEN u.{field} THEN '{label}' END" for field, label in UTILITY_LABELS
+    )
+
+    apartment_amenities = Apartment.amenities.field
+    building_amenities = Building.amenities.field
+    tables = {
+        'apartment': Apartment._meta.db_table,
+        'building': Building._meta.db_table,
+        'utilities': ApartmentUtilities._meta.db_table,
+        'parking': ApartmentParking._meta.db_table,
+        'apartment_amenities': apartment_amenities.m2m_db_table(),
+        'apartment_amenity': apartment_amenities.related_model._meta.db_table,
+        'building_amenities': building_amenities.m2m_db_table(),
+        'building_amenity': building_amenities.related_model._meta.db_table,
+    }
+
+    text_sql = f"""
+        SELECT
+            a.id AS apartment_id,
+            b.name AS building_name,
+            concat(b.street_address_1, ' ', b.city, ' ', b.state, ' ', b.zip_code) AS building_address,
+            CASE WHEN coalesce(b.neighborhood, '') = '' THEN '' ELSE {neighborhood_sql} END AS neighborhood,
+            a.unit_number, a.bedrooms, a.bathrooms, a.square_feet, a.description,
+            {type_sql} AS apartment_type,
+            nullif(concat_ws(', ', {utilities_sql}), '') AS utilities,
+            (
+                SELECT string_agg(
+                    concat_ws(' ', {parking_sql}, CASE WHEN p.has_ev_charging THEN 'EV charging' END),
+                    ' ' ORDER BY p.parking_type, p.monthly_rate, p.id
+                )
+                FROM {tables['parking']} p WHERE p.apartment_id = a.id
+            ) AS parking,
+            concat_ws(
+                ' ',
+                (
+                    SELECT string_agg(am.name, ' ' ORDER BY am.id)
+                    FROM {tables['apartment_amenities']} aa
+                    JOIN {tables['apartment_amenity']} am ON am.id = aa.{apartment_amenities.m2m_reverse_name()}
+                    WHERE aa.{apartment_amenities.m2m_column_name()} = a.id
+                ),
+                (
+                    SELECT string_agg(bm.name, ' ' ORDER BY bm.id)
+                    FROM {tables['building_amenities']} ba
+                    JOIN {tables['building_amenity']} bm ON bm.id = ba.{building_amenities.m2m_reverse_name()}
+                    WHERE ba.{building_amenities.m2m_column_name()} = a.building_id
+                )
+            ) AS amenities_text,
+            b.latitude, b.longitude
+        FROM {tables['apartment']} a
+        JOIN {tables['building']} b ON b.id = a.building_id
+        LEFT JOIN {tables['utilities']} u ON u.apartment_id = a.id
+        WHERE {where}
+    """
+
+    full_text_sql = """
+        concat_ws(
+            ' ',
+            'Unit ' || t.unit_number,
+            nullif(t.building_name, ''),
+            nullif(t.building_address, ''),
+            nullif(t.neighborhood, ''),
+            CASE WHEN t.bedrooms <> 0 THEN t.bedrooms::text || ' bedroom' END,
+            CASE WHEN t.bathrooms <> 0 THEN t.bathrooms::text || ' bathroom' END,
+            CASE WHEN t.square_feet <> 0 THEN t.square_feet::text || ' sqft' END,
+            nullif(t.description, ''),
+            nullif(t.apartment_type, ''),
+            'Includes ' || t.utilities,
+            nullif(t.parking, '')
+        )
+    """
+
+    sql = f"""
+        SELECT
+            s.apartment_id, s.building_name, s.building_address, s.neighborhood, s.full_text,
+            s.amenities_text, s.latitude, s.longitude, now(),
+            setweight(to_tsvector(coalesce(s.building_name, '')), 'A') ||
+            setweight(to_tsvector(coalesce(s.neighborhood, '')), 'B') ||
+            setweight(to_tsvector(coalesce(s.full_text, '')), 'C') ||
+            setweight(to_tsvector(coalesce(s.amenities_text, '')), 'D')
+        FROM (
+            SELECT
+                t.apartment_id, t.building_name, t.building_address, t.neighborhood,
+                {full_text_sql} AS full_text,
+                t.amenities_text, t.latitude, t.longitude
+            FROM ({text_sql}) t
+        ) s
+    """
+    params = neighborhood_params + type_params + parking_params + list(where_params)
+    return sql, params
+
+
+def _live_table() -> str:
+    from .search_models import ApartmentSearchIndex
+    return ApartmentSearchIndex._meta.db_table
+
+
+def _shadow_table() -> str:
+    return f"{_live_table()}_shadow"
+
+
+def refresh_index_rows(apartment_ids: List[int]) -> int:
+    """
+    Upsert index rows for specific apartments in one statement.
+    Used after imports and edits that only touch a handful of listings.
+    """
+    if not apartment_ids:
+        return 0
+
+    select_sql, params = index_select_sql('a.id = ANY(%s)', [list(apartment_ids)])
+    columns = ', '.join(INDEX_COLUMNS)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in INDEX_COLUMNS[1:])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {_live_table()} ({columns}) {select_sql} "
+            f"ON CONFLICT (apartment_id) DO UPDATE SET {updates}",
+            params,
+        )
+        return cursor.rowcount
+
+
+def _build_shard(shard: int, shards: int, building_id: Optional[int], in_worker: bool) -> int:
+    """Insert one shard of index rows (apartments whose building_id % shards == shard)."""
+    conditions = ['a.building_id %% %s = %s']
+    params = [shards, shard]
+    if building_id is not None:
+        conditions.append('a.building_id = %s')
+        params.append(building_id)
+
+    select_sql, select_params = index_select_sql(' AND '.join(conditions), params)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {_shadow_table()} ({', '.join(INDEX_COLUMNS)}) {select_sql}",
+                select_params,
+            )
+            return cursor.rowcount
+    finally:
+        if in_worker:
+            # Worker threads get their own connection; don't leak it
+            connection.close()
+
+
+def rebuild_search_index(building_id: Optional[int] = None, parallel: int = 1) -> IndexRebuildStats:
+    """
+    Rebuild the search index through a shadow table and swap it in atomically.
+
+    Args:
+        building_id: Only rebuild rows for apartments of this building
+        parallel: Number of workers building shards (split by building ID)
+
+    Raises:
+        RuntimeError: If another rebuild is already running
+    """
+    live = _live_table()
+    shadow = _shadow_table()
+    shards = max(1, parallel)
+    stats = IndexRebuildStats(shards=shards)
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [REBUILD_LOCK_ID])
+        if not cursor.fetchone()[0]:
+            raise RuntimeError('Another search index rebuild is already running')
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {shadow}')
+            # Unlogged and without indexes: the shadow is only read once, by the swap
+            cursor.execute(f'CREATE UNLOGGED TABLE {shadow} (LIKE {live} INCLUDING DEFAULTS)')
+
+        started = time.monotonic()
+        if shards == 1:
+            stats.rows = _build_shard(0, 1, building_id, in_worker=False)
+        else:
+            # Workers run on separate connections, so the shadow table must be committed
+            if connection.in_atomic_block:
+                raise RuntimeError('Parallel rebuilds cannot run inside a transaction')
+            with ThreadPoolExecutor(max_workers=shards) as executor:
+                counts = executor.map(
+                    lambda shard: _build_shard(shard, shards, building_id, in_worker=True),
+                    range(shards),
+                )
+                stats.rows = sum(counts)
+        stats.build_seconds = time.monotonic() - started
+
+        started = time.monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Block concurrent index writers but not searches, which keep reading
+            # the old rows until this transaction commits
+            cursor.execute(f'LOCK TABLE {live} IN SHARE ROW EXCLUSIVE MODE')
+            if building_id is None:
+                cursor.execute(f'DELETE FROM {live}')
+            else:
+                from .models import Apartment
+                cursor.execute(
+                    f'DELETE FROM {live} WHERE apartment_id IN '
+                    f'(SELECT id FROM {Apartment._meta.db_table} WHERE building_id = %s)',
+                    [building_id],
+                )
+            cursor.execute(f'INSERT INTO {live} SELECT * FROM {shadow}')
+        stats.swap_seconds = time.monotonic() - started
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {shadow}')
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [REBUILD_LOCK_ID])
+
+    logger.info(
+        f"Search index rebuilt: {stats.rows} rows in {stats.elapsed:.2f}s "
+        f"({stats.rows_per_second:.0f} rows/s, {stats.shards} shard(s))"
+    )
+    return stats
@@ -1,11 +1,17 @@
 import logging
 from datetime import datetime, date
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
 from django.conf import settings
-from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 from .models import Apartment, ApartmentImage
+from .preference_filters import PreferenceFilterService
 from buildings.models import Building, Amenity
+from applications.outbox import Outbox
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +23,8 @@ def get_filtered_apartments(request, user):
         filters (dict): Active filters for display
         auto_applied (bool): Whether preferences were auto-applied
     """
-    # Start with all apartments - optimized query with related data
-    apartments = Apartment.objects.all().select_related('building').prefetch_related('images', 'building__amenities', 'amenities', 'availability_calendar')
+    # Start with all apartments; related rows are prefetched per page by the caller
+    apartments = Apartment.objects.all().select_related('building')
     
     # Business Logic: Auto-populate filters from applicant preferences
     auto_applied_preferences = False
@@ -27,118 +33,24 @@ def get_filtered_apartments(request, user):
     if user.is_authenticated and not request.GET and hasattr(user, 'applicant_profile') and not is_ajax_request:
         try:
             applicant = user.applicant_profile
-            # Create a mutable copy of GET parameters
-            get_params = request.GET.copy()
-            
-            # Apply applicant's housing preferences as default filters
-            if applicant.max_rent_budget:
-                get_params['max_price'] = str(int(applicant.max_rent_budget))
-            
-            if applicant.min_bedrooms:
-                get_params['min_bedrooms'] = str(applicant.min_bedrooms)
-            if applicant.max_bedrooms:
-                get_params['max_bedrooms'] = str(applicant.max_bedrooms)
-                
-            if applicant.min_bathrooms:
-                get_params['min_bathrooms'] = str(applicant.min_bathrooms)
-            if applicant.max_bathrooms:
-                get_params['max_bathrooms'] = str(applicant.max_bathrooms)
-            
-            if applicant.desired_move_in_date:
-                today = date.today()
-                days_until_move = (applicant.desired_move_in_date - today).days
-                if days_until_move <= 0:
-                    get_params['move_in_date'] = 'available_now'
-                elif days_until_move <= 30:
-                    get_params['move_in_date'] = 'within_30'
-                elif days_until_move <= 60:
-                    get_params['move_in_date'] = 'within_60'
-            
-            # Apply neighborhood preferences (Hybrid: Legacy + Ranked)
-            neighborhood_values = set()
-            
-            # 1. Legacy Preference
-            if applicant.neighborhood_preferences.exists():
-                for neighborhood in applicant.neighborhood_preferences.all():
-                    # Map applicant neighborhood to building neighborhood choices
-                    for choice_value, choice_name in Building.NEIGHBORHOOD_CHOICES:
-                        if choice_name.lower() == neighborhood.name.lower() or choice_value.lower() == neighborhood.name.lower():
-                            neighborhood_values.add(choice_value)
-                            break
-            
-            # 2. Ranked Preference (New)
-            if hasattr(applicant, 'ranked_neighborhood_preferences') and applicant.ranked_neighborhood_preferences.exists():
-                for neighborhood in applicant.ranked_neighborhood_preferences.all():
-                    for choice_value, choice_name in Building.NEIGHBORHOOD_CHOICES:
-                        if choice_name.lower() == neighborhood.name.lower() or choice_value.lower() == neighborhood.name.lower():
-                            neighborhood_values.add(choice_value)
-                            break
-
-            if neighborhood_values:
-                get_params.setlist('neighborhoods', list(neighborhood_values))
-            
-            # Apply amenity preferences (Hybrid: Legacy + Ranked)
-            amenity_ids = set()
-            
-            # 1. Legacy Preference
-            if applicant.amenities.exists():
-                for amenity in applicant.amenities.all():
-                    try:
-                        from buildings.models import Amenity as BuildingAmenity
-                        building_amenity = BuildingAmenity.objects.filter(name__iexact=amenity.name).first()
-                        if building_amenity:
-                            amenity_ids.add(str(building_amenity.id))
-                    except (ImportError, AttributeError):
-                        continue
-
-            # 2. Ranked Preference (New) - Flattening logic: Any rank > 0 is "interested"
-            # Building Amenities
-            # Note: We query the preference model directly or through related manager if available
-            # Assuming 'building_amenity_preferences' related name or similar based on standard conventions
-            # If not explicitly defined, we use the _set manager
-            
-            try:
-                # Building Amenity Preferences
-                if hasattr(applicant, 'building_amenity_preferences'):
-                    for pref in applicant.building_amenity_preferences.all():
-                         # Map to BuildingAmenity ID
-                         # The pref.amenity is likely a Building Amenity model instance already or similar
-                         # We need to match it to the Building Amenity used in filtering
-                         from buildings.models import Amenity as BuildingAmenity
-                         building_amenity = BuildingAmenity.objects.filter(name__iexact=pref.amenity.name).first()
-                         if building_amenity:
-                             amenity_ids.add(str(building_amenity.id))
-
-                # Apartment Amenity Preferences
-                if hasattr(applicant, 'apartment_amenity_preferences'):
-                    for pref in applicant.apartment_amenity_preferences.all():
-                        from buildings.models import Amenity as BuildingAmenity
-                        # Note: Apartment Amenities might not map 1:1 to Building Amenities in filter
-                        # but we try to match by name as best effort
-                        building_amenity = BuildingAmenity.objects.filter(name__iexact=pref.amenity.name).first()
-                        if building_amenity:
-                            amenity_ids.add(str(building_amenity.id))
-            except Exception as e:
-                logger.warning(f"Error flattening ranked amenity preferences: {e}")
-
-            if amenity_ids:
-                get_params.setlist('amenities', list(amenity_ids))            
-            # Update request.GET with the preferences
+            # Stored, pre-resolved preference filters (see apartments.preference_filters)
+            get_params = PreferenceFilterService.default_query(applicant)
             if get_params:
                 request.GET = get_params
                 auto_applied_preferences = True
-                
         except Exception as e:
             logger.error(f"Error applying applicant preferences: {e}")
 
-    # Sorting
+    # Sorting (always total, so pages never overlap)
     sort_by = request.GET.get('sort')
     if sort_by == 'price_asc':
-        apartments = apartments.order_by('rent_price')
+        apartments = apartments.order_by('rent_price', 'id')
     elif sort_by == 'price_desc':
-        apartments = apartments.order_by('-rent_price')
+        apartments = apartments.order_by('-rent_price', '-id')
     elif sort_by == 'newest':
-        apartments = apartments.order_by('-created_at') if hasattr(Apartment, 'created_at') else apartments.order_by('-id')
+        apartments = apartments.order_by('-created_at', '-id') if hasattr(Apartment, 'created_at') else apartments.order_by('-id')
+    else:
+        apartments = apartments.order_by('-id')
 
     active_filters = []
     
@@ -253,8 +165,10 @@ def get_filtered_apartments(request, user):
 
 def serialize_apartments_for_map(apartments):
     """
-    Serializes apartment queryset into JSON format for map/AJAX.
+    Serializes a page of apartments into JSON format for map/AJAX.
     """
+    apartments = list(apartments)
+    prefetch_related_objects(apartments, 'images', 'building__images', 'concessions')
     apartments_data = []
     for apartment in apartments:
         try:
@@ -262,9 +176,10 @@ def serialize_apartments_for_map(apartments):
             title = f"Unit {apartment.unit_number}" if apartment.unit_number else f"{apartment.bedrooms or 0} BR / {apartment.bathrooms or 0} BA"
             
             # Collect all images (apartment first, then building)
-            apartment_images = [img.thumbnail_url for img in apartment.images.all()] if apartment.images.exists() else []
-            building_images = [img.thumbnail_url for img in apartment.building.images.all()] if apartment.building and apartment.building.images.exists() else []
+            apartment_images = [img.thumbnail_url for img in apartment.images.all()]
+            building_images = [img.thumbnail_url for img in apartment.building.images.all()] if apartment.building else []
             all_images = apartment_images + building_images
+            created = getattr(apartment, 'created_at', None) or apartment.last_modified
             
             apartment_data = {
                 'id': apartment.id,
@@ -277,13 +192,13 @@ def serialize_apartments_for_map(apartments):
                 'building_address': f"{apartment.building.street_address_1}, {apartment.building.city}, {apartment.building.state}" if apartment.building else '',
                 'neighborhood': apartment.building.get_neighborhood_display() if apartment.building and apartment.building.neighborhood else '',
                 'status': apartment.get_status_display(),
-                'thumbnail_url': apartment.images.first().thumbnail_url if apartment.images.exists() else '',
+                'thumbnail_url': apartment_images[0] if apartment_images else '',
                 'all_images': all_images,
                 'detail_url': f'/apartments/{apartment.id}/overview/',
                 'latitude': float(apartment.building.latitude) if apartment.building and apartment.building.latitude else 40.7128,
                 'longitude': float(apartment.building.longitude) if apartment.building and apartment.building.longitude else -74.0060,
-                'is_new': bool((getattr(apartment, 'created_at', None) or getattr(apartment, 'last_modified', None)) and timezone.now() and (timezone.now() - (apartment.created_at if getattr(apartment, 'created_at', None) else apartment.last_modified)).days <= 7),
-                'has_special': bool(getattr(apartment, 'rent_specials', None) or getattr(apartment, 'free_stuff', None) or (hasattr(apartment, 'concessions') and apartment.concessions.exists())),
+                'is_new': bool(created and (timezone.now() - created).days <= 7),
+                'has_special': bool(getattr(apartment, 'rent_specials', None) or getattr(apartment, 'free_stuff', None) or apartment.concessions.all()),
                 'pet_policy': apartment.building.get_pet_policy_display() if apartment.building and apartment.building.pet_policy else '',
             }
             apartments_data.append(apartment_data)
@@ -294,6 +209,57 @@ def serialize_apartments_for_map(apartments):
     return apartments_data
 
 
+def apartment_card_cache_key(apartment_id, last_modified, day=None):
+    """
+    Fragment cache key for one listing card. The card's availability badge
+    compares against today's date, so cards also expire at midnight.
+    """
+    day = day or timezone.localdate()
+    stamp = last_modified.isoformat() if last_modified else ''
+    return make_template_fragment_key('apartment_card', [apartment_id, stamp, day.isoformat()])
+
+
+def render_apartment_cards(apartments):
+    """
+    Rendered listing cards for a page of apartments, in order.
+    Business Logic: Cards change far less often than they are viewed; only
+    cache misses are prefetched and rendered.
+    """
+    day = timezone.localdate()
+    keys = {
+        apartment.pk: apartment_card_cache_key(apartment.pk, apartment.last_modified, day)
+        for apartment in apartments
+    }
+    cards = cache.get_many(list(keys.values()))
+
+    misses = [apartment for apartment in apartments if keys[apartment.pk] not in cards]
+    if misses:
+        prefetch_related_objects(misses, 'images', 'building__images', 'amenities', 'availability_calendar')
+        rendered = {
+            keys[apartment.pk]: render_to_string('apartments/includes/apartment_card.html', {'apartment': apartment})
+            for apartment in misses
+        }
+        cache.set_many(rendered, settings.APARTMENT_CARD_CACHE_TIMEOUT)
+        cards.update(rendered)
+
+    return [mark_safe(cards[keys[apartment.pk]]) for apartment in apartments]
+
+
+def invalidate_apartment_cards(apartments):
+    """
+    Drop today's cached cards for an Apartment queryset whose related rows
+    (images, amenities, availability, building) changed. Saving the
+    apartment itself needs no call: last_modified is part of the key.
+    """
+    day = timezone.localdate()
+    keys = [
+        apartment_card_cache_key(pk, last_modified, day)
+        for pk, last_modified in apartments.values_list('pk', 'last_modified')
+    ]
+    if keys:
+        cache.delete_many(keys)
+
+
 def handle_broker_contact(apartment, form_data, user=None):
     """
     Handles the logic for emailing the broker and confirming with the user.
@@ -369,7 +335,6 @@ Please contact the potential tenant to schedule the tour.
         if inquiry:
             inquiry.preferred_times = preferred_times
             inquiry.message = "Tour Request"
-            inquiry.save()
             
     else:  # ask_question
         question = form_data.get('question')
@@ -394,7 +359,6 @@ Please respond to the potential tenant's inquiry.
     
         if inquiry:
             inquiry.message = question
-            inquiry.save()
 
     # Get broker emails
     broker_emails = []
@@ -404,17 +368,21 @@ Please respond to the potential tenant's inquiry.
         elif broker.email:
             broker_emails.append(broker.email)
     
-    # Send email to broker(s)
-    if broker_emails:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=broker_emails,
-            fail_silently=False,
+    # Save the inquiry and queue both emails together; workers deliver them after commit
+    with transaction.atomic():
+        if inquiry:
+            inquiry.save()
+
+        if not broker_emails:
+            return False
+
+        key_prefix = f"broker-contact:{inquiry.pk}" if inquiry else None
+        Outbox.enqueue_email(
+            'broker_contact', broker_emails, subject, message,
+            idempotency_key=f"{key_prefix}:broker" if key_prefix else None,
         )
-        
-        # Send confirmation email to user
+
+        # Confirmation email to user
         confirmation_subject = f"Your inquiry about {apartment.building.name} Unit {apartment.unit_number}"
         confirmation_message = f"""
 Hi {name},
@@ -428,14 +396,10 @@ If you have any other questions, please don't hesitate to reach out.
 Best regards,
 {settings.SITE_NAME} Team
         """
-        
-        send_mail(
-            subject=confirmation_subject,
-            message=confirmation_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=True,
-        )
-        return True
-    
-    return False
+
+        if email:
+            Outbox.enqueue_email(
+                'broker_contact_confirmation', email, confirmation_subject, confirmation_message,
+                idempotency_key=f"{key_prefix}:confirmation" if key_prefix else None,
+            )
+    return True
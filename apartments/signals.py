@@ -0,0 +1,56 @@
+"""
+Listing Card Cache Signals
+==========================
+
+Cached listing cards are keyed by apartment id and last_modified, so saving
+an apartment retires its card by itself. Changes to the related rows a card
+shows (images, amenities, availability, the building) do not touch
+last_modified and drop the affected cards here.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from buildings.models import Building, BuildingImage
+from .models import Apartment, ApartmentImage
+from .models_extended import ApartmentAvailability
+from .services import invalidate_apartment_cards
+
+
+def _invalidate_on_commit(apartments):
+    # After commit, so a concurrent render cannot re-cache the old rows
+    transaction.on_commit(lambda: invalidate_apartment_cards(apartments))
+
+
+@receiver(post_save, sender=ApartmentImage)
+@receiver(post_delete, sender=ApartmentImage)
+@receiver(post_save, sender=ApartmentAvailability)
+@receiver(post_delete, sender=ApartmentAvailability)
+def apartment_related_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(Apartment.objects.filter(pk=instance.apartment_id))
+
+
+@receiver(post_save, sender=BuildingImage)
+@receiver(post_delete, sender=BuildingImage)
+def building_image_changed(sender, instance, **kwargs):
+    _invalidate_on_commit(Apartment.objects.filter(building_id=instance.building_id))
+
+
+@receiver(post_save, sender=Building)
+def building_changed(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_on_commit(Apartment.objects.filter(building_id=instance.pk))
+
+
+@receiver(m2m_changed, sender=Apartment.amenities.through)
+def apartment_amenities_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _invalidate_on_commit(Apartment.objects.filter(pk=instance.pk))
+    elif action in ('post_add', 'post_remove'):
+        _invalidate_on_commit(Apartment.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        # Changed from the amenity side: collect the apartments before the rows go
+        apartment_ids = list(Apartment.objects.filter(amenities=instance).values_list('pk', flat=True))
+        _invalidate_on_commit(Apartment.objects.filter(pk__in=apartment_ids))
@@ -0,0 +1,26 @@
+"""
+Celery Tasks for Apartments App
+===============================
+
+Periodic background jobs that keep apartment search data fresh.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='apartments.refresh_autocomplete_index',
+    ignore_result=True
+)
+def refresh_autocomplete_index_task():
+    """
+    Rebuild the search suggestion index from the database and publish the
+    snapshot so every web worker picks it up on its next check.
+    """
+    from .autocomplete import refresh_autocomplete_index
+
+    index = refresh_autocomplete_index()
+    return len(index)
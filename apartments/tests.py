@@ -4,15 +4,28 @@ Business Context: Testing core rental unit functionality that drives revenue.
 Ensures apartment listings, pricing, and broker contact features work correctly.
 """
 
-from django.test import TestCase, Client
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
 from decimal import Decimal
+from io import StringIO
 from .models import Apartment, ApartmentImage, ApartmentAmenity, ApartmentConcession
+from .models_extended import ApartmentParking, ApartmentUtilities
 from buildings.models import Building, Amenity
 from .forms import ApartmentForm, ApartmentBasicForm, ApartmentAmenitiesForm, ApartmentDetailsForm
+from .search_indexer import rebuild_search_index
+from .search_models import ApartmentSearchIndex
+from .preference_filters import AMENITY_LOOKUP_CACHE_KEY, PreferenceFilterService
+from . import services
+from applications.outbox import OutboxWorker
 import json
+import os
+import tempfile
 
 User = get_user_model()
 
@@ -251,7 +264,9 @@ class ApartmentViewTest(TestCase):
         )
         self.assertEqual(response.status_code, 302)  # Redirect after success
         
-        # Check that email was sent
+        # Emails are queued with the inquiry and delivered by the outbox worker
+        self.assertEqual(len(mail.outbox), 0)
+        OutboxWorker.drain('email')
         self.assertEqual(len(mail.outbox), 2)  # Broker notification + User confirmation
         self.assertIn(self.building.name, mail.outbox[0].subject)
         self.assertIn('John Tenant', mail.outbox[0].body)
@@ -273,7 +288,9 @@ class ApartmentViewTest(TestCase):
         )
         self.assertEqual(response.status_code, 302)
         
-        # Check that email was sent
+        # Emails are queued with the inquiry and delivered by the outbox worker
+        self.assertEqual(len(mail.outbox), 0)
+        OutboxWorker.drain('email')
         self.assertEqual(len(mail.outbox), 2)
         self.assertIn("Question about", mail.outbox[0].subject)
         self.assertIn('Are pets allowed', mail.outbox[0].body)
@@ -634,4 +651,497 @@ class ApartmentSearchTest(TestCase):
         
         # Should only return Brooklyn apartment (1BR, $2800, has gym)
         self.assertEqual(apartments.count(), 1)
-        self.assertEqual(apartments.first().building, self.building_bk)
\ No newline at end of file
+        self.assertEqual(apartments.first().building, self.building_bk)
+
+class AutocompleteIndexTest(TestCase):
+    """
+    Test the in-memory search suggestion index.
+    Business Logic: Autocomplete runs on every keystroke and must not hit the database.
+    """
+    
+    def setUp(self):
+        from .autocomplete import reset_local_autocomplete_index
+        from .search_models import PopularSearchTerm
+        from django.core.cache import cache
+        
+        cache.clear()
+        reset_local_autocomplete_index()
+        
+        Building.objects.create(
+            name="Parkview Tower",
+            street_address_1="1 Park Ave",
+            city="New York",
+            state="NY",
+            zip_code="10016",
+        )
+        PopularSearchTerm.objects.create(term="parking", search_count=50)
+        PopularSearchTerm.objects.create(term="park", search_count=5)
+        
+    def test_prefix_matches_ranked_by_weight(self):
+        """Popular terms outrank building names and neighborhoods"""
+        from .autocomplete import AutocompleteIndex
+        
+        index = AutocompleteIndex([
+            ("Park Slope", 0, 2),
+            ("parking", 50, 0),
+            ("Parkview Tower", 0, 1),
+            ("park", 5, 0),
+        ])
+        self.assertEqual(
+            index.suggest("par"),
+            ["parking", "park", "Parkview Tower", "Park Slope"]
+        )
+        
+    def test_matches_inner_words(self):
+        """Typing a later word of a name still suggests it"""
+        from .autocomplete import AutocompleteIndex
+        
+        index = AutocompleteIndex([("Park Slope", 0, 2), ("Sunset Park", 0, 2)])
+        self.assertEqual(index.suggest("slo"), ["Park Slope"])
+        self.assertEqual(index.suggest("PARK", limit=1), ["Park Slope"])
+        
+    def test_duplicates_collapse_case_insensitively(self):
+        """The same suggestion from two sources is only returned once"""
+        from .autocomplete import AutocompleteIndex
+        
+        index = AutocompleteIndex([("astoria", 12, 0), ("Astoria", 0, 2)])
+        self.assertEqual(index.suggest("ast"), ["astoria"])
+        
+    def test_snapshot_round_trip(self):
+        """Snapshots rebuild an identical index in another worker"""
+        from .autocomplete import build_autocomplete_index, AutocompleteIndex
+        
+        index = build_autocomplete_index()
+        restored = AutocompleteIndex.from_snapshot(index.to_snapshot())
+        self.assertEqual(restored.suggest("park"), index.suggest("park"))
+        
+    def test_suggestions_api_uses_index_without_queries(self):
+        """Warm lookups are answered from memory"""
+        url = reverse('search_suggestions')
+        self.client.get(url, {'q': 'park'})  # Warm the index
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'park'})
+        
+        suggestions = response.json()['suggestions']
+        self.assertEqual(suggestions[:2], ["parking", "park"])
+        self.assertIn("Parkview Tower", suggestions)
+        self.assertIn("Park Slope", suggestions)
+
+
+class ListingFeedImportTest(TestCase):
+    """
+    Test the listings feed importer.
+    Business Logic: Feed syncs must be idempotent and only touch changed listings.
+    """
+    
+    HEADER = [
+        'ApartmentAmenities', 'ApartmentConcessions', 'ApartmentFreeStuff', 'ApartmentId',
+        'ApartmentLocks', 'ApartmentPictures', 'ApartmentRequiredDocuments', 'ApartmentThreeDPhotos',
+        'ApartmentType', 'ApartmentVideos', 'AvailableFrom', 'BathroomQuantity', 'BedroomQuantity',
+        'BrokerFeeRequired', 'City', 'Country', 'DepositPrice', 'Description', 'Floor',
+        'HoldingDepositAllowedPaymentMethods', 'HoldingDepositAmount', 'HoldingDepositDeliverCheckNote',
+        'HoldingDepositZelleAddress', 'IncludedInRentApartmentAmenities', 'InternalNotes', 'Latitude',
+        'LeaseDurations', 'LeasePrice', 'Longitude', 'ModifyDate', 'Neighborhood', 'NetPrice', 'OwnerId',
+        'PaidMonths', 'PriceDateFrom', 'PriceDateTo', 'SelfTourStatus', 'SquareFeet', 'StaffId', 'State',
+        'Status', 'Street', 'Unit', 'ZipCode',
+    ]
+    
+    def _row(self, **overrides):
+        row = {name: 'null' for name in self.HEADER}
+        row.update({
+            'ApartmentAmenities': '"Dishwasher,Hardwood Floors"',
+            'ApartmentConcessions': '"[{"MonthsFree":1.0,"LeaseTerms":"13 months","SpecialOfferId":77,"Name":"Rental"}]"',
+            'ApartmentFreeStuff': '"[]"',
+            'ApartmentId': '501',
+            'ApartmentLocks': '"[{"ConnectionType":"PinCode"}]"',
+            'ApartmentType': 'multi-family',
+            'BathroomQuantity': '1',
+            'BedroomQuantity': '2',
+            'BrokerFeeRequired': 'False',
+            'City': 'Brooklyn',
+            'DepositPrice': '3000',
+            'Description': '"Sunny corner unit.\nSteps from the park."',
+            'Latitude': '40.6758880',
+            'LeaseDurations': '12 months',
+            'LeasePrice': '3000',
+            'Longitude': '-73.9529050',
+            'Neighborhood': 'Crown Heights',
+            'NetPrice': '2769.23',
+            'PaidMonths': '1',
+            'State': 'NY',
+            'Status': 'Vacant',
+            'Street': '24 Rogers Avenue',
+            'Unit': '1A',
+            'ZipCode': '11216',
+        })
+        row.update(overrides)
+        return '\t'.join(row[name] for name in self.HEADER)
+    
+    def _write_feed(self, *rows):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, encoding='utf-8')
+        handle.write('\t'.join(self.HEADER) + '\n' + '\n'.join(rows) + '\n')
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+    
+    def _run(self, path, *args):
+        out = StringIO()
+        call_command('import_listings', path, *args, stdout=out)
+        return out.getvalue()
+    
+    def test_import_creates_listing_with_related_rows(self):
+        """A feed row becomes a building, apartment, amenities and concessions"""
+        self._run(self._write_feed(self._row()))
+        
+        apartment = Apartment.objects.get(external_id=501)
+        self.assertEqual(apartment.building.street_address_1, '24 Rogers Avenue')
+        self.assertEqual(apartment.building.neighborhood, 'Crown Heights')
+        self.assertEqual(apartment.rent_price, Decimal('3000.00'))
+        self.assertEqual(apartment.status, 'available')
+        self.assertEqual(apartment.lock_type, 'PinCode')
+        self.assertIn('Steps from the park.', apartment.description)
+        self.assertEqual(
+            sorted(apartment.amenities.values_list('name', flat=True)),
+            ['Dishwasher', 'Hardwood Floors']
+        )
+        concession = apartment.concessions.get()
+        self.assertEqual(concession.special_offer_id, 77)
+        self.assertEqual(concession.months_free, Decimal('1.0'))
+        self.assertTrue(ApartmentSearchIndex.objects.filter(apartment=apartment).exists())
+        
+    def test_reimport_is_idempotent_and_updates_changes(self):
+        """Unchanged rows are skipped; changed rows are upserted in place"""
+        self._run(self._write_feed(self._row()))
+        output = self._run(self._write_feed(self._row()))
+        self.assertIn('0 new, 0 changed, 1 unchanged', output)
+        
+        output = self._run(self._write_feed(self._row(LeasePrice='3200', ApartmentAmenities='"Dishwasher"')))
+        self.assertIn('1 changed', output)
+        
+        apartment = Apartment.objects.get(external_id=501)
+        self.assertEqual(Apartment.objects.count(), 1)
+        self.assertEqual(apartment.rent_price, Decimal('3200.00'))
+        self.assertEqual(list(apartment.amenities.values_list('name', flat=True)), ['Dishwasher'])
+        self.assertEqual(apartment.concessions.count(), 1)
+        
+    def test_dropped_offer_is_removed_per_apartment(self):
+        """An offer one unit dropped is deleted even if another unit in the batch keeps it"""
+        from .feed_import import ListingFeedImporter, iter_feed_records, parse_listing
+
+        second = dict(ApartmentId='502', Unit='2B')
+        self._run(self._write_feed(self._row(), self._row(**second)))
+        self.assertEqual(ApartmentConcession.objects.filter(special_offer_id=77).count(), 2)
+
+        path = self._write_feed(self._row(ApartmentConcessions='"[]"'), self._row(**second, LeasePrice='3100'))
+        listings = [parse_listing(number, row) for number, row in iter_feed_records(path)]
+        self.assertEqual(len(ListingFeedImporter().import_listings(listings)), 2)
+
+        self.assertFalse(ApartmentConcession.objects.filter(apartment__external_id=501).exists())
+        self.assertTrue(ApartmentConcession.objects.filter(apartment__external_id=502, special_offer_id=77).exists())
+
+        # batch_size splits the listings into separate transactions
+        listings = [parse_listing(number, row) for number, row in iter_feed_records(
+            self._write_feed(self._row(LeasePrice='2900'), self._row(**second, LeasePrice='3000'))
+        )]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(ListingFeedImporter(batch_size=1).import_listings(listings)), 2)
+        self.assertEqual(sum('SAVEPOINT' in q['sql'] and 'RELEASE' not in q['sql'] and 'ROLLBACK' not in q['sql']
+                             for q in queries.captured_queries), 2)
+
+    def test_import_refreshes_public_broker_pages(self):
+        """Bulk upserts send no signals, so the importer invalidates broker pages itself"""
+        from users.public_profiles import PublicBrokerProfileService
+
+        self._run(self._write_feed(self._row()))
+        broker = get_user_model().objects.create_user(email='lister@example.com', password='x', is_broker=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.get(external_id=501).building.brokers.add(broker)
+        self.assertEqual(PublicBrokerProfileService.get_summary(broker.id)['listings'][0]['rent_price'],
+                         Decimal('3000.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._run(self._write_feed(self._row(LeasePrice='3200')))
+        self.assertEqual(PublicBrokerProfileService.get_summary(broker.id)['listings'][0]['rent_price'],
+                         Decimal('3200.00'))
+
+    def test_dry_run_writes_nothing(self):
+        """Dry runs report the diff without touching the database"""
+        output = self._run(self._write_feed(self._row()), '--dry-run')
+        self.assertIn('+ 24 Rogers Avenue #1A', output)
+        self.assertFalse(Apartment.objects.exists())
+        self.assertFalse(Building.objects.exists())
+
+
+class SearchIndexRebuildTest(TestCase):
+    """
+    Test the set-based search index rebuild.
+    Business Logic: Reindexing must produce the same rows as the per-apartment
+    path, and a scoped rebuild must leave the rest of the index untouched.
+    """
+    
+    def setUp(self):
+        self.building = Building.objects.create(
+            name="Court Street Lofts",
+            street_address_1="200 Court St",
+            city="Brooklyn",
+            state="NY",
+            zip_code="11201",
+            neighborhood="brooklyn_heights",
+        )
+        self.building.amenities.add(Amenity.objects.create(name="Roof Deck"))
+        self.other_building = Building.objects.create(
+            name="Park Towers",
+            street_address_1="1000 Park Ave",
+            city="New York",
+            state="NY",
+            zip_code="10021",
+        )
+        
+        self.apartment = Apartment.objects.create(
+            building=self.building,
+            unit_number="4B",
+            bedrooms=Decimal('2.0'),
+            bathrooms=Decimal('1.5'),
+            square_feet=900,
+            rent_price=Decimal('3500.00'),
+            description="Sunny corner unit",
+            apartment_type='duplex',
+        )
+        self.apartment.amenities.add(ApartmentAmenity.objects.create(name="Dishwasher"))
+        ApartmentUtilities.objects.create(apartment=self.apartment, heat_included=True, water_included=True)
+        ApartmentParking.objects.create(apartment=self.apartment, parking_type='garage', has_ev_charging=True)
+        
+        self.studio = Apartment.objects.create(
+            building=self.other_building,
+            unit_number="1",
+            bedrooms=Decimal('0.0'),
+            rent_price=Decimal('2200.00'),
+        )
+    
+    def _rows(self):
+        return {
+            row.apartment_id: (
+                row.building_name, row.building_address, row.neighborhood,
+                row.full_text, row.amenities_text, str(row.search_vector),
+            )
+            for row in ApartmentSearchIndex.objects.all()
+        }
+    
+    def test_set_based_rows_match_per_apartment_rebuild(self):
+        stats = rebuild_search_index()
+        self.assertEqual(stats.rows, 2)
+        set_based = self._rows()
+        
+        for row in ApartmentSearchIndex.objects.all():
+            row.rebuild_index()
+        self.assertEqual(self._rows(), set_based)
+        self.assertIn("Includes Water, Heat", set_based[self.apartment.id][3])
+        self.assertIn("Garage EV charging", set_based[self.apartment.id][3])
+    
+    def test_building_scoped_rebuild_keeps_other_rows(self):
+        rebuild_search_index()
+        Apartment.objects.filter(pk=self.studio.pk).update(description="Renovated")
+        Apartment.objects.filter(pk=self.apartment.pk).update(description="Renovated")
+        
+        stats = rebuild_search_index(building_id=self.building.id)
+        self.assertEqual(stats.rows, 1)
+        self.assertEqual(ApartmentSearchIndex.objects.count(), 2)
+        self.assertIn("Renovated", ApartmentSearchIndex.objects.get(pk=self.apartment.pk).full_text)
+        self.assertNotIn("Renovated", ApartmentSearchIndex.objects.get(pk=self.studio.pk).full_text)
+    
+    def test_command_reports_throughput(self):
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 apartments', out.getvalue())
+        self.assertIn('apartments/s', out.getvalue())
+        self.assertEqual(ApartmentSearchIndex.objects.count(), 2)
+
+
+class ParallelSearchIndexRebuildTest(TransactionTestCase):
+    """
+    Test sharded rebuilds, which run on separate database connections.
+    Business Logic: Every apartment is indexed exactly once whatever the worker count.
+    """
+    
+    def test_parallel_rebuild_indexes_every_apartment_once(self):
+        for i in range(4):
+            building = Building.objects.create(
+                name=f"Building {i}",
+                street_address_1=f"{i} Main St",
+                city="Brooklyn",
+                state="NY",
+                zip_code="11201",
+            )
+            for unit in ('1A', '2A'):
+                Apartment.objects.create(building=building, unit_number=unit, rent_price=Decimal('2000.00'))
+        
+        stats = rebuild_search_index(parallel=3)
+        self.assertEqual(stats.shards, 3)
+        self.assertEqual(stats.rows, 8)
+        self.assertEqual(ApartmentSearchIndex.objects.count(), 8)
+
+
+class PreferenceFilterTest(TestCase):
+    """
+    Test stored default listing filters.
+    Business Logic: applicants land on listings pre-filtered by their
+    preferences, without resolving those preferences on every page load.
+    """
+
+    def setUp(self):
+        from applicants.models import Applicant, Amenity as ApplicantAmenity, Neighborhood
+
+        cache.delete(AMENITY_LOOKUP_CACHE_KEY)
+        self.gym = Amenity.objects.create(name="Gym")
+        self.doorman = Amenity.objects.create(name="Doorman")
+        self.user = User.objects.create_user(email="renter@test.com", password=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applicant = Applicant.objects.create(
+                user=self.user, first_name="Rae", last_name="Renter",
+                max_rent_budget=Decimal("3200.50"), min_bedrooms="1",
+            )
+            self.applicant.neighborhood_preferences.add(Neighborhood.objects.create(name="astoria"))
+            self.applicant.amenities.add(ApplicantAmenity.objects.create(name="gym"))
+            self.applicant.building_amenity_preferences.create(amenity=self.doorman, priority_level=4)
+        self.applicant.refresh_from_db()
+
+    def test_preferences_are_resolved_once_and_stored(self):
+        self.assertEqual(self.applicant.listing_filter_defaults, {
+            'max_price': ['3200'],
+            'min_bedrooms': ['1'],
+            'neighborhoods': ['Astoria'],
+            'amenities': sorted([str(self.gym.pk), str(self.doorman.pk)]),
+        })
+
+        with self.assertNumQueries(0):
+            query = PreferenceFilterService.default_query(self.applicant)
+        self.assertEqual(query.getlist('amenities'), self.applicant.listing_filter_defaults['amenities'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applicant.building_amenity_preferences.all().delete()
+        self.applicant.refresh_from_db()
+        self.assertEqual(self.applicant.listing_filter_defaults['amenities'], [str(self.gym.pk)])
+
+    def test_rolled_back_savepoint_does_not_drop_the_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applicant.max_rent_budget = Decimal("2500")
+            self.applicant.save()
+            try:
+                with transaction.atomic():
+                    self.applicant.save()
+                    raise ValueError("Nested step failed")
+            except ValueError:
+                pass
+        self.applicant.refresh_from_db()
+        self.assertEqual(self.applicant.listing_filter_defaults['max_price'], ['2500'])
+
+    def test_amenity_changes_invalidate_lookup_and_stored_filters(self):
+        PreferenceFilterService.amenity_ids_by_name()
+        self.assertIsNotNone(cache.get(AMENITY_LOOKUP_CACHE_KEY))
+
+        Amenity.objects.create(name="Roof Deck")
+        self.assertIsNone(cache.get(AMENITY_LOOKUP_CACHE_KEY))
+        self.applicant.refresh_from_db()
+        self.assertIsNone(self.applicant.listing_filter_defaults)
+
+        # Re-resolved (and stored) on the next listings load
+        query = PreferenceFilterService.default_query(self.applicant)
+        self.assertEqual(query['max_price'], '3200')
+        self.applicant.refresh_from_db()
+        self.assertIsNotNone(self.applicant.listing_filter_defaults)
+
+    def test_first_listings_load_costs_the_same_as_a_filtered_load(self):
+        factory = RequestFactory()
+        self.user.applicant_profile  # Loaded by the auth middleware's request.user in practice
+
+        request = factory.get(reverse('apartments_list'))
+        request.user = self.user
+        with CaptureQueriesContext(connection) as default_load:
+            _, defaults, auto_applied = services.get_filtered_apartments(request, self.user)
+        self.assertTrue(auto_applied)
+
+        filtered = factory.get(reverse('apartments_list'), request.GET)
+        filtered.user = self.user
+        with CaptureQueriesContext(connection) as filtered_load:
+            _, explicit, _ = services.get_filtered_apartments(filtered, self.user)
+        self.assertEqual(defaults, explicit)
+        self.assertEqual(len(default_load), len(filtered_load))
+
+
+class ApartmentListPaginationTest(TestCase):
+    """
+    Test the paginated, card-cached listings page.
+    Business Logic: the main listing page is the highest-traffic view and
+    must stay fast as inventory grows.
+    """
+
+    def setUp(self):
+        from .views import APARTMENTS_PER_PAGE
+
+        cache.clear()
+        self.per_page = APARTMENTS_PER_PAGE
+        self.building = Building.objects.create(
+            name="Paged Towers", street_address_1="1 Page St", city="New York",
+            state="NY", zip_code="10001", neighborhood="chelsea",
+        )
+        self.apartments = [
+            Apartment.objects.create(
+                building=self.building, unit_number=f"{i}A", bedrooms=1, bathrooms=1,
+                rent_price=Decimal("3000.00") + i, status="available",
+            )
+            for i in range(self.per_page + 2)
+        ]
+
+    def test_results_are_paginated_with_a_single_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('apartments_list'), {'sort': 'price_asc'})
+        counts = [q['sql'] for q in queries if 'COUNT(' in q['sql'].upper()]
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(response.context['total_results'], self.per_page + 2)
+        self.assertEqual(len(response.context['apartment_cards']), self.per_page)
+        self.assertEqual(list(response.context['apartments']), self.apartments[:self.per_page])
+
+        response = self.client.get(
+            reverse('apartments_list'), {'sort': 'price_asc', 'page': 2},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        data = json.loads(response.content)
+        self.assertEqual(data['total_results'], self.per_page + 2)
+        self.assertEqual([apt['id'] for apt in data['apartments']], [apt.pk for apt in self.apartments[-2:]])
+        self.assertIn('Page 2 of 2', data['html'])
+
+    def test_cached_cards_skip_related_queries_until_changed(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse('apartments_list'))
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse('apartments_list'))
+        self.assertLess(len(second), len(first))
+        self.assertContains(response, "$3025")
+
+        # Saving the apartment changes its key; related changes drop the cached card
+        apartment = self.apartments[-1]
+        apartment.rent_price = Decimal("3999.00")
+        apartment.save()
+        self.assertContains(self.client.get(reverse('apartments_list')), "$3999")
+
+        key = services.apartment_card_cache_key(apartment.pk, Apartment.objects.get(pk=apartment.pk).last_modified)
+        self.assertIsNotNone(cache.get(key))
+        with self.captureOnCommitCallbacks(execute=True):
+            apartment.amenities.add(ApartmentAmenity.objects.create(name="Dishwasher"))
+        self.assertIsNone(cache.get(key))
+
+    def test_smart_matches_load_from_their_own_endpoint(self):
+        from applicants.models import Applicant
+
+        user = User.objects.create_user(email="matcher@test.com", password=None)
+        Applicant.objects.create(user=user, first_name="Mia", last_name="Match")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('apartments_list'))
+        self.assertNotIn('smart_matches', response.context)
+        self.assertContains(response, reverse('apartment_smart_matches'))
+
+        response = self.client.get(reverse('apartment_smart_matches'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('smart_matches', response.context)
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.apartments_list, name='apartments_list'),
+    path('smart-matches/', views.apartment_smart_matches, name='apartment_smart_matches'),
     path('<int:apartment_id>/edit/', views.apartment_edit, name='apartment_edit'),
     path('<int:apartment_id>/overview/', views.apartment_overview, name='apartment_overview'),
     path('<int:apartment_id>/contact-broker/', views.contact_broker, name='contact_broker'),
@@ -10,6 +10,7 @@ from .forms import (
     ApartmentForm, ApartmentImageForm, ApartmentBasicForm, 
     ApartmentAmenitiesForm, ApartmentDetailsForm, BrokerContactForm
 )
+from django.core.paginator import Paginator
 from django.http import JsonResponse
 from datetime import datetime, date, timedelta
 import logging
@@ -17,47 +18,51 @@ from . import services
 
 logger = logging.getLogger(__name__)
 
+APARTMENTS_PER_PAGE = 24
+
+
 def apartments_list(request):
     """
     Main apartment search and listing view.
     Refactored to use services for filtering logic.
+    Business Logic: Highest-traffic page. Results are paginated with a single
+    COUNT, cards come from the fragment cache, and smart matches load
+    separately from apartment_smart_matches.
     """
     # Use service to get filtered apartments
     apartments, filters, auto_applied_preferences = services.get_filtered_apartments(request, request.user)
-    
-    # Business Feature: Smart Matching Algorithm
-    smart_matches = []
     is_ajax_request = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
-    
-    if request.user.is_authenticated and hasattr(request.user, 'applicant_profile') and not is_ajax_request:
-        try:
-            from applicants.apartment_matching import get_apartment_matches_for_applicant
-            applicant = request.user.applicant_profile
-            smart_matches = get_apartment_matches_for_applicant(applicant)  # Show all matches
-        except ImportError as e:
-            logger.warning(f"Smart matching module not available: {e}")
-            smart_matches = []
-        except Exception as e:
-            logger.error(f"Error getting smart matches: {e}")
-            smart_matches = []
+
+    page = Paginator(apartments, APARTMENTS_PER_PAGE).get_page(request.GET.get('page'))
+    page_apartments = page.object_list
+    rows = list(page_apartments)  # Evaluates the page once; the queryset keeps the rows
+    total_results = page.paginator.count
+
+    query = request.GET.copy()
+    query.pop('page', None)
+    query_string = query.urlencode()
 
     # Handle AJAX requests for filtering
     if is_ajax_request:
         try:
             from django.template.loader import render_to_string
             
-            apartments_data = services.serialize_apartments_for_map(apartments)
+            apartments_data = services.serialize_apartments_for_map(rows)
             
             # Render only the grid part for seamless updates
             html = render_to_string('apartments/includes/apartment_grid_items.html', {
-                'apartments': apartments,
-                'total_results': apartments.count()
+                'apartment_cards': services.render_apartment_cards(rows),
+                'page_obj': page,
+                'query_string': query_string,
+                'total_results': total_results,
             }, request=request)
             
             return JsonResponse({
                 'html': html,
                 'apartments': apartments_data,
-                'total_results': apartments.count(),
+                'total_results': total_results,
+                'page': page.number,
+                'num_pages': page.paginator.num_pages,
                 'active_filters': filters,
                 'sort_by': request.GET.get('sort'),
                 'selected_neighborhoods': request.GET.getlist('neighborhoods'),
@@ -82,13 +87,15 @@ def apartments_list(request):
 
     context = {
         'sort_by': sort_by,
-        'apartments': apartments,
+        'apartments': page_apartments,
+        'apartment_cards': services.render_apartment_cards(rows),
+        'page_obj': page,
+        'query_string': query_string,
         'all_amenities': all_amenities,
         'neighborhood_choices': neighborhood_choices,
         'active_filters': filters,
-        'total_results': apartments.count(),
+        'total_results': total_results,
         'auto_applied_preferences': auto_applied_preferences,
-        'smart_matches': smart_matches,
         'mapbox_token': getattr(settings, 'MAPBOX_API_TOKEN', ''),
         'selected_neighborhoods': neighborhood_values,
         'selected_amenities': amenity_ids,
@@ -107,6 +114,27 @@ def apartments_list(request):
     return render(request, 'apartments/apartments_list.html', context)
 
 
+def apartment_smart_matches(request):
+    """
+    Smart-matches section of the listing page, fetched after the page loads.
+    Business Logic: Scoring the whole inventory against an applicant's
+    profile is the slowest part of the page, so it no longer blocks the
+    listings from rendering.
+    """
+    smart_matches = []
+    if request.user.is_authenticated and hasattr(request.user, 'applicant_profile'):
+        try:
+            from applicants.apartment_matching import get_apartment_matches_for_applicant
+            applicant = request.user.applicant_profile
+            smart_matches = get_apartment_matches_for_applicant(applicant)  # Show all matches
+        except ImportError as e:
+            logger.warning(f"Smart matching module not available: {e}")
+        except Exception as e:
+            logger.error(f"Error getting smart matches: {e}")
+
+    return render(request, 'apartments/includes/smart_matches_cta.html', {'smart_matches': smart_matches})
+
+
 def apartment_edit(request, apartment_id=None, building_id=None):
     """
     Apartment editing interface.
@@ -0,0 +1,196 @@
+"""
+Activity Rollups
+================
+
+Precomputed applicant engagement for CRM pages and broker lists.
+
+Raw ApplicantActivity rows grow without bound for applicants who browse a lot,
+and summarising them on every CRM page meant scanning thousands of rows.
+Instead each activity, as it is written, bumps a compact per-day counter:
+
+- ApplicantActivityRollup: one row per (applicant, day, activity type)
+- ApplicantCRM.last_activity_at / last_login_at: last-seen timestamps
+- ApplicantCRM.engagement_score: 0-100 from the activity count over the last
+  ENGAGEMENT_WINDOW_DAYS days
+
+Scores decay as days leave the window, so a nightly task refreshes them;
+rebuild() recomputes everything from raw activities (backfills, bulk loads).
+"""
+
+from datetime import timedelta
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
+from django.utils import timezone
+
+from .models import ApplicantActivity, ApplicantActivityRollup, ApplicantCRM
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_WINDOW_DAYS = 30
+ENGAGEMENT_POINTS_PER_ACTIVITY = 2  # 50 activities in the window = 100
+
+
+class ActivityRollupService:
+    """
+    Maintain and read per-applicant activity rollups.
+    """
+
+    @staticmethod
+    def window_start(days=ENGAGEMENT_WINDOW_DAYS):
+        """First day counted in a ``days``-long window ending today."""
+        return timezone.localdate() - timedelta(days=days)
+
+    @staticmethod
+    def record(activity):
+        """
+        Count one newly written activity: bump its day counter, then refresh
+        the applicant's CRM timestamps and score (two small writes).
+        """
+        created_at = activity.created_at or timezone.now()
+        key = {
+            'applicant_id': activity.applicant_id,
+            'day': timezone.localdate(created_at),
+            'activity_type': activity.activity_type,
+        }
+        increment = {
+            'count': F('count') + 1,
+            'last_at': Greatest(F('last_at'), Value(created_at)),
+        }
+
+        with transaction.atomic():
+            if not ApplicantActivityRollup.objects.filter(**key).update(**increment):
+                try:
+                    with transaction.atomic():
+                        ApplicantActivityRollup.objects.create(count=1, last_at=created_at, **key)
+                except IntegrityError:
+                    # Another writer created today's row first
+                    ApplicantActivityRollup.objects.filter(**key).update(**increment)
+
+            crm_update = {
+                'last_activity_at': Greatest(Coalesce(F('last_activity_at'), Value(created_at)), Value(created_at)),
+                'engagement_score': ActivityRollupService._score_expression(),
+            }
+            if activity.activity_type == 'login':
+                crm_update['last_login_at'] = Greatest(
+                    Coalesce(F('last_login_at'), Value(created_at)), Value(created_at)
+                )
+            ApplicantCRM.objects.filter(applicant_id=activity.applicant_id).update(**crm_update)
+
+    @staticmethod
+    def _score_expression():
+        """Engagement score for the CRM row's applicant, as a correlated subquery."""
+        window_total = (
+            ApplicantActivityRollup.objects.filter(
+                applicant_id=OuterRef('applicant_id'),
+                day__gte=ActivityRollupService.window_start(),
+            )
+            .values('applicant_id')
+            .annotate(total=Sum('count'))
+            .values('total')
+        )
+        return Least(
+            Coalesce(Subquery(window_total, output_field=IntegerField()), 0) * ENGAGEMENT_POINTS_PER_ACTIVITY,
+            100,
+        )
+
+    @staticmethod
+    def refresh_scores(applicant_ids=None):
+        """
+        Recompute engagement scores in one UPDATE (all CRMs, or only ``applicant_ids``).
+        Only rows whose score changes are written.
+        """
+        crms = ApplicantCRM.objects.all()
+        if applicant_ids is not None:
+            crms = crms.filter(applicant_id__in=applicant_ids)
+        score = ActivityRollupService._score_expression()
+        updated = (
+            crms.alias(new_score=score)
+            .exclude(engagement_score=F('new_score'))
+            .update(engagement_score=score)
+        )
+        logger.info(f"Refreshed engagement scores for {updated} applicants")
+        return updated
+
+    @staticmethod
+    def rebuild(applicant_ids=None, batch_size=5000):
+        """
+        Recompute rollups and CRM fields from raw activities, e.g. after
+        backfilling or bulk-loading activities (which bypass signals).
+        """
+        activities = ApplicantActivity.objects.all()
+        rollups = ApplicantActivityRollup.objects.all()
+        crms = ApplicantCRM.objects.all()
+        if applicant_ids is not None:
+            activities = activities.filter(applicant_id__in=applicant_ids)
+            rollups = rollups.filter(applicant_id__in=applicant_ids)
+            crms = crms.filter(applicant_id__in=applicant_ids)
+
+        grouped = (
+            activities.annotate(activity_day=TruncDate('created_at'))
+            .values('applicant_id', 'activity_day', 'activity_type')
+            .annotate(total=Count('id'), latest=Max('created_at'))
+            .order_by()
+        )
+        created = 0
+        with transaction.atomic():
+            rollups.delete()
+            batch = []
+            for row in grouped.iterator(chunk_size=batch_size):
+                batch.append(ApplicantActivityRollup(
+                    applicant_id=row['applicant_id'], day=row['activity_day'],
+                    activity_type=row['activity_type'], count=row['total'], last_at=row['latest'],
+                ))
+                if len(batch) >= batch_size:
+                    created += len(ApplicantActivityRollup.objects.bulk_create(batch))
+                    batch = []
+            if batch:
+                created += len(ApplicantActivityRollup.objects.bulk_create(batch))
+
+            def latest(**filters):
+                return Subquery(
+                    ApplicantActivityRollup.objects.filter(applicant_id=OuterRef('applicant_id'), **filters)
+                    .order_by('-last_at').values('last_at')[:1]
+                )
+
+            crms.update(
+                last_activity_at=latest(),
+                last_login_at=latest(activity_type='login'),
+                engagement_score=ActivityRollupService._score_expression(),
+            )
+        logger.info(f"Rebuilt {created} activity rollup rows")
+        return created
+
+    @staticmethod
+    def get_summary(applicant, days=ENGAGEMENT_WINDOW_DAYS):
+        """
+        Activity summary for the last ``days`` days, read from rollups.
+
+        Returns the shape ActivityTracker.get_activity_summary always has, plus
+        ``counts_by_type`` keyed by activity type code.
+        """
+        rows = (
+            ApplicantActivityRollup.objects.filter(
+                applicant=applicant, day__gte=ActivityRollupService.window_start(days)
+            )
+            .values('activity_type')
+            .annotate(total=Sum('count'))
+            .order_by()
+        )
+        labels = dict(ApplicantActivity.ACTIVITY_TYPES)
+        counts_by_type = {row['activity_type']: row['total'] for row in rows}
+
+        return {
+            'total_activities': sum(counts_by_type.values()),
+            'activity_breakdown': {
+                labels.get(activity_type, activity_type): total
+                for activity_type, total in counts_by_type.items()
+            },
+            'counts_by_type': counts_by_type,
+            'most_recent': (
+                ApplicantActivity.objects.filter(applicant=applicant).order_by('-created_at').first()
+            ),
+            'period_days': days,
+        }
@@ -427,26 +427,9 @@ class ActivityTracker:
     
     @staticmethod
     def get_activity_summary(applicant, days=30):
-        """Generate activity analytics for reporting"""
-        from datetime import timedelta
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        activities = ApplicantActivity.objects.filter(
-            applicant=applicant,
-            created_at__gte=cutoff_date
-        )
-        
-        summary = {}
-        for activity in activities:
-            activity_type = activity.get_activity_type_display()
-            summary[activity_type] = summary.get(activity_type, 0) + 1
-        
-        return {
-            'total_activities': activities.count(),
-            'activity_breakdown': summary,
-            'most_recent': activities.order_by('-created_at').first(),
-            'period_days': days
-        }
+        """Generate activity analytics for reporting (read from daily rollups)"""
+        from .activity_rollups import ActivityRollupService
+        return ActivityRollupService.get_summary(applicant, days=days)
 
 
 # Convenience Functions
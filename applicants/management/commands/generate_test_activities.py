@@ -11,6 +11,7 @@ from django.utils import timezone
 from datetime import timedelta
 import random
 from applicants.models import Applicant, ApplicantActivity
+from applicants.activity_rollups import ActivityRollupService
 
 
 class Command(BaseCommand):
@@ -35,6 +36,7 @@ class Command(BaseCommand):
         if options['clear']:
             self.stdout.write('Clearing existing activities...')
             ApplicantActivity.objects.all().delete()
+            ActivityRollupService.rebuild()
         
         # Get applicants or create a test one
         applicants = list(Applicant.objects.all()[:10])
@@ -0,0 +1,29 @@
+"""
+Rebuild Activity Rollups
+========================
+
+Recompute daily activity rollups and CRM engagement fields from raw
+ApplicantActivity rows. Run once after deploying rollups, and after any
+bulk load or deletion of activities.
+Usage: python manage.py rebuild_activity_rollups [--applicant ID ...]
+"""
+
+from django.core.management.base import BaseCommand
+from applicants.activity_rollups import ActivityRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild applicant activity rollups and engagement scores from raw activities'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--applicant',
+            type=int,
+            action='append',
+            dest='applicant_ids',
+            help='Only rebuild this applicant (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        rows = ActivityRollupService.rebuild(applicant_ids=options['applicant_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} activity rollup rows'))
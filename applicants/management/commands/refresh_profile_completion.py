@@ -0,0 +1,27 @@
+"""
+Refresh Profile Completion
+==========================
+
+Recompute the stored profile completion percentage for every applicant
+(run once after deploying the field, and after bulk imports).
+Usage: python manage.py refresh_profile_completion [--batch-size N]
+"""
+
+from django.core.management.base import BaseCommand
+from applicants.models import Applicant
+
+
+class Command(BaseCommand):
+    help = 'Recompute and store profile completion percentages for all applicants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Applicants loaded per query'
+        )
+
+    def handle(self, *args, **options):
+        updated = Applicant.refresh_profile_completions(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Updated profile completion for {updated} applicants'))
@@ -2,11 +2,26 @@
 Activity Tracking Middleware
 ============================
 
-Middleware to capture the current request user for activity tracking.
+Middleware to capture the current request user for activity tracking, and to
+instrument the database queries each request makes (query count, DB time,
+repeated query shapes and per-view query budgets).
 """
 
+from collections import defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass
+import logging
+import os
+import re
+import sys
+import time
 from threading import local
 
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
 _thread_locals = local()
 
 
@@ -43,4 +58,183 @@ class ActivityTrackingMiddleware:
             if hasattr(_thread_locals, 'request'):
                 del _thread_locals.request
         
-        return response
\ No newline at end of file
+        return response
+
+
+# Query Instrumentation
+# ---------------------
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_SITE_PACKAGES = os.sep + 'site-packages' + os.sep
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view makes more queries than its budget allows (enforced in tests)."""
+
+
+def query_shape(sql: str) -> str:
+    """Normalize SQL so queries differing only in parameter values group together."""
+    shape = _STRING_LITERAL_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    return _WHITESPACE_RE.sub(' ', shape).strip()
+
+
+def _originating_frame() -> str:
+    """First stack frame in project code (outside Django, libraries and this module)."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and _SITE_PACKAGES not in filename and filename != __file__:
+            return f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+@dataclass
+class QueryShapeStats:
+    count: int = 0
+    duration: float = 0.0
+    origin: str = ''
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording every query made while it is active.
+
+    Usage:
+        with QueryRecorder() as recorder:
+            ...
+        recorder.count, recorder.duration, recorder.repeated_shapes()
+    """
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = defaultdict(QueryShapeStats)
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            stats = self.shapes[query_shape(sql)]
+            if not stats.count:
+                # Only look up the caller once per shape to keep overhead low
+                stats.origin = _originating_frame()
+            stats.count += 1
+            stats.duration += elapsed
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+    def repeated_shapes(self, threshold=None):
+        """Query shapes executed at least ``threshold`` times (likely N+1 loops), worst first."""
+        threshold = threshold or getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        repeated = [(shape, stats) for shape, stats in self.shapes.items() if stats.count >= threshold]
+        return sorted(repeated, key=lambda item: item[1].count, reverse=True)
+
+    def assert_within(self, max_queries, label='block'):
+        """Raise QueryBudgetExceeded if more than ``max_queries`` queries were made."""
+        if self.count > max_queries:
+            details = '; '.join(
+                f"{stats.count}x from {stats.origin}: {shape[:120]}"
+                for shape, stats in self.repeated_shapes(threshold=2)
+            )
+            raise QueryBudgetExceeded(
+                f"{label} made {self.count} queries (budget {max_queries})"
+                + (f". Repeated: {details}" if details else '')
+            )
+
+
+def query_budget(max_queries):
+    """
+    Decorator declaring the maximum number of queries a view may make.
+    Enforced by QueryInstrumentationMiddleware when QUERY_BUDGET_ENFORCE is on
+    (tests), logged as a warning otherwise.
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Middleware counting the queries and DB time of each request.
+
+    - Adds a Server-Timing header (db time, query count, app time) so the
+      numbers show up in the browser's network panel
+    - Logs query shapes repeated QUERY_REPEAT_THRESHOLD+ times with the code
+      location that issued them, which is how N+1 loops show up
+    - Checks the view's query budget (@query_budget or QUERY_BUDGETS by URL
+      name); raises QueryBudgetExceeded when QUERY_BUDGET_ENFORCE is set
+
+    Enabled by the QUERY_INSTRUMENTATION setting.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        db_ms = recorder.duration * 1000
+        app_ms = max(total - recorder.duration, 0) * 1000
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", app;dur={app_ms:.1f}'
+        )
+
+        view_name = self._view_name(request)
+        for shape, stats in recorder.repeated_shapes():
+            logger.warning(
+                f"Possible N+1 in {view_name}: {stats.count} similar queries "
+                f"({stats.duration * 1000:.1f}ms) from {stats.origin}: {shape[:200]}"
+            )
+
+        budget = self._budget(request)
+        if budget is not None and recorder.count > budget:
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                recorder.assert_within(budget, label=view_name)
+            logger.warning(f"{view_name} made {recorder.count} queries (budget {budget})")
+
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return request.path
+        return match.view_name or match._func_path
+
+    @staticmethod
+    def _budget(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        budget = getattr(match.func, 'query_budget', None)
+        if budget is None:
+            budget = getattr(settings, 'QUERY_BUDGETS', {}).get(match.view_name)
+        return budget
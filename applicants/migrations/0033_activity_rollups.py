@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applicants', '0032_applicant_has_pets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicantcrm',
+            name='engagement_score',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='applicantcrm',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='applicantcrm',
+            name='last_login_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ApplicantActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('activity_type', models.CharField(choices=[('profile_created', 'Profile Created'), ('profile_updated', 'Profile Updated'), ('profile_completed', 'Profile Completed'), ('password_changed', 'Password Changed'), ('login', 'Logged In'), ('logout', 'Logged Out'), ('session_timeout', 'Session Timeout'), ('application_started', 'Application Started'), ('application_updated', 'Application Updated'), ('application_submitted', 'Application Submitted'), ('application_viewed', 'Application Viewed'), ('apartment_viewed', 'Apartment Viewed'), ('apartment_favorited', 'Apartment Favorited'), ('apartment_unfavorited', 'Apartment Unfavorited'), ('building_viewed', 'Building Viewed'), ('property_search', 'Property Search'), ('virtual_tour', 'Virtual Tour Viewed'), ('email_sent', 'Email Sent'), ('sms_sent', 'SMS Sent'), ('phone_call', 'Phone Call'), ('message_received', 'Message Received'), ('message_replied', 'Message Replied'), ('document_uploaded', 'Document Uploaded'), ('document_deleted', 'Document Deleted'), ('document_verified', 'Document Verified'), ('document_rejected', 'Document Rejected'), ('crm_note_added', 'CRM Note Added'), ('status_changed', 'Status Changed'), ('broker_assigned', 'Broker Assigned'), ('follow_up_scheduled', 'Follow-up Scheduled'), ('meeting_scheduled', 'Meeting Scheduled'), ('email_opened', 'Email Opened'), ('link_clicked', 'Link Clicked'), ('form_started', 'Form Started'), ('form_abandoned', 'Form Abandoned')], max_length=30)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('last_at', models.DateTimeField()),
+                ('applicant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_rollups', to='applicants.applicant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='applicants__day_f9f4a1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('applicant', 'day', 'activity_type'), name='unique_activity_rollup_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applicants', '0033_activity_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicant',
+            name='profile_completion_percentage',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
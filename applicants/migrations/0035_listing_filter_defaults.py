@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applicants', '0034_applicant_profile_completion_percentage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicant',
+            name='listing_filter_defaults',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def copy_assignment_to_crm(apps, schema_editor):
+    """The CRM assignment is the one the applicant list scopes by; carry over legacy assignments"""
+    Applicant = apps.get_model('applicants', 'Applicant')
+    ApplicantCRM = apps.get_model('applicants', 'ApplicantCRM')
+
+    missing = Applicant.objects.filter(crm__isnull=True).values_list('id', 'assigned_broker_id')
+    ApplicantCRM.objects.bulk_create(
+        [ApplicantCRM(applicant_id=pk, assigned_broker_id=broker_id) for pk, broker_id in missing],
+        batch_size=1000,
+    )
+    ApplicantCRM.objects.filter(
+        assigned_broker__isnull=True, applicant__assigned_broker__isnull=False
+    ).update(assigned_broker_id=Subquery(
+        Applicant.objects.filter(pk=OuterRef('applicant_id')).values('assigned_broker_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applicants', '0035_listing_filter_defaults'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_assignment_to_crm, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.core.validators import MinValueValidator, MaxValueValidator
 from cloudinary.models import CloudinaryField
 from cloudinary.utils import cloudinary_url
@@ -267,8 +268,90 @@ class Applicant(models.Model):
     placement_date = models.DateTimeField(null=True, blank=True, help_text="Date when applicant was placed in an apartment")
     placed_apartment = models.ForeignKey('apartments.Apartment', on_delete=models.SET_NULL, null=True, blank=True, help_text="Apartment where applicant was placed")
 
+    # Cached overall_completion_percentage, refreshed when the profile or its related records change
+    profile_completion_percentage = models.PositiveSmallIntegerField(default=0)
+
+    # Resolved default apartment-list filters (apartments.preference_filters);
+    # NULL until first resolved, refreshed when preferences change
+    listing_filter_defaults = models.JSONField(null=True, blank=True)
+
+    # Related records that count towards profile completion (relation names)
+    COMPLETION_RELATIONS = (
+        'photos', 'previous_addresses', 'identification_documents', 'pets',
+        'neighborhood_preferences', 'amenities', 'income_sources', 'assets',
+    )
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+    @classmethod
+    def with_completion_flags(cls, queryset=None):
+        """
+        Annotate a completion_has_<relation> EXISTS flag for every relation in
+        COMPLETION_RELATIONS, so get_field_completion_status needs no extra
+        queries for applicants loaded from this queryset.
+        """
+        queryset = queryset if queryset is not None else cls.objects.all()
+        flags = {}
+        for relation in cls.COMPLETION_RELATIONS:
+            field = cls._meta.get_field(relation)
+            if field.many_to_many:
+                related = field.remote_field.through.objects.filter(**{field.m2m_field_name(): OuterRef('pk')})
+            else:
+                related = field.related_model.objects.filter(**{field.field.name: OuterRef('pk')})
+            flags[f'completion_has_{relation}'] = Exists(related)
+        return queryset.annotate(**flags)
+
+    @classmethod
+    def bulk_completion_status(cls, queryset=None):
+        """
+        Load applicants with their completion flags in one query and attach
+        ``completion_status`` (the get_field_completion_status dict) to each.
+        """
+        applicants = list(cls.with_completion_flags(queryset))
+        for applicant in applicants:
+            applicant.completion_status = applicant.get_field_completion_status()
+        return applicants
+
+    @classmethod
+    def refresh_profile_completions(cls, queryset=None, batch_size=500):
+        """
+        Recompute and store profile_completion_percentage in batches, writing
+        only rows whose value changed. Returns the number of rows updated.
+        """
+        queryset = queryset if queryset is not None else cls.objects.all()
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            changed = []
+            for applicant in cls.bulk_completion_status(cls.objects.filter(pk__in=ids[start:start + batch_size])):
+                percentage = applicant.completion_status['overall_completion_percentage']
+                if percentage != applicant.profile_completion_percentage:
+                    applicant.profile_completion_percentage = percentage
+                    changed.append(applicant)
+            updated += cls.objects.bulk_update(changed, ['profile_completion_percentage'])
+        return updated
+
+    def refresh_profile_completion(self):
+        """Recompute and store profile_completion_percentage (one read, plus a write if it changed)."""
+        fresh = type(self).bulk_completion_status(type(self).objects.filter(pk=self.pk))
+        if not fresh:
+            return None
+        percentage = fresh[0].completion_status['overall_completion_percentage']
+        if percentage != fresh[0].profile_completion_percentage:
+            type(self).objects.filter(pk=self.pk).update(profile_completion_percentage=percentage)
+        self.profile_completion_percentage = percentage
+        return percentage
+
+    def _has_related(self, relation):
+        """Whether a completion relation has rows, from annotations or prefetches when available."""
+        flag = f'completion_has_{relation}'
+        if flag in self.__dict__:
+            return self.__dict__[flag]
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if relation in prefetched:
+            return bool(prefetched[relation])
+        return getattr(self, relation).exists()
     
     def get_filled_fields(self):
         fields = {
@@ -357,7 +440,7 @@ class Applicant(models.Model):
             'email': {'step': 1, 'weight': 8, 'label': 'Email', 'value': self.email},
             'phone_number': {'step': 1, 'weight': 8, 'label': 'Phone Number', 'value': self.phone_number},
             'date_of_birth': {'step': 1, 'weight': 5, 'label': 'Date of Birth', 'value': self.date_of_birth},
-            'profile_photo': {'step': 1, 'weight': 5, 'label': 'Profile Photo', 'value': True if self.photos.exists() else None},
+            'profile_photo': {'step': 1, 'weight': 5, 'label': 'Profile Photo', 'value': True if self._has_related('photos') else None},
             'emergency_contact_name': {'step': 1, 'weight': 4, 'label': 'Emergency Contact Name', 'value': self.emergency_contact_name},
             'emergency_contact_phone': {'step': 1, 'weight': 4, 'label': 'Emergency Contact Phone', 'value': self.emergency_contact_phone},
             
@@ -369,8 +452,8 @@ class Applicant(models.Model):
             'housing_status': {'step': 1, 'weight': 6, 'label': 'Housing Status', 'value': self.housing_status},
             'evicted_before': {'step': 1, 'weight': 6, 'label': 'Eviction History', 'value': self.evicted_before},
             'reason_for_moving': {'step': 1, 'weight': 5, 'label': 'Reason for Moving', 'value': self.reason_for_moving},
-            'previous_addresses': {'step': 1, 'weight': 10, 'label': 'Address History', 'value': True if self.previous_addresses.exists() else None},
-            'identification_documents': {'step': 1, 'weight': 10, 'label': 'ID Documents', 'value': True if self.identification_documents.exists() else None},
+            'previous_addresses': {'step': 1, 'weight': 10, 'label': 'Address History', 'value': True if self._has_related('previous_addresses') else None},
+            'identification_documents': {'step': 1, 'weight': 10, 'label': 'ID Documents', 'value': True if self._has_related('identification_documents') else None},
             
             # Step 2: Housing Needs (The Matching Core)
             'desired_move_in_date': {'step': 2, 'weight': 15, 'label': 'Desired Move-in Date', 'value': self.desired_move_in_date},
@@ -380,14 +463,14 @@ class Applicant(models.Model):
             'min_bathrooms': {'step': 2, 'weight': 8, 'label': 'Min Bathrooms', 'value': self.min_bathrooms},
             'max_bathrooms': {'step': 2, 'weight': 5, 'label': 'Max Bathrooms', 'value': self.max_bathrooms},
             'open_to_roommates': {'step': 2, 'weight': 8, 'label': 'Roommate Preference', 'value': self.open_to_roommates},
-            'pets': {'step': 2, 'weight': 8, 'label': 'Pet Information', 'value': self.has_pets if self.has_pets is not None else (True if self.pets.exists() else None)},
-            'neighborhood_preferences': {'step': 2, 'weight': 15, 'label': 'Neighborhood Preferences', 'value': True if self.neighborhood_preferences.exists() else None},
-            'amenities': {'step': 2, 'weight': 10, 'label': 'Amenity Preferences', 'value': True if self.amenities.exists() else None},
+            'pets': {'step': 2, 'weight': 8, 'label': 'Pet Information', 'value': self.has_pets if self.has_pets is not None else (True if self._has_related('pets') else None)},
+            'neighborhood_preferences': {'step': 2, 'weight': 15, 'label': 'Neighborhood Preferences', 'value': True if self._has_related('neighborhood_preferences') else None},
+            'amenities': {'step': 2, 'weight': 10, 'label': 'Amenity Preferences', 'value': True if self._has_related('amenities') else None},
             
             # Step 3: Employment & Financial
             'employment_status': {'step': 3, 'weight': 15, 'label': 'Employment Status', 'value': self.employment_status},
-            'income_sources': {'step': 3, 'weight': 10, 'label': 'Additional Income', 'value': True if self.income_sources.exists() else None},
-            'assets': {'step': 3, 'weight': 10, 'label': 'Financial Assets', 'value': True if self.assets.exists() else None},
+            'income_sources': {'step': 3, 'weight': 10, 'label': 'Additional Income', 'value': True if self._has_related('income_sources') else None},
+            'assets': {'step': 3, 'weight': 10, 'label': 'Financial Assets', 'value': True if self._has_related('assets') else None},
         }
 
         # Context-Aware Logic for Step 3
@@ -707,6 +790,11 @@ class ApplicantCRM(models.Model):
     status = models.CharField(max_length=20, choices=ApplicationStatus.choices, default=ApplicationStatus.NEW)
     last_updated = models.DateTimeField(auto_now=True)
 
+    # Precomputed from activity rollups (see activity_rollups.py)
+    engagement_score = models.PositiveSmallIntegerField(default=0, db_index=True)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    last_login_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"CRM for {self.applicant.first_name} {self.applicant.last_name}"
 
@@ -894,6 +982,28 @@ class ApplicantActivity(models.Model):
         return color_map.get(self.activity_type, 'text-muted')
 
 
+class ApplicantActivityRollup(models.Model):
+    # Daily activity counts per applicant, maintained as activities are written
+    applicant = models.ForeignKey('Applicant', on_delete=models.CASCADE, related_name='activity_rollups')
+    day = models.DateField()
+    activity_type = models.CharField(max_length=30, choices=ApplicantActivity.ACTIVITY_TYPES)
+    count = models.PositiveIntegerField(default=0)
+    last_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['applicant', 'day', 'activity_type'], name='unique_activity_rollup_per_day'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.applicant_id} {self.day} {self.activity_type}: {self.count}"
+
+
 class UploadedFile(models.Model):
     # File attachments for broker notes
     log = models.ForeignKey(InteractionLog, on_delete=models.CASCADE, related_name="uploaded_files")
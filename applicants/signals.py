@@ -6,7 +6,7 @@ Automated activity tracking for applicant behavior analytics and CRM.
 Tracks user sessions, profile changes, application lifecycle, and document management.
 """
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
@@ -17,7 +17,11 @@ import logging
 import hashlib
 import json
 
-from .models import Applicant, ApplicantActivity
+from .models import (
+    Applicant, ApplicantActivity, ApplicantApartmentAmenityPreference, ApplicantAsset,
+    ApplicantBuildingAmenityPreference, ApplicantCRM, ApplicantIncomeSource, ApplicantPhoto,
+    IdentificationDocument, NeighborhoodPreference, Pet, PreviousAddress,
+)
 from .activity_tracker import ActivityTracker
 
 User = get_user_model()
@@ -123,6 +127,129 @@ def track_user_logout(sender, request, user, **kwargs):
 # Applicant Profile Management
 # ----------------------------
 
+@receiver(post_save, sender=Applicant)
+def create_applicant_crm(sender, instance, created, **kwargs):
+    """
+    Give every new applicant a CRM record, so list views never have to create
+    them. The CRM assignment starts from the applicant's assigned broker.
+    """
+    if created:
+        ApplicantCRM.objects.get_or_create(
+            applicant=instance, defaults={'assigned_broker_id': instance.assigned_broker_id}
+        )
+
+
+@receiver(post_save, sender=Applicant)
+def refresh_profile_completion(sender, instance, **kwargs):
+    """Keep the stored profile completion percentage in step with the profile"""
+    if kwargs.get('raw'):
+        return
+    try:
+        instance.refresh_profile_completion()
+    except Exception as e:
+        logger.error(f"Failed to refresh profile completion for applicant {instance.pk}: {e}")
+
+
+@receiver(post_save, sender=ApplicantPhoto)
+@receiver(post_delete, sender=ApplicantPhoto)
+@receiver(post_save, sender=PreviousAddress)
+@receiver(post_delete, sender=PreviousAddress)
+@receiver(post_save, sender=IdentificationDocument)
+@receiver(post_delete, sender=IdentificationDocument)
+@receiver(post_save, sender=Pet)
+@receiver(post_delete, sender=Pet)
+@receiver(post_save, sender=ApplicantIncomeSource)
+@receiver(post_delete, sender=ApplicantIncomeSource)
+@receiver(post_save, sender=ApplicantAsset)
+@receiver(post_delete, sender=ApplicantAsset)
+def refresh_completion_for_related(sender, instance, **kwargs):
+    """Adding or removing a completion-related record can change the percentage"""
+    if kwargs.get('raw') or not instance.applicant_id:
+        return
+    Applicant(pk=instance.applicant_id).refresh_profile_completion()
+
+
+@receiver(m2m_changed, sender=Applicant.neighborhood_preferences.through)
+@receiver(m2m_changed, sender=Applicant.amenities.through)
+def refresh_completion_for_preferences(sender, instance, action, reverse, pk_set, **kwargs):
+    """Neighborhood and amenity preference changes count towards completion"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.refresh_profile_completion()
+    elif pk_set:
+        for applicant in Applicant.objects.filter(pk__in=pk_set):
+            applicant.refresh_profile_completion()
+
+
+@receiver(post_save, sender=ApplicantActivity)
+def roll_up_activity(sender, instance, created, **kwargs):
+    """Keep the applicant's activity rollups and engagement score current"""
+    if not created:
+        return
+    try:
+        from .activity_rollups import ActivityRollupService
+        ActivityRollupService.record(instance)
+    except Exception as e:
+        logger.error(f"Failed to roll up activity {instance.pk}: {e}")
+
+
+# Default listing filters
+# -----------------------
+
+@receiver(post_save, sender=Applicant)
+def refresh_listing_filters(sender, instance, update_fields=None, **kwargs):
+    """Budget and bedroom/bathroom changes alter the applicant's default listing filters"""
+    from apartments.preference_filters import RANGE_FILTERS, PreferenceFilterService
+
+    if kwargs.get('raw'):
+        return
+    if update_fields is not None and not set(update_fields) & set(RANGE_FILTERS.values()):
+        return
+    PreferenceFilterService.schedule_refresh(instance.pk)
+
+
+@receiver(post_save, sender=NeighborhoodPreference)
+@receiver(post_delete, sender=NeighborhoodPreference)
+@receiver(post_save, sender=ApplicantBuildingAmenityPreference)
+@receiver(post_delete, sender=ApplicantBuildingAmenityPreference)
+@receiver(post_save, sender=ApplicantApartmentAmenityPreference)
+@receiver(post_delete, sender=ApplicantApartmentAmenityPreference)
+def refresh_listing_filters_for_preference(sender, instance, **kwargs):
+    """Ranked neighborhood and amenity preferences feed the default listing filters"""
+    from apartments.preference_filters import PreferenceFilterService
+
+    if kwargs.get('raw'):
+        return
+    PreferenceFilterService.schedule_refresh(instance.applicant_id)
+
+
+@receiver(m2m_changed, sender=Applicant.neighborhood_preferences.through)
+@receiver(m2m_changed, sender=Applicant.amenities.through)
+def refresh_listing_filters_for_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Legacy neighborhood and amenity preferences feed the default listing filters"""
+    from apartments.preference_filters import PreferenceFilterService
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        PreferenceFilterService.schedule_refresh(instance.pk)
+    elif pk_set:
+        for applicant_id in pk_set:
+            PreferenceFilterService.schedule_refresh(applicant_id)
+
+
+@receiver(post_save, sender='buildings.Amenity')
+@receiver(post_delete, sender='buildings.Amenity')
+def invalidate_amenity_lookup(sender, **kwargs):
+    """Amenity names/ids are cached for preference matching"""
+    from apartments.preference_filters import PreferenceFilterService
+
+    if kwargs.get('raw'):
+        return
+    PreferenceFilterService.invalidate_amenity_lookup()
+
+
 @receiver(post_save, sender=Applicant)
 def track_applicant_profile_changes(sender, instance, created, **kwargs):
     """Track profile creation and updates for audit trail"""
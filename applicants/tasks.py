@@ -204,4 +204,18 @@ def cleanup_old_activities(days_to_keep=None, activity_types=None, dry_run=True)
             'dry_run': False,
             'deleted': count,
             'cutoff_date': cutoff_date.isoformat()
-        }
\ No newline at end of file
+        }
+
+@shared_task(
+    name='applicants.refresh_engagement_scores',
+    ignore_result=True
+)
+def refresh_engagement_scores():
+    """
+    Nightly refresh of precomputed engagement scores.
+    Scores only change on write for active applicants; this lets the days that
+    have left the window decay everyone else's.
+    """
+    from .activity_rollups import ActivityRollupService
+
+    return ActivityRollupService.refresh_scores()
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from applicants.activity_rollups import ActivityRollupService
+from applicants.activity_tracker import ActivityTracker
+from applicants.models import Applicant, ApplicantActivity, ApplicantActivityRollup, ApplicantCRM
+
+User = get_user_model()
+
+
+class ActivityRollupTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password=None, is_staff=True)
+        self.applicant = self._applicant('Ana')
+
+    def _applicant(self, first_name):
+        user = User.objects.create_user(email=f'{first_name.lower()}@example.com', password=None)
+        return Applicant.objects.create(user=user, first_name=first_name, last_name='Tester')
+
+    def _activity(self, activity_type, applicant=None):
+        return ApplicantActivity.objects.create(
+            applicant=applicant or self.applicant, activity_type=activity_type, description=activity_type
+        )
+
+    def test_activities_update_rollups_incrementally(self):
+        ApplicantActivityRollup.objects.all().delete()  # Profile-creation signals also write activities
+        self._activity('apartment_viewed')
+        self._activity('apartment_viewed')
+        login = self._activity('login')
+
+        rollup = ApplicantActivityRollup.objects.get(applicant=self.applicant, activity_type='apartment_viewed')
+        self.assertEqual(rollup.count, 2)
+        self.assertEqual(rollup.day, timezone.localdate())
+
+        crm = ApplicantCRM.objects.get(applicant=self.applicant)
+        self.assertEqual(crm.last_login_at, login.created_at)
+        self.assertEqual(crm.last_activity_at, login.created_at)
+        total = ApplicantActivity.objects.filter(applicant=self.applicant).count()
+        self.assertEqual(crm.engagement_score, total * 2)
+
+    def test_summary_reads_rollups_inside_window(self):
+        self._activity('login')
+        ApplicantActivityRollup.objects.create(
+            applicant=self.applicant, activity_type='login', count=40,
+            day=timezone.localdate() - timedelta(days=60), last_at=timezone.now() - timedelta(days=60),
+        )
+
+        with self.assertNumQueries(2):
+            summary = ActivityTracker.get_activity_summary(self.applicant, days=30)
+        self.assertEqual(summary['counts_by_type']['login'], 1)
+        self.assertEqual(summary['activity_breakdown']['Logged In'], 1)
+        self.assertEqual(summary['total_activities'], sum(summary['counts_by_type'].values()))
+        self.assertEqual(summary['most_recent'].activity_type, 'login')
+
+    def test_rebuild_matches_incremental_and_scores_decay(self):
+        other = self._applicant('Ben')
+        for _ in range(3):
+            self._activity('property_search')
+        self._activity('login', applicant=other)
+        incremental = sorted(ApplicantActivityRollup.objects.values_list('applicant_id', 'activity_type', 'count'))
+
+        ActivityRollupService.rebuild()
+        rebuilt = sorted(ApplicantActivityRollup.objects.values_list('applicant_id', 'activity_type', 'count'))
+        self.assertEqual(rebuilt, incremental)
+        self.assertEqual(ApplicantCRM.objects.get(applicant=other).last_login_at,
+                         ApplicantActivity.objects.get(applicant=other, activity_type='login').created_at)
+
+        # Everything ages out of the window: only the stale scores are rewritten
+        ApplicantActivityRollup.objects.filter(applicant=self.applicant).update(
+            day=timezone.localdate() - timedelta(days=45)
+        )
+        self.assertEqual(ActivityRollupService.refresh_scores(), 1)
+        self.assertEqual(ApplicantCRM.objects.get(applicant=self.applicant).engagement_score, 0)
+        self.assertGreater(ApplicantCRM.objects.get(applicant=other).engagement_score, 0)
+
+    def test_crm_page_and_engagement_sort_use_precomputed_scores(self):
+        quiet = self._applicant('Quiet')
+        ApplicantCRM.objects.filter(applicant=self.applicant).update(engagement_score=80)
+        ApplicantCRM.objects.filter(applicant=quiet).update(engagement_score=10)
+        self.client.force_login(self.staff)
+
+        response = self.client.get(reverse('applicant_crm', args=[self.applicant.id]))
+        self.assertEqual(response.context['engagement_score'], 80)
+
+        response = self.client.get(reverse('applicants_list'), {'sort': 'engagement'})
+        self.assertEqual(list(response.context['applicants'])[:2], [self.applicant, quiet])
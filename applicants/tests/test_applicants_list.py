@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apartments.models import Apartment
+from applicants.models import Applicant, ApplicantCRM
+from applicants.views import APPLICANTS_PER_PAGE
+from applications.models import Application
+from buildings.models import Building
+
+User = get_user_model()
+
+
+class ApplicantsListTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='password', is_staff=True)
+        self.broker = User.objects.create_user(email='broker@example.com', password='password', is_broker=True)
+        self.other_broker = User.objects.create_user(email='other@example.com', password='password', is_broker=True)
+
+        self.building = Building.objects.create(
+            name='Bergen Lofts', street_address_1='1 Bergen St', city='Brooklyn', state='NY', zip_code='11201'
+        )
+        self.building.brokers.add(self.broker)
+        self.apartment = Apartment.objects.create(building=self.building, unit_number='2B', rent_price=2500)
+
+    def _applicant(self, first_name, **kwargs):
+        user = User.objects.create_user(email=f'{first_name.lower()}@example.com', password=None)
+        return Applicant.objects.create(user=user, first_name=first_name, last_name='Tester', **kwargs)
+
+    def test_new_applicants_get_crm_records(self):
+        applicant = self._applicant('Ana')
+        self.assertTrue(ApplicantCRM.objects.filter(applicant=applicant).exists())
+
+    def test_broker_scope_without_duplicates(self):
+        assigned = self._applicant('Assigned', assigned_broker=self.broker)
+        applied = self._applicant('Applied')
+        # Two applications to the broker's building must not duplicate the row
+        Application.objects.create(applicant=applied, apartment=self.apartment)
+        Application.objects.create(applicant=applied, apartment=self.apartment, status='PENDING')
+        self._applicant('Hidden', assigned_broker=self.other_broker)
+
+        self.client.force_login(self.broker)
+        response = self.client.get(reverse('applicants_list'))
+        self.assertEqual(list(response.context['applicants']), [applied, assigned])
+        self.assertEqual(response.context['stats']['total'], 2)
+        self.assertEqual(response.context['stats']['active_applications'], 1)
+        self.assertEqual(response.context['applicants'][0].latest_application.status, 'PENDING')
+
+    def test_crm_assignment_drives_scope_filters_and_stats(self):
+        # New CRM records start from the applicant's assigned broker
+        legacy = self._applicant('Legacy', assigned_broker=self.broker)
+        self.assertEqual(legacy.crm.assigned_broker, self.broker)
+
+        reassigned = self._applicant('Moved', assigned_broker=self.broker)
+        reassigned.crm.assigned_broker = self.other_broker
+        reassigned.crm.save()
+        crm_only = self._applicant('CrmOnly')
+        crm_only.crm.assigned_broker = self.broker
+        crm_only.crm.save()
+
+        self.client.force_login(self.broker)
+        response = self.client.get(reverse('applicants_list'))
+        self.assertEqual(list(response.context['applicants']), [crm_only, legacy])
+        self.assertEqual(response.context['stats']['total'], 2)
+        self.assertEqual(response.context['stats']['unassigned'], 0)
+        response = self.client.get(reverse('applicants_list'), {'assigned': 'me'})
+        self.assertEqual(list(response.context['applicants']), [crm_only, legacy])
+
+    def test_page_query_count_does_not_grow_with_applicants(self):
+        for i in range(3):
+            applicant = self._applicant(f'Early{i}')
+            Application.objects.create(applicant=applicant, apartment=self.apartment)
+        self.client.force_login(self.staff)
+        # Warm up (session, permissions)
+        self.client.get(reverse('applicants_list'))
+
+        with self.assertNumQueries(7):
+            self.client.get(reverse('applicants_list'))
+        for i in range(5):
+            applicant = self._applicant(f'Late{i}')
+            Application.objects.create(applicant=applicant, apartment=self.apartment)
+        with self.assertNumQueries(7):
+            self.client.get(reverse('applicants_list'))
+
+    def test_missing_crm_records_are_bulk_created(self):
+        for i in range(3):
+            self._applicant(f'Legacy{i}')
+        ApplicantCRM.objects.all().delete()
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('applicants_list'))
+        self.assertEqual(ApplicantCRM.objects.count(), 3)
+        self.assertTrue(all(applicant.crm.pk for applicant in response.context['applicants']))
+
+    def test_filters_stats_and_pagination(self):
+        soon = timezone.now().date() + timedelta(days=10)
+        for i in range(APPLICANTS_PER_PAGE + 2):
+            self._applicant(f'Bulk{i}')
+        urgent = self._applicant('Urgent', desired_move_in_date=soon)
+        urgent.crm.assigned_broker = self.broker
+        urgent.crm.save()
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('applicants_list'))
+        self.assertEqual(len(response.context['applicants']), APPLICANTS_PER_PAGE)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+        stats = response.context['stats']
+        self.assertEqual(stats['total'], APPLICANTS_PER_PAGE + 3)
+        self.assertEqual(stats['urgent'], 1)
+        self.assertEqual(stats['unassigned'], APPLICANTS_PER_PAGE + 2)
+
+        response = self.client.get(reverse('applicants_list'), {'q': 'urgent'})
+        self.assertEqual(list(response.context['applicants']), [urgent])
+
+        self.client.force_login(self.broker)
+        response = self.client.get(reverse('applicants_list'), {'assigned': 'me'})
+        self.assertEqual(list(response.context['applicants']), [urgent])  # Visible through the CRM assignment
+        response = self.client.get(reverse('applicants_list'), {'q': 'bulk', 'page': 2})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import TestCase
+
+from applicants.models import Amenity, Applicant, Pet, PreviousAddress
+
+User = get_user_model()
+
+
+class ProfileCompletionTests(TestCase):
+    def _applicant(self, first_name, **kwargs):
+        user = User.objects.create_user(email=f'{first_name.lower()}@example.com', password=None, is_applicant=True)
+        return Applicant.objects.create(user=user, first_name=first_name, last_name='Tester', **kwargs)
+
+    def test_batch_status_matches_per_applicant_status_in_one_query(self):
+        amenity = Amenity.objects.create(name='Gym')
+        full = self._applicant('Full', has_pets=None)
+        Pet.objects.create(applicant=full, name='Rex', pet_type='dog')
+        full.amenities.add(amenity)
+        self._applicant('Empty')
+
+        expected = {
+            applicant.pk: applicant.get_field_completion_status()
+            for applicant in Applicant.objects.all()
+        }
+        with self.assertNumQueries(1):
+            applicants = Applicant.bulk_completion_status(Applicant.objects.all())
+            statuses = {applicant.pk: applicant.completion_status for applicant in applicants}
+        self.assertEqual(statuses, expected)
+
+    def test_percentage_is_stored_and_refreshed_on_related_changes(self):
+        applicant = self._applicant('Ana')
+        stored = Applicant.objects.get(pk=applicant.pk).profile_completion_percentage
+        self.assertEqual(stored, applicant.get_field_completion_status()['overall_completion_percentage'])
+
+        PreviousAddress.objects.create(applicant=applicant, street_address_1='1 Main St')
+        applicant.amenities.add(Amenity.objects.create(name='Doorman'))
+        applicant.refresh_from_db()
+        self.assertGreater(applicant.profile_completion_percentage, stored)
+        self.assertEqual(
+            applicant.profile_completion_percentage,
+            applicant.get_field_completion_status()['overall_completion_percentage'],
+        )
+
+        Applicant.objects.filter(pk=applicant.pk).update(profile_completion_percentage=0)
+        self.assertEqual(Applicant.refresh_profile_completions(), 1)
+
+    def test_template_tag_reads_stored_percentage(self):
+        applicant = self._applicant('Cy')
+        Applicant.objects.filter(pk=applicant.pk).update(profile_completion_percentage=42)
+        user = User.objects.get(pk=applicant.user_id)
+
+        rendered = Template(
+            '{% load user_extras %}{% get_user_profile_completion user as pct %}{{ pct }}'
+        ).render(Context({'user': user}))
+        self.assertEqual(rendered, '42')
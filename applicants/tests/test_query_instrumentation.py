@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch
+
+from applicants.middleware import (
+    QueryBudgetExceeded,
+    QueryInstrumentationMiddleware,
+    QueryRecorder,
+    query_budget,
+    query_shape,
+)
+
+User = get_user_model()
+
+
+@query_budget(2)
+def looping_view(request):
+    """View with an N+1 loop: one query per user."""
+    for user_id in User.objects.values_list('id', flat=True):
+        User.objects.filter(id=user_id).exists()
+    return HttpResponse('ok')
+
+
+@override_settings(QUERY_INSTRUMENTATION=True, QUERY_REPEAT_THRESHOLD=3)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        for i in range(4):
+            User.objects.create_user(email=f'user{i}@example.com', password='testpass123')
+        self.factory = RequestFactory()
+
+    def _request(self, view, url_name='looping'):
+        request = self.factory.get('/looping/')
+        request.resolver_match = ResolverMatch(view, (), {}, url_name=url_name)
+        return request
+
+    def test_query_shape_ignores_parameter_values(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id = 12 AND name = 'a'"),
+            query_shape("SELECT * FROM t  WHERE id = 7 AND name = 'b'"),
+        )
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            query_shape('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    def test_recorder_flags_repeated_shapes_with_origin(self):
+        with QueryRecorder() as recorder:
+            looping_view(self.factory.get('/'))
+
+        self.assertEqual(recorder.count, 5)
+        repeated = recorder.repeated_shapes()
+        self.assertEqual(len(repeated), 1)
+        shape, stats = repeated[0]
+        self.assertEqual(stats.count, 4)
+        self.assertIn('test_query_instrumentation.py', stats.origin)
+        self.assertIn('looping_view', stats.origin)
+
+    def test_middleware_adds_server_timing_header(self):
+        middleware = QueryInstrumentationMiddleware(looping_view)
+        with self.assertLogs('applicants.middleware', level='WARNING') as logs:
+            response = middleware(self._request(looping_view))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="5 queries"', response['Server-Timing'])
+        self.assertTrue(any('Possible N+1 in looping' in line for line in logs.output))
+        self.assertTrue(any('budget 2' in line for line in logs.output))
+
+    @override_settings(QUERY_BUDGET_ENFORCE=True)
+    def test_budget_is_enforced_in_tests(self):
+        middleware = QueryInstrumentationMiddleware(looping_view)
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            middleware(self._request(looping_view))
+        self.assertIn('made 5 queries (budget 2)', str(raised.exception))
+
+        # Budgets can also be configured by URL name
+        def plain_view(request):
+            return looping_view(request)
+
+        with override_settings(QUERY_BUDGETS={'plain': 10}):
+            response = QueryInstrumentationMiddleware(plain_view)(self._request(plain_view, 'plain'))
+        self.assertEqual(response.status_code, 200)
@@ -1,5 +1,5 @@
 from django.urls import path, include
-from .views import delete_applicant_photo, delete_pet_photo, applicant_overview, applicants_list, applicant_crm, get_applicant_data, toggle_saved_apartment
+from .views import delete_applicant_photo, delete_pet_photo, applicant_overview, applicants_list, nudge_campaign, applicant_crm, get_applicant_data, toggle_saved_apartment
 from .profile_views import progressive_profile, quick_profile_update, profile_step1, profile_step2, profile_step3
 from .activity_views import activity_dashboard, activity_timeline, activity_analytics_api
 
@@ -8,6 +8,7 @@ urlpatterns = [
     path('delete-photo/<int:photo_id>/', delete_applicant_photo, name='delete_applicant_photo'),
     path('delete-pet-photo/<int:photo_id>/', delete_pet_photo, name='delete_pet_photo'),
     path("applicants/", applicants_list, name="applicants_list"),
+    path("applicants/nudge/", nudge_campaign, name="nudge_campaign"),
     path("<int:applicant_id>/crm/", applicant_crm, name="applicant_crm"),
     path("get-applicant-data/<int:applicant_id>/", get_applicant_data, name="get_applicant_data"),
     path("api/toggle-saved-apartment/", toggle_saved_apartment, name="toggle_saved_apartment"),
@@ -1,17 +1,21 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from .models import Applicant, ApplicantPhoto, PetPhoto, ApplicantCRM, ApplicationHistory, InteractionLog, SavedApartment
 from .forms import ApplicantForm, ApplicantPhotoForm, PetForm, PetPhotoForm
-from applications.models import Application
+from applications.models import Application, NudgeCampaign
 from apartments.models import Apartment, ApartmentAmenity
 from django.contrib import messages
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q
 
 from .forms import InteractionLogForm
 from django.utils.timezone import now
+from datetime import timedelta
 from applicants.models import Applicant, Amenity, Neighborhood
 from applications.nudge_service import NudgeService
+from applications.nudge_campaigns import NudgeCampaignService
+from django.views.decorators.http import require_POST
 
 import random
 
@@ -109,38 +113,152 @@ def applicant_overview(request, applicant_id):
     })
 
 
+APPLICANTS_PER_PAGE = 50
+ACTIVE_APPLICATION_STATUSES = ['NEW', 'PENDING', 'WAITLISTED']
+
+
+def visible_applicants(user, queryset=None):
+    """
+    Applicants a broker/admin may see. Brokers see applicants assigned to them
+    in the CRM (the assignment the list filters, stats and CRM views use) or
+    who applied to one of their buildings; the building check is an EXISTS
+    subquery, so no join fan-out and no DISTINCT.
+    """
+    queryset = queryset if queryset is not None else Applicant.objects.all()
+    if user.is_superuser or user.is_staff:
+        return queryset
+    applied_to_broker_building = Application.objects.filter(
+        applicant=OuterRef('pk'),
+        apartment__building__brokers=user,
+    )
+    return queryset.filter(Q(crm__assigned_broker=user) | Q(Exists(applied_to_broker_building)))
+
+
 @login_required
 @user_passes_test(user_is_broker_or_admin)
 def applicants_list(request):
-    # Optimize queries for list display
-    base_qs = Applicant.objects.select_related(
-        'user',
+    """
+    Paginated applicant CRM list.
+    Filters (search, CRM status, assignment) run in SQL; the header stats are a
+    single aggregate query over every visible applicant.
+    """
+    scoped = visible_applicants(request.user)
+
+    today = now().date()
+    stats = scoped.aggregate(
+        total=Count('pk'),
+        urgent=Count('pk', filter=Q(
+            desired_move_in_date__gte=today,
+            desired_move_in_date__lte=today + timedelta(days=30),
+        )),
+        unassigned=Count('pk', filter=Q(crm__assigned_broker__isnull=True)),
+        active_applications=Count('pk', filter=Q(Exists(Application.objects.filter(
+            applicant=OuterRef('pk'), status__in=ACTIVE_APPLICATION_STATUSES,
+        )))),
+    )
+
+    applicants = scoped
+    search = request.GET.get('q', '').strip()
+    if search:
+        applicants = applicants.filter(
+            Q(user__first_name__icontains=search) | Q(_first_name__icontains=search) |
+            Q(user__last_name__icontains=search) | Q(_last_name__icontains=search) |
+            Q(user__email__icontains=search) | Q(_email__icontains=search)
+        )
+    crm_status = request.GET.get('status', '')
+    if crm_status:
+        applicants = applicants.filter(crm__status=crm_status)
+    assignment = request.GET.get('assigned', '')
+    if assignment == 'unassigned':
+        applicants = applicants.filter(crm__assigned_broker__isnull=True)
+    elif assignment == 'me':
+        applicants = applicants.filter(crm__assigned_broker=request.user)
+
+    applicants = applicants.select_related(
+        'user', 'crm', 'crm__assigned_broker',
     ).prefetch_related(
         'neighborhood_preferences',
-        'applications',
+        Prefetch('applications', queryset=Application.objects.order_by('id')),
     )
-    
-    # Filter based on permissions
-    if request.user.is_superuser or request.user.is_staff:
-        applicants = base_qs.all()
+    # Engagement orderings read the precomputed CRM rollup fields
+    sort = request.GET.get('sort', '')
+    if sort == 'engagement':
+        applicants = applicants.order_by(F('crm__engagement_score').desc(nulls_last=True), '-id')
+    elif sort == 'recent':
+        applicants = applicants.order_by(F('crm__last_activity_at').desc(nulls_last=True), '-id')
     else:
-        # Brokers see assigned applicants OR applicants who applied to their buildings
-        applicants = base_qs.filter(
-            Q(assigned_broker=request.user) |
-            Q(applications__apartment__building__brokers=request.user)
-        ).distinct()
-    
-    # Initialize CRM records for workflow
-    for applicant in applicants:
-        crm, created = ApplicantCRM.objects.get_or_create(applicant=applicant)
-        applicant.crm = crm
+        applicants = applicants.order_by('-id')
+
+    page = Paginator(applicants, APPLICANTS_PER_PAGE).get_page(request.GET.get('page'))
+
+    # Provision missing CRM records for this page in one INSERT
+    # (new applicants get theirs from a post_save signal)
+    missing = [applicant for applicant in page if not hasattr(applicant, 'crm')]
+    if missing:
+        ApplicantCRM.objects.bulk_create(
+            [ApplicantCRM(applicant=applicant, assigned_broker_id=applicant.assigned_broker_id)
+             for applicant in missing],
+            ignore_conflicts=True,
+        )
+        crms = ApplicantCRM.objects.filter(applicant__in=missing).select_related('assigned_broker')
+        crm_by_applicant = {crm.applicant_id: crm for crm in crms}
+        for applicant in missing:
+            applicant.crm = crm_by_applicant.get(applicant.id)
+
+    for applicant in page:
+        applications = applicant.applications.all()
+        applicant.latest_application = applications[len(applications) - 1] if applications else None
 
+    query = request.GET.copy()
+    query.pop('page', None)
     context = {
-        "applicants": applicants
+        "applicants": page,
+        "page_obj": page,
+        "stats": stats,
+        "search": search,
+        "crm_status": crm_status,
+        "assignment": assignment,
+        "sort": sort,
+        "crm_status_choices": ApplicantCRM._meta.get_field('status').choices,
+        "nudge_audiences": NudgeCampaign.AUDIENCE_CHOICES,
+        "query_string": query.urlencode(),
     }
     return render(request, "applicants/applicants_list.html", context)
 
 
+@login_required
+@user_passes_test(user_is_broker_or_admin)
+@require_POST
+def nudge_campaign(request):
+    """
+    Start a bulk nudge to every visible applicant in an audience.
+    Business Logic: one background job reminds the whole audience; the
+    request only records the campaign.
+    """
+    audience = request.POST.get('audience', '')
+    channel = request.POST.get('channel', 'email')
+    custom_message = request.POST.get('custom_message', '').strip()
+
+    if audience not in dict(NudgeCampaign.AUDIENCE_CHOICES):
+        messages.error(request, "Choose who to remind.")
+        return redirect('applicants_list')
+
+    recipients = NudgeCampaignService.audience_queryset(audience, request.user).count()
+    if not recipients:
+        messages.info(request, "No applicants currently match that reminder.")
+        return redirect('applicants_list')
+
+    campaign, error = NudgeCampaignService.start(request.user, audience, channel, custom_message)
+    if error:
+        messages.error(request, f"Failed to start reminders: {error}")
+    else:
+        messages.success(
+            request,
+            f"Sending {campaign.get_audience_display().lower()} reminders to {recipients} applicants by {channel.upper()}."
+        )
+    return redirect('applicants_list')
+
+
 def get_applicant_data(request, applicant_id):
     # API endpoint for applicant data export
     if not request.user.is_authenticated:
@@ -155,8 +273,8 @@ def get_applicant_data(request, applicant_id):
                 applicant.applications.filter(building__brokers=request.user).exists()):
              return JsonResponse({"error": "Permission denied"}, status=403)
 
-        # Get field completion status
-        completion_status = applicant.get_field_completion_status()
+        # Get field completion status (related-record checks from one annotated query)
+        completion_status = Applicant.bulk_completion_status(Applicant.objects.filter(pk=applicant.pk))[0].completion_status
         
         # Basic data structure for backward compatibility
         basic_data = {
@@ -331,10 +449,8 @@ def applicant_crm(request, applicant_id):
     recent_activities = ActivityTracker.get_recent_activities(applicant, limit=50)
     activity_summary = ActivityTracker.get_activity_summary(applicant, days=30)
     
-    # Calculate Engagement Score (Simple heuristic)
-    # 0-100 score based on activity count
-    activity_count = activity_summary.get('total_activities', 0)
-    engagement_score = min(100, activity_count * 2) # 50 activities = 100%
+    # Engagement score is precomputed from the activity rollups
+    engagement_score = crm.engagement_score
 
     if request.method == "POST":
         if "contact_method" in request.POST:
@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import (
     Application, UploadedFile, ApplicationActivity, ApplicationSection,
     PersonalInfoData, PreviousAddress, IncomeData, AdditionalEmployment,
@@ -155,15 +155,31 @@ class LegalDocumentsAdmin(admin.ModelAdmin):
         }),
     )
 
+class AwaitingReconciliationFilter(admin.SimpleListFilter):
+    """Payments whose gateway outcome is unknown (see applications.payment_utils)"""
+    title = 'reconciliation'
+    parameter_name = 'reconciliation'
+
+    def lookups(self, request, model_admin):
+        return [('awaiting', 'Awaiting reconciliation')]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'awaiting':
+            from .payment_utils import PaymentProcessor
+            return queryset.filter(pk__in=PaymentProcessor.stale_payments().values('pk'))
+        return queryset
+
+
 class ApplicationPaymentAdmin(admin.ModelAdmin):
-    list_display = ('application', 'amount', 'status', 'payment_method', 'paid_at')
-    list_filter = ('status', 'payment_method')
-    search_fields = ('application__id', 'payment_intent_id', 'transaction_id')
-    readonly_fields = ('created_at', 'updated_at')
+    list_display = ('application', 'amount', 'status', 'payment_method', 'paid_at', 'updated_at')
+    list_filter = (AwaitingReconciliationFilter, 'status', 'payment_method')
+    search_fields = ('application__id', 'payment_intent_id', 'transaction_id', 'idempotency_key')
+    readonly_fields = ('idempotency_key', 'created_at', 'updated_at')
+    actions = ['reconcile_with_processor']
     
     fieldsets = (
         ('Payment Information', {
-            'fields': ('amount', 'status')
+            'fields': ('amount', 'status', 'idempotency_key')
         }),
         ('Transaction Details', {
             'fields': ('payment_intent_id', 'payment_method', 'transaction_id', 
@@ -179,6 +195,19 @@ class ApplicationPaymentAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Reconcile with the processor')
+    def reconcile_with_processor(self, request, queryset):
+        """Look up unconfirmed payments in the gateway report; never charges."""
+        from .payment_utils import PaymentProcessor
+
+        processor = PaymentProcessor()
+        for payment in queryset.select_related('application'):
+            if not processor._needs_reconciliation(payment):
+                self.message_user(request, f"Application {payment.application_id}: not awaiting reconciliation", level=messages.WARNING)
+                continue
+            success, message = processor.reconcile_payment(payment.application)
+            self.message_user(request, f"Application {payment.application_id}: {message}", level=messages.SUCCESS if success else messages.WARNING)
+
 # Register all models
 admin.site.register(Application, ApplicationAdmin)
 admin.site.register(UploadedFile, UploadedFileAdmin)
@@ -0,0 +1,108 @@
+"""
+Wizard Draft Store
+==================
+
+Compact per-user storage for multi-step wizard state (currently the broker
+application creation wizard), replacing growing blobs in the session.
+
+- One ApplicationDraft row per user and wizard
+- Loaded at most once per request; written only when a step changes it
+- Keys set to None are dropped instead of stored
+- Stale drafts are purged by a periodic task after APPLICATION_DRAFT_TTL_DAYS
+"""
+
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DraftStore:
+    """
+    Read/write access to one user's draft for one wizard.
+
+    Usage:
+        draft = DraftStore.for_request(request, 'broker_application')
+        draft.update({'applicant_id': 12, 'applicant_type': 'existing'})
+        draft.get('applicant_id')
+        draft.clear()
+    """
+
+    def __init__(self, user, wizard: str):
+        self.user = user
+        self.wizard = wizard
+        self._draft = None
+
+    @classmethod
+    def for_request(cls, request, wizard: str, legacy_session_key: Optional[str] = None) -> 'DraftStore':
+        """
+        Return the request's store for ``wizard`` (shared by every helper call
+        in the request, so the draft is loaded once).
+
+        Args:
+            legacy_session_key: Session key the wizard used to store its state in;
+                any data left there is moved into the draft on first access
+        """
+        stores = request.__dict__.setdefault('_draft_stores', {})
+        if wizard not in stores:
+            store = cls(request.user, wizard)
+            if legacy_session_key and legacy_session_key in request.session:
+                store.update(request.session.pop(legacy_session_key) or {})
+            stores[wizard] = store
+        return stores[wizard]
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._draft is None:
+            from .models import ApplicationDraft
+
+            self._draft = (
+                ApplicationDraft.objects.filter(user=self.user, wizard=self.wizard).first()
+                or ApplicationDraft(user=self.user, wizard=self.wizard)
+            )
+        return self._draft.data
+
+    def get(self, key: Optional[str] = None, default=None):
+        """Return one value, or a copy of the whole draft when no key is given."""
+        if key is None:
+            return dict(self.data)
+        return self.data.get(key, default)
+
+    def update(self, values: Dict[str, Any]):
+        """Merge ``values`` into the draft with a single write (skipped when nothing changes)."""
+        data = dict(self.data)
+        for key, value in values.items():
+            if value is None:
+                data.pop(key, None)
+            else:
+                data[key] = value
+        if data == self.data:
+            return
+        self._draft.data = data
+        self._draft.save()
+
+    def set(self, key: str, value):
+        self.update({key: value})
+
+    def clear(self):
+        """Delete the draft (e.g. once the wizard has created its application)."""
+        from .models import ApplicationDraft
+
+        ApplicationDraft.objects.filter(user=self.user, wizard=self.wizard).delete()
+        self._draft = None
+
+    @staticmethod
+    def purge_stale(days: Optional[int] = None) -> int:
+        """Delete drafts not touched for ``days`` (default APPLICATION_DRAFT_TTL_DAYS)."""
+        from .models import ApplicationDraft
+
+        days = days if days is not None else getattr(settings, 'APPLICATION_DRAFT_TTL_DAYS', 7)
+        deleted, _ = ApplicationDraft.objects.filter(
+            updated_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        if deleted:
+            logger.info(f"Purged {deleted} stale application drafts")
+        return deleted
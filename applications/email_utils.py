@@ -1,12 +1,21 @@
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.urls import reverse
+from django.utils import timezone
+from .outbox import Outbox
 import logging
 
 logger = logging.getLogger(__name__)
 
+def application_completion_url(application, request=None):
+    """Absolute link an applicant follows to complete an application (token access, no login)."""
+    current_site = Site.objects.get_current() if request is None else request.get_host()
+    protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
+    completion_url = reverse('applicant_complete', kwargs={'uuid': application.unique_link})
+    return f"{protocol}://{current_site}{completion_url}?token={application.unique_link}"
+
+
 def send_application_link_email(application, request=None):
     """
     Send application link to applicant via email
@@ -16,13 +25,8 @@ def send_application_link_email(application, request=None):
         return False
     
     try:
-        # Get the current site
-        current_site = Site.objects.get_current() if request is None else request.get_host()
-        protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
-        
         # Build the application completion URL
-        completion_url = reverse('applicant_complete', kwargs={'uuid': application.unique_link})
-        full_url = f"{protocol}://{current_site}{completion_url}?token={application.unique_link}"
+        full_url = application_completion_url(application, request)
         
         # Prepare email context
         context = {
@@ -40,16 +44,13 @@ def send_application_link_email(application, request=None):
         text_message = render_to_string('applications/emails/application_link_email.txt', context)
         
         # Send email
-        send_mail(
-            subject=subject,
-            message=text_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[application.applicant.email],
-            fail_silently=False,
+        # Queue for delivery; repeat clicks within the same minute are queued once
+        Outbox.enqueue_email(
+            'application_link', application.applicant.email, subject, text_message, html_body=html_message,
+            idempotency_key=_idempotency_key('application_link', application),
         )
         
-        logger.info(f"Application link email sent successfully to {application.applicant.email} for application {application.id}")
+        logger.info(f"Application link email queued for {application.applicant.email} for application {application.id}")
         return True
         
     except Exception as e:
@@ -69,11 +70,7 @@ def send_application_reminder_email(application, request=None):
     
     try:
         # Similar to send_application_link_email but with reminder template
-        current_site = Site.objects.get_current() if request is None else request.get_host()
-        protocol = 'https' if getattr(settings, 'USE_HTTPS', False) else 'http'
-        
-        completion_url = reverse('applicant_complete', kwargs={'uuid': application.unique_link})
-        full_url = f"{protocol}://{current_site}{completion_url}?token={application.unique_link}"
+        full_url = application_completion_url(application, request)
         
         context = {
             'application': application,
@@ -88,22 +85,23 @@ def send_application_reminder_email(application, request=None):
         html_message = render_to_string('applications/emails/application_reminder_email.html', context)
         text_message = render_to_string('applications/emails/application_reminder_email.txt', context)
         
-        send_mail(
-            subject=subject,
-            message=text_message,
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[application.applicant.email],
-            fail_silently=False,
+        # Queue for delivery; repeat clicks within the same minute are queued once
+        Outbox.enqueue_email(
+            'application_reminder', application.applicant.email, subject, text_message, html_body=html_message,
+            idempotency_key=_idempotency_key('application_reminder', application),
         )
         
-        logger.info(f"Application reminder email sent to {application.applicant.email} for application {application.id}")
+        logger.info(f"Application reminder email queued for {application.applicant.email} for application {application.id}")
         return True
         
     except Exception as e:
         logger.error(f"Failed to send reminder email for application {application.id}: {str(e)}")
         return False
 
+def _idempotency_key(kind, application):
+    minute = timezone.now().strftime('%Y%m%d%H%M')
+    return f"{kind}:{application.id}:{application.applicant.email}:{minute}"
+
 def get_property_display(application):
     """Helper function to get property display text"""
     if application.apartment:
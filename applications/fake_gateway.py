@@ -0,0 +1,142 @@
+"""
+Fake Sola Gateway
+=================
+
+A local HTTP server that answers like the Sola (Cardknox) gateway, for tests
+and offline development (point SOLA_API_URL at ``gateway.url``).
+
+- Approves every sale, refund and void, except cards in ``decline_cards``
+- Sleeps ``delay`` seconds before answering (to exercise timeouts); the
+  charge has already happened by then, as with a real lost response
+- Like the real gateway, never deduplicates: every sale charges
+- Answers with HTTP ``error_status`` when set (e.g. 502), after charging, as
+  a failing proxy in front of the real gateway would
+- Answers report:transactions with the sales sent for ``xInvoice`` (an error
+  while ``report_available`` is False)
+- Records every request in ``requests`` and the client address of every new
+  connection in ``connections`` (keep-alive reuse shows as one connection)
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode
+import itertools
+import json
+import threading
+import time
+
+
+class _GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.gateway.connections.append(self.client_address)
+
+    def do_POST(self):
+        gateway = self.server.gateway
+        length = int(self.headers.get('Content-Length') or 0)
+        data = dict(parse_qsl(self.rfile.read(length).decode(), keep_blank_values=True))
+        body = urlencode(gateway.respond(data)).encode()
+        status = 200
+        if gateway.error_status and data.get('xCommand') != 'report:transactions':
+            status, body = gateway.error_status, b''
+        if gateway.delay:
+            time.sleep(gateway.delay)
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/x-www-form-urlencoded')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client gave up (timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSolaGateway:
+    """
+    Usage::
+
+        with FakeSolaGateway() as gateway, override_settings(SOLA_API_URL=gateway.url):
+            ...
+    """
+
+    def __init__(self, decline_cards=('4000000000000002',), delay=0):
+        self.decline_cards = set(decline_cards)
+        self.delay = delay
+        self.report_available = True
+        self.error_status = None
+        self.requests = []
+        self.connections = []
+        self._charges = []
+        self._ref_numbers = itertools.count(1000)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/gateway"
+
+    @property
+    def sales(self):
+        """Sale requests received."""
+        return [data for data in self.requests if data.get('xCommand') == 'cc:sale']
+
+    def respond(self, data):
+        with self._lock:
+            self.requests.append(data)
+            command = data.get('xCommand')
+            if command == 'report:transactions':
+                return self._report(data)
+            if data.get('xCardNum') in self.decline_cards:
+                response = {'xResult': 'D', 'xStatus': 'Declined', 'xError': 'Card declined', 'xRefNum': ''}
+            else:
+                response = {
+                    'xResult': 'A',
+                    'xStatus': 'Approved',
+                    'xRefNum': str(next(self._ref_numbers)),
+                    'xAuthCode': '123456',
+                }
+                if command == 'cc:sale' and data.get('xCardNum'):
+                    response['xMaskedCardNumber'] = f"{data['xCardNum'][:1]}xxxxxxxxxxx{data['xCardNum'][-4:]}"
+            if command == 'cc:sale':
+                self._charges.append((data, response))
+            return response
+
+    def _report(self, data):
+        if not self.report_available:
+            return {'xResult': 'E', 'xStatus': 'Error', 'xError': 'Report unavailable'}
+        records = [
+            {
+                'xRefNum': response['xRefNum'],
+                'xInvoice': sale.get('xInvoice', ''),
+                'xCustom01': sale.get('xCustom01', ''),
+                'xCommand': 'CC:Sale',
+                'xResponseResult': response['xStatus'],
+            }
+            for sale, response in self._charges
+            if sale.get('xInvoice') == data.get('xInvoice')
+        ]
+        return {'xResult': 'A', 'xStatus': 'Approved', 'xReportData': json.dumps(records)}
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _GatewayHandler)
+        self._server.daemon_threads = True
+        self._server.gateway = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
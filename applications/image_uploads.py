@@ -0,0 +1,264 @@
+"""
+Cropped Image Uploads
+=====================
+
+Photos picked in the application wizard used to arrive as a base64 data URL
+of the browser-cropped canvas, decoded in the request and pushed to
+Cloudinary before the response went out. Phone photos made that a
+multi-megabyte request body followed by a long synchronous upload.
+
+Uploads now take one of two paths:
+- Server processing (default): the browser sends the original file plus the
+  crop rectangle. The request only stages the file; a background task crops
+  it with Pillow, applies and strips EXIF, downsizes it to
+  UPLOAD_IMAGE_MAX_DIMENSION and uploads the result.
+- Direct upload (IMAGE_DIRECT_UPLOADS): the browser uploads its cropped
+  image straight to Cloudinary with parameters signed here, and the form
+  only posts back the signed upload response, which is verified before use.
+
+Staged files live in IMAGE_UPLOAD_STAGING_ROOT, which web and worker
+processes must share. Files Pillow cannot identify are rejected in the
+request rather than staged. A staged file is removed only once its upload
+has succeeded; transient Cloudinary errors are retried by the task, and a
+file that still fails is left in place so the photo can be recovered until
+the periodic purge deletes it after IMAGE_UPLOAD_STAGING_TTL_DAYS.
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+from io import BytesIO
+from typing import Optional
+
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.utils
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Upload failures worth retrying (process_uploaded_image retries these)
+TRANSIENT_UPLOAD_ERRORS = (cloudinary.exceptions.Error, ConnectionError, TimeoutError)
+
+
+def application_folder(application_id):
+    """Cloudinary folder that holds an application's wizard photos"""
+    return f'applications/{application_id}'
+
+
+def staging_storage():
+    return FileSystemStorage(location=settings.IMAGE_UPLOAD_STAGING_ROOT)
+
+
+def is_image(uploaded_file):
+    """
+    Whether Pillow can identify and verify the file (header and structure
+    only; nothing is decoded). The file is rewound afterwards.
+    """
+    try:
+        with Image.open(uploaded_file) as image:
+            image.verify()
+        return True
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Rejected upload {uploaded_file.name}: not a readable image ({e})")
+        return False
+    finally:
+        uploaded_file.seek(0)
+
+
+def parse_crop(crop_data_json):
+    """
+    Crop rectangle from the cropper's hidden input, in original-image pixels:
+    {'x', 'y', 'width', 'height', 'rotate'}. None when nothing was cropped.
+    """
+    if not crop_data_json:
+        return None
+    try:
+        crop_info = json.loads(crop_data_json)
+        data = crop_info.get('data') if crop_info.get('cropped') else None
+        if not data:
+            return None
+        crop = {key: float(data.get(key) or 0) for key in ('x', 'y', 'width', 'height', 'rotate')}
+    except (TypeError, ValueError, AttributeError) as e:
+        logger.warning(f"Ignoring invalid crop data: {e}")
+        return None
+    if crop['width'] <= 0 or crop['height'] <= 0:
+        return None
+    return crop
+
+
+def process_image(source, crop=None, name='photo.jpg'):
+    """
+    Crop, orient and downsize an image; returns a JPEG upload with no EXIF.
+
+    The crop rectangle is in the coordinates the cropper showed, i.e. after
+    EXIF orientation and rotation are applied.
+    """
+    max_dimension = settings.UPLOAD_IMAGE_MAX_DIMENSION
+    with Image.open(source) as original:
+        if crop is None:
+            # JPEGs decode at a reduced scale when no full-size crop coordinates apply
+            original.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(original)
+        if crop:
+            if crop['rotate']:
+                # Cropper.js rotates clockwise; Pillow rotates counter-clockwise
+                image = image.rotate(-crop['rotate'], expand=True, fillcolor='white')
+            left, top = max(crop['x'], 0), max(crop['y'], 0)
+            right = min(crop['x'] + crop['width'], image.width)
+            bottom = min(crop['y'] + crop['height'], image.height)
+            if right > left and bottom > top:
+                image = image.crop((round(left), round(top), round(right), round(bottom)))
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if image.mode != 'RGB':
+            # Flatten transparency onto white (JPEG has no alpha)
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+
+        output = BytesIO()
+        # A freshly encoded image carries no EXIF block unless one is passed in
+        image.save(output, format='JPEG', quality=settings.UPLOAD_IMAGE_QUALITY, optimize=True)
+
+    base = os.path.splitext(os.path.basename(name))[0] or 'photo'
+    return SimpleUploadedFile(f'{base}.jpg', output.getvalue(), content_type='image/jpeg')
+
+
+class ImageUploadService:
+    """
+    Stage, process and upload wizard photos.
+    """
+
+    @staticmethod
+    def schedule(model, field_name, uploaded_file, crop_data_json='', **attrs):
+        """
+        Stage an uploaded image and create ``model(**attrs)`` with the
+        processed image in the background once the request commits.
+        Returns the staged name, or None (nothing staged) if the file is not
+        an image.
+        """
+        if not is_image(uploaded_file):
+            return None
+        extension = os.path.splitext(uploaded_file.name)[1].lower()[:10]
+        staged_name = staging_storage().save(f'{uuid.uuid4().hex}{extension}', uploaded_file)
+        job = {
+            'model': model._meta.label,
+            'field_name': field_name,
+            'staged_name': staged_name,
+            'original_name': uploaded_file.name,
+            'crop': parse_crop(crop_data_json),
+            'attrs': attrs,
+        }
+        transaction.on_commit(lambda: ImageUploadService.dispatch(job))
+        return staged_name
+
+    @staticmethod
+    def dispatch(job):
+        try:
+            from .tasks import process_uploaded_image
+            process_uploaded_image.apply_async(args=[job], retry=False)
+        except Exception as e:
+            # No broker available: process in-process rather than dropping the photo
+            logger.warning(f"Could not queue image processing for {job['staged_name']}, running inline: {e}")
+            try:
+                ImageUploadService.run(job)
+            except Exception as e:
+                # Runs after the request committed; the staged file is kept for recovery
+                logger.error(f"Inline image processing failed for {job['staged_name']}: {e}")
+
+    @staticmethod
+    def run(job):
+        """
+        Process a staged image, upload it and create its row. The staged file
+        is removed only after the upload succeeded; on failure it is kept so
+        the task can retry.
+        """
+        model = apps.get_model(job['model'])
+        staged_name = job['staged_name']
+        try:
+            with staging_storage().open(staged_name) as source:
+                image = process_image(source, job['crop'], job['original_name'])
+            instance = model(**job['attrs'], **{job['field_name']: image})
+            with transaction.atomic():
+                instance.save()  # CloudinaryField uploads the processed file here
+        except Exception as e:
+            logger.warning(f"Processing {job['model']} image {staged_name} failed, keeping the staged file: {e}")
+            raise
+        staging_storage().delete(staged_name)
+        logger.info(f"Processed {job['model']} image {instance.pk} ({image.size} bytes)")
+        return instance
+
+    @staticmethod
+    def purge_stale_staged(days: Optional[int] = None) -> int:
+        """Delete staged files older than ``days`` (default IMAGE_UPLOAD_STAGING_TTL_DAYS)."""
+        days = days if days is not None else getattr(settings, 'IMAGE_UPLOAD_STAGING_TTL_DAYS', 7)
+        cutoff = timezone.now() - timedelta(days=days)
+        storage = staging_storage()
+        try:
+            _, names = storage.listdir('')
+        except FileNotFoundError:
+            return 0
+        deleted = 0
+        for name in names:
+            if storage.get_modified_time(name) < cutoff:
+                storage.delete(name)
+                deleted += 1
+        if deleted:
+            logger.info(f"Purged {deleted} stale staged images")
+        return deleted
+
+    @staticmethod
+    def direct_upload_params(folder):
+        """Signed parameters for a browser upload straight to Cloudinary."""
+        config = cloudinary.config()
+        max_dimension = settings.UPLOAD_IMAGE_MAX_DIMENSION
+        params = {
+            'timestamp': int(time.time()),
+            'folder': folder,
+            # Incoming transformation: downsized and re-encoded before storage
+            'transformation': f'c_limit,w_{max_dimension},h_{max_dimension}',
+        }
+        params['signature'] = cloudinary.utils.api_sign_request(params, config.api_secret)
+        params['api_key'] = config.api_key
+        params['upload_url'] = cloudinary.utils.cloudinary_api_url('upload', resource_type='image')
+        return params
+
+    @staticmethod
+    def verified_direct_upload(upload_json, folder):
+        """
+        Stored CloudinaryField value for a browser upload response, or None
+        if it is missing, its signature does not verify or it was not
+        uploaded into ``folder``.
+        """
+        if not upload_json:
+            return None
+        try:
+            upload = json.loads(upload_json)
+            public_id, version, signature = upload['public_id'], upload['version'], upload['signature']
+        except (TypeError, ValueError, KeyError):
+            logger.warning("Ignoring malformed direct upload response")
+            return None
+        if not str(public_id).startswith(f'{folder}/'):
+            # A valid upload signed for another application's folder
+            logger.warning(f"Rejected direct upload {public_id}: not in {folder}")
+            return None
+        try:
+            verified = cloudinary.utils.verify_api_response_signature(public_id, version, signature)
+        except Exception as e:  # Cloudinary not configured
+            logger.warning(f"Could not verify direct upload {public_id}: {e}")
+            return None
+        if not verified:
+            logger.warning(f"Rejected direct upload {public_id}: signature mismatch")
+            return None
+        image_format = upload.get('format') or 'jpg'
+        return f"image/upload/v{version}/{public_id}.{image_format}"
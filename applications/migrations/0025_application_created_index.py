@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apartments', '0012_listing_feed_import'),
+        ('applicants', '0032_applicant_has_pets'),
+        ('applications', '0024_application_draft'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['-created_at', '-id'], name='application_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0026_outbox_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='substitutions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='NudgeCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('audience', models.CharField(choices=[('incomplete_profile', 'Incomplete profile'), ('missing_documents', 'Missing documents'), ('stale_application', 'Stale application')], max_length=30)),
+                ('channel', models.CharField(choices=[('email', 'Email'), ('sms', 'SMS')], default='email', max_length=10)),
+                ('custom_message', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('recipient_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0, help_text='Matched applicants without an email/phone')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('broker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nudge_campaigns', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0027_nudge_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationpayment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0029_application_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='applicationpayment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('needs_review', 'Needs Review'), ('completed', 'Completed'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20),
+        ),
+    ]
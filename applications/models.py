@@ -5,6 +5,8 @@ from apartments.models import Apartment
 from applicants.models import Applicant
 import uuid
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from encrypted_model_fields.fields import EncryptedCharField
 
 class ApplicationStatus(models.TextChoices):
@@ -45,6 +47,7 @@ class EmploymentType(models.TextChoices):
 class PaymentStatus(models.TextChoices):
     PENDING = 'pending', 'Pending'
     PROCESSING = 'processing', 'Processing'
+    NEEDS_REVIEW = 'needs_review', 'Needs Review'
     COMPLETED = 'completed', 'Completed'
     FAILED = 'failed', 'Failed'
     REFUNDED = 'refunded', 'Refunded'
@@ -98,13 +101,20 @@ class Application(models.Model):
     payment_completed = models.BooleanField(default=False)
     payment_completed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of application_list (newest first)
+            models.Index(fields=['-created_at', '-id'], name='application_created_id_idx'),
+        ]
+
     def get_total_progress(self):
         """Calculates total weighted progress across all 5 sections"""
         total = 0
         sections = self.sections.all()
         for section in sections:
             total += section.get_progress_percentage()
-        return round(total / 5) if sections.exists() else 0
+        # Truthiness reuses the evaluated (possibly prefetched) sections
+        return round(total / 5) if sections else 0
 
     def get_dynamic_status(self):
         """Returns dynamic status label for NEW applications"""
@@ -582,6 +592,8 @@ class ApplicationPayment(models.Model):
     paid_at = models.DateTimeField(null=True, blank=True)
     receipt_url = models.URLField(blank=True, null=True)
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
+    # Sent with each charge attempt (as xCustom01) to find it in gateway reports; new per attempt
+    idempotency_key = models.CharField(max_length=64, unique=True, blank=True, null=True)
     
     # Refund tracking
     refunded_at = models.DateTimeField(null=True, blank=True)
@@ -594,3 +606,134 @@ class ApplicationPayment(models.Model):
     def get_completion_status(self):
         """Payment completion"""
         return 100 if self.status == 'completed' else 0
+
+
+class ApplicationDraft(models.Model):
+    """
+    Work-in-progress state of a multi-step wizard (e.g. broker application
+    creation), one row per user and wizard. Kept out of the session so the
+    session stays small and is only written when it actually changes.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='application_drafts')
+    wizard = models.CharField(max_length=50)
+    data = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'wizard'], name='unique_application_draft_per_wizard'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.wizard} draft for user {self.user_id}"
+
+
+class ApplicationSnapshot(models.Model):
+    """
+    Denormalized copy of everything the v2 wizard and review page read for
+    one application (section data, uploaded files, applicant prefill),
+    rebuilt whenever that data is saved. ``version`` increases with every
+    rebuild; ``schema_version`` is the layout it was built with.
+    """
+    application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='snapshot')
+    schema_version = models.PositiveSmallIntegerField(default=1)
+    version = models.PositiveIntegerField(default=1)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot v{self.version} for application {self.application_id}"
+
+
+class OutboxMessage(models.Model):
+    """
+    An email or SMS waiting to be delivered by the outbox workers.
+    Written in the same transaction as the event that triggers it (a nudge, an
+    inquiry, an application link), so the message exists if and only if the
+    event committed; Celery workers deliver it outside the web request.
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    kind = models.CharField(max_length=50, help_text="What triggered the message, e.g. nudge or otp")
+    idempotency_key = models.CharField(max_length=255, unique=True)
+
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not delivered before this time (retry backoff)")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    provider_message_id = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+
+    # Per-recipient placeholder values; lets bulk messages share one rendered
+    # subject/body so providers can batch them (e.g. SendGrid personalizations)
+    substitutions = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['channel', 'status', 'available_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} {self.kind} to {', '.join(self.recipients)} ({self.status})"
+
+    def personalize(self, text):
+        """Apply this message's substitutions to its shared subject or body"""
+        for placeholder, value in self.substitutions.items():
+            text = text.replace(placeholder, str(value))
+        return text
+
+
+class NudgeCampaign(models.Model):
+    """
+    One bulk reminder job: every applicant a broker can see who matches an
+    audience filter is nudged by one Celery task, instead of one blocking
+    request per applicant.
+    """
+    AUDIENCE_CHOICES = [
+        ('incomplete_profile', 'Incomplete profile'),
+        ('missing_documents', 'Missing documents'),
+        ('stale_application', 'Stale application'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    broker = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='nudge_campaigns')
+    audience = models.CharField(max_length=30, choices=AUDIENCE_CHOICES)
+    channel = models.CharField(max_length=10, choices=OutboxMessage.CHANNEL_CHOICES, default='email')
+    custom_message = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    recipient_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0, help_text="Matched applicants without an email/phone")
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_audience_display()} {self.channel} nudge by {self.broker} ({self.status})"
@@ -0,0 +1,309 @@
+"""
+Bulk Nudge Campaigns
+====================
+
+Remind every applicant who matches an audience filter in one background job.
+
+Nudging one applicant at a time (NudgeService) renders a template, queues a
+message and writes the CRM/activity logs for that applicant alone; reminding
+hundreds meant hundreds of blocking requests. A campaign instead:
+
+- selects its audience in SQL (incomplete profile, missing documents, stale
+  application), scoped to the applicants the broker can see
+- renders each variant's precompiled template once, with per-recipient values
+  left as placeholders filled in by OutboxMessage.substitutions
+- queues every message and writes every InteractionLog / ApplicationActivity
+  with bulk_create, in one transaction
+
+A broker can't start the same (audience, channel) campaign twice within
+CAMPAIGN_COOLDOWN, so a double-submitted form nudges each applicant once.
+
+Delivery is the outbox's job: SendGrid receives each group of identical
+messages as one request with a personalization per recipient, Twilio calls
+are spread over a small thread pool.
+"""
+
+from datetime import timedelta
+from functools import lru_cache
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.template import Context, Engine
+from django.urls import reverse
+from django.utils import timezone
+
+from applicants.models import ApplicantCRM, InteractionLog
+from .email_utils import application_completion_url, get_property_display
+from .models import (
+    Application, ApplicationActivity, ApplicationStatus, NudgeCampaign, OutboxMessage,
+    RequiredDocumentType, UploadedFile,
+)
+from .outbox import Outbox, get_outbox_provider
+
+logger = logging.getLogger(__name__)
+
+STALE_APPLICATION_DAYS = 7
+CAMPAIGN_COOLDOWN = timedelta(minutes=10)
+OPEN_APPLICATION_STATUSES = [ApplicationStatus.NEW, ApplicationStatus.PENDING]
+
+# Per-recipient placeholders, substituted at delivery (SendGrid substitution tag style)
+PLACEHOLDERS = {
+    'first_name': '-first_name-',
+    'link': '-link-',
+    'property': '-property-',
+}
+
+# (audience, channel) -> (subject, body) template sources
+VARIANTS = {
+    ('incomplete_profile', 'email'): (
+        "Finish your {{ site_name }} profile",
+        "Dear {{ first_name }},\n\n"
+        "{{ custom_message|default:'Your renter profile is not complete yet. Brokers can match you to apartments faster once it is.' }}\n\n"
+        "Complete your profile: {{ link }}\n\n"
+        "Best regards,\n{{ broker_name }}\n{{ site_name }} Team\n",
+    ),
+    ('incomplete_profile', 'sms'): (
+        "",
+        "{{ site_name }}: Hi {{ first_name }}, {{ custom_message|default:'please finish your renter profile so we can match you to apartments.' }} {{ link }}",
+    ),
+    ('missing_documents', 'email'): (
+        "Documents needed for {{ property }}",
+        "Dear {{ first_name }},\n\n"
+        "{{ custom_message|default:'Your application is still missing required documents. Please upload them so we can move it forward.' }}\n\n"
+        "Upload your documents: {{ link }}\n\n"
+        "Best regards,\n{{ broker_name }}\n{{ site_name }} Team\n",
+    ),
+    ('missing_documents', 'sms'): (
+        "",
+        "{{ site_name }}: Hi {{ first_name }}, {% if custom_message %}{{ custom_message }}{% else %}your application for "
+        "{{ property }} needs documents.{% endif %} Upload: {{ link }}",
+    ),
+    ('stale_application', 'email'): (
+        "Your application for {{ property }} is waiting",
+        "Dear {{ first_name }},\n\n"
+        "{{ custom_message|default:'You started an application but have not finished it yet. Pick up where you left off:' }}\n\n"
+        "{{ link }}\n\n"
+        "Best regards,\n{{ broker_name }}\n{{ site_name }} Team\n",
+    ),
+    ('stale_application', 'sms'): (
+        "",
+        "{{ site_name }}: Hi {{ first_name }}, {% if custom_message %}{{ custom_message }}{% else %}your application for "
+        "{{ property }} is waiting.{% endif %} Continue: {{ link }}",
+    ),
+}
+
+_TEXT_ENGINE = Engine(autoescape=False)  # Plain-text email and SMS bodies
+
+
+@lru_cache(maxsize=None)
+def compiled_variant(audience, channel):
+    """Compile a variant's subject/body templates once per process."""
+    subject, body = VARIANTS[(audience, channel)]
+    return _TEXT_ENGINE.from_string(subject), _TEXT_ENGINE.from_string(body)
+
+
+class NudgeCampaignService:
+    """
+    Select, queue and log bulk nudges.
+    """
+
+    @staticmethod
+    def target_applications(audience):
+        """
+        Open applications (of the outer applicant) that qualify for
+        ``audience``, newest first. For incomplete_profile any open
+        application qualifies; it only supplies the nudge's link.
+        """
+        applications = Application.objects.filter(
+            applicant=OuterRef('pk'), is_revoked=False, status__in=OPEN_APPLICATION_STATUSES,
+        ).order_by('-created_at')
+        if audience == 'missing_documents':
+            missing = Q()
+            for document_type in RequiredDocumentType.values:
+                missing |= Q(required_documents__contains=[document_type]) & ~Q(Exists(
+                    UploadedFile.objects.filter(application=OuterRef('pk'), document_type=document_type)
+                ))
+            return applications.filter(missing)
+        if audience == 'stale_application':
+            cutoff = timezone.now() - timedelta(days=STALE_APPLICATION_DAYS)
+            return applications.filter(submitted_by_applicant=False, updated_at__lt=cutoff)
+        return applications
+
+    @staticmethod
+    def audience_queryset(audience, broker):
+        """
+        Applicants visible to ``broker`` matching ``audience``, annotated with
+        ``nudge_application_id`` (the application the nudge links to, if any).
+        """
+        from applicants.views import visible_applicants
+
+        if audience not in dict(NudgeCampaign.AUDIENCE_CHOICES):
+            raise ValueError(f"Unknown nudge audience: {audience}")
+
+        applications = NudgeCampaignService.target_applications(audience)
+        applicants = visible_applicants(broker).annotate(
+            nudge_application_id=Subquery(applications.values('pk')[:1])
+        )
+        if audience == 'incomplete_profile':
+            return applicants.filter(profile_completion_percentage__lt=100)
+        return applicants.filter(nudge_application_id__isnull=False)
+
+    @staticmethod
+    def start(broker, audience, channel='email', custom_message=''):
+        """
+        Record a campaign and dispatch its job once the request commits.
+        Returns (campaign, error); campaign is None when it cannot run.
+        """
+        if (audience, channel) not in VARIANTS:
+            return None, "Unknown audience or channel."
+        if not get_outbox_provider(channel).enabled:
+            return None, f"{channel.upper()} service not configured."
+
+        from users.models import User
+
+        with transaction.atomic():
+            # Serialize a broker's concurrent submits so the recent-campaign check holds
+            User.objects.select_for_update().filter(pk=broker.pk).first()
+            recent = NudgeCampaign.objects.filter(
+                broker=broker, audience=audience, channel=channel,
+                created_at__gte=timezone.now() - CAMPAIGN_COOLDOWN,
+            ).exclude(status='failed')
+            if recent.exists():
+                return None, "These reminders were just sent. Please wait a few minutes before sending them again."
+
+            campaign = NudgeCampaign.objects.create(
+                broker=broker, audience=audience, channel=channel, custom_message=custom_message or '',
+            )
+        transaction.on_commit(lambda: NudgeCampaignService.dispatch(campaign.pk))
+        return campaign, None
+
+    @staticmethod
+    def dispatch(campaign_id):
+        try:
+            from .tasks import run_nudge_campaign
+            run_nudge_campaign.apply_async(args=[campaign_id], retry=False)
+        except Exception as e:
+            # No broker available: run in-process rather than dropping the campaign
+            logger.warning(f"Could not queue nudge campaign {campaign_id}, running inline: {e}")
+            try:
+                NudgeCampaignService.run(campaign_id)
+            except Exception as e:
+                # Already recorded on the campaign; don't fail the request that committed it
+                logger.error(f"Inline nudge campaign {campaign_id} failed: {e}")
+
+    @staticmethod
+    def run(campaign_id):
+        """
+        Queue and log every nudge for a campaign in one transaction.
+        Campaigns already run (e.g. a retried task) are left untouched.
+        """
+        try:
+            with transaction.atomic():
+                campaign = (
+                    NudgeCampaign.objects.select_for_update().select_related('broker').get(pk=campaign_id)
+                )
+                if campaign.status != 'queued':
+                    return campaign
+                NudgeCampaignService._queue(campaign)
+                campaign.status = 'completed'
+                campaign.completed_at = timezone.now()
+                campaign.save(update_fields=['status', 'recipient_count', 'skipped_count', 'completed_at'])
+        except Exception as e:
+            logger.error(f"Nudge campaign {campaign_id} failed: {e}")
+            NudgeCampaign.objects.filter(pk=campaign_id, status='queued').update(
+                status='failed', error=str(e), completed_at=timezone.now()
+            )
+            raise
+
+        logger.info(
+            f"Nudge campaign {campaign.pk} queued {campaign.recipient_count} {campaign.channel} messages "
+            f"({campaign.skipped_count} skipped)"
+        )
+        return campaign
+
+    @staticmethod
+    def _queue(campaign):
+        broker = campaign.broker
+        applicants = list(
+            NudgeCampaignService.audience_queryset(campaign.audience, broker).select_related('user')
+        )
+        applications = Application.objects.select_related('apartment__building').in_bulk(
+            [applicant.nudge_application_id for applicant in applicants if applicant.nudge_application_id]
+        )
+
+        # Render each variant once; per-recipient values stay as placeholders
+        subject_template, body_template = compiled_variant(campaign.audience, campaign.channel)
+        context = Context({
+            **PLACEHOLDERS,
+            'broker_name': f"{broker.first_name} {broker.last_name}".strip() or broker.email,
+            'site_name': settings.SITE_NAME,
+            'custom_message': campaign.custom_message,
+        })
+        subject = subject_template.render(context).strip()
+        body = body_template.render(context).strip()
+
+        messages, recipients = [], []
+        for applicant in applicants:
+            contact = applicant.email if campaign.channel == 'email' else applicant.phone_number
+            if not contact:
+                continue
+            application = applications.get(applicant.nudge_application_id)
+            if application:
+                link = application_completion_url(application)
+                property_display = get_property_display(application)
+            else:
+                link = f"{settings.SITE_URL}{reverse('progressive_profile')}"
+                property_display = ''
+            messages.append(OutboxMessage(
+                channel=campaign.channel,
+                kind=f'nudge_campaign:{campaign.audience}',
+                idempotency_key=f'nudge-campaign:{campaign.pk}:{applicant.pk}',
+                recipients=[contact],
+                subject=subject,
+                body=body,
+                substitutions={
+                    PLACEHOLDERS['first_name']: applicant.first_name or '',
+                    PLACEHOLDERS['link']: link,
+                    PLACEHOLDERS['property']: property_display,
+                },
+            ))
+            recipients.append((applicant, application))
+
+        Outbox.enqueue_bulk(messages)
+        NudgeCampaignService._log(campaign, recipients)
+
+        campaign.recipient_count = len(messages)
+        campaign.skipped_count = len(applicants) - len(messages)
+
+    @staticmethod
+    def _log(campaign, recipients):
+        """Write the CRM interaction and application activity rows in bulk."""
+        applicant_ids = [applicant.pk for applicant, _ in recipients]
+        ApplicantCRM.objects.bulk_create(
+            [ApplicantCRM(applicant_id=pk) for pk in applicant_ids], ignore_conflicts=True
+        )
+        crm_ids = dict(
+            ApplicantCRM.objects.filter(applicant_id__in=applicant_ids).values_list('applicant_id', 'id')
+        )
+
+        label = campaign.get_audience_display()
+        note = f"[{campaign.channel.upper()} SENT] {campaign.custom_message or 'Standard Nudge'} ({label} campaign)"
+        InteractionLog.objects.bulk_create(
+            [
+                InteractionLog(crm_id=crm_ids[pk], broker=campaign.broker, note=note, is_message=True)
+                for pk in applicant_ids
+            ],
+            batch_size=500,
+        )
+        ApplicationActivity.objects.bulk_create(
+            [
+                ApplicationActivity(
+                    application=application,
+                    description=f"{label} reminder sent by {campaign.broker.email} via {campaign.channel.upper()}",
+                )
+                for _, application in recipients if application
+            ],
+            batch_size=500,
+        )
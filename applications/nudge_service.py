@@ -1,18 +1,27 @@
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 from .models import ApplicationActivity
+from .outbox import Outbox, get_outbox_provider
 from applicants.models import InteractionLog, ApplicantCRM
-from applications.sms_utils import SMSBackend
+import hashlib
 
 class NudgeService:
     """
     Service for sending reminders (nudges) to applicants
     to complete their applications or upload documents.
-    Supports both Email and SMS.
+    Supports both Email and SMS. Messages are queued in the outbox together
+    with the CRM log entry and delivered by background workers.
     """
 
+    @staticmethod
+    def _idempotency_key(channel, applicant, user, text):
+        """Same nudge from the same broker within a minute (e.g. a double submit) is queued once"""
+        digest = hashlib.sha256(text.encode()).hexdigest()[:12]
+        minute = timezone.now().strftime('%Y%m%d%H%M')
+        return f"nudge-{channel}:{applicant.id}:{getattr(user, 'id', None)}:{minute}:{digest}"
+
     @staticmethod
     def send_nudge(target, user, nudge_type='email', custom_message=None):
         """
@@ -77,16 +86,14 @@ Best regards,
 """
 
         try:
-            send_mail(
-                subject,
-                message_body,
-                settings.DEFAULT_FROM_EMAIL,
-                [applicant.email],
-                fail_silently=False,
-            )
-            
-            # Log activity
-            NudgeService._log_interaction(applicant, user, "EMAIL", custom_message or "Standard Nudge")
+            # Queue the email and log it atomically; delivery happens in a worker
+            with transaction.atomic():
+                queued = Outbox.enqueue_email(
+                    'nudge', applicant.email, subject, message_body,
+                    idempotency_key=NudgeService._idempotency_key('email', applicant, user, message_body),
+                )
+                if queued.created:  # A deduped double submit was already logged
+                    NudgeService._log_interaction(applicant, user, "EMAIL", custom_message or "Standard Nudge")
             return True, None
         except Exception as e:
             return False, str(e)
@@ -96,8 +103,7 @@ Best regards,
         if not applicant.phone_number:
             return False, "Applicant has no phone number."
             
-        sms_backend = SMSBackend()
-        if not sms_backend.enabled:
+        if not get_outbox_provider('sms').enabled:
             return False, "SMS service not configured."
 
         message = custom_message
@@ -105,26 +111,31 @@ Best regards,
             context_str = f" for {application.get_address_display()}" if application else ""
             message = f"{settings.SITE_NAME}: Hi {applicant.first_name}, reminder from {user.first_name}{context_str}. Please check your email for details."
 
-        success, result = sms_backend.send_sms(applicant.phone_number, message)
-        
-        if success:
-            NudgeService._log_interaction(applicant, user, "SMS", message)
+        try:
+            with transaction.atomic():
+                queued = Outbox.enqueue_sms(
+                    'nudge', applicant.phone_number, message,
+                    idempotency_key=NudgeService._idempotency_key('sms', applicant, user, message),
+                )
+                if queued.created:
+                    NudgeService._log_interaction(applicant, user, "SMS", message)
             return True, None
-        else:
-            return False, result
+        except Exception as e:
+            return False, str(e)
 
     @staticmethod
     def _log_interaction(applicant, user, method, message):
         """Log the interaction to CRM"""
         try:
-            crm, _ = ApplicantCRM.objects.get_or_create(applicant=applicant)
-            InteractionLog.objects.create(
-                crm=crm,
-                broker=user,
-                note=f"[{method} SENT] {message}",
-                created_at=timezone.now(),
-                is_message=True
-            )
+            with transaction.atomic():
+                crm, _ = ApplicantCRM.objects.get_or_create(applicant=applicant)
+                InteractionLog.objects.create(
+                    crm=crm,
+                    broker=user,
+                    note=f"[{method} SENT] {message}",
+                    created_at=timezone.now(),
+                    is_message=True
+                )
         except Exception as e:
             print(f"Error logging interaction: {e}")
 
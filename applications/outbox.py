@@ -0,0 +1,441 @@
+"""
+Transactional Outbox
+====================
+
+Email and SMS delivery moved out of the web request.
+
+Callers enqueue an OutboxMessage inside the same database transaction as the
+business event (nudge logged, inquiry saved, application link re-sent). Once
+that transaction commits, a Celery task is kicked to drain the outbox; a
+periodic beat task drains anything the kick missed. The request itself never
+waits on SendGrid or Twilio.
+
+Delivery guarantees:
+- Idempotency keys: enqueueing the same key twice (double-clicks, retried
+  requests) yields one message
+- Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+  workers never deliver the same row
+- Failures retry with exponential backoff up to OUTBOX_MAX_ATTEMPTS; claims
+  abandoned by a crashed worker are released after OUTBOX_CLAIM_TIMEOUT
+- Each provider declares max_concurrency; at most that many workers drain its
+  channel at once
+
+Providers are configured by dotted path (OUTBOX_EMAIL_PROVIDER,
+OUTBOX_SMS_PROVIDER). FakeOutboxProvider records messages locally for tests
+and offline development.
+
+Retention: messages of REDACTED_KINDS (one-time codes) have their subject and
+body blanked as soon as they are sent or fail for good, and purge_finished()
+(run nightly) deletes sent and failed rows after OUTBOX_RETENTION_DAYS.
+
+Bulk messages (nudge campaigns) share one rendered subject/body and carry
+per-recipient ``substitutions``; SendGridBatchEmailProvider sends such groups
+as one API call with a personalization per recipient, other providers apply
+the substitutions locally.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional, Sequence, Tuple
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDERS = {
+    'email': 'applications.outbox.DjangoEmailProvider',
+    'sms': 'applications.outbox.TwilioSMSProvider',
+}
+
+# Delivery result per message: (success, provider message id or error)
+SendResult = Tuple[bool, str]
+
+# Kinds whose content is a secret: blanked once delivery is finished
+REDACTED_KINDS = {'otp'}
+
+
+class OutboxProvider:
+    """
+    Base class for outbox delivery providers.
+    send_batch() receives a claimed batch and returns one SendResult per
+    message, in order; it should reuse one connection/client for the batch.
+    """
+    name = 'base'
+    max_concurrency = 2  # Workers allowed to drain this provider's channel at once
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def send_batch(self, messages: Sequence) -> List[SendResult]:
+        raise NotImplementedError
+
+
+class DjangoEmailProvider(OutboxProvider):
+    """Delivers through the configured EMAIL_BACKEND (SendGrid, Mailgun, SES or console)."""
+    name = 'email'
+    max_concurrency = 4
+
+    def send_batch(self, messages):
+        results = []
+        with get_connection(fail_silently=False) as connection:
+            for message in messages:
+                email = EmailMultiAlternatives(
+                    subject=message.personalize(message.subject),
+                    body=message.personalize(message.body),
+                    from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                    to=message.recipients,
+                    headers={'X-Idempotency-Key': message.idempotency_key},
+                    connection=connection,
+                )
+                if message.html_body:
+                    email.attach_alternative(message.personalize(message.html_body), 'text/html')
+                try:
+                    sent = connection.send_messages([email])
+                    results.append((True, '') if sent else (False, 'Provider accepted no messages'))
+                except Exception as e:
+                    results.append((False, str(e)))
+        return results
+
+
+class SendGridBatchEmailProvider(OutboxProvider):
+    """
+    Delivers through the SendGrid v3 API, one request per group of messages
+    sharing a subject/body (up to PERSONALIZATIONS_PER_REQUEST recipients),
+    with each message's recipients and substitutions as a personalization.
+    """
+    name = 'sendgrid'
+    max_concurrency = 4
+    PERSONALIZATIONS_PER_REQUEST = 1000  # SendGrid API limit
+
+    def __init__(self):
+        self.client = None
+        if getattr(settings, 'SENDGRID_API_KEY', ''):
+            try:
+                import sendgrid
+                self.client = sendgrid.SendGridAPIClient(api_key=settings.SENDGRID_API_KEY)
+            except ImportError:
+                logger.error("SendGrid package not installed. Run: pip install sendgrid")
+
+    @property
+    def enabled(self):
+        return self.client is not None
+
+    def send_batch(self, messages):
+        groups = defaultdict(list)
+        for index, message in enumerate(messages):
+            groups[(message.subject, message.body, message.html_body, message.from_email)].append(index)
+
+        results = [None] * len(messages)
+        for content, indexes in groups.items():
+            for start in range(0, len(indexes), self.PERSONALIZATIONS_PER_REQUEST):
+                chunk = indexes[start:start + self.PERSONALIZATIONS_PER_REQUEST]
+                result = self._send_group(content, [messages[index] for index in chunk])
+                for index in chunk:
+                    results[index] = result
+        return results
+
+    def _send_group(self, content, messages) -> SendResult:
+        from sendgrid.helpers.mail import CustomArg, Mail, Personalization, Substitution, To
+
+        subject, body, html_body, from_email = content
+        mail = Mail(
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            subject=subject,
+            plain_text_content=body,
+            html_content=html_body or None,
+        )
+        for message in messages:
+            personalization = Personalization()
+            for recipient in message.recipients:
+                personalization.add_to(To(recipient))
+            for placeholder, value in message.substitutions.items():
+                personalization.add_substitution(Substitution(placeholder, str(value)))
+            personalization.add_custom_arg(CustomArg('idempotency_key', message.idempotency_key))
+            mail.add_personalization(personalization)
+
+        try:
+            response = self.client.send(mail)
+        except Exception as e:
+            return False, str(e)
+        if response.status_code in (200, 201, 202):
+            return True, response.headers.get('X-Message-Id', '')
+        return False, f"SendGrid returned {response.status_code}"
+
+
+class TwilioSMSProvider(OutboxProvider):
+    """
+    Delivers through Twilio. Twilio has no batch endpoint, so a batch is sent
+    by a small thread pool (OUTBOX_SMS_POOL_SIZE) sharing one client.
+    """
+    name = 'twilio'
+    max_concurrency = 2
+
+    def __init__(self):
+        from .sms_utils import SMSBackend
+        self.backend = SMSBackend()
+
+    @property
+    def enabled(self):
+        return self.backend.enabled
+
+    def send_batch(self, messages):
+        pool_size = min(getattr(settings, 'OUTBOX_SMS_POOL_SIZE', 4), len(messages))
+        if pool_size <= 1:
+            return [self._send(message) for message in messages]
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            return list(pool.map(self._send, messages))
+
+    def _send(self, message) -> SendResult:
+        return self.backend.send_sms(message.recipients[0], message.personalize(message.body))
+
+
+class FakeOutboxProvider(OutboxProvider):
+    """
+    Offline provider for tests and local development.
+    Delivered messages are appended to FakeOutboxProvider.sent; recipients
+    listed in fail_recipients fail delivery.
+    """
+    name = 'fake'
+    max_concurrency = 1
+    sent = []
+    fail_recipients = set()
+
+    @classmethod
+    def reset(cls):
+        cls.sent = []
+        cls.fail_recipients = set()
+
+    def send_batch(self, messages):
+        results = []
+        for message in messages:
+            if set(message.recipients) & self.fail_recipients:
+                results.append((False, 'Simulated provider failure'))
+                continue
+            FakeOutboxProvider.sent.append(message)
+            results.append((True, f'fake-{message.pk}'))
+        return results
+
+
+def get_outbox_provider(channel: str) -> OutboxProvider:
+    """Instantiate the configured provider for a channel (OUTBOX_<CHANNEL>_PROVIDER dotted path)."""
+    path = getattr(settings, f'OUTBOX_{channel.upper()}_PROVIDER', '') or DEFAULT_PROVIDERS[channel]
+    return import_string(path)()
+
+
+class Outbox:
+    """
+    Enqueue messages for asynchronous delivery.
+
+    Usage:
+        with transaction.atomic():
+            inquiry.save()
+            Outbox.enqueue_email('broker_contact', [broker_email], subject, body,
+                                 idempotency_key=f'broker-contact:{inquiry.pk}')
+
+    Each enqueue returns the message; its ``created`` attribute is False when
+    the idempotency key was already queued (nothing new was recorded).
+    """
+
+    @staticmethod
+    def enqueue_email(kind, to, subject, body, html_body='', from_email='', idempotency_key=None):
+        recipients = [to] if isinstance(to, str) else list(to)
+        return Outbox._enqueue(
+            'email', kind, idempotency_key,
+            recipients=recipients, subject=subject, body=body, html_body=html_body, from_email=from_email,
+        )
+
+    @staticmethod
+    def enqueue_sms(kind, to, body, idempotency_key=None):
+        return Outbox._enqueue('sms', kind, idempotency_key, recipients=[to], body=body)
+
+    @staticmethod
+    def _enqueue(channel, kind, idempotency_key, **fields):
+        from .models import OutboxMessage
+
+        key = idempotency_key or f'{kind}:{uuid.uuid4()}'
+        try:
+            # Savepoint, so a duplicate key doesn't break the caller's transaction
+            with transaction.atomic():
+                message = OutboxMessage.objects.create(
+                    channel=channel, kind=kind, idempotency_key=key,
+                    **{name: value for name, value in fields.items() if value is not None},
+                )
+        except IntegrityError:
+            logger.info(f"Outbox message {key} already queued")
+            message = OutboxMessage.objects.get(idempotency_key=key)
+            message.created = False
+            return message
+
+        message.created = True
+        transaction.on_commit(lambda: Outbox.kick(channel))
+        return message
+
+    @staticmethod
+    def enqueue_bulk(messages, batch_size=500):
+        """
+        Insert prepared (unsaved) OutboxMessage rows in batches. Rows whose
+        idempotency key already exists are skipped, so re-running a job
+        cannot queue duplicates. Workers are kicked once per channel on commit.
+        """
+        from .models import OutboxMessage
+
+        OutboxMessage.objects.bulk_create(messages, batch_size=batch_size, ignore_conflicts=True)
+        for channel in {message.channel for message in messages}:
+            transaction.on_commit(lambda channel=channel: Outbox.kick(channel))
+
+    @staticmethod
+    def kick(channel: str):
+        """Ask a worker to drain ``channel`` now; the periodic drain is the fallback."""
+        try:
+            from .tasks import drain_outbox
+            drain_outbox.apply_async(kwargs={'channel': channel}, retry=False)
+        except Exception as e:
+            logger.warning(f"Could not dispatch outbox drain for {channel}, leaving it to the periodic drain: {e}")
+
+    @staticmethod
+    def purge_finished(days: Optional[int] = None) -> int:
+        """Delete sent and failed messages older than ``days`` (default OUTBOX_RETENTION_DAYS)."""
+        from .models import OutboxMessage
+
+        days = days if days is not None else getattr(settings, 'OUTBOX_RETENTION_DAYS', 30)
+        deleted, _ = OutboxMessage.objects.filter(
+            status__in=['sent', 'failed'], created_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        if deleted:
+            logger.info(f"Purged {deleted} delivered or failed outbox messages")
+        return deleted
+
+    @staticmethod
+    def time_until_next_attempt(attempts: int) -> timedelta:
+        """Exponential backoff: 30s, 60s, 120s ... capped at one hour."""
+        return timedelta(seconds=min(30 * 2 ** max(attempts - 1, 0), 3600))
+
+
+class OutboxWorker:
+    """
+    Drain pending outbox messages for one channel in claimed batches.
+    """
+
+    @staticmethod
+    def drain(channel: str, batch_size: Optional[int] = None, max_batches: int = 20) -> dict:
+        provider = get_outbox_provider(channel)
+        stats = {'channel': channel, 'sent': 0, 'retrying': 0, 'failed': 0, 'skipped': False}
+        if not provider.enabled:
+            logger.warning(f"Outbox provider {provider.name} for {channel} is not configured")
+            stats['skipped'] = True
+            return stats
+
+        slot = OutboxWorker._acquire_slot(channel, provider.max_concurrency)
+        if slot is None:
+            # Enough workers are already draining this provider
+            stats['skipped'] = True
+            return stats
+
+        try:
+            OutboxWorker._release_stale_claims(channel)
+            batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+            for _ in range(max_batches):
+                batch = OutboxWorker._claim(channel, batch_size)
+                if not batch:
+                    break
+                try:
+                    results = provider.send_batch(batch)
+                except Exception as e:
+                    logger.error(f"Outbox provider {provider.name} failed a batch of {len(batch)}: {e}")
+                    results = [(False, str(e))] * len(batch)
+                for key, count in OutboxWorker._record(batch, results).items():
+                    stats[key] += count
+        finally:
+            cache.delete(slot)
+
+        if stats['sent'] or stats['failed']:
+            logger.info(
+                f"Outbox {channel}: {stats['sent']} sent, {stats['retrying']} retrying, {stats['failed']} failed"
+            )
+        return stats
+
+    @staticmethod
+    def _acquire_slot(channel, limit):
+        timeout = getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 300)
+        for index in range(max(limit, 1)):
+            key = f'outbox:slot:{channel}:{index}'
+            if cache.add(key, True, timeout):
+                return key
+        return None
+
+    @staticmethod
+    def _release_stale_claims(channel):
+        from .models import OutboxMessage
+
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 300))
+        released = OutboxMessage.objects.filter(
+            channel=channel, status='sending', claimed_at__lt=cutoff
+        ).update(status='pending', claimed_at=None)
+        if released:
+            logger.warning(f"Released {released} abandoned {channel} outbox claims")
+
+    @staticmethod
+    def _claim(channel, batch_size):
+        from .models import OutboxMessage
+
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(channel=channel, status='pending', available_at__lte=now)
+                .order_by('available_at', 'id')[:batch_size]
+            )
+            if batch:
+                OutboxMessage.objects.filter(pk__in=[message.pk for message in batch]).update(
+                    status='sending', claimed_at=now
+                )
+        return batch
+
+    @staticmethod
+    def _record(batch, results):
+        from .models import OutboxMessage
+
+        now = timezone.now()
+        max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+        counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+        for message, (ok, detail) in zip(batch, results):
+            message.attempts += 1
+            message.claimed_at = None
+            if ok:
+                message.status = 'sent'
+                message.sent_at = now
+                message.provider_message_id = detail or ''
+                message.last_error = ''
+                counts['sent'] += 1
+            elif message.attempts >= max_attempts:
+                message.status = 'failed'
+                message.last_error = detail or ''
+                counts['failed'] += 1
+                logger.error(f"Outbox message {message.idempotency_key} failed permanently: {detail}")
+            else:
+                message.status = 'pending'
+                message.available_at = now + Outbox.time_until_next_attempt(message.attempts)
+                message.last_error = detail or ''
+                counts['retrying'] += 1
+        OutboxMessage.objects.bulk_update(
+            batch,
+            ['status', 'attempts', 'claimed_at', 'sent_at', 'provider_message_id', 'last_error', 'available_at'],
+        )
+        finished_secrets = [
+            message.pk for message in batch
+            if message.kind in REDACTED_KINDS and message.status in ('sent', 'failed')
+        ]
+        if finished_secrets:
+            OutboxMessage.objects.filter(pk__in=finished_secrets).update(
+                subject='', body='', html_body='', substitutions={}
+            )
+        return counts
@@ -1,15 +1,143 @@
+"""
+Sola Payment Gateway
+====================
+
+Card payments for application fees.
+
+Gateway calls go through one keep-alive session per process
+(SOLA_POOL_SIZE pooled connections) instead of a new connection per call,
+with separate connect (SOLA_CONNECT_TIMEOUT) and read (SOLA_TIMEOUT)
+timeouts. Every gateway command moves money, so retries are limited to
+requests that were never sent (connection could not be opened); a request
+that was sent but got no answer is reported as an unknown outcome, never
+retried.
+
+Double-submits cannot double-charge: PaymentProcessor locks the
+ApplicationPayment row, marks it PROCESSING with an idempotency key and only
+then calls the gateway. A concurrent submit sees the payment completed or in
+progress. The gateway does not deduplicate sales, so the key (sent as
+xCustom01) is only used to find the attempt in the gateway's transaction
+report. An attempt with an unknown outcome stays PROCESSING until
+SOLA_PROCESSING_TIMEOUT passes; the next submit then looks it up instead of
+charging again:
+- approved in the report: the payment is completed with that transaction
+- absent or declined: the payment is marked FAILED and may be resubmitted
+- report unavailable: the payment is marked NEEDS_REVIEW for staff; no sale
+  is ever sent for it automatically
+
+Stale attempts are also settled without any submit: the periodic
+reconcile_stale_payments task, the payment page itself (on GET) and the
+admin "Reconcile with the processor" action all run reconcile_payment.
+
+Per-action latency (sale, refund, void) is logged and counted in the cache;
+see gateway_latency_summary().
+"""
+
 import logging
 import json
+import threading
 import time
+import uuid
+from datetime import timedelta
 from decimal import Decimal
 from typing import Dict, Optional, Tuple
-from urllib.parse import urlencode
+from urllib.parse import parse_qsl
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+LATENCY_CACHE_PREFIX = 'payments:gateway_latency'
+LATENCY_CACHE_TTL = 60 * 60 * 24 * 7
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_gateway_session() -> requests.Session:
+    """Process-wide keep-alive session for gateway calls, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Connect errors only: a request that never reached the gateway is safe to resend
+                retries = Retry(
+                    total=settings.SOLA_CONNECT_RETRIES, connect=settings.SOLA_CONNECT_RETRIES,
+                    read=0, status=0, other=0, redirect=0, backoff_factor=0.2, raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=settings.SOLA_POOL_SIZE, max_retries=retries,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                _session = session
+    return _session
+
+
+def reset_gateway_session():
+    """Close pooled connections (e.g. after settings change in tests)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _request_was_sent(error: requests.exceptions.RequestException) -> bool:
+    """False only when the connection could not be opened, so the gateway never saw the request."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return not isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    return True
+
+
+def record_gateway_latency(action: str, elapsed: float, ok: bool):
+    """Count a gateway call and its latency under ``action``."""
+    elapsed_ms = int(elapsed * 1000)
+    logger.info(f"Sola {action} took {elapsed_ms}ms ({'ok' if ok else 'error'})")
+    counters = {'count': 1, 'total_ms': elapsed_ms, 'errors': 0 if ok else 1}
+    try:
+        for name, value in counters.items():
+            key = f"{LATENCY_CACHE_PREFIX}:{action}:{name}"
+            if not cache.add(key, value, LATENCY_CACHE_TTL):
+                cache.incr(key, value)
+    except Exception as e:
+        logger.warning(f"Could not record gateway latency: {e}")
+
+
+def gateway_latency_summary(actions=('sale', 'refund', 'void')) -> Dict[str, Dict]:
+    """{action: {'count', 'errors', 'avg_ms'}} from the cache counters."""
+    keys = [f"{LATENCY_CACHE_PREFIX}:{action}:{name}" for action in actions for name in ('count', 'total_ms', 'errors')]
+    try:
+        values = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"Could not read gateway latency: {e}")
+        values = {}
+    summary = {}
+    for action in actions:
+        count = values.get(f"{LATENCY_CACHE_PREFIX}:{action}:count", 0)
+        total_ms = values.get(f"{LATENCY_CACHE_PREFIX}:{action}:total_ms", 0)
+        summary[action] = {
+            'count': count,
+            'errors': values.get(f"{LATENCY_CACHE_PREFIX}:{action}:errors", 0),
+            'avg_ms': round(total_ms / count) if count else None,
+        }
+    return summary
+
+
 class SolaPaymentGateway:
     """
     Sola (formerly Cardknox) payment gateway integration.
@@ -28,12 +156,16 @@ class SolaPaymentGateway:
     COMMAND_REFUND = 'cc:refund'
     COMMAND_VOID = 'cc:void'
     COMMAND_SAVE = 'cc:save'
+    COMMAND_REPORT = 'report:transactions'
     
     def __init__(self):
         """Initialize with settings from Django config"""
         self.api_key = getattr(settings, 'SOLA_API_KEY', '')
         self.api_url = getattr(settings, 'SOLA_API_URL', 'https://x1.cardknox.com/gateway')
-        self.timeout = getattr(settings, 'SOLA_TIMEOUT', 30)
+        self.timeout = (
+            getattr(settings, 'SOLA_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'SOLA_TIMEOUT', 30),
+        )
         self.is_sandbox = getattr(settings, 'SOLA_SANDBOX_MODE', True)
         
         if not self.api_key:
@@ -51,38 +183,42 @@ class SolaPaymentGateway:
         logger.info(f"Sola {action} - Request: {safe_request}")
         logger.info(f"Sola {action} - Response: {response_data}")
     
-    def _make_request(self, data: Dict) -> Dict:
-        """Make HTTP request to Sola API"""
+    def _make_request(self, data: Dict, action: str = 'request') -> Dict:
+        """
+        Make HTTP request to Sola API over the pooled session.
+        Errors come back as an xResult=E response; ``outcome_unknown`` is set
+        when the request may have reached the gateway before failing.
+        """
         # Add API key to all requests
         data['xKey'] = self.api_key
         data['xVersion'] = '5.0.0'
         data['xSoftwareName'] = 'DoorWay'
         data['xSoftwareVersion'] = '1.0'
         
+        started = time.monotonic()
+        ok = False
         try:
-            response = requests.post(
-                self.api_url,
-                data=data,
-                timeout=self.timeout,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'}
-            )
+            response = get_gateway_session().post(self.api_url, data=data, timeout=self.timeout)
             response.raise_for_status()
             
             # Parse form-encoded response
-            result = {}
-            for line in response.text.split('&'):
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    result[key] = value
-            
+            result = dict(parse_qsl(response.text, keep_blank_values=True))
+            ok = True
             return result
             
-        except requests.exceptions.Timeout:
-            logger.error(f"Sola API timeout after {self.timeout} seconds")
-            return {'xResult': self.RESULT_ERROR, 'xError': 'Gateway timeout'}
+        except requests.exceptions.Timeout as e:
+            logger.error(f"Sola API timeout ({action}): {e}")
+            return {'xResult': self.RESULT_ERROR, 'xError': 'Gateway timeout', 'outcome_unknown': _request_was_sent(e)}
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"Sola API returned an error ({action}): {e}")
+            # A 5xx (e.g. a 502/504 from a proxy) may come after the gateway acted; a 4xx means it refused
+            outcome_unknown = e.response is None or e.response.status_code >= 500
+            return {'xResult': self.RESULT_ERROR, 'xError': str(e), 'outcome_unknown': outcome_unknown}
         except requests.exceptions.RequestException as e:
-            logger.error(f"Sola API request failed: {e}")
-            return {'xResult': self.RESULT_ERROR, 'xError': str(e)}
+            logger.error(f"Sola API request failed ({action}): {e}")
+            return {'xResult': self.RESULT_ERROR, 'xError': str(e), 'outcome_unknown': _request_was_sent(e)}
+        finally:
+            record_gateway_latency(action, time.monotonic() - started, ok)
     
     def process_payment(
         self,
@@ -94,10 +230,13 @@ class SolaPaymentGateway:
         cardholder_name: str,
         email: str,
         invoice_number: str = None,
-        save_card: bool = False
+        save_card: bool = False,
+        idempotency_key: str = ''
     ) -> Tuple[bool, Dict]:
         """
         Process a credit card payment.
+        ``idempotency_key`` is sent as xCustom01 so the attempt can be found
+        with find_sale(); the gateway does not deduplicate on it.
         
         Returns:
             Tuple of (success: bool, response_data: dict)
@@ -117,6 +256,8 @@ class SolaPaymentGateway:
             'xInvoice': invoice_number or f"APP-{int(time.time())}",
             'xDescription': 'Rental Application Fee',
         }
+        if idempotency_key:
+            request_data['xCustom01'] = idempotency_key
         
         # Add tokenization if requested
         if save_card:
@@ -124,7 +265,7 @@ class SolaPaymentGateway:
             request_data['xTokenize'] = 'TRUE'
         
         # Make API request
-        response = self._make_request(request_data)
+        response = self._make_request(request_data, 'sale')
         
         # Log transaction
         self._log_transaction('PAYMENT', request_data, response)
@@ -143,6 +284,7 @@ class SolaPaymentGateway:
             'response_text': response.get('xStatus', response.get('xError', 'Unknown error')),
             'avs_result': response.get('xAvsResult', ''),
             'cvv_result': response.get('xCvvResult', ''),
+            'outcome_unknown': response.get('outcome_unknown', False),
             'raw_response': response
         }
         
@@ -152,7 +294,8 @@ class SolaPaymentGateway:
         self,
         amount: Decimal,
         card_token: str,
-        invoice_number: str = None
+        invoice_number: str = None,
+        idempotency_key: str = ''
     ) -> Tuple[bool, Dict]:
         """
         Process payment using a saved card token.
@@ -164,8 +307,10 @@ class SolaPaymentGateway:
             'xInvoice': invoice_number or f"APP-{int(time.time())}",
             'xDescription': 'Rental Application Fee',
         }
+        if idempotency_key:
+            request_data['xCustom01'] = idempotency_key
         
-        response = self._make_request(request_data)
+        response = self._make_request(request_data, 'sale')
         self._log_transaction('TOKENIZED_PAYMENT', request_data, response)
         
         success = response.get('xResult') == self.RESULT_APPROVED
@@ -176,6 +321,7 @@ class SolaPaymentGateway:
             'auth_code': response.get('xAuthCode', ''),
             'response_code': response.get('xResult', ''),
             'response_text': response.get('xStatus', response.get('xError', 'Unknown error')),
+            'outcome_unknown': response.get('outcome_unknown', False),
             'raw_response': response
         }
         
@@ -203,7 +349,7 @@ class SolaPaymentGateway:
         if reason:
             request_data['xDescription'] = reason[:100]  # Limit length
         
-        response = self._make_request(request_data)
+        response = self._make_request(request_data, 'refund')
         self._log_transaction('REFUND', request_data, response)
         
         success = response.get('xResult') == self.RESULT_APPROVED
@@ -227,7 +373,7 @@ class SolaPaymentGateway:
             'xRefNum': transaction_id,
         }
         
-        response = self._make_request(request_data)
+        response = self._make_request(request_data, 'void')
         self._log_transaction('VOID', request_data, response)
         
         success = response.get('xResult') == self.RESULT_APPROVED
@@ -241,6 +387,37 @@ class SolaPaymentGateway:
         
         return success, result
     
+    def find_sale(self, invoice_number: str, idempotency_key: str, since) -> Tuple[Optional[bool], Dict]:
+        """
+        Look up a sale sent with ``idempotency_key`` in the transaction report.
+
+        Returns (approved, record): (True, record) for an approved sale,
+        (False, {}) when the report has no approved sale for the key, and
+        (None, {}) when the report could not be read.
+        """
+        request_data = {
+            'xCommand': self.COMMAND_REPORT,
+            'xBeginDate': (since - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
+            'xEndDate': (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'),
+            'xInvoice': invoice_number,
+        }
+        response = self._make_request(request_data, 'report')
+        if response.get('xResult') != self.RESULT_APPROVED:
+            logger.error(f"Sola report lookup for {idempotency_key} failed: {response.get('xError', 'Unknown error')}")
+            return None, {}
+        try:
+            records = json.loads(response.get('xReportData') or '[]')
+        except ValueError:
+            logger.error(f"Sola report lookup for {idempotency_key} returned unreadable data")
+            return None, {}
+        
+        for record in records:
+            if record.get('xCustom01') != idempotency_key:
+                continue
+            if str(record.get('xResponseResult', '')).lower() in ('approved', self.RESULT_APPROVED.lower()):
+                return True, record
+        return False, {}
+    
     def validate_card(self, card_number: str) -> bool:
         """
         Validate card number using Luhn algorithm.
@@ -291,6 +468,154 @@ class PaymentProcessor:
     def __init__(self):
         self.gateway = SolaPaymentGateway()
     
+    @staticmethod
+    def get_or_create_payment(application, amount: Optional[Decimal] = None):
+        """Application's payment record, created PENDING on first use (safe under concurrent requests)."""
+        from .models import ApplicationPayment, PaymentStatus
+        
+        defaults = {
+            'amount': amount or application.application_fee_amount,
+            'status': PaymentStatus.PENDING
+        }
+        try:
+            with transaction.atomic():
+                payment, _ = ApplicationPayment.objects.get_or_create(application=application, defaults=defaults)
+        except IntegrityError:
+            # Another request created it between our lookup and insert
+            payment = ApplicationPayment.objects.get(application=application)
+        return payment
+    
+    def _start_attempt(self, application, amount: Optional[Decimal]):
+        """
+        Lock the payment row and claim it for a charge attempt.
+        Returns (payment, message); message is set when no charge should be made.
+        """
+        from .models import ApplicationPayment, PaymentStatus
+        
+        self.get_or_create_payment(application, amount)
+        with transaction.atomic():
+            payment = ApplicationPayment.objects.select_for_update().get(application=application)
+            
+            # Don't process if already paid
+            if payment.status == PaymentStatus.COMPLETED:
+                return payment, "Payment already processed"
+            
+            if payment.status in (PaymentStatus.PROCESSING, PaymentStatus.NEEDS_REVIEW):
+                return payment, "Your payment is already being processed. Please wait a moment and refresh this page."
+            
+            # First attempt, or a new one after a failure
+            payment.idempotency_key = uuid.uuid4().hex
+            payment.status = PaymentStatus.PROCESSING
+            payment.save(update_fields=['status', 'idempotency_key', 'updated_at'])
+        return payment, None
+    
+    def _needs_reconciliation(self, payment) -> bool:
+        """An earlier attempt whose outcome is still unknown and no longer in flight."""
+        from .models import PaymentStatus
+        
+        if payment.status == PaymentStatus.NEEDS_REVIEW:
+            return True
+        stale_after = timedelta(seconds=settings.SOLA_PROCESSING_TIMEOUT)
+        return payment.status == PaymentStatus.PROCESSING and payment.updated_at <= timezone.now() - stale_after
+    
+    @staticmethod
+    def stale_payments():
+        """Payments awaiting reconciliation: NEEDS_REVIEW, or PROCESSING past SOLA_PROCESSING_TIMEOUT."""
+        from .models import ApplicationPayment, PaymentStatus
+        
+        cutoff = timezone.now() - timedelta(seconds=settings.SOLA_PROCESSING_TIMEOUT)
+        return ApplicationPayment.objects.filter(
+            Q(status=PaymentStatus.NEEDS_REVIEW) | Q(status=PaymentStatus.PROCESSING, updated_at__lte=cutoff)
+        )
+    
+    def reconcile_stale_payments(self, limit: int = 100) -> Dict[str, int]:
+        """Reconcile up to ``limit`` stale payments, oldest first. Returns counts by outcome."""
+        from .models import PaymentStatus
+        
+        counts = {'completed': 0, 'failed': 0, 'unresolved': 0}
+        stale = self.stale_payments().select_related('application').order_by('updated_at')[:limit]
+        for payment in stale:
+            try:
+                success, _ = self.reconcile_payment(payment.application)
+            except Exception as e:
+                logger.error(f"Could not reconcile payment {payment.idempotency_key}: {e}")
+                counts['unresolved'] += 1
+                continue
+            payment.refresh_from_db(fields=['status'])
+            if success:
+                counts['completed'] += 1
+            elif payment.status == PaymentStatus.FAILED:
+                counts['failed'] += 1
+            else:
+                counts['unresolved'] += 1
+        return counts
+    
+    def _complete_payment(self, payment, application, transaction_id: str, payment_method: str = '',
+                          card_token: str = ''):
+        """Mark a payment and its application paid."""
+        from .models import PaymentStatus
+        
+        payment.status = PaymentStatus.COMPLETED
+        payment.transaction_id = transaction_id
+        if payment_method:
+            payment.payment_method = payment_method
+        payment.paid_at = timezone.now()
+        
+        # Store additional details
+        if card_token:
+            payment.payment_intent_id = card_token
+        
+        payment.save()
+        
+        # Update application status
+        application.payment_completed = True
+        application.payment_completed_at = timezone.now()
+        application.save()
+    
+    def reconcile_payment(self, application) -> Tuple[bool, str]:
+        """
+        Settle an attempt with an unknown outcome from the gateway's
+        transaction report. Never sends a sale.
+        """
+        from .models import ApplicationPayment, PaymentStatus
+        from .views import log_activity
+        
+        payment = ApplicationPayment.objects.get(application=application)
+        approved, record = self.gateway.find_sale(
+            invoice_number=f"APP-{application.id}",
+            idempotency_key=payment.idempotency_key,
+            since=payment.created_at,
+        )
+        
+        with transaction.atomic():
+            payment = ApplicationPayment.objects.select_for_update().get(pk=payment.pk)
+            if payment.status == PaymentStatus.COMPLETED:
+                return True, "Payment already processed"
+            if not self._needs_reconciliation(payment):
+                return False, "Your payment is already being processed. Please wait a moment and refresh this page."
+            
+            if approved:
+                self._complete_payment(payment, application, record.get('xRefNum', ''))
+                outcome = f"Payment confirmed by the processor - ${payment.amount}"
+                result = True, f"Payment of ${payment.amount} processed successfully"
+            elif approved is False:
+                payment.status = PaymentStatus.FAILED
+                payment.save(update_fields=['status', 'updated_at'])
+                outcome = "Earlier payment attempt was not charged by the processor"
+                result = False, "Your earlier payment attempt did not go through. Please submit your payment again."
+            else:
+                payment.status = PaymentStatus.NEEDS_REVIEW
+                payment.save(update_fields=['status', 'updated_at'])
+                outcome = f"Payment {payment.idempotency_key} could not be confirmed and needs review"
+                result = False, (
+                    "We could not confirm your earlier payment with the processor. "
+                    "Please do not resubmit; our team will review it and contact you."
+                )
+        
+        logger.warning(f"Reconciled payment {payment.idempotency_key} for application {application.id}: {outcome}")
+        log_activity(application, outcome)
+        return result
+    
     def process_application_payment(
         self,
         application,
@@ -308,20 +633,7 @@ class PaymentProcessor:
         Returns:
             Tuple of (success: bool, message: str)
         """
-        from .models import ApplicationPayment, PaymentStatus
-        
-        # Get or create payment record
-        payment, created = ApplicationPayment.objects.get_or_create(
-            application=application,
-            defaults={
-                'amount': amount or application.application_fee_amount,
-                'status': PaymentStatus.PENDING
-            }
-        )
-        
-        # Don't process if already paid
-        if payment.status == PaymentStatus.COMPLETED:
-            return True, "Payment already processed"
+        from .models import PaymentStatus
         
         # Extract card data
         card_number = card_data.get('card_number', '')
@@ -330,18 +642,28 @@ class PaymentProcessor:
         cvv = card_data.get('cvv', '')
         cardholder_name = card_data.get('cardholder_name', '')
         
+        # Validate card
+        if not self.gateway.validate_card(card_number):
+            payment = self.get_or_create_payment(application, amount)
+            if payment.status == PaymentStatus.COMPLETED:
+                return True, "Payment already processed"
+            return False, "Invalid card number"
+        
+        payment = self.get_or_create_payment(application, amount)
+        if self._needs_reconciliation(payment):
+            # An earlier sale may have gone through: look it up rather than charge again
+            return self.reconcile_payment(application)
+        
+        payment, message = self._start_attempt(application, amount)
+        if message:
+            return payment.status == PaymentStatus.COMPLETED, message
+        
         # Get email from application
         email = ''
         if hasattr(application, 'applicant') and application.applicant:
             email = application.applicant.email
         
-        # Validate card
-        if not self.gateway.validate_card(card_number):
-            payment.status = PaymentStatus.FAILED
-            payment.save()
-            return False, "Invalid card number"
-        
-        # Process payment
+        # Process payment (no lock held while waiting on the gateway)
         success, response = self.gateway.process_payment(
             amount=payment.amount,
             card_number=card_number,
@@ -351,41 +673,45 @@ class PaymentProcessor:
             cardholder_name=cardholder_name,
             email=email,
             invoice_number=f"APP-{application.id}",
-            save_card=card_data.get('save_card', False)
+            save_card=card_data.get('save_card', False),
+            idempotency_key=payment.idempotency_key
         )
         
+        from .views import log_activity
+        
         # Update payment record
         if success:
-            payment.status = PaymentStatus.COMPLETED
-            payment.transaction_id = response['transaction_id']
-            payment.payment_method = self.gateway.get_card_type(card_number)
-            payment.paid_at = timezone.now()
-            
-            # Store additional details
-            if response.get('card_token'):
-                payment.payment_intent_id = response['card_token']
-            
-            payment.save()
-            
-            # Update application status
-            application.payment_completed = True
-            application.payment_completed_at = timezone.now()
-            application.save()
+            self._complete_payment(
+                payment,
+                application,
+                response['transaction_id'],
+                payment_method=self.gateway.get_card_type(card_number),
+                card_token=response.get('card_token', ''),
+            )
             
             # Log activity
-            from .services import log_activity
             log_activity(
                 application,
                 f"Payment processed successfully - ${payment.amount}"
             )
             
             return True, f"Payment of ${payment.amount} processed successfully"
+        elif response.get('outcome_unknown'):
+            # The gateway may have charged the card: keep the attempt claimed
+            logger.error(f"Payment {payment.idempotency_key} for application {application.id} has an unknown outcome")
+            log_activity(
+                application,
+                f"Payment outcome unknown: {response.get('response_text', 'Gateway timeout')}"
+            )
+            return False, (
+                "We could not confirm your payment with the processor. "
+                "Please do not resubmit; check back in a few minutes."
+            )
         else:
             payment.status = PaymentStatus.FAILED
             payment.save()
             
             # Log failure
-            from .services import log_activity
             log_activity(
                 application,
                 f"Payment failed: {response.get('response_text', 'Unknown error')}"
@@ -404,34 +730,37 @@ class PaymentProcessor:
         """
         from .models import ApplicationPayment, PaymentStatus
         
-        try:
-            payment = ApplicationPayment.objects.get(application=application)
-        except ApplicationPayment.DoesNotExist:
-            return False, "No payment found for this application"
-        
-        if payment.status != PaymentStatus.COMPLETED:
-            return False, "Payment not completed, cannot refund"
-        
-        if not payment.transaction_id:
-            return False, "No transaction ID found"
-        
-        # Process refund
-        refund_amount = amount or payment.amount
-        success, response = self.gateway.refund_payment(
-            transaction_id=payment.transaction_id,
-            amount=refund_amount,
-            reason=reason
-        )
+        # The row stays locked through the gateway call so two refunds can't both go out
+        with transaction.atomic():
+            try:
+                payment = ApplicationPayment.objects.select_for_update().get(application=application)
+            except ApplicationPayment.DoesNotExist:
+                return False, "No payment found for this application"
+            
+            if payment.status != PaymentStatus.COMPLETED:
+                return False, "Payment not completed, cannot refund"
+            
+            if not payment.transaction_id:
+                return False, "No transaction ID found"
+            
+            # Process refund
+            refund_amount = amount or payment.amount
+            success, response = self.gateway.refund_payment(
+                transaction_id=payment.transaction_id,
+                amount=refund_amount,
+                reason=reason
+            )
+            
+            if success:
+                payment.status = PaymentStatus.REFUNDED
+                payment.refunded_at = timezone.now()
+                payment.refund_amount = refund_amount
+                payment.refund_reason = reason
+                payment.save()
         
         if success:
-            payment.status = PaymentStatus.REFUNDED
-            payment.refunded_at = timezone.now()
-            payment.refund_amount = refund_amount
-            payment.refund_reason = reason
-            payment.save()
-            
             # Log activity
-            from .services import log_activity
+            from .views import log_activity
             log_activity(
                 application,
                 f"Payment refunded - ${refund_amount}"
@@ -116,7 +116,7 @@ class ApplicationDataService:
                 
                 if personal_info:
                     # Update with more recent data if available
-                    if personal_info.ssn_encrypted:
+                    if personal_info.ssn:
                         prefill_data['ssn_last_four'] = '****'  # Indicate SSN is on file
                     if personal_info.employment_type:
                         prefill_data['employment_type'] = personal_info.employment_type
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from .models import UploadedFile, RequiredDocumentType
+from .snapshots import PREFILL_APPLICANT_FIELDS, ApplicationSnapshotService
 from .tasks import analyze_document_async
 
 @receiver(post_save, sender=UploadedFile)
@@ -38,3 +41,77 @@ def sync_applicant_broker(sender, instance, created, **kwargs):
         if instance.applicant.assigned_broker != instance.broker:
             instance.applicant.assigned_broker = instance.broker
             instance.applicant.save(update_fields=['assigned_broker'])
+
+
+# Application snapshots: rebuilt when anything they hold changes
+
+# Model -> (parent FK attribute, parent model, path from parent to the application id)
+SNAPSHOT_SOURCES = {
+    'applications.PersonalInfoData': ('application_id', None, None),
+    'applications.IncomeData': ('application_id', None, None),
+    'applications.LegalDocuments': ('application_id', None, None),
+    'applications.UploadedFile': ('application_id', None, None),
+    'applications.PreviousAddress': ('personal_info_id', 'applications.PersonalInfoData', 'application_id'),
+    'applications.Pet': ('personal_info_id', 'applications.PersonalInfoData', 'application_id'),
+    'applications.PetPhoto': ('pet_id', 'applications.Pet', 'personal_info__application_id'),
+    'applications.AdditionalEmployment': ('income_data_id', 'applications.IncomeData', 'application_id'),
+    'applications.AdditionalIncome': ('income_data_id', 'applications.IncomeData', 'application_id'),
+    'applications.AssetInfo': ('income_data_id', 'applications.IncomeData', 'application_id'),
+}
+
+# Applicant-side model -> (parent FK attribute, parent model, path from parent to the applicant id)
+PREFILL_SOURCES = {
+    'applicants.PreviousAddress': ('applicant_id', None, None),
+    'applicants.Pet': ('applicant_id', None, None),
+    'applicants.PetPhoto': ('pet_id', 'applicants.Pet', 'applicant_id'),
+    'applicants.ApplicantJob': ('applicant_id', None, None),
+    'applicants.ApplicantIncomeSource': ('applicant_id', None, None),
+    'applicants.ApplicantAsset': ('applicant_id', None, None),
+}
+
+
+def _resolve(sources, instance):
+    attribute, parent_label, path = sources[instance._meta.label]
+    value = getattr(instance, attribute)
+    if parent_label is None or value is None:
+        return value
+    # The parent may already be gone when a cascade delete reaches this row
+    return apps.get_model(parent_label).objects.filter(pk=value).values_list(path, flat=True).first()
+
+
+def refresh_application_snapshot(sender, instance, **kwargs):
+    ApplicationSnapshotService.schedule_refresh(_resolve(SNAPSHOT_SOURCES, instance))
+
+
+def refresh_applicant_snapshots(sender, instance, **kwargs):
+    ApplicationSnapshotService.schedule_refresh_for_applicant(_resolve(PREFILL_SOURCES, instance))
+
+
+def refresh_snapshots_for_applicant_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & PREFILL_APPLICANT_FIELDS:
+        return  # e.g. broker assignment or engagement bookkeeping
+    ApplicationSnapshotService.schedule_refresh_for_applicant(instance.pk)
+
+
+def refresh_snapshots_for_applicant_user(sender, instance, update_fields=None, **kwargs):
+    """Applicant name, email and phone live on the user."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    from applicants.models import Applicant
+
+    for applicant_id in Applicant.objects.filter(user=instance).values_list('pk', flat=True):
+        ApplicationSnapshotService.schedule_refresh_for_applicant(applicant_id)
+
+
+for _label in SNAPSHOT_SOURCES:
+    post_save.connect(refresh_application_snapshot, sender=_label, dispatch_uid=f'snapshot_save_{_label}')
+    post_delete.connect(refresh_application_snapshot, sender=_label, dispatch_uid=f'snapshot_delete_{_label}')
+for _label in PREFILL_SOURCES:
+    post_save.connect(refresh_applicant_snapshots, sender=_label, dispatch_uid=f'snapshot_save_{_label}')
+    post_delete.connect(refresh_applicant_snapshots, sender=_label, dispatch_uid=f'snapshot_delete_{_label}')
+post_save.connect(
+    refresh_snapshots_for_applicant_profile, sender='applicants.Applicant', dispatch_uid='snapshot_save_applicant',
+)
+post_save.connect(
+    refresh_snapshots_for_applicant_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='snapshot_save_applicant_user',
+)
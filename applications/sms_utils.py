@@ -92,9 +92,8 @@ def send_application_link_sms(to_phone: str, application) -> Tuple[bool, str]:
     Returns:
         Tuple of (success: bool, message_id_or_error: str)
     """
-    sms_backend = SMSBackend()
-    
-    if not sms_backend.enabled:
+    from .outbox import get_outbox_provider
+    if not get_outbox_provider('sms').enabled:
         return False, "SMS service not configured"
     
     # Create SMS message
@@ -112,7 +111,10 @@ def send_application_link_sms(to_phone: str, application) -> Tuple[bool, str]:
     # SMS template (keep under 160 characters for single SMS)
     message = f"{settings.SITE_NAME}: Complete your application for {property_info}. Link: {application_url}"
     
-    return sms_backend.send_sms(to_phone, message)
+    # Delivered by the outbox worker; the returned id is the outbox key
+    from .outbox import Outbox
+    queued = Outbox.enqueue_sms('application_link', to_phone, message)
+    return True, queued.idempotency_key
 
 
 def send_test_sms(to_phone: str) -> Tuple[bool, str]:
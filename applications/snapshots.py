@@ -0,0 +1,280 @@
+"""
+Application Snapshots
+=====================
+
+One denormalized JSON document per application holding everything the v2
+wizard steps and the review page display: Section 1-3 data with their
+addresses, pets, jobs, income sources and assets, the uploaded files, and the
+applicant's prefill data.
+
+Building it costs a dozen or so queries, so it is built once per change
+instead of on every page view:
+- saves/deletes of section data, uploaded files and pet photos rebuild the
+  application's snapshot once the transaction commits (once per transaction
+  however many rows changed)
+- saves of the applicant's profile, addresses, pets, jobs, income sources and
+  assets rebuild the snapshots of the applicant's applications
+
+Each rebuild bumps ApplicationSnapshot.version. Snapshots built with an
+older SCHEMA_VERSION are rebuilt on read. Dates and datetimes are stored as
+ISO strings and parsed back on read; decimals stay strings.
+"""
+
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.dateparse import parse_date, parse_datetime
+
+from realestate.transactions import run_once_on_commit
+
+from .models import Application, ApplicationSnapshot
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+PERSONAL_INFO_FIELDS = (
+    'first_name', 'middle_name', 'last_name', 'suffix', 'email', 'phone_cell', 'date_of_birth',
+    'street_address_1', 'street_address_2', 'city', 'state', 'zip_code',
+    'current_address_years', 'current_address_months', 'housing_status', 'current_monthly_rent',
+    'is_rental_property', 'reason_for_moving', 'landlord_name', 'landlord_phone', 'landlord_email',
+    'desired_address', 'desired_unit', 'desired_move_in_date', 'referral_source', 'has_pets',
+    'reference1_name', 'reference1_phone', 'reference2_name', 'reference2_phone',
+    'has_filed_bankruptcy', 'has_criminal_conviction',
+)
+PREVIOUS_ADDRESS_FIELDS = (
+    'street_address_1', 'street_address_2', 'city', 'state', 'zip_code', 'years', 'months',
+    'housing_status', 'landlord_name', 'landlord_phone', 'landlord_email', 'monthly_rent',
+)
+INCOME_FIELDS = (
+    'employment_type', 'employer', 'job_title', 'annual_income', 'employment_length',
+    'supervisor_name', 'supervisor_email', 'supervisor_phone', 'currently_employed', 'start_date', 'end_date',
+    'school_name', 'year_of_graduation', 'school_address', 'school_phone',
+    'additional_income_source', 'additional_income_amount', 'id_type', 'id_state',
+    'has_multiple_jobs', 'has_additional_income', 'has_assets',
+)
+JOB_FIELDS = (
+    'company_name', 'position', 'annual_income', 'supervisor_name', 'supervisor_email', 'supervisor_phone',
+    'currently_employed', 'employment_start_date', 'employment_end_date', 'job_type',
+)
+LEGAL_FIELDS = (
+    'discrimination_form_signed', 'discrimination_form_signature', 'discrimination_form_signed_at',
+    'brokers_form_signed', 'brokers_form_signature', 'brokers_form_signed_at',
+)
+
+# Applicant fields read by ApplicationDataService.get_prefill_data_for_applicant
+PREFILL_APPLICANT_FIELDS = {
+    '_first_name', '_last_name', '_email', '_phone_number', 'middle_name', 'suffix', 'date_of_birth',
+    'current_address_years', 'current_address_months',
+    'street_address_1', 'street_address_2', 'city', 'state', 'zip_code', 'housing_status', 'monthly_rent',
+    'current_landlord_name', 'current_landlord_phone', 'current_landlord_email',
+    'desired_move_in_date', 'has_pets', 'employment_status', 'company_name', 'position', 'annual_income',
+    'supervisor_name', 'supervisor_email', 'supervisor_phone', 'currently_employed',
+    'employment_start_date', 'employment_end_date',
+    'school_name', 'year_of_graduation', 'school_address', 'school_phone',
+}
+
+# Keys parsed back from ISO strings on read
+DATE_KEYS = {
+    'date_of_birth', 'desired_move_in_date', 'start_date', 'end_date',
+    'employment_start_date', 'employment_end_date',
+}
+DATETIME_KEYS = {'discrimination_form_signed_at', 'brokers_form_signed_at', 'uploaded_at'}
+
+
+def _values(instance, fields):
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _hydrate(value):
+    """Parse stored ISO dates/datetimes back into date objects, in place."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, str) and key in DATE_KEYS:
+                value[key] = parse_date(item[:10])
+            elif isinstance(item, str) and key in DATETIME_KEYS:
+                value[key] = parse_datetime(item)
+            else:
+                _hydrate(item)
+    elif isinstance(value, list):
+        for item in value:
+            _hydrate(item)
+    return value
+
+
+class ApplicationSnapshotService:
+    """
+    Build, store and read application snapshots.
+    """
+
+    @staticmethod
+    def build(application):
+        """Query everything the wizard and review page show for one application."""
+        from .models import IncomeData, LegalDocuments, PersonalInfoData, RequiredDocumentType
+        from .services import ApplicationDataService
+
+        personal_info = (
+            PersonalInfoData.objects.filter(application=application)
+            .prefetch_related('previous_addresses', 'pets__photos').first()
+        )
+        income_data = (
+            IncomeData.objects.filter(application=application)
+            .prefetch_related('additional_jobs', 'additional_income', 'assets').first()
+        )
+        legal_docs = LegalDocuments.objects.filter(application=application).first()
+        document_types = dict(RequiredDocumentType.choices)
+
+        snapshot = {
+            'personal_info': None,
+            'previous_addresses': [],
+            'pets': [],
+            'income': None,
+            'additional_jobs': [],
+            'additional_income': [],
+            'assets': [],
+            'legal': _values(legal_docs, LEGAL_FIELDS) if legal_docs else None,
+            'documents': [],
+            'prefill': {},
+        }
+
+        if personal_info:
+            data = _values(personal_info, PERSONAL_INFO_FIELDS)
+            data['has_ssn'] = bool(personal_info.ssn)
+            street = ', '.join(filter(None, [personal_info.street_address_1, personal_info.street_address_2]))
+            region = ' '.join(filter(None, [personal_info.state, personal_info.zip_code]))
+            data['current_address'] = ', '.join(filter(None, [street, personal_info.city, region]))
+            snapshot['personal_info'] = data
+
+            for address in personal_info.previous_addresses.all():
+                item = _values(address, PREVIOUS_ADDRESS_FIELDS)
+                item['address'] = address.address or ', '.join(filter(None, [
+                    address.street_address_1, address.street_address_2, address.city, address.state, address.zip_code,
+                ]))
+                item['duration'] = address.duration or address.length_at_address or (
+                    f"{address.years or 0} yrs, {address.months or 0} mos"
+                )
+                snapshot['previous_addresses'].append(item)
+
+            snapshot['pets'] = [
+                {
+                    'name': pet.name,
+                    'pet_type': pet.pet_type,
+                    'quantity': pet.quantity,
+                    'description': pet.description,
+                    'photos': [photo.image.url for photo in pet.photos.all()],
+                }
+                for pet in personal_info.pets.all()
+            ]
+
+        if income_data:
+            data = _values(income_data, INCOME_FIELDS)
+            data['get_employment_type_display'] = income_data.get_employment_type_display()
+            snapshot['income'] = data
+            snapshot['additional_jobs'] = [_values(job, JOB_FIELDS) for job in income_data.additional_jobs.all()]
+            snapshot['additional_income'] = [
+                _values(source, ('income_source', 'average_annual_income', 'source_type', 'description'))
+                for source in income_data.additional_income.all()
+            ]
+            snapshot['assets'] = [
+                _values(asset, ('asset_name', 'account_balance', 'asset_type', 'description'))
+                for asset in income_data.assets.all()
+            ]
+
+        for uploaded in application.uploaded_files.order_by('uploaded_at', 'id'):
+            try:
+                analysis = json.loads(uploaded.analysis_results) if uploaded.analysis_results else None
+            except (TypeError, ValueError):
+                analysis = None
+            snapshot['documents'].append({
+                'id': uploaded.id,
+                'document_type': uploaded.document_type,
+                'document_type_display': document_types.get(uploaded.document_type, uploaded.document_type),
+                'uploaded_at': uploaded.uploaded_at,
+                'analysis_results': analysis,
+            })
+
+        applicant = application.applicant
+        if applicant:
+            prefill = ApplicationDataService.get_prefill_data_for_applicant(applicant)
+            prefill['jobs'] = [
+                _values(job, JOB_FIELDS) for job in applicant.jobs.all()
+            ]
+            prefill['income_sources'] = [
+                _values(source, ('income_source', 'average_annual_income', 'source_type'))
+                for source in applicant.income_sources.all()
+            ]
+            prefill['assets'] = [
+                _values(asset, ('asset_name', 'account_balance', 'asset_type'))
+                for asset in applicant.assets.all()
+            ]
+            snapshot['prefill'] = prefill
+
+        # Store exactly what a later read returns (ISO strings, decimal strings)
+        return json.loads(json.dumps(snapshot, cls=DjangoJSONEncoder))
+
+    @staticmethod
+    def refresh(application):
+        """Rebuild and store an application's snapshot; returns the data as read."""
+        data = ApplicationSnapshotService.build(application)
+        updated = ApplicationSnapshot.objects.filter(application=application).update(
+            data=data, schema_version=SCHEMA_VERSION, version=F('version') + 1,
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ApplicationSnapshot.objects.create(
+                        application=application, data=data, schema_version=SCHEMA_VERSION,
+                    )
+            except IntegrityError:
+                # Built concurrently by another request
+                ApplicationSnapshot.objects.filter(application=application).update(
+                    data=data, schema_version=SCHEMA_VERSION, version=F('version') + 1,
+                )
+        return _hydrate(data)
+
+    @staticmethod
+    def get(application):
+        """The application's snapshot data, building it first if missing or outdated."""
+        snapshot = (
+            ApplicationSnapshot.objects.filter(application=application)
+            .only('data', 'schema_version').first()
+        )
+        if snapshot is None or snapshot.schema_version != SCHEMA_VERSION:
+            return ApplicationSnapshotService.refresh(application)
+        return _hydrate(snapshot.data)
+
+    @staticmethod
+    def schedule_refresh(application_id):
+        """
+        Rebuild an application's snapshot once the current transaction
+        commits. A section save touching many rows schedules many times; the
+        snapshot is rebuilt once (see run_once_on_commit).
+        """
+        if not application_id:
+            return
+
+        def run():
+            application = Application.objects.select_related('applicant').filter(pk=application_id).first()
+            if application is not None:
+                try:
+                    ApplicationSnapshotService.refresh(application)
+                except Exception as e:
+                    # A stale snapshot is rebuilt by the next change; drop it so reads rebuild now
+                    logger.error(f"Failed to refresh snapshot for application {application_id}: {e}")
+                    ApplicationSnapshot.objects.filter(application_id=application_id).delete()
+
+        run_once_on_commit(('application_snapshot', application_id), run)
+
+    @staticmethod
+    def schedule_refresh_for_applicant(applicant_id):
+        """Rebuild the snapshots of every application (with a snapshot) of an applicant."""
+        if not applicant_id:
+            return
+        application_ids = ApplicationSnapshot.objects.filter(
+            application__applicant_id=applicant_id
+        ).values_list('application_id', flat=True)
+        for application_id in application_ids:
+            ApplicationSnapshotService.schedule_refresh(application_id)
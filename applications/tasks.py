@@ -1,5 +1,6 @@
 from celery import shared_task
 from django.core.files.storage import default_storage
+from applications.image_uploads import TRANSIENT_UPLOAD_ERRORS
 import tempfile
 import os
 from doc_analysis.utils import extract_text_and_metadata, analyze_bank_statement, detect_pdf_modifications
@@ -177,4 +178,89 @@ def cleanup_old_analysis_tasks():
     """
     # This could be used to clean up old temporary files or completed tasks
     # For now, it's a placeholder for future cleanup operations
-    return "Cleanup completed"
\ No newline at end of file
+    return "Cleanup completed"
+
+@shared_task(name='applications.purge_stale_drafts', ignore_result=True)
+def purge_stale_drafts():
+    """
+    Periodic task deleting abandoned wizard drafts (see applications.drafts).
+    """
+    from applications.drafts import DraftStore
+
+    return DraftStore.purge_stale()
+
+
+@shared_task(name='applications.purge_staged_images', ignore_result=True)
+def purge_staged_images():
+    """
+    Periodic task deleting staged wizard photos whose upload never succeeded
+    (see applications.image_uploads).
+    """
+    from applications.image_uploads import ImageUploadService
+
+    return ImageUploadService.purge_stale_staged()
+
+
+@shared_task(name='applications.drain_outbox', ignore_result=True)
+def drain_outbox(channel=None):
+    """
+    Deliver pending outbox messages (see applications.outbox).
+    Kicked after each enqueue commits and run periodically as a safety net;
+    without a channel, drains every channel.
+    """
+    from applications.outbox import OutboxWorker
+
+    channels = [channel] if channel else ['email', 'sms']
+    return [OutboxWorker.drain(name) for name in channels]
+
+
+@shared_task(name='applications.reconcile_stale_payments', ignore_result=True)
+def reconcile_stale_payments():
+    """
+    Periodic task settling payments whose outcome is unknown (stale
+    PROCESSING or NEEDS_REVIEW) from the gateway report; never charges
+    (see applications.payment_utils).
+    """
+    from applications.payment_utils import PaymentProcessor
+
+    return PaymentProcessor().reconcile_stale_payments()
+
+
+@shared_task(name='applications.purge_outbox', ignore_result=True)
+def purge_outbox():
+    """
+    Periodic task deleting sent and failed outbox messages past their
+    retention (see applications.outbox).
+    """
+    from applications.outbox import Outbox
+
+    return Outbox.purge_finished()
+
+
+@shared_task(name='applications.run_nudge_campaign', ignore_result=True)
+def run_nudge_campaign(campaign_id):
+    """
+    Queue and log every reminder of a bulk nudge campaign
+    (see applications.nudge_campaigns).
+    """
+    from applications.nudge_campaigns import NudgeCampaignService
+
+    NudgeCampaignService.run(campaign_id)
+
+
+@shared_task(
+    name='applications.process_uploaded_image',
+    ignore_result=True,
+    autoretry_for=TRANSIENT_UPLOAD_ERRORS,
+    retry_backoff=True,
+    max_retries=5,
+)
+def process_uploaded_image(job):
+    """
+    Crop, downsize and upload a staged wizard photo
+    (see applications.image_uploads). Transient upload errors are retried
+    with backoff; the staged file stays until an upload succeeds.
+    """
+    from applications.image_uploads import ImageUploadService
+
+    ImageUploadService.run(job)
@@ -1,3 +1,894 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import BytesIO
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.contrib.sites.models import Site
+from django.db import transaction
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from apartments.models import Apartment
+from applicants.models import Applicant, InteractionLog
+from buildings.models import Building
+from users.models import User
+from .drafts import DraftStore
+from .email_utils import application_completion_url
+from .fake_gateway import FakeSolaGateway
+from .image_uploads import ImageUploadService, parse_crop, process_image
+from .models import (
+    AdditionalEmployment, Application, ApplicationActivity, ApplicationDraft, ApplicationPayment, ApplicationSnapshot,
+    IncomeData, LegalDocuments, NudgeCampaign, OutboxMessage, PaymentStatus, PersonalInfoData, Pet, PetPhoto,
+    PreviousAddress, UploadedFile,
+)
+from .nudge_campaigns import NudgeCampaignService
+from .nudge_service import NudgeService
+from .outbox import FakeOutboxProvider, Outbox, OutboxWorker, SendGridBatchEmailProvider
+from .payment_utils import PaymentProcessor, gateway_latency_summary, reset_gateway_session
+from .snapshots import ApplicationSnapshotService
+from .tasks import reconcile_stale_payments
+from .views import APPLICATIONS_PER_PAGE, save_wizard_photo
+
+
+class BrokerWizardDraftTest(TestCase):
+    """
+    Test the broker application wizard's draft store.
+    Business Logic: Wizard progress survives between steps without being kept
+    in (and re-saved with) the session.
+    """
+
+    def setUp(self):
+        self.broker = User.objects.create_user(email='broker@example.com', password='testpass123', is_broker=True)
+        self.client.force_login(self.broker)
+
+    def test_step_one_saves_draft_outside_the_session(self):
+        response = self.client.post(reverse('broker_create_step1'), {
+            'applicant_type': 'new',
+            'new_applicant_first_name': 'Dana',
+            'new_applicant_last_name': 'Reyes',
+            'new_applicant_email': 'dana@example.com',
+        })
+        self.assertRedirects(response, reverse('broker_create_step2'), fetch_redirect_response=False)
+
+        draft = ApplicationDraft.objects.get(user=self.broker, wizard='broker_application')
+        self.assertEqual(draft.data['new_applicant_email'], 'dana@example.com')
+        self.assertEqual(draft.data['applicant_type'], 'new')
+        self.assertNotIn('applicant_id', draft.data)
+        self.assertNotIn('broker_application_creation', self.client.session)
+
+    def test_store_writes_once_per_update_and_skips_no_ops(self):
+        store = DraftStore(self.broker, 'broker_application')
+        # One lookup plus one insert for a multi-key update
+        with self.assertNumQueries(2):
+            store.update({'applicant_type': 'existing', 'applicant_id': '7'})
+        with self.assertNumQueries(0):
+            store.update({'applicant_type': 'existing', 'apartment_id': None})
+
+        store.set('applicant_id', None)
+        self.assertEqual(DraftStore(self.broker, 'broker_application').get(), {'applicant_type': 'existing'})
+
+        store.clear()
+        self.assertFalse(ApplicationDraft.objects.exists())
+
+    def test_legacy_session_state_moves_into_draft(self):
+        session = self.client.session
+        session['broker_application_creation'] = {'applicant_type': 'existing', 'property_type': 'existing'}
+        session.save()
+
+        response = self.client.get(reverse('broker_create_step3'))
+        self.assertNotEqual(response.status_code, 500)
+        self.assertEqual(
+            ApplicationDraft.objects.get(user=self.broker).data,
+            {'applicant_type': 'existing', 'property_type': 'existing'},
+        )
+        self.assertNotIn('broker_application_creation', self.client.session)
+
+
+class ApplicationListTest(TestCase):
+    """
+    Test the application dashboard list.
+    Business Logic: Stats come from one aggregate, brokers see their own and
+    covered unassigned applications, and pages are keyset-paginated.
+    """
+
+    def setUp(self):
+        self.broker = User.objects.create_user(email='broker@example.com', password=None, is_broker=True)
+        self.other_broker = User.objects.create_user(email='other@example.com', password=None, is_broker=True)
+        self.building = Building.objects.create(
+            name='Bergen Lofts', street_address_1='1 Bergen St', city='Brooklyn', state='NY', zip_code='11201'
+        )
+        self.building.brokers.add(self.broker)
+        self.apartment = Apartment.objects.create(building=self.building, unit_number='2B', rent_price=2500)
+        other_building = Building.objects.create(
+            name='Other Place', street_address_1='9 Other St', city='Brooklyn', state='NY', zip_code='11201'
+        )
+        self.other_apartment = Apartment.objects.create(building=other_building, unit_number='1A', rent_price=2000)
+        user = User.objects.create_user(email='ana@example.com', password=None)
+        self.applicant = Applicant.objects.create(user=user, first_name='Ana', last_name='Tester')
+
+    def _application(self, **kwargs):
+        return Application.objects.create(applicant=self.applicant, **kwargs)
+
+    def test_stats_and_broker_scope(self):
+        own = self._application(broker=self.broker, apartment=self.other_apartment, status='PENDING')
+        covered = self._application(apartment=self.apartment)
+        covered_again = self._application(apartment=self.apartment, status='APPROVED')
+        manual = self._application(broker=self.broker, manual_building_name='Side St', manual_unit_number='3')
+        self._application(broker=self.broker, manual_building_name='Side St', manual_unit_number='3')
+        self._application(apartment=self.other_apartment)  # Not covered by this broker
+        self._application(broker=self.other_broker, apartment=self.apartment)
+
+        self.client.force_login(self.broker)
+        response = self.client.get(reverse('applications_list'))
+        visible = list(response.context['applications'])
+        self.assertEqual(len(visible), 5)
+        self.assertTrue({own, covered, covered_again, manual} <= set(visible))
+        self.assertEqual(response.context['total_applications'], 5)
+        self.assertEqual(response.context['new_applications'], 3)
+        self.assertEqual(response.context['pending_applications'], 1)
+        self.assertEqual(response.context['approved_applications'], 1)
+        # Two listed apartments plus one manual-entry property
+        self.assertEqual(response.context['unique_properties'], 3)
+
+    def test_keyset_pages_and_constant_queries(self):
+        for _ in range(APPLICATIONS_PER_PAGE + 5):
+            self._application(broker=self.broker, apartment=self.apartment)
+        newest_first = list(Application.objects.order_by('-created_at', '-id'))
+        self.client.force_login(self.broker)
+        self.client.get(reverse('applications_list'))  # Warm up (session)
+
+        with self.assertNumQueries(5):
+            first = self.client.get(reverse('applications_list')).context['page']
+        self.assertEqual(list(first), newest_first[:APPLICATIONS_PER_PAGE])
+        self.assertTrue(first.has_next)
+        self.assertFalse(first.has_previous)
+
+        with self.assertNumQueries(5):
+            second = self.client.get(reverse('applications_list'), {'after': first.next_cursor}).context['page']
+        self.assertEqual(list(second), newest_first[APPLICATIONS_PER_PAGE:])
+        self.assertFalse(second.has_next)
+
+        back = self.client.get(reverse('applications_list'), {'before': second.previous_cursor}).context['page']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous)
+
+        response = self.client.get(reverse('applications_list'), {'after': 'not-a-cursor'})
+        self.assertEqual(list(response.context['page']), list(first))
+
+
+@override_settings(
+    OUTBOX_EMAIL_PROVIDER='applications.outbox.FakeOutboxProvider',
+    OUTBOX_SMS_PROVIDER='applications.outbox.FakeOutboxProvider',
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTest(TestCase):
+    """
+    Test the transactional outbox.
+    Business Logic: Notifications are recorded with the business event and
+    delivered by workers, exactly once, without blocking the request.
+    """
+
+    def setUp(self):
+        FakeOutboxProvider.reset()
+
+    def test_enqueue_records_row_without_contacting_provider(self):
+        with transaction.atomic():
+            Outbox.enqueue_email('welcome', 'a@example.com', 'Hi', 'Body', idempotency_key='welcome:1')
+            Outbox.enqueue_email('welcome', 'a@example.com', 'Hi', 'Body', idempotency_key='welcome:1')
+
+        self.assertEqual(OutboxMessage.objects.filter(idempotency_key='welcome:1').count(), 1)
+        self.assertEqual(OutboxMessage.objects.get().status, 'pending')
+        self.assertEqual(FakeOutboxProvider.sent, [])
+
+    def test_rolled_back_transaction_discards_message(self):
+        try:
+            with transaction.atomic():
+                Outbox.enqueue_sms('otp', '+15555550100', 'Code 123456')
+                raise RuntimeError('request failed')
+        except RuntimeError:
+            pass
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_drain_delivers_and_marks_sent(self):
+        Outbox.enqueue_email('welcome', ['a@example.com', 'b@example.com'], 'Hi', 'Body')
+        Outbox.enqueue_sms('otp', '+15555550100', 'Code 123456')
+
+        stats = OutboxWorker.drain('email')
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(len(FakeOutboxProvider.sent), 1)
+        self.assertEqual(FakeOutboxProvider.sent[0].recipients, ['a@example.com', 'b@example.com'])
+
+        message = OutboxMessage.objects.get(channel='email')
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(message.attempts, 1)
+        self.assertTrue(message.provider_message_id)
+        self.assertEqual(OutboxMessage.objects.get(channel='sms').status, 'pending')
+
+        # Nothing left to deliver on the next pass
+        self.assertEqual(OutboxWorker.drain('email')['sent'], 0)
+
+    def test_failures_back_off_then_fail(self):
+        FakeOutboxProvider.fail_recipients = {'bounce@example.com'}
+        message = Outbox.enqueue_email('welcome', 'bounce@example.com', 'Hi', 'Body')
+
+        self.assertEqual(OutboxWorker.drain('email')['retrying'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'pending')
+        self.assertGreater(message.available_at, timezone.now())
+        self.assertEqual(message.last_error, 'Simulated provider failure')
+
+        # Not retried before its backoff expires
+        self.assertEqual(OutboxWorker.drain('email')['retrying'], 0)
+
+        OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(OutboxWorker.drain('email')['failed'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.attempts, 2)
+
+    def test_one_time_codes_are_blanked_after_delivery_and_old_rows_purged(self):
+        FakeOutboxProvider.fail_recipients = {'+15555550199'}
+        Outbox.enqueue_sms('otp', '+15555550100', 'Code 123456')
+        Outbox.enqueue_sms('otp', '+15555550199', 'Code 654321')
+        Outbox.enqueue_email('welcome', 'a@example.com', 'Hi', 'Body')
+
+        OutboxWorker.drain('sms')
+        OutboxMessage.objects.filter(channel='sms').update(available_at=timezone.now() - timedelta(seconds=1))
+        OutboxWorker.drain('sms')
+        OutboxWorker.drain('email')
+
+        self.assertEqual(FakeOutboxProvider.sent[0].body, 'Code 123456')
+        self.assertEqual(
+            sorted(OutboxMessage.objects.filter(kind='otp').values_list('status', 'body')),
+            [('failed', ''), ('sent', '')],
+        )
+        self.assertEqual(OutboxMessage.objects.get(kind='welcome').body, 'Body')
+
+        pending = Outbox.enqueue_email('welcome', 'b@example.com', 'Hi', 'Body')
+        OutboxMessage.objects.update(created_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(Outbox.purge_finished(), 3)
+        self.assertEqual(list(OutboxMessage.objects.all()), [pending])
+
+    def test_abandoned_claims_are_released(self):
+        message = Outbox.enqueue_email('welcome', 'a@example.com', 'Hi', 'Body')
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            status='sending', claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(OutboxWorker.drain('email')['sent'], 1)
+
+    def test_nudge_queues_message_and_logs_interaction(self):
+        broker = User.objects.create_user(email='broker@example.com', password=None, is_broker=True)
+        user = User.objects.create_user(email='ana@example.com', password=None)
+        applicant = Applicant.objects.create(user=user, first_name='Ana', last_name='Tester')
+
+        success, error = NudgeService.send_nudge(applicant, broker, nudge_type='email')
+        self.assertTrue(success, error)
+        # Double submit within the same minute is queued once
+        NudgeService.send_nudge(applicant, broker, nudge_type='email')
+
+        message = OutboxMessage.objects.get(kind='nudge')
+        self.assertEqual(message.recipients, ['ana@example.com'])
+        self.assertEqual(InteractionLog.objects.filter(crm__applicant=applicant, broker=broker).count(), 1)
+        self.assertEqual(FakeOutboxProvider.sent, [])
+
+        OutboxWorker.drain('email')
+        self.assertEqual(len(FakeOutboxProvider.sent), 1)
+
+
+@override_settings(
+    OUTBOX_EMAIL_PROVIDER='applications.outbox.FakeOutboxProvider',
+    OUTBOX_SMS_PROVIDER='applications.outbox.FakeOutboxProvider',
+)
+class NudgeCampaignTest(TestCase):
+    """
+    Test bulk nudge campaigns.
+    Business Logic: a broker reminds a whole audience with one job; every
+    reminder is queued and logged without per-applicant round trips.
+    """
+
+    def setUp(self):
+        FakeOutboxProvider.reset()
+        self.broker = User.objects.create_user(
+            email='broker@example.com', password=None, is_broker=True, first_name='Bea', last_name='Broker'
+        )
+        self.outsider = self._applicant('Zed', assigned_broker=None)
+
+    def _applicant(self, first_name, assigned_broker=True):
+        user = User.objects.create_user(email=f'{first_name.lower()}@example.com', password=None)
+        return Applicant.objects.create(
+            user=user, first_name=first_name, last_name='Tester',
+            assigned_broker=self.broker if assigned_broker else None,
+        )
+
+    def _application(self, applicant, **kwargs):
+        return Application.objects.create(
+            applicant=applicant, broker=self.broker, manual_building_name='Elm House', manual_unit_number='4B',
+            manual_building_address='1 Elm St, Brooklyn, NY',
+            **kwargs
+        )
+
+    def test_audiences_are_selected_in_sql_and_scoped_to_broker(self):
+        missing = self._applicant('Ana')
+        missing_app = self._application(missing, required_documents=['photo_id', 'paystub'])
+        UploadedFile.objects.create(application=missing_app, document_type='photo_id', file='id.pdf')
+        complete_docs = self._applicant('Ben')
+        complete_app = self._application(complete_docs, required_documents=['photo_id'])
+        UploadedFile.objects.create(application=complete_app, document_type='photo_id', file='id.pdf')
+        stale = self._applicant('Cy')
+        stale_app = self._application(stale)
+        Application.objects.filter(pk=stale_app.pk).update(updated_at=timezone.now() - timedelta(days=30))
+
+        def audience(name):
+            return {
+                applicant.pk: applicant.nudge_application_id
+                for applicant in NudgeCampaignService.audience_queryset(name, self.broker)
+            }
+
+        self.assertEqual(audience('missing_documents'), {missing.pk: missing_app.pk})
+        self.assertEqual(audience('stale_application'), {stale.pk: stale_app.pk})
+        self.assertNotIn(self.outsider.pk, audience('incomplete_profile'))
+
+    def test_campaign_queues_shared_messages_and_logs_in_bulk(self):
+        applicants = [self._applicant(name) for name in ('Ana', 'Ben')]
+        for applicant in applicants:
+            self._application(applicant, required_documents=['paystub'])
+        campaign, error = NudgeCampaignService.start(self.broker, 'missing_documents')
+        self.assertIsNone(error)
+
+        NudgeCampaignService.run(campaign.pk)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.recipient_count), ('completed', 2))
+
+        messages = list(OutboxMessage.objects.filter(kind='nudge_campaign:missing_documents'))
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(len({(message.subject, message.body) for message in messages}), 1)
+        self.assertIn('-first_name-', messages[0].body)
+        self.assertEqual(InteractionLog.objects.filter(broker=self.broker, is_message=True).count(), 2)
+        self.assertEqual(ApplicationActivity.objects.count(), 2)
+
+        # A retried job does nothing
+        NudgeCampaignService.run(campaign.pk)
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+        self.assertEqual(InteractionLog.objects.count(), 2)
+
+        OutboxWorker.drain('email')
+        sent = sorted(FakeOutboxProvider.sent, key=lambda message: message.recipients)
+        self.assertIn('Dear Ana', sent[0].personalize(sent[0].body))
+        self.assertEqual(sent[0].personalize(sent[0].subject), 'Documents needed for Elm House - 4B')
+        body = sent[1].personalize(sent[1].body)
+        link = re.search(r'Upload your documents: (\S+)', body).group(1)
+        application = Application.objects.get(applicant__user__email=sent[1].recipients[0])
+        self.assertEqual(link, application_completion_url(application))
+        path, query = urlsplit(link)[2:4]
+        self.assertEqual(resolve(path).url_name, 'applicant_complete')
+        self.assertEqual(query, f'token={application.unique_link}')
+
+    def test_double_submit_starts_one_campaign(self):
+        self._application(self._applicant('Ana'), required_documents=['paystub'])
+        campaign, error = NudgeCampaignService.start(self.broker, 'missing_documents')
+        self.assertIsNone(error)
+
+        duplicate, error = NudgeCampaignService.start(self.broker, 'missing_documents', custom_message='Again')
+        self.assertIsNone(duplicate)
+        self.assertIn('just sent', error)
+        # Another channel, or a failed campaign, doesn't block
+        self.assertIsNotNone(NudgeCampaignService.start(self.broker, 'missing_documents', channel='sms')[0])
+        NudgeCampaign.objects.filter(pk=campaign.pk).update(status='failed')
+        self.assertIsNotNone(NudgeCampaignService.start(self.broker, 'missing_documents')[0])
+
+    def test_inline_fallback_logs_failures_instead_of_raising(self):
+        campaign, _ = NudgeCampaignService.start(self.broker, 'missing_documents')
+        with mock.patch('applications.tasks.run_nudge_campaign.apply_async', side_effect=OSError('no broker')), \
+                mock.patch.object(NudgeCampaignService, '_queue', side_effect=RuntimeError('boom')):
+            NudgeCampaignService.dispatch(campaign.pk)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.error), ('failed', 'boom'))
+
+    def test_campaign_queries_do_not_grow_with_audience(self):
+        def run_campaign(count):
+            NudgeCampaign.objects.update(created_at=timezone.now() - timedelta(hours=1))  # Past the cooldown
+            Site.objects.clear_cache()  # Links look the site up once per campaign
+            for index in range(count):
+                self._application(self._applicant(f'Stale{count}x{index}'))
+            Application.objects.update(updated_at=timezone.now() - timedelta(days=30))
+            campaign, _ = NudgeCampaignService.start(self.broker, 'stale_application', channel='sms')
+            User.objects.filter(applicant_profile__isnull=False).update(phone_number='+15555550100')
+            with CaptureQueriesContext(connection) as queries:
+                NudgeCampaignService.run(campaign.pk)
+            return len(queries)
+
+        self.assertEqual(run_campaign(2), run_campaign(6))
+
+    def test_view_records_campaign_for_background_job(self):
+        self._application(self._applicant('Ana'), required_documents=['paystub'])
+        self.client.force_login(self.broker)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('nudge_campaign'), {'audience': 'missing_documents', 'channel': 'email'})
+        self.assertRedirects(response, reverse('applicants_list'), fetch_redirect_response=False)
+        self.assertEqual(NudgeCampaign.objects.get().status, 'queued')
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_sendgrid_groups_identical_messages_into_one_request(self):
+        provider = SendGridBatchEmailProvider()
+        provider.client = mock.Mock()
+        provider.client.send.return_value = mock.Mock(status_code=202, headers={'X-Message-Id': 'sg-1'})
+        shared = dict(channel='email', subject='Hi -first_name-', body='Dear -first_name-')
+        messages = [
+            OutboxMessage(idempotency_key='a', recipients=['a@example.com'], substitutions={'-first_name-': 'Ana'}, **shared),
+            OutboxMessage(idempotency_key='b', recipients=['b@example.com'], substitutions={'-first_name-': 'Ben'}, **shared),
+            OutboxMessage(idempotency_key='c', channel='email', recipients=['c@example.com'], subject='Other', body='Body'),
+        ]
+
+        self.assertEqual(provider.send_batch(messages), [(True, 'sg-1')] * 3)
+        self.assertEqual(provider.client.send.call_count, 2)
+        payload = provider.client.send.call_args_list[0].args[0].get()
+        self.assertCountEqual(
+            [p['substitutions'] for p in payload['personalizations']],
+            [{'-first_name-': 'Ana'}, {'-first_name-': 'Ben'}],
+        )
+
+
+class WizardPhotoUploadTest(TestCase):
+    """
+    Test the cropped photo upload pipeline.
+    Business Logic: wizard requests carry the original file and a crop
+    rectangle; cropping, EXIF stripping and the upload happen afterwards.
+    """
+
+    def setUp(self):
+        self.staging = tempfile.TemporaryDirectory()
+        self.addCleanup(self.staging.cleanup)
+        staging_settings = override_settings(IMAGE_UPLOAD_STAGING_ROOT=self.staging.name, UPLOAD_IMAGE_MAX_DIMENSION=200)
+        staging_settings.enable()
+        self.addCleanup(staging_settings.disable)
+
+        self.application = Application.objects.create(manual_building_name='Elm House')
+        personal_info = PersonalInfoData.objects.create(application=self.application)
+        self.pet = Pet.objects.create(personal_info=personal_info, pet_type='Dog')
+
+    def _photo(self, size=(400, 300), orientation=None):
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        if orientation:
+            exif[0x0112] = orientation
+        output = BytesIO()
+        Image.new('RGB', size, 'red').save(output, format='JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile('IMG_0001.jpeg', output.getvalue(), content_type='image/jpeg')
+
+    def test_process_image_crops_orients_downsizes_and_strips_exif(self):
+        from PIL import Image
+
+        crop = parse_crop(json.dumps({'cropped': True, 'data': {'x': 10, 'y': 20, 'width': 300, 'height': 150, 'rotate': 0}}))
+        result = Image.open(process_image(self._photo(), crop))
+        self.assertEqual(result.size, (200, 100))
+        self.assertEqual(len(result.getexif()), 0)
+
+        # Orientation 6 = rotated 90 degrees clockwise when displayed
+        result = Image.open(process_image(self._photo(orientation=6)))
+        self.assertEqual(result.size, (150, 200))
+        self.assertIsNone(parse_crop(json.dumps({'cropped': False})))
+
+    def test_request_only_stages_the_original(self):
+        from cloudinary import CloudinaryResource
+
+        request = RequestFactory().post('/', {
+            'pet_photo_1_1': self._photo(size=(800, 600)),
+            'crop_data_pet_1_1': json.dumps({'cropped': True, 'data': {'x': 0, 'y': 0, 'width': 600, 'height': 600}}),
+        })
+        uploaded = CloudinaryResource('pets/photo', version=1, format='jpg', type='upload', resource_type='image')
+        with mock.patch('cloudinary.uploader.upload_resource', return_value=uploaded) as upload, \
+                mock.patch('applications.tasks.process_uploaded_image.apply_async', side_effect=ConnectionError):
+            with self.captureOnCommitCallbacks() as callbacks:
+                save_wizard_photo(request, self.application, PetPhoto, 'pet_photo_1_1', 'crop_data_pet_1_1',
+                                  pet_id=self.pet.id)
+            self.assertFalse(PetPhoto.objects.exists())
+            self.assertEqual(len(os.listdir(self.staging.name)), 1)
+
+            for callback in callbacks:
+                callback()  # No broker: processed inline
+
+        photo = PetPhoto.objects.get(pet=self.pet)
+        self.assertEqual(photo.image.public_id, 'pets/photo')
+        processed = upload.call_args.args[0]
+        processed.seek(0)
+        from PIL import Image
+        self.assertEqual(Image.open(processed).size, (200, 200))
+        self.assertEqual(os.listdir(self.staging.name), [])
+
+    def test_failed_upload_keeps_the_staged_file_for_retry(self):
+        import cloudinary.exceptions
+        from .tasks import process_uploaded_image
+
+        request = RequestFactory().post('/', {'pet_photo_1_1': self._photo()})
+        with mock.patch('applications.tasks.process_uploaded_image.apply_async', side_effect=ConnectionError), \
+                mock.patch('cloudinary.uploader.upload_resource', side_effect=cloudinary.exceptions.GeneralError('503')):
+            with self.captureOnCommitCallbacks(execute=True):
+                save_wizard_photo(request, self.application, PetPhoto, 'pet_photo_1_1', 'crop_data_pet_1_1',
+                                  pet_id=self.pet.id)
+
+        self.assertFalse(PetPhoto.objects.exists())
+        self.assertEqual(len(os.listdir(self.staging.name)), 1)
+        self.assertTrue(issubclass(cloudinary.exceptions.GeneralError, process_uploaded_image.autoretry_for))
+        self.assertEqual(process_uploaded_image.max_retries, 5)
+
+    def test_non_images_are_rejected_in_the_request(self):
+        from django.contrib.messages import get_messages
+        from django.contrib.messages.storage.cookie import CookieStorage
+
+        fake = SimpleUploadedFile('IMG_0002.jpeg', b'not really a jpeg', content_type='image/jpeg')
+        request = RequestFactory().post('/', {'pet_photo_1_1': fake})
+        request._messages = CookieStorage(request)
+        with mock.patch('applications.tasks.process_uploaded_image.apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                save_wizard_photo(request, self.application, PetPhoto, 'pet_photo_1_1', 'crop_data_pet_1_1',
+                                  pet_id=self.pet.id)
+
+        self.assertEqual(callbacks, [])
+        apply_async.assert_not_called()
+        self.assertEqual(os.listdir(self.staging.name), [])
+        self.assertIn('IMG_0002.jpeg', str(list(get_messages(request))[0]))
+
+    def test_staged_files_are_purged_after_the_ttl(self):
+        from .tasks import purge_staged_images
+
+        with mock.patch('applications.image_uploads.transaction.on_commit'):
+            old = ImageUploadService.schedule(PetPhoto, 'image', self._photo(), pet_id=self.pet.id)
+            recent = ImageUploadService.schedule(PetPhoto, 'image', self._photo(), pet_id=self.pet.id)
+        week_ago = (timezone.now() - timedelta(days=8)).timestamp()
+        os.utime(os.path.join(self.staging.name, old), (week_ago, week_ago))
+
+        self.assertEqual(purge_staged_images(), 1)
+        self.assertEqual(os.listdir(self.staging.name), [recent])
+
+    def test_direct_uploads_are_stored_only_when_signed_for_the_application(self):
+        import cloudinary
+        import cloudinary.utils
+
+        folder = f'applications/{self.application.id}'
+        with mock.patch.object(cloudinary.config(), 'api_secret', 'test-secret'):
+            def upload(public_id, signature=None):
+                signature = signature or cloudinary.utils.api_sign_request(
+                    {'public_id': public_id, 'version': 7}, 'test-secret'
+                )
+                return json.dumps({'public_id': public_id, 'version': 7, 'format': 'jpg', 'signature': signature})
+
+            self.assertEqual(
+                ImageUploadService.verified_direct_upload(upload(f'{folder}/direct'), folder),
+                f'image/upload/v7/{folder}/direct.jpg',
+            )
+            self.assertIsNone(ImageUploadService.verified_direct_upload(upload(f'{folder}/direct', 'forged'), folder))
+            # Correctly signed, but uploaded for another application
+            self.assertIsNone(ImageUploadService.verified_direct_upload(upload('applications/999/direct'), folder))
+
+    @override_settings(IMAGE_DIRECT_UPLOADS=True)
+    def test_upload_signature_requires_token_or_ownership(self):
+        import cloudinary
+
+        url = reverse('image_upload_signature', args=[self.application.id])
+        broker = User.objects.create_user(email='owner@example.com', password='x', is_broker=True)
+        stranger = User.objects.create_user(email='stranger@example.com', password='x')
+
+        with mock.patch.object(cloudinary.config(), 'api_secret', 'test-secret'):
+            self.assertEqual(self.client.post(url).status_code, 403)
+            response = self.client.post(f'{url}?token={self.application.unique_link}')
+            self.assertEqual(response.json()['folder'], f'applications/{self.application.id}')
+
+            self.client.force_login(stranger)
+            self.assertEqual(self.client.post(url).status_code, 403)
+
+            Application.objects.filter(pk=self.application.pk).update(broker=broker)
+            self.client.force_login(broker)
+            self.assertEqual(self.client.post(url).status_code, 200)
+
+
+class PaymentGatewayTest(TestCase):
+    """
+    Test application fee payments against a local fake gateway.
+    Business Logic: gateway calls reuse pooled connections, and a timed-out or
+    double-submitted payment never charges the card twice.
+    """
+
+    CARD = {
+        'card_number': '4111111111111111', 'exp_month': '12', 'exp_year': '2030',
+        'cvv': '123', 'cardholder_name': 'Dana Reyes',
+    }
+
+    def setUp(self):
+        cache.clear()
+        reset_gateway_session()
+        self.addCleanup(reset_gateway_session)
+        self.gateway = FakeSolaGateway().start()
+        self.addCleanup(self.gateway.stop)
+        gateway_settings = override_settings(
+            SOLA_API_URL=self.gateway.url, SOLA_API_KEY='test-key', SOLA_CONNECT_RETRIES=0,
+        )
+        gateway_settings.enable()
+        self.addCleanup(gateway_settings.disable)
+        self.application = Application.objects.create(manual_building_name='Elm House')
+
+    def test_payment_reuses_connection_and_sends_idempotency_key(self):
+        other = Application.objects.create(manual_building_name='Oak House')
+        processor = PaymentProcessor()
+        self.assertEqual(processor.process_application_payment(self.application, self.CARD)[0], True)
+        self.assertEqual(processor.process_application_payment(other, self.CARD)[0], True)
+
+        payment = ApplicationPayment.objects.get(application=self.application)
+        self.assertEqual(payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(payment.transaction_id, '1000')
+        self.assertEqual(self.gateway.sales[0]['xCustom01'], payment.idempotency_key)
+        self.assertEqual(len(self.gateway.connections), 1)
+        self.assertEqual(gateway_latency_summary()['sale']['count'], 2)
+
+    def test_double_submit_charges_once(self):
+        processor = PaymentProcessor()
+        processor.process_application_payment(self.application, self.CARD)
+        success, message = processor.process_application_payment(self.application, self.CARD)
+
+        self.assertTrue(success)
+        self.assertEqual(message, "Payment already processed")
+        self.assertEqual(len(self.gateway.requests), 1)
+
+    def _make_stale(self):
+        ApplicationPayment.objects.filter(application=self.application).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+    def test_timed_out_sale_is_looked_up_never_sent_again(self):
+        # The gateway charges the card but the response is lost
+        self.gateway.delay = 0.5
+        with override_settings(SOLA_TIMEOUT=0.1):
+            success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        payment = ApplicationPayment.objects.get(application=self.application)
+        self.assertEqual(payment.status, PaymentStatus.PROCESSING)
+
+        # Resubmitting while the outcome is unknown sends nothing
+        self.gateway.delay = 0
+        success, message = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        self.assertIn('already being processed', message)
+        self.assertEqual(len(self.gateway.requests), 1)
+
+        # Once stale, an unreadable report leaves the payment for review; no second sale
+        self.gateway.report_available = False
+        self._make_stale()
+        for _ in range(2):
+            success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+            self.assertFalse(success)
+            payment.refresh_from_db()
+            self.assertEqual(payment.status, PaymentStatus.NEEDS_REVIEW)
+        self.assertEqual(len(self.gateway.sales), 1)
+
+        # The report shows the original charge: completed without charging again
+        self.gateway.report_available = True
+        success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertTrue(success)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(payment.transaction_id, '1000')
+        self.assertEqual(len(self.gateway.sales), 1)
+        self.application.refresh_from_db()
+        self.assertTrue(self.application.payment_completed)
+
+    def test_stale_payments_settle_without_a_resubmit(self):
+        self.gateway.delay = 0.5
+        with override_settings(SOLA_TIMEOUT=0.1):
+            PaymentProcessor().process_application_payment(self.application, self.CARD)
+        in_flight = Application.objects.create(manual_building_name='Oak House')
+        ApplicationPayment.objects.create(
+            application=in_flight, amount=50, status=PaymentStatus.PROCESSING, idempotency_key='fresh',
+        )
+        self.gateway.delay = 0
+
+        # The periodic task picks up the stale attempt (not the fresh one) and leaves it for review
+        self.gateway.report_available = False
+        self._make_stale()
+        self.assertEqual(reconcile_stale_payments(), {'completed': 0, 'failed': 0, 'unresolved': 1})
+        payment = ApplicationPayment.objects.get(application=self.application)
+        self.assertEqual(payment.status, PaymentStatus.NEEDS_REVIEW)
+        self.assertEqual(ApplicationPayment.objects.get(application=in_flight).status, PaymentStatus.PROCESSING)
+
+        # Opening the payment page settles it once the report shows the charge
+        self.gateway.report_available = True
+        url = f"{reverse('section5_payment', args=[self.application.id])}?token={self.application.unique_link}"
+        response = self.client.get(url)
+        self.assertRedirects(
+            response,
+            f"{reverse('v2_application_overview', args=[self.application.id])}?token={self.application.unique_link}",
+            fetch_redirect_response=False,
+        )
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(len(self.gateway.sales), 1)
+
+    def test_gateway_5xx_after_charging_is_looked_up_never_sent_again(self):
+        # A proxy answers 502 although the gateway charged the card
+        self.gateway.error_status = 502
+        success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        payment = ApplicationPayment.objects.get(application=self.application)
+        self.assertEqual(payment.status, PaymentStatus.PROCESSING)
+
+        self.gateway.error_status = None
+        success, message = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        self.assertIn('already being processed', message)
+
+        self._make_stale()
+        success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertTrue(success)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.COMPLETED)
+        self.assertEqual(len(self.gateway.sales), 1)
+
+    def test_gateway_4xx_is_a_plain_failure(self):
+        self.gateway.error_status = 400
+        success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        self.assertEqual(ApplicationPayment.objects.get(application=self.application).status, PaymentStatus.FAILED)
+
+    def test_stale_attempt_missing_from_report_fails_before_a_new_sale(self):
+        ApplicationPayment.objects.create(
+            application=self.application, amount=50, status=PaymentStatus.PROCESSING, idempotency_key='lost',
+        )
+        self._make_stale()
+
+        success, message = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        self.assertIn('did not go through', message)
+        self.assertEqual(ApplicationPayment.objects.get(application=self.application).status, PaymentStatus.FAILED)
+        self.assertEqual(self.gateway.sales, [])
+
+        # Only the applicant's next submit charges, under a new key
+        success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertTrue(success)
+        self.assertEqual(len(self.gateway.sales), 1)
+        self.assertNotEqual(self.gateway.sales[0]['xCustom01'], 'lost')
+
+    def test_declined_or_unreachable_payment_fails_and_next_attempt_gets_new_key(self):
+        declined = dict(self.CARD, card_number='4000000000000002')
+        success, _ = PaymentProcessor().process_application_payment(self.application, declined)
+        self.assertFalse(success)
+        payment = ApplicationPayment.objects.get(application=self.application)
+        self.assertEqual(payment.status, PaymentStatus.FAILED)
+        first_key = payment.idempotency_key
+
+        # Connection refused: the request never left, so it is a plain failure
+        url = self.gateway.url
+        self.gateway.stop()
+        reset_gateway_session()
+        with override_settings(SOLA_API_URL=url):
+            success, _ = PaymentProcessor().process_application_payment(self.application, self.CARD)
+        self.assertFalse(success)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, PaymentStatus.FAILED)
+        self.assertNotEqual(payment.idempotency_key, first_key)
+        self.assertEqual(gateway_latency_summary()['sale']['errors'], 1)
+
+
+class ApplicationSnapshotTest(TestCase):
+    """
+    Test the per-application snapshot read by the v2 wizard and review page.
+    Business Logic: section data is gathered once per save, not once per page view.
+    """
+
+    def setUp(self):
+        self.broker = User.objects.create_user(email='broker@example.com', password=None, is_broker=True)
+        user = User.objects.create_user(email='ana@example.com', password=None)
+        self.applicant = Applicant.objects.create(user=user, first_name='Ana', last_name='Tester', company_name='Acme')
+        self.application = Application.objects.create(
+            broker=self.broker, applicant=self.applicant, manual_building_name='Elm House', required_documents=['photo_id'],
+        )
+
+    def _fill_sections(self):
+        personal_info = PersonalInfoData.objects.create(
+            application=self.application, first_name='Ana', last_name='Tester', email='ana@example.com',
+            date_of_birth=timezone.now().date().replace(year=1990),
+        )
+        PreviousAddress.objects.create(personal_info=personal_info, street_address_1='1 Main St', city='Brooklyn', order=1)
+        income = IncomeData.objects.create(
+            application=self.application, employment_type='employed', employer='Acme', annual_income=85000,
+        )
+        AdditionalEmployment.objects.create(income_data=income, company_name='Side Co', position='Tutor', annual_income=5000)
+        LegalDocuments.objects.create(
+            application=self.application, discrimination_form_signed=True, brokers_form_signed=True,
+            discrimination_form_signed_at=timezone.now(), brokers_form_signed_at=timezone.now(),
+        )
+        UploadedFile.objects.create(application=self.application, file='raw/upload/id.pdf', document_type='photo_id')
+        return personal_info
+
+    def test_section_saves_rebuild_snapshot_once_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                personal_info = self._fill_sections()
+
+        # Six rows saved, one rebuild
+        snapshot = ApplicationSnapshot.objects.get(application=self.application)
+        self.assertEqual(snapshot.version, 1)
+        self.assertEqual(snapshot.data['previous_addresses'][0]['address'], '1 Main St, Brooklyn')
+        self.assertEqual(snapshot.data['additional_jobs'][0]['company_name'], 'Side Co')
+        self.assertEqual(snapshot.data['prefill']['employer'], 'Acme')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            personal_info.first_name = 'Anna'
+            personal_info.save()
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(snapshot.data['personal_info']['first_name'], 'Anna')
+
+        # Applicant profile changes refresh the prefill; bookkeeping saves do not
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applicant.company_name = 'Globex'
+            self.applicant.save()
+            self.applicant.save(update_fields=['assigned_broker'])
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.version, 3)
+        self.assertEqual(snapshot.data['prefill']['employer'], 'Globex')
+
+    def test_rolled_back_savepoint_does_not_drop_the_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            personal_info = self._fill_sections()
+        with self.captureOnCommitCallbacks(execute=True):
+            personal_info.first_name = 'Anna'
+            personal_info.save()
+            try:
+                with transaction.atomic():
+                    personal_info.save()
+                    raise ValueError('Nested step failed')
+            except ValueError:
+                pass
+        self.assertEqual(ApplicationSnapshotService.get(self.application)['personal_info']['first_name'], 'Anna')
+
+    def test_review_page_reads_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._fill_sections()
+        self.client.force_login(self.broker)
+        url = reverse('section4_review', args=[self.application.id])
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        section_tables = ('applications_personalinfodata', 'applications_incomedata', 'applications_uploadedfile')
+        self.assertFalse([q['sql'] for q in queries if any(table in q['sql'] for table in section_tables)])
+
+        self.assertTrue(response.context['all_sections_complete'])
+        self.assertEqual(response.context['personal_info']['date_of_birth'].year, 1990)
+        self.assertContains(response, 'Side Co - Tutor')
+        self.assertContains(response, 'Photo ID')
+
+    def test_income_step_prefills_from_snapshot(self):
+        from applicants.models import ApplicantJob
+
+        ApplicantJob.objects.create(applicant=self.applicant, company_name='Side Co', position='Tutor', annual_income=5000)
+        url = f"{reverse('section2_income', args=[self.application.id])}?token={self.application.unique_link}"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IncomeData.objects.get(application=self.application).employer, 'Acme')
+        self.assertEqual(
+            [job['company_name'] for job in ApplicationSnapshotService.get(self.application)['additional_jobs']],
+            ['Side Co'],
+        )
+
+    def test_outdated_schema_is_rebuilt_on_read(self):
+        ApplicationSnapshotService.refresh(self.application)
+        ApplicationSnapshot.objects.filter(application=self.application).update(schema_version=0, data={})
+
+        data = ApplicationSnapshotService.get(self.application)
+        self.assertEqual(data['prefill']['first_name'], 'Ana')
+        self.assertEqual(ApplicationSnapshot.objects.get(application=self.application).version, 2)
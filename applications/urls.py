@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     # Updated views for 5-section system
     broker_confirmation, create_v2_application, v2_application_overview, v2_section1_personal_info,
+    image_upload_signature,
     v2_section2_income, v2_section3_legal, v2_section4_review, v2_section5_payment,
     v2_section_navigation, add_previous_address, remove_previous_address,
     # Progressive broker application creation
@@ -37,6 +38,7 @@ urlpatterns = [
     path('<int:application_id>/overview/', v2_application_overview, name='v2_application_overview'),
     path('<int:application_id>/manage/', broker_application_management, name='broker_application_management'),
     path('<int:application_id>/section1/', v2_section1_personal_info, name='section1_personal_info'),
+    path('<int:application_id>/uploads/signature/', image_upload_signature, name='image_upload_signature'),
     path('<int:application_id>/section2/', v2_section2_income, name='section2_income'),
     path('<int:application_id>/section3/', v2_section3_legal, name='section3_legal'),
     path('<int:application_id>/section4/', v2_section4_review, name='section4_review'),
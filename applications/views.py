@@ -3,13 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from .forms import PersonalInfoForm, PreviousAddressForm, IncomeForm
+from .drafts import DraftStore
+from .snapshots import ApplicationSnapshotService
 from .models import (
     UploadedFile, Application, ApplicationActivity, ApplicationSection, 
     PersonalInfoData, PreviousAddress, SectionStatus, IncomeData,
-    Pet, PetPhoto
+    Pet, PetPhoto, ApplicationStatus
 )
-from django.core.files.base import ContentFile
-import base64
+from django.conf import settings
 from applicants.models import Applicant, SavedApartment
 from apartments.models import Apartment
 from applicants.apartment_matching import ApartmentMatchingService
@@ -48,6 +49,7 @@ import os
 import requests
 import tempfile
 import json
+from decimal import Decimal
 from django.utils import timezone
 from doc_analysis.utils import extract_text_and_metadata, analyze_bank_statement, analyze_pay_stub, detect_pdf_modifications, analyze_tax_return
 
@@ -107,58 +109,82 @@ def applicant_complete(request, uuid):
 
 
 # ✅ BROKER LISTS ALL APPLICATIONS
+APPLICATIONS_PER_PAGE = 25
+
+
 @login_required
 def application_list(request):
+    """
+    Dashboard list of applications visible to the current user.
+
+    Business Logic:
+    - Superusers see every application
+    - Brokers see their own applications plus unassigned ones for apartments
+      in buildings they cover (checked with an EXISTS subquery per row)
+    - Applicants see their own applications
+    - Stats come from one conditional aggregate; the list is keyset-paginated
+      (?after=/?before= cursors) so deep pages cost the same as the first
+    """
+    from django.db.models import Count, Exists, OuterRef, Q, Value
+    from django.db.models.functions import Coalesce, Concat, NullIf
+    from .pagination import keyset_paginate
+
     if request.user.is_superuser:
-        applications = Application.objects.all().select_related('applicant', 'apartment__building', 'broker').order_by('-created_at')  # ✅ Superuser sees ALL applications
+        applications = Application.objects.all()  # ✅ Superuser sees ALL applications
     elif request.user.is_broker:
-        # Import necessary models
-        from django.db import models
-        from buildings.models import Building
-        from apartments.models import Apartment
-        
-        # Get all buildings assigned to this broker
-        broker_buildings = Building.objects.filter(brokers=request.user)
-        
-        # Get all apartments in those buildings
-        broker_apartments = Apartment.objects.filter(building__in=broker_buildings)
-        
         # Show applications assigned to the broker OR unassigned applications for their apartments
+        covered_apartment = Apartment.objects.filter(
+            pk=OuterRef('apartment_id'), building__brokers=request.user
+        )
         applications = Application.objects.filter(
-            models.Q(broker=request.user) | 
-            (models.Q(apartment__in=broker_apartments) & models.Q(broker__isnull=True))
-        ).select_related('applicant', 'apartment__building', 'broker').order_by('-created_at')
+            Q(broker=request.user) | (Q(broker__isnull=True) & Exists(covered_apartment))
+        )
     elif request.user.is_applicant:
         # Get the applicant profile for the current user
         if hasattr(request.user, 'applicant_profile'):
             # Show all applications for this applicant (including NEW applications created by brokers)
-            applications = Application.objects.filter(
-                applicant=request.user.applicant_profile
-            ).select_related('applicant', 'apartment__building', 'broker').order_by('-created_at')
+            applications = Application.objects.filter(applicant=request.user.applicant_profile)
         else:
             applications = Application.objects.none()  # No applicant profile, no applications
     else:
         messages.error(request, "You are not authorized to view applications.")
         return redirect("home")
 
-    # Calculate dashboard statistics
-    total_applications = applications.count()
-    new_applications = applications.filter(status='new').count()
-    pending_applications = applications.filter(status='pending').count()
-    approved_applications = applications.filter(status='approved').count()
-    unique_properties = len(set(
-        f"{app.apartment.building.name} - {app.apartment.unit_number}" if app.apartment 
-        else f"{app.get_building_display()} - {app.get_unit_display()}"
-        for app in applications
-    ))
+    # Calculate dashboard statistics in a single query. Manual-entry properties
+    # are keyed the same way get_building_display/get_unit_display render them.
+    manual_property = Concat(
+        Coalesce(NullIf('manual_building_name', Value('')), Value('Unknown Building')),
+        Value(' - '),
+        Coalesce(NullIf('manual_unit_number', Value('')), Value('Unknown Unit')),
+    )
+    stats = applications.aggregate(
+        total_applications=Count('id'),
+        new_applications=Count('id', filter=Q(status=ApplicationStatus.NEW)),
+        pending_applications=Count('id', filter=Q(status=ApplicationStatus.PENDING)),
+        approved_applications=Count('id', filter=Q(status=ApplicationStatus.APPROVED)),
+        listed_properties=Count('apartment', distinct=True),
+        manual_properties=Count(manual_property, filter=Q(apartment__isnull=True), distinct=True),
+    )
+
+    page = keyset_paginate(
+        applications.select_related(
+            'applicant__user', 'apartment__building', 'broker',
+            # Section progress (get_dynamic_status) reads these per row
+            'personal_info', 'income_info', 'legal_docs', 'payment',
+        ).prefetch_related('sections'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        per_page=APPLICATIONS_PER_PAGE,
+    )
 
     context = {
-        'applications': applications,
-        'total_applications': total_applications,
-        'new_applications': new_applications,
-        'pending_applications': pending_applications,
-        'approved_applications': approved_applications,
-        'unique_properties': unique_properties,
+        'applications': page,
+        'page': page,
+        'total_applications': stats['total_applications'],
+        'new_applications': stats['new_applications'],
+        'pending_applications': stats['pending_applications'],
+        'approved_applications': stats['approved_applications'],
+        'unique_properties': stats['listed_properties'] + stats['manual_properties'],
     }
 
     return render(request, "applications/application_list.html", context)
@@ -249,10 +275,12 @@ def send_application_link(request, application_id):
     # Send email
     from .email_utils import send_application_link_email
     
-    email_sent = send_application_link_email(application, request)
+    with transaction.atomic():
+        email_sent = send_application_link_email(application, request)
+        if email_sent:
+            log_activity(application, f"Application link re-sent to {application.applicant.email} by {request.user.email}")
     if email_sent:
         messages.success(request, f"Application link sent to {application.applicant.email}")
-        log_activity(application, f"Application link re-sent to {application.applicant.email} by {request.user.email}")
     else:
         messages.error(request, "Failed to send email. Please try again later.")
     
@@ -551,30 +579,24 @@ def approve_application(request, application_id):
 
 
 # Progressive Broker Application Creation Utilities
+def _broker_draft(request):
+    return DraftStore.for_request(request, 'broker_application', legacy_session_key='broker_application_creation')
+
 def get_broker_session_data(request, key=None):
-    """Get broker application creation data from session"""
-    session_key = 'broker_application_creation'
-    if session_key not in request.session:
-        request.session[session_key] = {}
-    
-    if key:
-        return request.session[session_key].get(key)
-    return request.session[session_key]
+    """Get broker application creation data from the wizard draft store"""
+    return _broker_draft(request).get(key)
 
 def set_broker_session_data(request, key, value):
-    """Set broker application creation data in session"""
-    session_key = 'broker_application_creation'
-    if session_key not in request.session:
-        request.session[session_key] = {}
-    
-    request.session[session_key][key] = value
-    request.session.modified = True
+    """Set one broker application creation value in the wizard draft store"""
+    _broker_draft(request).set(key, value)
+
+def update_broker_session_data(request, values):
+    """Set several broker application creation values with a single write"""
+    _broker_draft(request).update(values)
 
 def clear_broker_session_data(request):
-    """Clear broker application creation session data"""
-    session_key = 'broker_application_creation'
-    if session_key in request.session:
-        del request.session[session_key]
+    """Clear broker application creation draft data"""
+    _broker_draft(request).clear()
 
 # Progressive Broker Application Creation Views
 @login_required
@@ -617,18 +639,22 @@ def broker_create_step1(request):
             if not all([first_name, last_name, email]):
                 messages.error(request, "First Name, Last Name, and Email are required for new prospects.")
                 # Store whatever they entered so far
-                set_broker_session_data(request, 'new_applicant_first_name', first_name)
-                set_broker_session_data(request, 'new_applicant_last_name', last_name)
-                set_broker_session_data(request, 'new_applicant_email', email)
-                set_broker_session_data(request, 'new_applicant_phone', phone)
+                update_broker_session_data(request, {
+                    'new_applicant_first_name': first_name,
+                    'new_applicant_last_name': last_name,
+                    'new_applicant_email': email,
+                    'new_applicant_phone': phone,
+                })
                 return redirect('broker_create_step1')
 
-            set_broker_session_data(request, 'new_applicant_email', email)
-            set_broker_session_data(request, 'new_applicant_phone', phone)
-            set_broker_session_data(request, 'new_applicant_first_name', first_name)
-            set_broker_session_data(request, 'new_applicant_last_name', last_name)
-            # Clear existing applicant_id if switching to new
-            set_broker_session_data(request, 'applicant_id', None)
+            update_broker_session_data(request, {
+                'new_applicant_email': email,
+                'new_applicant_phone': phone,
+                'new_applicant_first_name': first_name,
+                'new_applicant_last_name': last_name,
+                # Clear existing applicant_id if switching to new
+                'applicant_id': None,
+            })
         
         return redirect('broker_create_step2')
     
@@ -696,9 +722,11 @@ def broker_create_step2(request):
             apartment_id = request.POST.get('apartment')
             set_broker_session_data(request, 'apartment_id', apartment_id)
         elif property_type == 'manual' and request.user.is_superuser:
-            set_broker_session_data(request, 'manual_building_name', request.POST.get('manual_building_name', ''))
-            set_broker_session_data(request, 'manual_building_address', request.POST.get('manual_building_address', ''))
-            set_broker_session_data(request, 'manual_unit_number', request.POST.get('manual_unit_number', ''))
+            update_broker_session_data(request, {
+                'manual_building_name': request.POST.get('manual_building_name', ''),
+                'manual_building_address': request.POST.get('manual_building_address', ''),
+                'manual_unit_number': request.POST.get('manual_unit_number', ''),
+            })
         
         return redirect('broker_create_step3')
     
@@ -1047,21 +1075,51 @@ def create_v2_application(request, apartment_id=None):
     return redirect('section1_personal_info', application_id=application.id)
 
 
-def process_cropped_image(crop_data_json, original_file):
-    if crop_data_json:
-        try:
-            crop_info = json.loads(crop_data_json)
-            if crop_info.get('cropped') and crop_info.get('croppedImage'):
-                # Extract base64 image data
-                image_data = crop_info['croppedImage']
-                if 'base64,' in image_data:
-                    format, imgstr = image_data.split('base64,')
-                    ext = format.split('/')[-1].split(';')[0]
-                    # Create a ContentFile from the base64 data
-                    return ContentFile(base64.b64decode(imgstr), name=f'cropped.{ext}')
-        except Exception as e:
-            print(f"Error processing crop data: {e}")
-    return original_file
+def save_wizard_photo(request, application, model, photo_field, crop_data_field, **attrs):
+    """
+    Save a wizard photo without processing it in the request: a verified
+    direct Cloudinary upload into the application's folder is stored as is;
+    an uploaded original is cropped and uploaded in the background (see
+    applications.image_uploads), or rejected with a message if it is not an
+    image.
+    """
+    from .image_uploads import ImageUploadService, application_folder
+
+    direct = ImageUploadService.verified_direct_upload(
+        request.POST.get(f'{photo_field}_cloudinary'), application_folder(application.id)
+    )
+    if direct:
+        model.objects.create(image=direct, **attrs)
+    elif photo_field in request.FILES:
+        uploaded_file = request.FILES[photo_field]
+        staged = ImageUploadService.schedule(
+            model, 'image', uploaded_file, request.POST.get(crop_data_field, ''), **attrs
+        )
+        if staged is None:
+            messages.error(request, f'"{uploaded_file.name}" is not a valid image and was not saved.')
+
+
+def image_upload_signature(request, application_id):
+    """
+    Signed parameters for uploading a wizard photo straight to Cloudinary.
+    Only for the application's token link, its applicant, its broker or staff.
+    """
+    from .image_uploads import ImageUploadService, application_folder
+
+    application = get_object_or_404(Application.objects.select_related('applicant'), id=application_id)
+    token = request.GET.get('token')
+    if not settings.IMAGE_DIRECT_UPLOADS or request.method != 'POST':
+        return JsonResponse({'error': 'Direct uploads are not enabled'}, status=400)
+
+    user = request.user
+    allowed = bool(token and token == str(application.unique_link)) or (user.is_authenticated and (
+        user.is_staff or user.is_superuser
+        or application.broker_id == user.id
+        or (application.applicant is not None and application.applicant.user_id == user.id)
+    ))
+    if not allowed:
+        return JsonResponse({'error': 'Not allowed'}, status=403)
+    return JsonResponse(ImageUploadService.direct_upload_params(application_folder(application.id)))
 
 
 @hybrid_csrf_protect
@@ -1090,10 +1148,12 @@ def v2_section1_personal_info(request, application_id):
         application=application
     )
     
+    # Everything this page shows, from the application snapshot (one row)
+    snapshot = ApplicationSnapshotService.get(application)
+    
     # Pre-fill with applicant profile data
     if application.applicant:
-        from .services import ApplicationDataService
-        prefill_data = ApplicationDataService.get_prefill_data_for_applicant(application.applicant)
+        prefill_data = snapshot['prefill']
         
         # Map prefill data to PersonalInfoData fields
         field_mapping = {
@@ -1123,46 +1183,56 @@ def v2_section1_personal_info(request, application_id):
         }
         
         # Apply prefill data to personal_info instance ONLY if the field is currently empty
+        prefilled_fields = []
         for profile_field, app_field in field_mapping.items():
             if profile_field in prefill_data and prefill_data[profile_field]:
                 if not getattr(personal_info, app_field):
                     setattr(personal_info, app_field, prefill_data[profile_field])
+                    prefilled_fields.append(app_field)
         
-        # Always save to ensure consistency (idempotent if no changes)
-        personal_info.save()
-
-        # Clone Previous Addresses if they don't exist yet
-        if not personal_info.previous_addresses.exists() and 'previous_addresses' in prefill_data:
-            for i, addr_data in enumerate(prefill_data['previous_addresses'], 1):
-                PreviousAddress.objects.create(
-                    personal_info=personal_info,
-                    street_address_1=addr_data.get('street_address_1'),
-                    street_address_2=addr_data.get('street_address_2'),
-                    city=addr_data.get('city'),
-                    state=addr_data.get('state'),
-                    zip_code=addr_data.get('zip_code'),
-                    housing_status=addr_data.get('housing_status'),
-                    years=addr_data.get('years', 0),
-                    months=addr_data.get('months', 0),
-                    monthly_rent=addr_data.get('monthly_rent'),
-                    landlord_name=addr_data.get('landlord_name'),
-                    landlord_phone=addr_data.get('landlord_phone'),
-                    landlord_email=addr_data.get('landlord_email'),
-                    order=i
-                )
+        # One transaction, so the snapshot is rebuilt once for all prefilled rows
+        with transaction.atomic():
+            if prefilled_fields:
+                personal_info.save(update_fields=prefilled_fields + ['updated_at'])
+            
+            cloned = False
+            # Clone Previous Addresses if they don't exist yet
+            if not snapshot['previous_addresses'] and prefill_data.get('previous_addresses'):
+                cloned = True
+                for i, addr_data in enumerate(prefill_data['previous_addresses'], 1):
+                    PreviousAddress.objects.create(
+                        personal_info=personal_info,
+                        street_address_1=addr_data.get('street_address_1'),
+                        street_address_2=addr_data.get('street_address_2'),
+                        city=addr_data.get('city'),
+                        state=addr_data.get('state'),
+                        zip_code=addr_data.get('zip_code'),
+                        housing_status=addr_data.get('housing_status'),
+                        years=addr_data.get('years', 0),
+                        months=addr_data.get('months', 0),
+                        monthly_rent=addr_data.get('monthly_rent'),
+                        landlord_name=addr_data.get('landlord_name'),
+                        landlord_phone=addr_data.get('landlord_phone'),
+                        landlord_email=addr_data.get('landlord_email'),
+                        order=i
+                    )
+            
+            # Clone Pets if they don't exist yet
+            if not snapshot['pets'] and prefill_data.get('pets'):
+                cloned = True
+                for pet_data in prefill_data['pets']:
+                    Pet.objects.create(
+                        personal_info=personal_info,
+                        name=pet_data.get('name'),
+                        pet_type=pet_data.get('pet_type'),
+                        quantity=pet_data.get('quantity', 1),
+                        description=pet_data.get('description'),
+                    )
+                    # Note: We're not cloning photos by URL here because it requires re-uploading
+                    # In a real sync, we might copy Cloudinary assets. For now, we clone the metadata.
         
-        # Clone Pets if they don't exist yet
-        if not personal_info.pets.exists() and 'pets' in prefill_data:
-            for pet_data in prefill_data['pets']:
-                Pet.objects.create(
-                    personal_info=personal_info,
-                    name=pet_data.get('name'),
-                    pet_type=pet_data.get('pet_type'),
-                    quantity=pet_data.get('quantity', 1),
-                    description=pet_data.get('description'),
-                )
-                # Note: We're not cloning photos by URL here because it requires re-uploading
-                # In a real sync, we might copy Cloudinary assets. For now, we clone the metadata.
+        if prefilled_fields or cloned:
+            snapshot = ApplicationSnapshotService.get(application)
     
     # Get application section
     section = ApplicationSection.objects.get(
@@ -1218,17 +1288,13 @@ def v2_section1_personal_info(request, application_id):
                                 quantity=1,
                                 description=request.POST.get(f'pet_description_{i}') or None
                             )
-                            # Handle Pet Photos
+                            # Handle Pet Photos (cropped and uploaded after the response)
                             for photo_num in range(1, 4):
-                                photo_field = f'pet_photo_{i}_{photo_num}'
-                                crop_data_field = f'crop_data_pet_{i}_{photo_num}'
-                                if photo_field in request.FILES:
-                                    crop_data = request.POST.get(crop_data_field, '')
-                                    image_file = process_cropped_image(crop_data, request.FILES[photo_field])
-                                    PetPhoto.objects.create(
-                                        pet=pet,
-                                        image=image_file
-                                    )
+                                save_wizard_photo(
+                                    request, application, PetPhoto,
+                                    f'pet_photo_{i}_{photo_num}', f'crop_data_pet_{i}_{photo_num}',
+                                    pet_id=pet.id,
+                                )
                 
                 # Update section status
                 section.status = SectionStatus.COMPLETED
@@ -1289,35 +1355,31 @@ def v2_section1_personal_info(request, application_id):
             section.save()
     
     # Get previous addresses
-    previous_addresses_qs = PreviousAddress.objects.filter(
-        personal_info=personal_info
-    ).order_by('order')
-    
     previous_addresses_list = []
-    for addr in previous_addresses_qs:
+    for addr in snapshot['previous_addresses']:
         previous_addresses_list.append({
-            'street_address_1': addr.street_address_1 or '',
-            'street_address_2': addr.street_address_2 or '',
-            'city': addr.city or '',
-            'state': addr.state or '',
-            'zip_code': addr.zip_code or '',
-            'years': addr.years or 0,
-            'months': addr.months or 0,
-            'monthly_rent': str(addr.monthly_rent) if addr.monthly_rent else '',
-            'housing_status': addr.housing_status or 'own',
-            'landlord_name': addr.landlord_name or '',
-            'landlord_phone': addr.landlord_phone or '',
-            'landlord_email': addr.landlord_email or '',
+            'street_address_1': addr['street_address_1'] or '',
+            'street_address_2': addr['street_address_2'] or '',
+            'city': addr['city'] or '',
+            'state': addr['state'] or '',
+            'zip_code': addr['zip_code'] or '',
+            'years': addr['years'] or 0,
+            'months': addr['months'] or 0,
+            'monthly_rent': addr['monthly_rent'] or '',
+            'housing_status': addr['housing_status'] or 'own',
+            'landlord_name': addr['landlord_name'] or '',
+            'landlord_phone': addr['landlord_phone'] or '',
+            'landlord_email': addr['landlord_email'] or '',
         })
     
     # Get Pets data
     pets_list = []
-    for pet in personal_info.pets.all():
+    for pet in snapshot['pets']:
         pets_list.append({
-            'name': pet.name or '',
-            'pet_type': pet.pet_type,
-            'description': pet.description or '',
-            'photos': [photo.image.url for photo in pet.photos.all()]
+            'name': pet['name'] or '',
+            'pet_type': pet['pet_type'],
+            'description': pet['description'] or '',
+            'photos': pet['photos']
         })
     
     # Check if this is a preview request
@@ -1336,6 +1398,10 @@ def v2_section1_personal_info(request, application_id):
         'preview_mode': is_preview,
         'token': token,
         'is_applicant_access': is_applicant_access,
+        'direct_upload_url': (
+            f"{reverse('image_upload_signature', args=[application.id])}?token={token or ''}"
+            if settings.IMAGE_DIRECT_UPLOADS else ''
+        ),
     }
     
     # Use different templates based on access type
@@ -1731,8 +1797,7 @@ def v2_section2_income(request, application_id):
     
     # Pre-fill with applicant profile data if this is a newly created income_data
     if created and application.applicant:
-        from .services import ApplicationDataService
-        prefill_data = ApplicationDataService.get_prefill_data_for_applicant(application.applicant)
+        prefill_data = ApplicationSnapshotService.get(application)['prefill']
         
         # Map employment data from applicant profile
         field_mapping = {
@@ -1770,50 +1835,50 @@ def v2_section2_income(request, application_id):
                 if value:
                     setattr(income_data, app_field, value)
         
-        # Save if any data was filled
-        if (any(getattr(income_data, field) for field in field_mapping.values() if field)) or created:
+        # Save the prefilled record and copied sub-records (one transaction: one snapshot rebuild)
+        with transaction.atomic():
             income_data.save()
             
             # Map sub-records from profile to application related models
             from .models import AdditionalEmployment, AdditionalIncome, AssetInfo
             
             # Copy Jobs
-            for job in application.applicant.jobs.all():
+            for job in prefill_data.get('jobs', []):
                 AdditionalEmployment.objects.get_or_create(
                     income_data=income_data,
-                    company_name=job.company_name,
-                    position=job.position,
+                    company_name=job['company_name'],
+                    position=job['position'],
                     defaults={
-                        'annual_income': job.annual_income or 0,
-                        'supervisor_name': job.supervisor_name,
-                        'supervisor_email': job.supervisor_email,
-                        'supervisor_phone': job.supervisor_phone,
-                        'currently_employed': job.currently_employed,
-                        'start_date': job.employment_start_date,
-                        'end_date': job.employment_end_date,
-                        'employment_type': job.job_type
+                        'annual_income': job['annual_income'] or 0,
+                        'supervisor_name': job['supervisor_name'],
+                        'supervisor_email': job['supervisor_email'],
+                        'supervisor_phone': job['supervisor_phone'],
+                        'currently_employed': job['currently_employed'],
+                        'employment_start_date': job['employment_start_date'],
+                        'employment_end_date': job['employment_end_date'],
+                        'job_type': job['job_type']
                     }
                 )
             
             # Copy Income Sources
-            for source in application.applicant.income_sources.all():
+            for source in prefill_data.get('income_sources', []):
                 AdditionalIncome.objects.get_or_create(
                     income_data=income_data,
-                    income_source=source.income_source,
+                    income_source=source['income_source'],
                     defaults={
-                        'annual_income': source.average_annual_income or 0,
-                        'source_type': source.source_type
+                        'average_annual_income': source['average_annual_income'] or 0,
+                        'source_type': source['source_type']
                     }
                 )
                 
             # Copy Assets
-            for asset in application.applicant.assets.all():
+            for asset in prefill_data.get('assets', []):
                 AssetInfo.objects.get_or_create(
                     income_data=income_data,
-                    asset_name=asset.asset_name,
+                    asset_name=asset['asset_name'],
                     defaults={
-                        'account_balance': asset.account_balance or 0,
-                        'asset_type': asset.asset_type
+                        'account_balance': asset['account_balance'] or 0,
+                        'asset_type': asset['asset_type']
                     }
                 )
     
@@ -1899,9 +1964,10 @@ def v2_section2_income(request, application_id):
             section.save()
     
     # Get dynamic sub-records for context/pre-fill
-    additional_employment = income_data.additional_employment.all()
-    additional_income = income_data.additional_income.all()
-    assets = income_data.assets.all()
+    snapshot = ApplicationSnapshotService.get(application)
+    additional_employment = snapshot['additional_jobs']
+    additional_income = snapshot['additional_income']
+    assets = snapshot['assets']
     
     context = {
         'application': application,
@@ -1931,7 +1997,7 @@ def process_app_dynamic_jobs(request, income_data):
     """Process additional jobs for an application Section 2"""
     from .models import AdditionalEmployment
     # Clear existing to avoid duplicates on re-save
-    income_data.additional_employment.all().delete()
+    income_data.additional_jobs.all().delete()
     
     # Same naming convention as Step 3 for "Exact Mirror"
     for key, value in request.POST.items():
@@ -1961,9 +2027,9 @@ def process_app_dynamic_jobs(request, income_data):
                     supervisor_email=supervisor_email,
                     supervisor_phone=supervisor_phone,
                     currently_employed=currently_employed,
-                    start_date=start_date or None,
-                    end_date=end_date if not currently_employed and end_date else None,
-                    employment_type='student' if prefix == 'job_company_' else 'employed'
+                    employment_start_date=start_date or None,
+                    employment_end_date=end_date if not currently_employed and end_date else None,
+                    job_type='student' if prefix == 'job_company_' else 'employed'
                 )
 
 def process_app_dynamic_income_sources(request, income_data):
@@ -1991,7 +2057,7 @@ def process_app_dynamic_income_sources(request, income_data):
                     AdditionalIncome.objects.create(
                         income_data=income_data,
                         income_source=source,
-                        annual_income=float(amount),
+                        average_annual_income=float(amount),
                         source_type=source_type
                     )
 
@@ -2185,11 +2251,12 @@ def v2_section4_review(request, application_id):
         if not request.user.is_authenticated:
             return redirect('login')
     
-    # Gather all application data for review
-    personal_info = PersonalInfoData.objects.filter(application=application).first()
-    income_data = IncomeData.objects.filter(application=application).first()
-    legal_docs = LegalDocuments.objects.filter(application=application).first()
-    uploaded_files = application.uploaded_files.all()
+    # Gather all application data for review (one snapshot row)
+    snapshot = ApplicationSnapshotService.get(application)
+    personal_info = snapshot['personal_info']
+    income_data = snapshot['income']
+    legal_docs = snapshot['legal']
+    uploaded_files = snapshot['documents']
     
     # Get or create section tracking
     section, _ = ApplicationSection.objects.get_or_create(
@@ -2204,7 +2271,7 @@ def v2_section4_review(request, application_id):
         'personal_message': '',
         'income': False,
         'income_message': '',
-        'legal': legal_docs and legal_docs.discrimination_form_signed and legal_docs.brokers_form_signed,
+        'legal': bool(legal_docs and legal_docs['discrimination_form_signed'] and legal_docs['brokers_form_signed']),
         'required_docs': False,
         'docs_message': ''
     }
@@ -2212,11 +2279,11 @@ def v2_section4_review(request, application_id):
     # Validate Personal Information (check required fields)
     if personal_info:
         missing_fields = []
-        if not personal_info.first_name:
+        if not personal_info['first_name']:
             missing_fields.append('first name')
-        if not personal_info.last_name:
+        if not personal_info['last_name']:
             missing_fields.append('last name')
-        if not personal_info.email:
+        if not personal_info['email']:
             missing_fields.append('email')
         
         if missing_fields:
@@ -2229,9 +2296,12 @@ def v2_section4_review(request, application_id):
     # Validate Income Information (check essential fields)
     if income_data:
         missing_fields = []
-        if not income_data.company_name:
+        if income_data['employment_type'] == 'student':
+            if not income_data['school_name']:
+                missing_fields.append('school name')
+        elif not income_data['employer']:
             missing_fields.append('company name')
-        if not income_data.annual_income or income_data.annual_income <= 0:
+        if not income_data['annual_income'] or Decimal(income_data['annual_income']) <= 0:
             missing_fields.append('valid annual income')
         
         if missing_fields:
@@ -2251,9 +2321,10 @@ def v2_section4_review(request, application_id):
         from .models import RequiredDocumentType
         doc_choices = dict(RequiredDocumentType.choices)
         
+        uploaded_types = {file['document_type'] for file in uploaded_files}
         for doc_type in required_documents_list:
             # Check if this document type has been uploaded
-            doc_uploaded = uploaded_files.filter(document_type=doc_type).exists()
+            doc_uploaded = doc_type in uploaded_types
             required_documents_status[doc_type] = {
                 'display_name': doc_choices.get(doc_type, doc_type),
                 'uploaded': doc_uploaded
@@ -2277,14 +2348,6 @@ def v2_section4_review(request, application_id):
         sections_complete['required_docs']
     )
     
-    # Parse document analysis results for display
-    for file in uploaded_files:
-        if file.analysis_results:
-            try:
-                file.analysis_results = json.loads(file.analysis_results)
-            except json.JSONDecodeError:
-                file.analysis_results = None
-    
     # Handle confirmation and proceed to payment
     if request.method == 'POST' and 'confirm_proceed' in request.POST:
         if not all_sections_complete:
@@ -2330,10 +2393,10 @@ def v2_section4_review(request, application_id):
         'is_preview': is_preview,
         
         # Include related data if available
-        'previous_addresses': personal_info.previous_addresses.all() if personal_info else [],
-        'additional_jobs': income_data.additional_jobs.all() if income_data else [],
-        'additional_income': income_data.additional_income.all() if income_data else [],
-        'assets': income_data.assets.all() if income_data else [],
+        'previous_addresses': snapshot['previous_addresses'],
+        'additional_jobs': snapshot['additional_jobs'],
+        'additional_income': snapshot['additional_income'],
+        'assets': snapshot['assets'],
         
         # Property details
         'property_display': application.get_building_display() if application else 'Not specified',
@@ -2379,13 +2442,24 @@ def v2_section5_payment(request, application_id):
             return redirect('application_detail', application_id=application.id)
     
     # Get or create payment record
-    payment, created = ApplicationPayment.objects.get_or_create(
-        application=application,
-        defaults={
-            'amount': application.application_fee_amount,
-            'status': PaymentStatus.PENDING
-        }
-    )
+    from .payment_utils import PaymentProcessor
+    payment = PaymentProcessor.get_or_create_payment(application)
+    
+    if request.method == 'GET':
+        processor = PaymentProcessor()
+        if processor._needs_reconciliation(payment):
+            # Settle an earlier attempt with an unknown outcome before showing the form again
+            success, message = processor.reconcile_payment(application)
+            payment.refresh_from_db()
+            if success:
+                messages.success(request, message)
+                if is_applicant_access:
+                    return redirect(f"{reverse('v2_application_overview', args=[application.id])}?token={token}")
+                return redirect('application_detail', application_id=application.id)
+            if payment.status == PaymentStatus.NEEDS_REVIEW:
+                messages.warning(request, message)
+            else:
+                messages.error(request, message)
     
     if request.method == 'POST':
         # Extract card data from form
@@ -2404,7 +2478,6 @@ def v2_section5_payment(request, application_id):
             messages.error(request, "Please fill in all required payment fields.")
         else:
             # Process payment
-            from .payment_utils import PaymentProcessor
             processor = PaymentProcessor()
             
             success, message = processor.process_application_payment(
@@ -2441,7 +2514,12 @@ def v2_section5_payment(request, application_id):
                 else:
                     return redirect('application_detail', application_id=application.id)
             else:
-                messages.error(request, f"Payment failed: {message}")
+                payment.refresh_from_db()
+                if payment.status in (PaymentStatus.PROCESSING, PaymentStatus.NEEDS_REVIEW):
+                    # In flight or unconfirmed: not a failure the applicant should retry
+                    messages.warning(request, message)
+                else:
+                    messages.error(request, f"Payment failed: {message}")
     
     # Prepare context for template
     context = {
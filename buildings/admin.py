@@ -72,15 +72,12 @@ class BuildingAdmin(admin.ModelAdmin):
 
     def refresh_neighborhood_data(self, request, queryset):
         """Action to manually trigger an update of Walk Score and School data."""
-        success_count = 0
-        for building in queryset:
-            if NeighborhoodService.update_building_data(building.id):
-                success_count += 1
-        
-        if success_count:
-            self.message_user(request, f"Successfully updated neighborhood data for {success_count} buildings.", messages.SUCCESS)
-        if success_count < queryset.count():
-            self.message_user(request, f"Failed to update data for {queryset.count() - success_count} buildings. Check coordinates.", messages.ERROR)
+        result = NeighborhoodService.refresh_buildings(queryset, force=True)
+
+        if result.updated:
+            self.message_user(request, f"Successfully updated neighborhood data for {result.updated} buildings.", messages.SUCCESS)
+        if result.failed:
+            self.message_user(request, f"Failed to update data for {result.failed} buildings. Check coordinates.", messages.ERROR)
     
     refresh_neighborhood_data.short_description = "Refresh Neighborhood Data (Walk Score/Schools)"
 
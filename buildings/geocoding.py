@@ -0,0 +1,305 @@
+"""
+Geocoding subsystem for building addresses.
+Business Context: Building coordinates drive the distance search and the
+listings map, so they need to be real, repeatable and cheap to compute for
+thousands of buildings.
+
+Lookups go through a pluggable provider (GEOCODING_PROVIDER setting). Results
+are stored in the GeocodeCache table keyed by provider and normalized address,
+so each distinct address is only sent to a provider once; misses and centroid
+fallbacks are retried after GEOCODE_RETRY_AFTER_DAYS.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'geocode_reference.csv')
+
+# USPS-style suffix/direction abbreviations so "Saint Marks Avenue" and
+# "St. Marks Ave" normalize to the same cache key.
+_ABBREVIATIONS = {
+    'avenue': 'ave', 'av': 'ave', 'street': 'st', 'boulevard': 'blvd', 'road': 'rd',
+    'place': 'pl', 'drive': 'dr', 'lane': 'ln', 'court': 'ct', 'terrace': 'ter',
+    'parkway': 'pkwy', 'square': 'sq', 'highway': 'hwy', 'saint': 'st',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+_ORDINAL_RE = re.compile(r'\b(\d+)(st|nd|rd|th)\b')
+_NON_WORD_RE = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize_street(street: str) -> str:
+    """Lowercase, strip punctuation and abbreviate a street line."""
+    text = _NON_WORD_RE.sub(' ', (street or '').lower())
+    text = _ORDINAL_RE.sub(r'\1', text)
+    return ' '.join(_ABBREVIATIONS.get(word, word) for word in text.split())
+
+
+def normalize_zip(zip_code: str) -> str:
+    return (zip_code or '').strip()[:5]
+
+
+def normalize_address(street: str, city: str = '', state: str = '', zip_code: str = '') -> str:
+    """Cache key for an address: normalized street, city, state and 5-digit ZIP."""
+    parts = [
+        normalize_street(street),
+        ' '.join(_NON_WORD_RE.sub(' ', (city or '').lower()).split()),
+        (state or '').strip().lower(),
+        normalize_zip(zip_code),
+    ]
+    return '|'.join(parts)
+
+
+@dataclass(frozen=True)
+class AddressQuery:
+    """Address fields sent to a provider."""
+    street: str
+    city: str = ''
+    state: str = ''
+    zip_code: str = ''
+    neighborhood: str = ''
+
+    @property
+    def key(self) -> str:
+        return normalize_address(self.street, self.city, self.state, self.zip_code)
+
+    @property
+    def one_line(self) -> str:
+        locality = ' '.join(filter(None, [self.state, normalize_zip(self.zip_code)]))
+        return ', '.join(filter(None, [self.street, self.city, locality]))
+
+
+@dataclass(frozen=True)
+class GeocodeResult:
+    """Coordinates returned by a provider."""
+    latitude: Decimal
+    longitude: Decimal
+    precision: str  # 'address', 'zip' or 'neighborhood'
+    provider: str
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls at least 1/rate seconds apart.
+    Shared by all worker threads of a geocoding run.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second and rate_per_second > 0 else 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class GeocodingProvider:
+    """
+    Base class for geocoding providers.
+    Subclasses implement geocode(); they must not touch the database because
+    lookups run in worker threads.
+    """
+    name = 'base'
+    rate_limit = 10  # Requests per second the provider tolerates
+    max_workers = 4
+
+    def geocode(self, query: AddressQuery) -> Optional[GeocodeResult]:
+        raise NotImplementedError
+
+
+class LocalGeocodingProvider(GeocodingProvider):
+    """
+    Offline provider backed by the bundled reference table.
+    Resolves exact known addresses first, then the ZIP centroid, then the
+    neighborhood centroid. Used for development, tests and offline runs.
+    """
+    name = 'local'
+    rate_limit = 0  # No external calls, no limit
+    max_workers = 1
+
+    _reference = None
+    _reference_lock = threading.Lock()
+
+    @classmethod
+    def load_reference(cls) -> Dict[str, Dict[str, tuple]]:
+        if cls._reference is None:
+            with cls._reference_lock:
+                if cls._reference is None:
+                    reference = {'address': {}, 'zip': {}, 'neighborhood': {}}
+                    with open(REFERENCE_DATA_PATH, newline='', encoding='utf-8') as handle:
+                        for row in csv.DictReader(handle):
+                            reference[row['kind']][row['key']] = (
+                                Decimal(row['latitude']), Decimal(row['longitude'])
+                            )
+                    cls._reference = reference
+        return cls._reference
+
+    def geocode(self, query: AddressQuery) -> Optional[GeocodeResult]:
+        reference = self.load_reference()
+        zip_code = normalize_zip(query.zip_code)
+
+        lookups = [
+            ('address', f"{normalize_street(query.street)}|{zip_code}"),
+            ('zip', zip_code),
+            ('neighborhood', (query.neighborhood or '').lower()),
+        ]
+        for precision, key in lookups:
+            point = reference[precision].get(key)
+            if point:
+                return GeocodeResult(point[0], point[1], precision, self.name)
+        return None
+
+
+class MapboxGeocodingProvider(GeocodingProvider):
+    """Mapbox forward geocoding (uses the MAPBOX_API_TOKEN already used by the map)."""
+    name = 'mapbox'
+    rate_limit = 10
+    max_workers = 8
+
+    API_URL = 'https://api.mapbox.com/geocoding/v5/mapbox.places/{query}.json'
+
+    def __init__(self, token: Optional[str] = None, timeout: float = 10):
+        import requests
+
+        self.token = token or getattr(settings, 'MAPBOX_API_TOKEN', '')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def geocode(self, query: AddressQuery) -> Optional[GeocodeResult]:
+        from urllib.parse import quote
+
+        response = self.session.get(
+            self.API_URL.format(query=quote(query.one_line)),
+            params={
+                'access_token': self.token,
+                'country': 'us',
+                'types': 'address',
+                'limit': 1,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        features = response.json().get('features') or []
+        if not features:
+            return None
+
+        longitude, latitude = features[0]['center']
+        return GeocodeResult(
+            Decimal(str(latitude)).quantize(Decimal('0.0000001')),
+            Decimal(str(longitude)).quantize(Decimal('0.0000001')),
+            'address',
+            self.name,
+        )
+
+
+def get_geocoding_provider(path: Optional[str] = None) -> GeocodingProvider:
+    """Instantiate the configured provider (GEOCODING_PROVIDER dotted path)."""
+    path = path or getattr(settings, 'GEOCODING_PROVIDER', '')
+    if not path:
+        path = (
+            'buildings.geocoding.MapboxGeocodingProvider'
+            if getattr(settings, 'MAPBOX_API_TOKEN', '')
+            else 'buildings.geocoding.LocalGeocodingProvider'
+        )
+    return import_string(path)()
+
+
+def geocode_addresses(
+    queries: Iterable[AddressQuery],
+    provider: Optional[GeocodingProvider] = None,
+    max_workers: Optional[int] = None,
+    rate_limit: Optional[float] = None,
+    refresh: bool = False,
+) -> Dict[str, Optional[GeocodeResult]]:
+    """
+    Geocode many addresses, consulting and filling the GeocodeCache table.
+
+    Each distinct normalized address is looked up at most once. Cache misses
+    are resolved concurrently under a shared rate limiter, and all new results
+    (including misses, so they aren't retried every run) are written in one
+    upsert. Cached misses and centroid fallbacks older than
+    GEOCODE_RETRY_AFTER_DAYS are looked up again.
+
+    Returns a mapping of normalized address -> result (None when not found).
+    """
+    from .models import GeocodeCache
+
+    provider = provider or get_geocoding_provider()
+    unique = {}
+    for query in queries:
+        unique.setdefault(query.key, query)
+
+    results = {}
+    if not refresh:
+        stored_keys = {GeocodeCache.storage_key(key): key for key in unique}
+        max_age = timedelta(days=getattr(settings, 'GEOCODE_RETRY_AFTER_DAYS', 30))
+        cached = GeocodeCache.objects.filter(provider=provider.name, normalized_address__in=list(stored_keys))
+        for entry in cached:
+            if entry.is_fresh(max_age):
+                results[stored_keys[entry.normalized_address]] = entry.as_result()
+
+    misses = [query for key, query in unique.items() if key not in results]
+    if not misses:
+        return results
+
+    limiter = RateLimiter(provider.rate_limit if rate_limit is None else rate_limit)
+
+    def lookup(query):
+        limiter.wait()
+        try:
+            return query.key, provider.geocode(query), None
+        except Exception as e:
+            return query.key, None, e
+
+    workers = max(1, min(max_workers or provider.max_workers, len(misses)))
+    entries = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for key, result, error in executor.map(lookup, misses):
+            if error is not None:
+                # Transient provider errors are not cached so the next run retries them
+                logger.warning(f"Geocoding failed for {key}: {error}")
+                continue
+            results[key] = result
+            entries.append(GeocodeCache.from_result(key, result, provider.name))
+
+    if entries:
+        GeocodeCache.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['normalized_address', 'provider'],
+            # created_at restarts the retry clock of misses and centroid fallbacks
+            update_fields=['latitude', 'longitude', 'precision', 'created_at', 'updated_at'],
+        )
+
+    return results
+
+
+def query_for_building(building) -> AddressQuery:
+    return AddressQuery(
+        street=building.street_address_1,
+        city=building.city,
+        state=building.state,
+        zip_code=building.zip_code,
+        neighborhood=building.neighborhood or '',
+    )
@@ -3,66 +3,95 @@ Django management command to geocode building addresses
 """
 from django.core.management.base import BaseCommand
 from buildings.models import Building
-import time
-import random
+from buildings.geocoding import geocode_addresses, get_geocoding_provider, query_for_building
 
 
 class Command(BaseCommand):
     help = 'Geocode building addresses to populate latitude/longitude'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-geocode every building, not only those missing coordinates',
+        )
+        parser.add_argument(
+            '--provider',
+            help='Dotted path of the geocoding provider (defaults to GEOCODING_PROVIDER)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Concurrent provider lookups (defaults to the provider setting)',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Maximum provider requests per second (defaults to the provider setting)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Buildings geocoded and written per batch',
+        )
+        parser.add_argument(
+            '--refresh-cache',
+            action='store_true',
+            help='Ignore cached results and query the provider again',
+        )
+
     def handle(self, *args, **options):
-        buildings = Building.objects.filter(latitude__isnull=True) | Building.objects.filter(longitude__isnull=True)
-        
-        self.stdout.write(f"Found {buildings.count()} buildings to geocode")
-        
-        # NYC neighborhoods with their approximate coordinates
-        neighborhood_coords = {
-            'Upper West Side': (40.7870, -73.9754),
-            'Upper East Side': (40.7736, -73.9566),
-            'Midtown': (40.7549, -73.9840),
-            'Chelsea': (40.7465, -74.0014),
-            'Greenwich Village': (40.7336, -73.9991),
-            'East Village': (40.7265, -73.9815),
-            'Lower East Side': (40.7153, -73.9874),
-            'Tribeca': (40.7163, -74.0086),
-            'Financial District': (40.7074, -74.0113),
-            'Williamsburg': (40.7081, -73.9571),
-            'Greenpoint': (40.7304, -73.9540),
-            'Bed-Stuy': (40.6895, -73.9535),
-            'Crown Heights': (40.6696, -73.9442),
-            'Park Slope': (40.6710, -73.9778),
-            'Bushwick': (40.6942, -73.9222),
-            'Astoria': (40.7644, -73.9235),
-            'Long Island City': (40.7447, -73.9485),
-            'Flushing': (40.7676, -73.8330),
-        }
-        
+        buildings = Building.objects.only(
+            'id', 'street_address_1', 'city', 'state', 'zip_code', 'neighborhood', 'latitude', 'longitude'
+        ).order_by('id')
+        if not options['all']:
+            buildings = buildings.filter(latitude__isnull=True) | buildings.filter(longitude__isnull=True)
+
+        total = buildings.count()
+        provider = get_geocoding_provider(options['provider'])
+        self.stdout.write(f"Found {total} buildings to geocode (provider: {provider.name})")
+
+        processed = 0
         updated = 0
-        for building in buildings:
-            neighborhood = building.neighborhood
-            
-            if neighborhood in neighborhood_coords:
-                # Use base coordinates for the neighborhood
-                base_lat, base_lng = neighborhood_coords[neighborhood]
-                
-                # Add small random offset to spread buildings out
-                offset_lat = random.uniform(-0.005, 0.005)
-                offset_lng = random.uniform(-0.005, 0.005)
-                
-                building.latitude = base_lat + offset_lat
-                building.longitude = base_lng + offset_lng
-                building.save()
-                
-                updated += 1
-                self.stdout.write(f"✓ Geocoded {building.name} in {neighborhood}")
-            else:
-                # Default to midtown Manhattan for unknown neighborhoods
-                building.latitude = 40.7549 + random.uniform(-0.01, 0.01)
-                building.longitude = -73.9840 + random.uniform(-0.01, 0.01)
-                building.save()
-                updated += 1
-                self.stdout.write(f"✓ Geocoded {building.name} (default location)")
-            
-            time.sleep(0.05)
-        
-        self.stdout.write(self.style.SUCCESS(f"\n✅ Successfully geocoded {updated} buildings"))
\ No newline at end of file
+        not_found = []
+        batch_size = max(1, options['batch_size'])
+        # Iterate by primary key so updated rows don't shift the remaining batches
+        last_id = 0
+        while True:
+            batch = list(buildings.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            queries = {building.id: query_for_building(building) for building in batch}
+            results = geocode_addresses(
+                queries.values(),
+                provider=provider,
+                max_workers=options['workers'],
+                rate_limit=options['rate'],
+                refresh=options['refresh_cache'],
+            )
+
+            changed = []
+            for building in batch:
+                result = results.get(queries[building.id].key)
+                if result is None:
+                    not_found.append(building)
+                    continue
+                if (building.latitude, building.longitude) != (result.latitude, result.longitude):
+                    building.latitude = result.latitude
+                    building.longitude = result.longitude
+                    changed.append(building)
+
+            Building.objects.bulk_update(changed, ['latitude', 'longitude'])
+            updated += len(changed)
+            processed += len(batch)
+            self.stdout.write(f"Processed {processed}/{total} buildings")
+
+        for building in not_found:
+            self.stdout.write(self.style.WARNING(f"✗ No match for {building}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ Successfully geocoded {updated} buildings ({len(not_found)} not found)"
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0006_auto_20260102_0824'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_address', models.CharField(max_length=255, unique=True)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=7, help_text='Empty when the provider found no match', max_digits=10, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=7, max_digits=10, null=True)),
+                ('precision', models.CharField(blank=True, choices=[('address', 'Address'), ('zip', 'ZIP Centroid'), ('neighborhood', 'Neighborhood Centroid')], max_length=20, null=True)),
+                ('provider', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Geocode Cache Entry',
+                'verbose_name_plural': 'Geocode Cache',
+            },
+        ),
+    ]
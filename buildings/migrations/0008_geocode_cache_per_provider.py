@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0007_geocode_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='When the provider was last asked'),
+        ),
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='normalized_address',
+            field=models.CharField(help_text='See storage_key() for long addresses', max_length=255),
+        ),
+        migrations.AlterUniqueTogether(
+            name='geocodecache',
+            unique_together={('normalized_address', 'provider')},
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 from cloudinary.utils import cloudinary_url
 from ckeditor.fields import RichTextField
+import hashlib
 
 
 
@@ -223,6 +225,12 @@ class BuildingImage(models.Model):
         )
         return url
 
+    @staticmethod
+    def thumbnail_url_for(stored_image):
+        """Thumbnail URL from a raw stored image value (e.g. a queryset annotation)."""
+        image = BuildingImage._meta.get_field('image').to_python(stored_image)
+        return BuildingImage(image=image).thumbnail_url
+
     def large_url(self):
         url, _ = cloudinary_url(
             self.image.public_id,
@@ -358,3 +366,71 @@ class NearbySchool(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.rating}/10) - {self.distance} mi"
+
+
+class GeocodeCache(models.Model):
+    """
+    Persistent address -> coordinates cache for the geocoding subsystem.
+    Business Context: Each distinct address is sent to a geocoding provider once;
+    re-runs and new buildings at known addresses are resolved from this table.
+    Entries are per provider; misses and centroid fallbacks are retried once
+    older than GEOCODE_RETRY_AFTER_DAYS.
+    """
+    PRECISION_CHOICES = [
+        ('address', 'Address'),
+        ('zip', 'ZIP Centroid'),
+        ('neighborhood', 'Neighborhood Centroid'),
+    ]
+
+    normalized_address = models.CharField(max_length=255, help_text='See storage_key() for long addresses')
+    latitude = models.DecimalField(max_digits=10, decimal_places=7, blank=True, null=True,
+                                   help_text='Empty when the provider found no match')
+    longitude = models.DecimalField(max_digits=10, decimal_places=7, blank=True, null=True)
+    precision = models.CharField(max_length=20, choices=PRECISION_CHOICES, blank=True, null=True)
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True, help_text='When the provider was last asked')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Geocode Cache Entry"
+        verbose_name_plural = "Geocode Cache"
+        unique_together = ['normalized_address', 'provider']
+
+    @staticmethod
+    def storage_key(normalized_address):
+        """
+        Column value for a normalized address: the address itself, or for one
+        longer than the column a prefix plus a hash of the full address.
+        """
+        max_length = GeocodeCache._meta.get_field('normalized_address').max_length
+        if len(normalized_address) <= max_length:
+            return normalized_address
+        digest = hashlib.sha256(normalized_address.encode()).hexdigest()
+        return f"{normalized_address[:max_length - len(digest) - 1]}#{digest}"
+
+    @classmethod
+    def from_result(cls, normalized_address, result, provider_name):
+        return cls(
+            normalized_address=cls.storage_key(normalized_address),
+            latitude=result.latitude if result else None,
+            longitude=result.longitude if result else None,
+            precision=result.precision if result else None,
+            provider=provider_name,
+        )
+
+    def is_fresh(self, max_age):
+        """Exact matches never expire; misses and centroid fallbacks do after ``max_age``."""
+        if self.precision == 'address' and self.latitude is not None:
+            return True
+        return self.created_at >= timezone.now() - max_age
+
+    def as_result(self):
+        """Return a GeocodeResult, or None for a cached miss."""
+        from .geocoding import GeocodeResult
+
+        if self.latitude is None or self.longitude is None:
+            return None
+        return GeocodeResult(self.latitude, self.longitude, self.precision, self.provider)
+
+    def __str__(self):
+        return f"{self.normalized_address} -> {self.latitude}, {self.longitude}"
@@ -1,90 +1,257 @@
+"""
+Neighborhood data (Walk Score and nearby schools) for buildings.
+Business Context: Walk/transit scores and school ratings are shown on every
+apartment page, so the whole portfolio has to be kept reasonably fresh without
+hammering the upstream APIs.
+
+Data comes from a pluggable provider (NEIGHBORHOOD_DATA_PROVIDER setting) and
+is written in batches: one bulk_update for the buildings and one bulk_create
+for their schools per batch. Buildings refreshed within the TTL are skipped.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
 import logging
+import math
 import random
-from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
+from django.utils.module_loading import import_string
+
 from .models import Building, NearbySchool
 
 logger = logging.getLogger(__name__)
 
+BUILDING_FIELDS = [
+    'walk_score', 'walk_description',
+    'bike_score', 'bike_description',
+    'transit_score', 'transit_description',
+    'neighborhood_data_updated',
+]
+
+
+@dataclass(frozen=True)
+class SchoolData:
+    name: str
+    rating: Optional[int]
+    grades: str
+    distance: Decimal
+    school_type: str
+
+
+@dataclass
+class NeighborhoodData:
+    """Everything a provider returns for one building."""
+    walk_score: Optional[int]
+    bike_score: Optional[int]
+    transit_score: Optional[int]
+    schools: List[SchoolData] = field(default_factory=list)
+
+
+@dataclass
+class RefreshResult:
+    updated: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+class NeighborhoodDataProvider:
+    """
+    Base class for neighborhood data providers.
+    Subclasses implement fetch() for a single building; the service handles
+    batching, freshness and all database writes.
+    """
+    name = 'base'
+
+    def fetch(self, building) -> NeighborhoodData:
+        raise NotImplementedError
+
+
+class LocalNeighborhoodProvider(NeighborhoodDataProvider):
+    """
+    Offline stand-in for the Walk Score and GreatSchools APIs.
+    Generates deterministic data from the building ID with a private Random
+    instance, so results are repeatable without reseeding the global generator.
+    """
+    name = 'local'
+
+    def fetch(self, building) -> NeighborhoodData:
+        rng = random.Random(building.id)
+        neighborhood = building.neighborhood or 'Local'
+
+        data = NeighborhoodData(
+            walk_score=rng.randint(60, 95),
+            bike_score=rng.randint(40, 90),
+            transit_score=rng.randint(50, 98),
+        )
+        data.schools = [
+            SchoolData(f"P.S. {rng.randint(1, 100)} {neighborhood}", rng.randint(6, 10), 'PK-5',
+                       Decimal(str(round(rng.uniform(0.1, 0.8), 1))), 'Public'),
+            SchoolData(f"I.S. {rng.randint(1, 100)} Bernstein", rng.randint(5, 9), '6-8',
+                       Decimal(str(round(rng.uniform(1.0, 2.0), 1))), 'Public'),
+            SchoolData(f"{neighborhood} High School", rng.randint(7, 10), '9-12',
+                       Decimal(str(round(rng.uniform(1.5, 3.0), 1))), 'Public'),
+        ]
+        return data
+
+
+def get_neighborhood_provider(path: Optional[str] = None) -> NeighborhoodDataProvider:
+    """Instantiate the configured provider (NEIGHBORHOOD_DATA_PROVIDER dotted path)."""
+    path = path or getattr(settings, 'NEIGHBORHOOD_DATA_PROVIDER', '') or \
+        'buildings.neighborhood_service.LocalNeighborhoodProvider'
+    return import_string(path)()
+
+
+def walk_description(score):
+    # Descriptions based on standard Walk Score ranges
+    if score is None:
+        return None
+    if score >= 90:
+        return "Walker's Paradise"
+    if score >= 70:
+        return "Very Walkable"
+    return "Somewhat Walkable"
+
+
+def bike_description(score):
+    if score is None:
+        return None
+    if score >= 90:
+        return "Biker's Paradise"
+    if score >= 70:
+        return "Very Bikeable"
+    return "Somewhat Bikeable"
+
+
+def transit_description(score):
+    if score is None:
+        return None
+    return "Excellent Transit" if score > 80 else "Good Transit"
+
+
 class NeighborhoodService:
     @staticmethod
-    def update_building_data(building_id):
+    def data_ttl() -> timedelta:
+        return timedelta(days=getattr(settings, 'NEIGHBORHOOD_DATA_TTL_DAYS', 30))
+
+    @staticmethod
+    def stale_buildings(ttl: Optional[timedelta] = None):
+        """Buildings never refreshed or refreshed longer ago than the TTL, oldest first."""
+        cutoff = timezone.now() - (ttl or NeighborhoodService.data_ttl())
+        return Building.objects.filter(
+            Q(neighborhood_data_updated__isnull=True) | Q(neighborhood_data_updated__lt=cutoff)
+        ).order_by(F('neighborhood_data_updated').asc(nulls_first=True), 'id')
+
+    @staticmethod
+    def refresh_quota(interval_seconds: float, ttl: Optional[timedelta] = None) -> int:
         """
-        Gateway method to update all neighborhood data for a building.
+        Buildings to refresh per scheduled run so the whole portfolio is
+        covered once per TTL, instead of every building expiring at once.
         """
-        try:
-            building = Building.objects.get(id=building_id)
-            
-            # 1. Update Walk Scores
-            NeighborhoodService._update_walk_scores(building)
-            
-            # 2. Update Nearby Schools
-            NeighborhoodService._update_nearby_schools(building)
-            
-            # 3. Mark as updated
-            building.neighborhood_data_updated = timezone.now()
-            building.save()
-            
-            return True
-        except Exception as e:
-            logger.error(f"Error updating neighborhood data for building {building_id}: {e}")
-            return False
+        ttl_seconds = (ttl or NeighborhoodService.data_ttl()).total_seconds()
+        runs_per_ttl = max(1, ttl_seconds / interval_seconds)
+        return max(1, math.ceil(Building.objects.count() / runs_per_ttl))
 
     @staticmethod
-    def _update_walk_scores(building):
+    def refresh_buildings(
+        buildings: Iterable,
+        provider: Optional[NeighborhoodDataProvider] = None,
+        force: bool = False,
+        batch_size: int = 200,
+    ) -> RefreshResult:
         """
-        Fetches scores from Walk Score API.
-        MOCK IMPLEMENTATION for now.
+        Refresh neighborhood data for many buildings.
+
+        Args:
+            buildings: Building queryset, list of buildings or list of IDs
+            provider: Data provider (defaults to NEIGHBORHOOD_DATA_PROVIDER)
+            force: Refresh even buildings updated within the TTL
+            batch_size: Buildings written per transaction
         """
-        # In a real implementation, we would call the Walk Score API here.
-        # For now, generate deterministic mock scores based on ID
-        seed = building.id
-        random.seed(seed)
-        
-        building.walk_score = random.randint(60, 95)
-        building.bike_score = random.randint(40, 90)
-        building.transit_score = random.randint(50, 98)
-        
-        # Descriptions based on standard Walk Score ranges
-        if building.walk_score >= 90:
-            building.walk_description = "Walker's Paradise"
-        elif building.walk_score >= 70:
-            building.walk_description = "Very Walkable"
-        else:
-            building.walk_description = "Somewhat Walkable"
-            
-        if building.bike_score >= 90:
-            building.bike_description = "Biker's Paradise"
-        elif building.bike_score >= 70:
-            building.bike_description = "Very Bikeable"
-        else:
-            building.bike_description = "Somewhat Bikeable"
-            
-        building.transit_description = "Excellent Transit" if building.transit_score > 80 else "Good Transit"
-        building.save()
+        provider = provider or get_neighborhood_provider()
+        result = RefreshResult()
+        cutoff = timezone.now() - NeighborhoodService.data_ttl()
+
+        batch = []
+        for building in NeighborhoodService._iter_buildings(buildings):
+            if not force and building.neighborhood_data_updated and building.neighborhood_data_updated >= cutoff:
+                result.skipped += 1
+                continue
+            batch.append(building)
+            if len(batch) >= batch_size:
+                NeighborhoodService._refresh_batch(batch, provider, result)
+                batch = []
+        if batch:
+            NeighborhoodService._refresh_batch(batch, provider, result)
+
+        return result
 
     @staticmethod
-    def _update_nearby_schools(building):
+    def update_building_data(building_id):
         """
-        Fetches schools from GreatSchools API.
-        MOCK IMPLEMENTATION for now.
+        Gateway method to update all neighborhood data for a single building.
         """
-        # Clear existing schools to refresh
-        building.nearby_schools.all().delete()
-        
-        # Mock schools data
-        mock_schools = [
-            {"name": f"P.S. {random.randint(1, 100)} {building.neighborhood or 'Local'}", "rating": random.randint(6, 10), "grades": "PK-5", "distance": Decimal(str(round(random.uniform(0.1, 0.8), 1))), "type": "Public"},
-            {"name": f"I.S. {random.randint(1, 100)} Bernstein", "rating": random.randint(5, 9), "grades": "6-8", "distance": Decimal(str(round(random.uniform(1.0, 2.0), 1))), "type": "Public"},
-            {"name": f"{building.neighborhood or 'Local'} High School", "rating": random.randint(7, 10), "grades": "9-12", "distance": Decimal(str(round(random.uniform(1.5, 3.0), 1))), "type": "Public"},
-        ]
-        
-        for school in mock_schools:
-            NearbySchool.objects.create(
-                building=building,
-                name=school["name"],
-                rating=school["rating"],
-                grades=school["grades"],
-                distance=school["distance"],
-                school_type=school["type"]
-            )
+        result = NeighborhoodService.refresh_buildings([building_id], force=True)
+        return result.updated == 1
+
+    @staticmethod
+    def _iter_buildings(buildings):
+        buildings = list(buildings)
+        ids = [item for item in buildings if not isinstance(item, Building)]
+        if ids:
+            buildings = [item for item in buildings if isinstance(item, Building)]
+            buildings += list(Building.objects.filter(id__in=ids))
+        return buildings
+
+    @staticmethod
+    def _refresh_batch(batch, provider, result):
+        now = timezone.now()
+        refreshed = []
+        schools = []
+
+        for building in batch:
+            try:
+                data = provider.fetch(building)
+            except Exception as e:
+                logger.error(f"Error updating neighborhood data for building {building.id}: {e}")
+                result.failed += 1
+                continue
+
+            building.walk_score = data.walk_score
+            building.walk_description = walk_description(data.walk_score)
+            building.bike_score = data.bike_score
+            building.bike_description = bike_description(data.bike_score)
+            building.transit_score = data.transit_score
+            building.transit_description = transit_description(data.transit_score)
+            building.neighborhood_data_updated = now
+            refreshed.append(building)
+
+            seen = set()
+            for school in data.schools:
+                # (building, name) is unique
+                if school.name in seen:
+                    continue
+                seen.add(school.name)
+                schools.append(NearbySchool(
+                    building=building,
+                    name=school.name,
+                    rating=school.rating,
+                    grades=school.grades,
+                    distance=school.distance,
+                    school_type=school.school_type,
+                ))
+
+        if not refreshed:
+            return
+
+        with transaction.atomic():
+            Building.objects.bulk_update(refreshed, BUILDING_FIELDS)
+            NearbySchool.objects.filter(building__in=refreshed).delete()
+            NearbySchool.objects.bulk_create(schools)
+
+        result.updated += len(refreshed)
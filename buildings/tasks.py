@@ -0,0 +1,40 @@
+"""
+Celery Tasks for Buildings App
+==============================
+
+Periodic background jobs that keep building neighborhood data fresh.
+"""
+
+from celery import shared_task
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='buildings.refresh_neighborhood_data',
+    ignore_result=True
+)
+def refresh_neighborhood_data_task(limit=None):
+    """
+    Refresh the stalest buildings' Walk Score and school data.
+
+    Each run only takes its share of the portfolio (see
+    NeighborhoodService.refresh_quota), so refreshes are spread evenly over the
+    TTL instead of the whole portfolio hitting the provider at once.
+    """
+    from .neighborhood_service import NeighborhoodService
+
+    if limit is None:
+        limit = NeighborhoodService.refresh_quota(settings.NEIGHBORHOOD_REFRESH_INTERVAL)
+
+    stale_ids = list(NeighborhoodService.stale_buildings().values_list('id', flat=True)[:limit])
+    if not stale_ids:
+        return 0
+
+    result = NeighborhoodService.refresh_buildings(stale_ids)
+    logger.info(
+        f"Neighborhood data refreshed for {result.updated} buildings ({result.failed} failed)"
+    )
+    return result.updated
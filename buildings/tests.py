@@ -1,3 +1,269 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apartments.models import Apartment
+
+from .geocoding import (
+    AddressQuery,
+    GeocodeResult,
+    GeocodingProvider,
+    geocode_addresses,
+    normalize_address,
+)
+from .models import Building, BuildingImage, GeocodeCache, NearbySchool
+from .neighborhood_service import LocalNeighborhoodProvider, NeighborhoodService
+from .tasks import refresh_neighborhood_data_task
+from .views import BUILDINGS_PER_PAGE
+
+
+class CountingProvider(GeocodingProvider):
+    """Test provider that records every lookup it receives."""
+    name = 'counting'
+    rate_limit = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def geocode(self, query):
+        self.calls.append(query.key)
+        if query.zip_code == '00000':
+            return None
+        return GeocodeResult(Decimal('40.7000000'), Decimal('-73.9000000'), 'address', self.name)
+
+
+class GeocodingTest(TestCase):
+    """
+    Test the geocoding subsystem.
+    Business Logic: Coordinates drive distance search and the map, so lookups
+    must be accurate, cached and repeatable.
+    """
+
+    def test_normalize_address_collapses_spelling_variants(self):
+        self.assertEqual(
+            normalize_address('637 Saint Marks Avenue', 'Brooklyn', 'NY', '11216-1234'),
+            normalize_address('637 St. Marks Ave', 'brooklyn', 'ny', '11216'),
+        )
+
+    def test_each_address_is_looked_up_once(self):
+        """Duplicate addresses share one lookup and results are cached"""
+        provider = CountingProvider()
+        queries = [
+            AddressQuery('24 Rogers Avenue', 'Brooklyn', 'NY', '11216'),
+            AddressQuery('24 Rogers Ave', 'Brooklyn', 'NY', '11216'),
+            AddressQuery('1 Nowhere Road', 'Brooklyn', 'NY', '00000'),
+        ]
+
+        results = geocode_addresses(queries, provider=provider)
+        self.assertEqual(len(provider.calls), 2)
+        self.assertEqual(results[queries[0].key].latitude, Decimal('40.7000000'))
+        self.assertIsNone(results[queries[2].key])
+
+        # Hits and cached misses are served from the table on the next run
+        geocode_addresses(queries, provider=provider)
+        self.assertEqual(len(provider.calls), 2)
+        self.assertEqual(GeocodeCache.objects.count(), 2)
+
+    def test_cache_is_per_provider_and_retries_stale_misses(self):
+        """Long addresses still hit the cache; misses expire, exact matches don't"""
+        provider = CountingProvider()
+        long_query = AddressQuery('1 ' + 'Very Long Street Name ' * 15, 'Brooklyn', 'NY', '11216')
+        missing = AddressQuery('1 Nowhere Road', 'Brooklyn', 'NY', '00000')
+        queries = [long_query, missing]
+        self.assertGreater(len(long_query.key), 255)
+
+        geocode_addresses(queries, provider=provider)
+        geocode_addresses(queries, provider=provider)
+        self.assertEqual(len(provider.calls), 2)
+
+        other = CountingProvider()
+        other.name = 'other'
+        geocode_addresses(queries, provider=other)
+        self.assertEqual(len(other.calls), 2)
+        self.assertEqual(GeocodeCache.objects.count(), 4)
+
+        GeocodeCache.objects.update(created_at=timezone.now() - timedelta(days=31))
+        results = geocode_addresses(queries, provider=provider)
+        self.assertEqual(provider.calls[2:], [missing.key])
+        self.assertEqual(results[long_query.key].latitude, Decimal('40.7000000'))
+        # The retried miss starts a new retry period
+        geocode_addresses(queries, provider=provider)
+        self.assertEqual(len(provider.calls), 3)
+
+    def test_command_uses_local_reference_data(self):
+        """The offline provider resolves known addresses and is idempotent"""
+        building = Building.objects.create(
+            name='Rogers',
+            street_address_1='24 Rogers Avenue',
+            city='Brooklyn',
+            state='NY',
+            zip_code='11216',
+        )
+
+        call_command('geocode_buildings', provider='buildings.geocoding.LocalGeocodingProvider', stdout=StringIO())
+        building.refresh_from_db()
+        self.assertEqual(building.latitude, Decimal('40.6758880'))
+        self.assertEqual(building.longitude, Decimal('-73.9529050'))
+
+        out = StringIO()
+        call_command('geocode_buildings', '--all', provider='buildings.geocoding.LocalGeocodingProvider', stdout=out)
+        self.assertIn('Successfully geocoded 0 buildings', out.getvalue())
+
+
+class FailingNeighborhoodProvider(LocalNeighborhoodProvider):
+    """Local provider that fails for buildings named 'Broken'."""
+
+    def fetch(self, building):
+        if building.name == 'Broken':
+            raise RuntimeError('provider unavailable')
+        return super().fetch(building)
+
+
+class NeighborhoodRefreshTest(TestCase):
+    """
+    Test the batched neighborhood data pipeline.
+    Business Logic: Walk Score and school data must be refreshable for the whole
+    portfolio in a few queries, without re-fetching fresh buildings.
+    """
+
+    def setUp(self):
+        self.buildings = [
+            Building.objects.create(
+                name=f'Building {i}',
+                street_address_1=f'{i} Test Street',
+                city='Brooklyn',
+                state='NY',
+                zip_code='11216',
+                neighborhood='Crown Heights',
+            )
+            for i in range(5)
+        ]
+
+    def test_batch_refresh_uses_bulk_writes(self):
+        """Query count does not grow with the number of buildings"""
+        # 1 building select, then per batch: savepoint, bulk_update, school delete,
+        # bulk_create, release
+        with self.assertNumQueries(6):
+            result = NeighborhoodService.refresh_buildings(Building.objects.all())
+
+        self.assertEqual(result.updated, 5)
+        self.assertEqual(NearbySchool.objects.count(), 15)
+        for building in Building.objects.all():
+            self.assertIsNotNone(building.walk_score)
+            self.assertIsNotNone(building.walk_description)
+            self.assertIsNotNone(building.neighborhood_data_updated)
+
+    def test_fresh_buildings_are_skipped(self):
+        NeighborhoodService.refresh_buildings(Building.objects.all())
+        result = NeighborhoodService.refresh_buildings(Building.objects.all())
+        self.assertEqual(result.updated, 0)
+        self.assertEqual(result.skipped, 5)
+
+        # Forced refreshes replace schools rather than duplicating them
+        result = NeighborhoodService.refresh_buildings(Building.objects.all(), force=True)
+        self.assertEqual(result.updated, 5)
+        self.assertEqual(NearbySchool.objects.count(), 15)
+
+    def test_local_provider_is_deterministic_and_leaves_global_random_alone(self):
+        random.seed(12345)
+        expected = random.random()
+
+        random.seed(12345)
+        first = LocalNeighborhoodProvider().fetch(self.buildings[0])
+        second = LocalNeighborhoodProvider().fetch(self.buildings[0])
+        self.assertEqual(random.random(), expected)
+        self.assertEqual(first, second)
+
+    def test_provider_failure_only_skips_that_building(self):
+        self.buildings[0].name = 'Broken'
+        self.buildings[0].save()
+
+        result = NeighborhoodService.refresh_buildings(
+            Building.objects.all(), provider=FailingNeighborhoodProvider()
+        )
+        self.assertEqual(result.updated, 4)
+        self.assertEqual(result.failed, 1)
+
+    def test_scheduled_task_refreshes_stalest_buildings_first(self):
+        stale = timezone.now() - timedelta(days=60)
+        Building.objects.update(neighborhood_data_updated=timezone.now())
+        Building.objects.filter(id=self.buildings[3].id).update(neighborhood_data_updated=stale)
+        Building.objects.filter(id=self.buildings[4].id).update(neighborhood_data_updated=None)
+
+        self.assertEqual(refresh_neighborhood_data_task(limit=1), 1)
+        self.buildings[4].refresh_from_db()
+        self.assertIsNotNone(self.buildings[4].neighborhood_data_updated)
+
+        self.assertEqual(refresh_neighborhood_data_task(), 1)
+        self.assertEqual(NeighborhoodService.stale_buildings().count(), 0)
+        self.assertEqual(refresh_neighborhood_data_task(), 0)
+
+
+class BuildingsListTest(TestCase):
+    """
+    Test the building directory.
+    Business Logic: The directory must load in a fixed number of queries
+    however many buildings, apartments and photos the portfolio holds.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='broker@example.com', password=None, is_broker=True)
+        self.client.force_login(self.user)
+
+    def _building(self, name, city='New York', apartments=0, images=0):
+        building = Building.objects.create(
+            name=name, street_address_1=f'{name} Ave', city=city, state='NY', zip_code='10001',
+        )
+        for i in range(apartments):
+            Apartment.objects.create(
+                building=building, unit_number=str(i), rent_price=Decimal('3000'),
+                status='available' if i % 2 == 0 else 'rented',
+            )
+        for i in range(images):
+            BuildingImage.objects.create(building=building, image=f'image/upload/v1/{name.lower()}_{i}.jpg')
+        return building
+
+    def test_counts_and_stats_come_from_annotations(self):
+        self._building('Alpha', apartments=3, images=2)
+        self._building('Beta', city='Brooklyn', apartments=2)
+
+        self.client.get(reverse('buildings_list'))  # Session and user lookups settle on the first request
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('buildings_list'))
+        for i in range(4):
+            self._building(f'Gamma {i}', apartments=2, images=1)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('buildings_list'))
+        self.assertEqual(len(large), len(small))
+
+        self.assertEqual(response.context['total_buildings'], 6)
+        self.assertEqual(response.context['total_apartments'], 2 + 1 + 4)
+        self.assertEqual(response.context['buildings_with_photos'], 5)
+        self.assertEqual(response.context['unique_cities'], 2)
+
+        alpha = response.context['buildings'][0]
+        self.assertEqual((alpha.name, alpha.active_apartments_count, alpha.image_count), ('Alpha', 2, 2))
+        self.assertIn('alpha_0', alpha.thumbnail_url)
+        self.assertIsNone(response.context['buildings'][1].thumbnail_url)
+
+    def test_search_and_pagination(self):
+        for i in range(BUILDINGS_PER_PAGE + 1):
+            self._building(f'Tower {i:03d}')
+        self._building('Harbor View', city='Hoboken')
+
+        response = self.client.get(reverse('buildings_list'))
+        self.assertEqual(len(response.context['buildings']), BUILDINGS_PER_PAGE)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
 
-# Create your tests here.
+        response = self.client.get(reverse('buildings_list'), {'q': 'hoboken'})
+        self.assertEqual([b.name for b in response.context['buildings']], ['Harbor View'])
+        self.assertEqual(response.context['total_buildings'], BUILDINGS_PER_PAGE + 2)
@@ -1,9 +1,12 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from .forms import BuildingForm, BuildingImageForm, BuildingAccessForm, BuildingSpecialForm
-from .models import Building
+from .models import Building, BuildingImage
 from .decorators import admin_only, authenticated_required
+from apartments.models import Apartment
 from django.contrib import messages
-from django.db.models import Count, Q
+from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.db import transaction
 import logging
@@ -12,27 +15,63 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+BUILDINGS_PER_PAGE = 50
+
+
 @authenticated_required
 def buildings_list(request):
     """
     Display list of all buildings with apartment counts and dashboard statistics.
     Read-only access for all authenticated users.
+    Business Logic: Per-building counts and the cover image come from
+    subquery annotations and the dashboard stats from one aggregate, so the
+    page costs the same few queries however large the portfolio grows.
     """
     try:
+        available_apartments = (
+            Apartment.objects.filter(building=OuterRef('pk'), status='available')
+            .values('building').annotate(total=Count('pk')).values('total')
+        )
+        images = BuildingImage.objects.filter(building=OuterRef('pk'))
+        image_count = images.values('building').annotate(total=Count('pk')).values('total')
+
         buildings = Building.objects.annotate(
-            active_apartments_count=Count('apartments', filter=Q(apartments__status='available'))
-        ).prefetch_related('images', 'apartments').order_by('name')
-        
-        # Calculate dashboard statistics
-        total_apartments = sum(building.active_apartments_count for building in buildings)
-        buildings_with_photos = sum(1 for building in buildings if building.images.exists())
-        unique_cities = len(set(building.city for building in buildings))
-        
+            active_apartments_count=Coalesce(Subquery(available_apartments, output_field=IntegerField()), 0),
+            image_count=Coalesce(Subquery(image_count, output_field=IntegerField()), 0),
+            first_image_public_id=Subquery(images.order_by('pk').values('image')[:1]),
+        )
+
+        # Calculate dashboard statistics (whole portfolio, one query)
+        stats = buildings.aggregate(
+            total_buildings=Count('pk'),
+            total_apartments=Sum('active_apartments_count'),
+            buildings_with_photos=Count('pk', filter=Q(image_count__gt=0)),
+            unique_cities=Count('city', distinct=True),
+        )
+
+        search = request.GET.get('q', '').strip()
+        if search:
+            buildings = buildings.filter(
+                Q(name__icontains=search) | Q(street_address_1__icontains=search) |
+                Q(city__icontains=search) | Q(neighborhood__icontains=search) |
+                Q(owner_name__icontains=search)
+            )
+
+        page = Paginator(buildings.order_by('name', 'pk'), BUILDINGS_PER_PAGE).get_page(request.GET.get('page'))
+        for building in page:
+            building.thumbnail_url = (
+                BuildingImage.thumbnail_url_for(building.first_image_public_id)
+                if building.first_image_public_id else None
+            )
+
+        query = request.GET.copy()
+        query.pop('page', None)
         context = {
-            'buildings': buildings,
-            'total_apartments': total_apartments,
-            'buildings_with_photos': buildings_with_photos,
-            'unique_cities': unique_cities,
+            'buildings': page,
+            'page_obj': page,
+            'search': search,
+            'query_string': query.urlencode(),
+            **stats,
         }
         
         return render(request, 'buildings/buildings_list.html', context)
@@ -10,6 +10,10 @@ from doc_analysis.models import DocumentEmbedding
 from django.db import connection
 from .tests_utils import enable_skip_external, disable_skip_external
 from doc_analysis.utils import detect_pdf_modifications
+from doc_analysis import redaction_utils
+from doc_analysis.redaction_utils import (
+    DocumentRedactor, benchmark_redaction, check_for_remaining_sensitive_data, chunk_bounds, sample_statement,
+)
 
 
 class AnalyzeDocumentViewTests(TestCase):
@@ -241,3 +245,106 @@ class EmbeddingSearchTests(TestCase):
         self.assertEqual(resp.status_code, 403)
         payload = resp.json()
         self.assertEqual(payload["status"], "error")
+
+
+class DocumentRedactorTests(TestCase):
+    SAMPLE = (
+        "  Bank of America Statement\n"
+        "  Account Holder: John Doe\n"
+        "  SSN: 123-45-6789\n"
+        "  Account Number: 1234567890123456\n"
+        "  Address: 123 Main Street, San Francisco, CA 94105\n"
+        "  Phone: 415-555-0123\n"
+        "  Email: john.doe@email.com\n"
+        "  Dear Jane Roe, your deposit (EIN: 12-3456789) posted\n"
+    )
+
+    def _redactor(self, **kwargs):
+        redactor = DocumentRedactor(**kwargs)
+        redactor.session_id = "S"
+        return redactor
+
+    def test_redacts_every_kind_in_one_pass_and_restores(self):
+        redactor = self._redactor()
+        redacted, mapping = redactor.redact_document(self.SAMPLE)
+
+        self.assertEqual(redacted, (
+            "  Bank of America Statement\n"
+            "  Account Holder: [NAME-S-0]\n"
+            "  SSN: [SSN-S-1]\n"
+            "  Account Number: [ACCT-S-2]\n"
+            "  Address: [ADDRESS-S-3], San Francisco, CA 94105\n"
+            "  Phone: [PHONE-S-4]\n"
+            "  Email: [EMAIL-S-5]@email.com\n"
+            "  Dear [NAME-S-6], your deposit (EIN: [EIN-REDACTED]) posted\n"
+        ))
+        self.assertEqual(mapping["[EMAIL-S-5]@email.com"], "john.doe@email.com")
+        self.assertEqual(check_for_remaining_sensitive_data(redacted), [])
+        # EINs are not restorable; everything else is
+        self.assertEqual(
+            redactor.restore_redacted(redacted),
+            self.SAMPLE.replace("12-3456789", "[EIN-REDACTED]"),
+        )
+
+    def test_line_context_rules(self):
+        redactor = self._redactor()
+        options = {"names": False, "ssn": False, "account_numbers": False}
+        text = "Routing Number: 021000021\nReference 021000021\nChase Bank Statement\n"
+        redacted, _ = redactor.redact_document(text, options)
+        # Routing numbers need a routing keyword on their line; a rejected
+        # match falls through to the lower-priority EIN pattern
+        self.assertEqual(
+            redacted,
+            "Routing Number: [ROUTING-REDACTED]\nReference [EIN-REDACTED]\nChase Bank Statement\n",
+        )
+
+        redacted, mapping = redactor.redact_document("Maria Gonzalez\nCustomer: Ann Lee, Dear Sam Poe\n")
+        self.assertEqual(redacted, "[NAME-S-0]\nCustomer: [NAME-S-1], Dear Sam Poe\n")
+        self.assertEqual(list(mapping.values()), ["Maria Gonzalez", "Ann Lee"])
+
+        # Labelled names are redacted whole, including inner capitals and apostrophes
+        redacted, mapping = redactor.redact_document(
+            "Account Holder: McDonald Smith\nCustomer Name: DeShawn Jones\nName: O'Brien Kelly\n"
+        )
+        self.assertEqual(redacted, "Account Holder: [NAME-S-0]\nCustomer Name: [NAME-S-1]\nName: [NAME-S-2]\n")
+        self.assertEqual(list(mapping.values()), ["McDonald Smith", "DeShawn Jones", "O'Brien Kelly"])
+
+        # Options disable kinds; the per-kind methods still work on their own
+        self.assertEqual(redactor.redact_document("Phone: 415-555-0123", {"phone_numbers": False})[0],
+                         "Phone: 415-555-0123")
+        self.assertEqual(redactor.redact_emails("a@b.com c@d.org"), "[EMAIL-S-0]@b.com [EMAIL-S-1]@d.org")
+
+    def test_chunked_scan_matches_serial_scan(self):
+        text = sample_statement(6)
+        serial, serial_map = self._redactor(workers=1).redact_document(text)
+
+        bounds = chunk_bounds(text, 3)
+        self.assertEqual(len(bounds), 3)
+        self.assertEqual((bounds[0][0], bounds[-1][1]), (0, len(text)))
+        # Chunks start at page markers
+        self.assertTrue(all(text.startswith("--- PAGE", start) for start, _ in bounds[1:]))
+        spans = [
+            span for start, end in bounds
+            for span in redaction_utils._scan_chunk(text[start:end], redaction_utils.ALL_KINDS, start)
+        ]
+        self.assertEqual(spans, redaction_utils.scan(text))
+
+        # Without a usable pool the parallel path scans serially
+        redactor = self._redactor(workers=3)
+        redactor.PARALLEL_MIN_CHARS = 0
+        with patch("doc_analysis.redaction_utils.get_pool", return_value=None):
+            self.assertEqual(redactor.redact_document(text), (serial, serial_map))
+
+    def test_remaining_data_check_and_benchmark(self):
+        self.assertEqual(check_for_remaining_sensitive_data("routing 123456789 and 12345678901"), [
+            "Possible SSN found",
+            "Long digit sequence found (possible account number)",
+            "Possible routing number found",
+        ])
+        self.assertEqual(check_for_remaining_sensitive_data("SSN 123-45-6789, routing"), ["Possible SSN found"])
+
+        rows = benchmark_redaction(page_counts=(1, 2), repeat=1, workers=1)
+        self.assertEqual([row["pages"] for row in rows], [1, 2])
+        self.assertGreater(rows[1]["chars"], rows[0]["chars"])
+        self.assertEqual(rows[1]["redacted"], 2 * rows[0]["redacted"])
+        self.assertNotIn("parallel_ms", rows[0])
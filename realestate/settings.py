@@ -74,7 +74,12 @@ SITE_ID = 1
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Query count / DB time instrumentation (Server-Timing, N+1 warnings, query budgets).
+    # Early in the chain so session and auth queries are counted too.
+    'applicants.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Sliding session expiry; replaces SESSION_SAVE_EVERY_REQUEST
+    'users.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -86,6 +91,11 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
 ]
 
+QUERY_INSTRUMENTATION = config('QUERY_INSTRUMENTATION', default=DEBUG, cast=bool)
+QUERY_REPEAT_THRESHOLD = 5  # Same query shape this many times in one request = likely N+1
+QUERY_BUDGET_ENFORCE = False  # Tests turn this on to fail on budget overruns
+QUERY_BUDGETS = {}  # URL name -> max queries, for views without @query_budget
+
 ROOT_URLCONF = 'realestate.urls'
 
 TEMPLATES = [
@@ -231,6 +241,17 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Wizard photo uploads (applications.image_uploads). Originals are staged on
+# disk shared by web and worker processes, then cropped, downsized and
+# uploaded in the background; IMAGE_DIRECT_UPLOADS lets the browser upload
+# its cropped image straight to Cloudinary instead.
+IMAGE_UPLOAD_STAGING_ROOT = config('IMAGE_UPLOAD_STAGING_ROOT', default=str(MEDIA_ROOT / 'upload-staging'))
+UPLOAD_IMAGE_MAX_DIMENSION = config('UPLOAD_IMAGE_MAX_DIMENSION', default=1600, cast=int)  # Pixels, longest side
+UPLOAD_IMAGE_QUALITY = config('UPLOAD_IMAGE_QUALITY', default=85, cast=int)  # JPEG quality
+IMAGE_DIRECT_UPLOADS = config('IMAGE_DIRECT_UPLOADS', default=False, cast=bool)
+# Staged originals whose upload never succeeded are purged after this many days
+IMAGE_UPLOAD_STAGING_TTL_DAYS = config('IMAGE_UPLOAD_STAGING_TTL_DAYS', default=7, cast=int)
+
 
 # Cloudinary media storage is now handled in the STORAGES dictionary above
 
@@ -245,8 +266,17 @@ LOGIN_REDIRECT_URL = '/'  # Will be handled by redirect_by_role function
 LOGOUT_REDIRECT_URL = '/users/login/'
 
 # Session settings
+# Sessions are read from the cache (Redis in production) and only hit the
+# database when they change or miss the cache
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
 SESSION_COOKIE_AGE = 86400 * 7  # 1 week
-SESSION_SAVE_EVERY_REQUEST = True
+# Expiry slides forward only when less than this many seconds remain
+# (see users.middleware.SessionRefreshMiddleware), not on every request
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_THRESHOLD = config('SESSION_REFRESH_THRESHOLD', default=86400 * 5, cast=int)
+
+# Multi-step wizard drafts (applications.drafts) untouched this long are purged
+APPLICATION_DRAFT_TTL_DAYS = 7
 
 # Field Encryption Settings
 FIELD_ENCRYPTION_KEY = config('FIELD_ENCRYPTION_KEY')
@@ -285,12 +315,61 @@ TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
 TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
 TWILIO_FROM_PHONE = config('TWILIO_FROM_PHONE', default='')
 
+# Outbox delivery (applications.outbox): provider dotted paths, empty = the
+# configured EMAIL_BACKEND / Twilio. With SendGrid, email goes through the
+# batch API (personalizations). applications.outbox.FakeOutboxProvider
+# delivers locally for tests and offline development.
+OUTBOX_EMAIL_PROVIDER = config(
+    'OUTBOX_EMAIL_PROVIDER',
+    default='applications.outbox.SendGridBatchEmailProvider'
+    if EMAIL_SERVICE.lower() == 'sendgrid' and SENDGRID_API_KEY else '',
+)
+OUTBOX_SMS_PROVIDER = config('OUTBOX_SMS_PROVIDER', default='')
+OUTBOX_SMS_POOL_SIZE = config('OUTBOX_SMS_POOL_SIZE', default=4, cast=int)  # Concurrent Twilio calls per worker
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=50, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+OUTBOX_CLAIM_TIMEOUT = config('OUTBOX_CLAIM_TIMEOUT', default=300, cast=int)  # Seconds
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=30, cast=int)  # Sent/failed rows kept this long
+
 # Site URL for generating links in emails/SMS
 SITE_URL = config('SITE_URL', default='http://localhost:8000')
 
 # Mapbox (for map-based apartment search)
 MAPBOX_API_TOKEN = config('MAPBOX_API_TOKEN', default='')
 
+# Geocoding provider (dotted path). Empty = Mapbox when a token is set, otherwise
+# the offline buildings.geocoding.LocalGeocodingProvider.
+GEOCODING_PROVIDER = config('GEOCODING_PROVIDER', default='')
+# Cached misses and ZIP/neighborhood centroid fallbacks are looked up again after this
+GEOCODE_RETRY_AFTER_DAYS = config('GEOCODE_RETRY_AFTER_DAYS', default=30, cast=int)
+
+# Neighborhood data (Walk Score / schools). Empty provider = the offline
+# buildings.neighborhood_service.LocalNeighborhoodProvider.
+NEIGHBORHOOD_DATA_PROVIDER = config('NEIGHBORHOOD_DATA_PROVIDER', default='')
+NEIGHBORHOOD_DATA_TTL_DAYS = config('NEIGHBORHOOD_DATA_TTL_DAYS', default=30, cast=int)
+NEIGHBORHOOD_REFRESH_INTERVAL = 60 * 60  # Seconds between scheduled refresh runs
+
+# Cache Configuration
+# Redis is shared by all web and worker processes; fall back to per-process
+# memory when it is not configured (local runs and tests).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a rendered listing card stays cached (cards also expire at midnight)
+APARTMENT_CARD_CACHE_TIMEOUT = config('APARTMENT_CARD_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -302,6 +381,52 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
 
+# Periodic tasks (run by `celery -A realestate beat`)
+from celery.schedules import crontab
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-autocomplete-index': {
+        'task': 'apartments.refresh_autocomplete_index',
+        'schedule': 10 * 60,  # Every 10 minutes
+    },
+    'refresh-neighborhood-data': {
+        'task': 'buildings.refresh_neighborhood_data',
+        'schedule': NEIGHBORHOOD_REFRESH_INTERVAL,
+    },
+    'refresh-broker-leaderboard': {
+        'task': 'users.refresh_broker_leaderboard',
+        'schedule': crontab(hour=2, minute=0),  # Nightly
+    },
+    'clear-expired-sessions': {
+        'task': 'users.clear_expired_sessions',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'purge-stale-application-drafts': {
+        'task': 'applications.purge_stale_drafts',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    'purge-stale-staged-images': {
+        'task': 'applications.purge_staged_images',
+        'schedule': crontab(hour=3, minute=40),
+    },
+    'drain-outbox': {
+        'task': 'applications.drain_outbox',
+        'schedule': 30,  # Safety net; enqueues kick a drain immediately
+    },
+    'reconcile-stale-payments': {
+        'task': 'applications.reconcile_stale_payments',
+        'schedule': 5 * 60,  # Every 5 minutes
+    },
+    'purge-outbox': {
+        'task': 'applications.purge_outbox',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    'refresh-engagement-scores': {
+        'task': 'applicants.refresh_engagement_scores',
+        'schedule': crontab(hour=3, minute=45),
+    },
+}
+
 # Sola Payment Gateway Settings
 SOLA_API_KEY = config('SOLA_API_KEY', default='')
 SOLA_SANDBOX_MODE = config('SOLA_SANDBOX_MODE', default=True, cast=bool)
@@ -309,7 +434,12 @@ SOLA_SANDBOX_MODE = config('SOLA_SANDBOX_MODE', default=True, cast=bool)
 # Note: Sola uses the same URL for sandbox and production
 # The API key determines which environment is used
 SOLA_API_URL = 'https://x1.cardknox.com/gateway'
-SOLA_TIMEOUT = 30  # Request timeout in seconds
+SOLA_TIMEOUT = config('SOLA_TIMEOUT', default=30, cast=int)  # Seconds to wait for a gateway response
+SOLA_CONNECT_TIMEOUT = config('SOLA_CONNECT_TIMEOUT', default=5, cast=int)  # Seconds to open a connection
+SOLA_CONNECT_RETRIES = config('SOLA_CONNECT_RETRIES', default=2, cast=int)  # Only for requests never sent
+SOLA_POOL_SIZE = config('SOLA_POOL_SIZE', default=10, cast=int)  # Keep-alive connections per process
+# Seconds before an unconfirmed charge attempt is looked up in the gateway report
+SOLA_PROCESSING_TIMEOUT = config('SOLA_PROCESSING_TIMEOUT', default=600, cast=int)
 
 # Activity Tracking Settings
 ACTIVITY_TRACKING_ASYNC = config('ACTIVITY_TRACKING_ASYNC', default=True, cast=bool)  # Use async by default
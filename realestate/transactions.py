@@ -0,0 +1,38 @@
+"""
+Transaction Helpers
+===================
+
+Deduplicated after-commit work shared by the apps.
+"""
+
+import threading
+
+from django.db import transaction
+
+_pending = threading.local()
+
+
+def run_once_on_commit(key, fn):
+    """
+    Run ``fn()`` once the current transaction commits, at most once per
+    ``key`` however many times it is scheduled before the commit.
+
+    Every call registers its own callback; the first one to run does the
+    work and the rest find ``key`` already handled. Keeping a callback per
+    call means a rolled-back savepoint, which discards only its own
+    callbacks, cannot drop work still scheduled from the outer transaction.
+    A key left behind by a fully rolled-back transaction is consumed by its
+    next commit.
+    """
+    keys = getattr(_pending, 'keys', None)
+    if keys is None:
+        keys = _pending.keys = set()
+    keys.add(key)
+
+    def run():
+        if key not in keys:
+            return  # An earlier callback already ran fn
+        keys.discard(key)
+        fn()
+
+    transaction.on_commit(run)
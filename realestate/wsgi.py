@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'realestate.settings')
 
 application = get_wsgi_application()
+
+# Warm the search suggestion index so the first keystroke doesn't pay for the build.
+# Loads the shared snapshot when one exists and only falls back to the database otherwise.
+try:
+    from apartments.autocomplete import get_autocomplete_index
+    get_autocomplete_index()
+except Exception:
+    pass
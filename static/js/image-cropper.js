@@ -26,6 +26,11 @@ class UniversalImageCropper {
             onCrop: options.onCrop || null,
             onDelete: options.onDelete || null,
             onUpload: options.onUpload || null,
+            // Send the cropped image as a base64 data URL with the crop data.
+            // Off: only the crop rectangle is sent and the server crops the original.
+            sendCroppedImage: options.sendCroppedImage !== false,
+            // Signature endpoint: upload the cropped image straight to Cloudinary
+            directUploadUrl: options.directUploadUrl || null,
             ...options
         };
         
@@ -351,12 +356,18 @@ class UniversalImageCropper {
                 
                 // Store crop data
                 if (this.cropDataInput) {
-                    const cropData = this.cropper.getData();
-                    this.cropDataInput.value = JSON.stringify({
+                    const cropInfo = {
                         cropped: true,
-                        data: cropData,
-                        croppedImage: croppedDataUrl
-                    });
+                        data: this.cropper.getData()
+                    };
+                    if (this.options.sendCroppedImage) {
+                        cropInfo.croppedImage = croppedDataUrl;
+                    }
+                    this.cropDataInput.value = JSON.stringify(cropInfo);
+                }
+
+                if (this.options.directUploadUrl) {
+                    this.uploadDirect(blob);
                 }
                 
                 // Close modal
@@ -372,6 +383,48 @@ class UniversalImageCropper {
         }
     }
     
+    async uploadDirect(blob) {
+        // Signed browser upload; on failure the original file is still sent with the form
+        const csrfInput = document.querySelector('[name=csrfmiddlewaretoken]');
+        try {
+            const signResponse = await fetch(this.options.directUploadUrl, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': csrfInput ? csrfInput.value : ''
+                }
+            });
+            if (!signResponse.ok) throw new Error('Could not sign upload');
+            const params = await signResponse.json();
+
+            const formData = new FormData();
+            formData.append('file', blob, 'photo.jpg');
+            ['api_key', 'timestamp', 'folder', 'transformation', 'signature'].forEach(key => {
+                formData.append(key, params[key]);
+            });
+            const uploadResponse = await fetch(params.upload_url, { method: 'POST', body: formData });
+            if (!uploadResponse.ok) throw new Error('Upload failed');
+            const upload = await uploadResponse.json();
+
+            let uploadInput = document.querySelector(`input[name="${this.fileInput.name}_cloudinary"]`);
+            if (!uploadInput) {
+                uploadInput = document.createElement('input');
+                uploadInput.type = 'hidden';
+                uploadInput.name = `${this.fileInput.name}_cloudinary`;
+                this.fileInput.insertAdjacentElement('afterend', uploadInput);
+            }
+            uploadInput.value = JSON.stringify({
+                public_id: upload.public_id,
+                version: upload.version,
+                signature: upload.signature,
+                format: upload.format
+            });
+            // Already uploaded: keep the original out of the form submission
+            this.fileInput.value = '';
+        } catch (error) {
+            console.error('Direct upload failed, sending the original instead:', error);
+        }
+    }
+
     showFullPreview() {
         if (!this.currentImageSrc) return;
         
@@ -0,0 +1,337 @@
+"""
+Performance Benchmark Suite
+===========================
+
+Repeatable timings for the platform's hot paths, run against synthetic data
+generated with users.seeding at one or more scales.
+
+Each benchmark is a function registered with @benchmark that receives a
+BenchmarkContext (seeded applicant, broker, test client) and returns the
+callable to time. Every run records wall time and the number of SQL queries,
+so a change that adds an N+1 shows up even when the timing noise hides it.
+
+Results are plain JSON so they can be stored as a baseline and compared on
+later runs (see the run_benchmarks management command).
+
+Each run starts from an empty cache, so benchmarks must run against a cache
+nothing else depends on: isolated_cache() swaps in a private in-memory one, and
+run_benchmark refuses to clear a cache that shares its server with the Celery
+broker (in production REDIS_URL is both).
+"""
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from typing import Callable, Dict, List, Optional
+from applicants.middleware import QueryRecorder
+from users.seeding import SeedDataGenerator
+import logging
+import statistics
+import time
+
+logger = logging.getLogger(__name__)
+
+# name -> setup(context) returning the zero-argument callable to time
+BENCHMARKS: Dict[str, Callable] = {}
+
+DEFAULT_SIZES = [100]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25  # Median may grow 25% before it counts as a regression
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under ``name``."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def scale_counts(size: int) -> Dict[str, int]:
+    """
+    Row counts for a scale, keyed by entity. ``size`` is the apartment count;
+    the other tables keep the proportions of the seed_data command.
+    """
+    return {
+        'brokers': max(3, size * 15 // 100),
+        'buildings': max(2, size // 5),
+        'apartments': size,
+        'applicants': max(2, size * 3 // 2),
+        'applications': max(1, size // 2),
+    }
+
+
+@dataclass
+class BenchmarkContext:
+    """Seeded inputs shared by the benchmarks of one scale"""
+    generator: SeedDataGenerator
+    size: int
+    client: Client = field(default_factory=Client)
+
+    @property
+    def applicant(self):
+        # Applicants with a budget exercise the full matching/insights paths
+        return next(a for a in self.generator.applicants if a.max_rent_budget)
+
+    @property
+    def broker(self):
+        return self.generator.brokers[0]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    size: int
+    runs: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    max_ms: float
+    queries: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline_ms: float
+    current_ms: float
+    baseline_queries: int
+    current_queries: int
+    ratio: float
+    regressed: bool
+
+
+def seed_to_scale(generator: SeedDataGenerator, size: int):
+    """
+    Top the generated data up to ``size``. Calling this with ascending sizes
+    reuses the rows created for the smaller scales.
+    """
+    if not generator.building_amenities:
+        generator.create_reference_data()
+
+    counts = scale_counts(size)
+    generator.create_brokers(counts['brokers'] - len(generator.brokers))
+    generator.create_buildings(counts['buildings'] - len(generator.buildings))
+    generator.create_apartments(counts['apartments'] - len(generator.apartments))
+
+    applicants = generator.create_applicants(
+        counts['applicants'] - len(generator.applicants), with_preferences=True
+    )
+    generator.create_applications(counts['applications'] - len(generator.applications), applicants=applicants)
+
+
+def ensure_cache_is_disposable():
+    """
+    Refuse to benchmark against a cache that shares its location with the
+    Celery broker: clearing it would drop queued tasks, sessions and cards.
+    """
+    location = settings.CACHES.get('default', {}).get('LOCATION', '')
+    locations = [location] if isinstance(location, str) else list(location)
+    broker = (getattr(settings, 'CELERY_BROKER_URL', '') or '').rstrip('/')
+    if broker and any(loc.rstrip('/') == broker for loc in locations):
+        raise RuntimeError(
+            "The default cache is the Celery broker; run benchmarks inside isolated_cache() "
+            "instead of clearing it"
+        )
+
+
+@contextmanager
+def isolated_cache():
+    """Run with a private in-memory default cache, discarded on exit."""
+    with override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'benchmarks',
+        }
+    }):
+        yield
+
+
+def run_benchmark(name: str, context: BenchmarkContext, repeat: int = DEFAULT_REPEAT,
+                  warmup: int = 1) -> BenchmarkResult:
+    """
+    Time one benchmark ``repeat`` times after ``warmup`` untimed runs.
+    The cache is cleared before every run so each one measures the cold path.
+    """
+    ensure_cache_is_disposable()
+    func = BENCHMARKS[name](context)
+
+    for _ in range(warmup):
+        cache.clear()
+        func()
+
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        cache.clear()
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(recorder.count)
+
+    return BenchmarkResult(
+        name=name,
+        size=context.size,
+        runs=repeat,
+        min_ms=round(min(timings), 3),
+        median_ms=round(statistics.median(timings), 3),
+        mean_ms=round(statistics.mean(timings), 3),
+        max_ms=round(max(timings), 3),
+        queries=max(queries),
+    )
+
+
+def run_suite(sizes: Optional[List[int]] = None, repeat: int = DEFAULT_REPEAT,
+              names: Optional[List[str]] = None, seed: int = 42, warmup: int = 1,
+              log: Callable[[str], None] = logger.info) -> Dict:
+    """
+    Seed each scale (ascending) and run the selected benchmarks against it.
+
+    Runs in the current database and cache; use isolated_database() and
+    isolated_cache() around this to keep the seeded rows and the per-run cache
+    clears away from real data.
+    """
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    names = names or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    generator = SeedDataGenerator(seed=seed, email_domain='bench.example.com')
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        seed_to_scale(generator, size)
+        log(f"Seeded scale {size} in {time.perf_counter() - started:.1f}s")
+
+        context = BenchmarkContext(generator=generator, size=size)
+        for name in names:
+            result = run_benchmark(name, context, repeat=repeat, warmup=warmup)
+            log(f"{result.key}: median {result.median_ms:.1f}ms, {result.queries} queries")
+            results.append(result)
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'seed': seed,
+        'repeat': repeat,
+        'sizes': sizes,
+        'results': {result.key: asdict(result) for result in results},
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    """
+    Compare two run_suite outputs on the benchmarks they share.
+
+    A benchmark regresses when its median time grows by more than ``threshold``
+    (a ratio) or when it makes more queries than the baseline.
+    """
+    comparisons = []
+    for key, result in current['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if base is None:
+            continue
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+        comparisons.append(Comparison(
+            key=key,
+            baseline_ms=base['median_ms'],
+            current_ms=result['median_ms'],
+            baseline_queries=base['queries'],
+            current_queries=result['queries'],
+            ratio=round(ratio, 3),
+            regressed=ratio > threshold or result['queries'] > base['queries'],
+        ))
+    return comparisons
+
+
+@contextmanager
+def isolated_database(verbosity: int = 0):
+    """
+    Run inside a freshly migrated throwaway database (test_<NAME>), destroyed
+    on exit, exactly like the test runner does.
+    """
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+@benchmark('apartment_matching')
+def bench_apartment_matching(context):
+    from applicants.apartment_matching import ApartmentMatchingService
+
+    applicant = context.applicant
+    return lambda: ApartmentMatchingService(applicant).get_apartment_matches(limit=20)
+
+
+@benchmark('apartment_search')
+def bench_apartment_search(context):
+    from apartments.search_utils import ApartmentSearchEngine
+
+    filters = {'max_price': 4000, 'min_bedrooms': 1}
+    return lambda: list(ApartmentSearchEngine().search(query='Tower', filters=filters, limit=50))
+
+
+@benchmark('map_serialization')
+def bench_map_serialization(context):
+    from apartments.models import Apartment
+    from apartments.services import serialize_apartments_for_map
+
+    def run():
+        # Same queryset shape as get_filtered_apartments
+        apartments = Apartment.objects.all().select_related('building').prefetch_related(
+            'images', 'building__amenities', 'amenities', 'availability_calendar'
+        )
+        return serialize_apartments_for_map(apartments)
+    return run
+
+
+@benchmark('broker_dashboard')
+def bench_broker_dashboard(context):
+    client = context.client
+    client.force_login(context.broker)
+    url = reverse('broker_dashboard')
+
+    def run():
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"broker_dashboard returned {response.status_code}")
+        return response
+    return run
+
+
+@benchmark('smart_insights')
+def bench_smart_insights(context):
+    from applicants.smart_insights import SmartInsights
+
+    applicant = context.applicant
+    return lambda: SmartInsights.analyze_applicant(applicant)
+
+
+@benchmark('document_redaction')
+def bench_document_redaction(context):
+    from doc_analysis.redaction_utils import DocumentRedactor, sample_statement
+
+    # A 20-page statement; benchmark_redaction() covers other sizes and the parallel path
+    text = sample_statement(20)
+    return lambda: DocumentRedactor().redact_document(text)
@@ -15,16 +15,24 @@ Scoring Algorithm:
 - Applications Approved: 25 points each  
 - Conversion Rate Bonus: Up to 50 points (50% = 25pts, 100% = 50pts)
 - Recent Activity Bonus: Up to 25 points (active in last 7 days)
+
+Rankings are materialized: refresh_leaderboard() computes every broker's
+metrics in one aggregate query, stores them in BrokerLeaderboardEntry and
+records the day's ranks in BrokerRankSnapshot. It runs nightly from Celery beat
+and on demand; the leaderboard page only reads the stored top N rows.
 """
 
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q, F, Avg
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import logging
 
+from .leaderboard_models import BrokerLeaderboardEntry, BrokerRankSnapshot
+
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
@@ -44,51 +52,155 @@ class BrokerLeaderboardService:
     def __init__(self):
         self.logger = logging.getLogger(f"{__name__}")
         
-    def get_broker_leaderboard(self, limit: int = 20) -> List[Dict]:
+    def get_broker_leaderboard(self, limit: int = 20, refresh: bool = False) -> List[Dict]:
         """
         Get ranked list of brokers with performance metrics
-        Optimized to use database aggregation instead of N+1 queries.
+        Reads the materialized leaderboard in a single query; the table is
+        only recomputed when requested or when it has never been built.
         
         Args:
             limit: Maximum number of brokers to return
+            refresh: Recompute the leaderboard before reading it
             
         Returns:
-            List of broker performance dictionaries sorted by score
+            List of broker performance dictionaries sorted by rank
         """
-        from applications.models import Application
+        if refresh:
+            self.refresh_leaderboard()
+        
+        entries = list(BrokerLeaderboardEntry.objects.select_related('broker')[:limit])
+        if not entries and not refresh and self.refresh_leaderboard():
+            entries = list(BrokerLeaderboardEntry.objects.select_related('broker')[:limit])
         
-        # Recent activity (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        return [self._entry_to_dict(entry) for entry in entries]
+    
+    def refresh_leaderboard(self) -> int:
+        """
+        Recompute metrics, scores and ranks for every active broker, replace the
+        materialized leaderboard and record today's rank snapshot.
         
-        # Get all active brokers with pre-calculated metrics
-        # Uses application_set (default reverse relation) for aggregation
+        Returns:
+            Number of brokers ranked
+        """
+        now = timezone.now()
+        today = timezone.localdate()
+        thirty_days_ago = now - timedelta(days=30)
+        
+        # All metrics in one grouped query over the broker's applications
         brokers = User.objects.filter(
             is_broker=True,
             is_active=True
         ).select_related('broker_profile').annotate(
-            annotated_total_apps=Count('application_set'),
-            annotated_approved_apps=Count('application_set', filter=Q(application_set__status='APPROVED')),
-            annotated_rejected_apps=Count('application_set', filter=Q(application_set__status='REJECTED')),
-            annotated_pending_apps=Count('application_set', filter=Q(application_set__status='PENDING')),
-            annotated_recent_apps=Count('application_set', filter=Q(application_set__created_at__gte=thirty_days_ago)),
-            annotated_last_activity=Max('application_set__created_at')
+            annotated_total_apps=Count('application'),
+            annotated_approved_apps=Count('application', filter=Q(application__status='APPROVED')),
+            annotated_rejected_apps=Count('application', filter=Q(application__status='REJECTED')),
+            annotated_pending_apps=Count('application', filter=Q(application__status='PENDING')),
+            annotated_recent_apps=Count('application', filter=Q(application__created_at__gte=thirty_days_ago)),
+            annotated_last_activity=Max('application__created_at')
         )
         
-        leaderboard = []
+        leaderboard = [self._calculate_broker_metrics(broker) for broker in brokers]
+        
+        # Sort by total score (highest first), ties broken deterministically
+        leaderboard.sort(key=lambda x: (-x['total_score'], -x['approved_applications'], x['broker'].pk))
         
-        for broker in brokers:
-            metrics = self._calculate_broker_metrics(broker)
-            leaderboard.append(metrics)
+        previous_ranks = self._previous_ranks(today)
         
-        # Sort by total score (highest first)
-        leaderboard.sort(key=lambda x: x['total_score'], reverse=True)
+        entries = []
+        snapshots = []
+        for rank, metrics in enumerate(leaderboard, 1):
+            broker = metrics['broker']
+            entries.append(BrokerLeaderboardEntry(
+                broker=broker,
+                rank=rank,
+                previous_rank=previous_ranks.get(broker.pk),
+                broker_name=metrics['broker_name'],
+                broker_email=metrics['broker_email'],
+                total_applications=metrics['total_applications'],
+                approved_applications=metrics['approved_applications'],
+                rejected_applications=metrics['rejected_applications'],
+                pending_applications=metrics['pending_applications'],
+                recent_applications=metrics['recent_applications'],
+                last_activity_at=metrics['last_activity_date'],
+                conversion_rate=Decimal(str(metrics['conversion_rate'])),
+                revenue_generated=metrics['revenue_generated'],
+                application_score=metrics['application_score'],
+                approval_score=metrics['approval_score'],
+                conversion_bonus=metrics['conversion_bonus'],
+                activity_bonus=metrics['activity_bonus'],
+                total_score=metrics['total_score'],
+                computed_at=now,
+            ))
+            snapshots.append(BrokerRankSnapshot(
+                broker=broker,
+                snapshot_date=today,
+                rank=rank,
+                total_score=metrics['total_score'],
+            ))
         
-        # Add ranking
-        for rank, broker_data in enumerate(leaderboard, 1):
-            broker_data['rank'] = rank
-            broker_data['rank_change'] = self._calculate_rank_change(broker_data['broker'], rank)
+        with transaction.atomic():
+            BrokerLeaderboardEntry.objects.all().delete()
+            BrokerLeaderboardEntry.objects.bulk_create(entries)
+            # Re-running on the same day overwrites that day's snapshot
+            BrokerRankSnapshot.objects.bulk_create(
+                snapshots,
+                update_conflicts=True,
+                unique_fields=['broker', 'snapshot_date'],
+                update_fields=['rank', 'total_score'],
+            )
         
-        return leaderboard[:limit]
+        self.logger.info(f"Broker leaderboard refreshed: {len(entries)} brokers ranked")
+        return len(entries)
+    
+    def _previous_ranks(self, today) -> Dict[int, int]:
+        """Ranks from the most recent snapshot taken before today, keyed by broker ID"""
+        previous_date = BrokerRankSnapshot.objects.filter(
+            snapshot_date__lt=today
+        ).aggregate(latest=Max('snapshot_date'))['latest']
+        if previous_date is None:
+            return {}
+        return dict(
+            BrokerRankSnapshot.objects.filter(snapshot_date=previous_date).values_list('broker_id', 'rank')
+        )
+    
+    def _entry_to_dict(self, entry: BrokerLeaderboardEntry) -> Dict:
+        """Shape a materialized row like the live metrics dictionary"""
+        days_since_activity, activity_status = self._get_activity_status(entry.last_activity_at)
+        
+        return {
+            'broker': entry.broker,
+            'broker_name': entry.broker_name,
+            'broker_email': entry.broker_email,
+            
+            # Core metrics
+            'total_applications': entry.total_applications,
+            'approved_applications': entry.approved_applications,
+            'rejected_applications': entry.rejected_applications,
+            'pending_applications': entry.pending_applications,
+            'conversion_rate': float(entry.conversion_rate),
+            'revenue_generated': entry.revenue_generated,
+            
+            # Recent activity
+            'recent_applications': entry.recent_applications,
+            'days_since_activity': days_since_activity,
+            'activity_status': activity_status,
+            
+            # Scoring
+            'application_score': entry.application_score,
+            'approval_score': entry.approval_score,
+            'conversion_bonus': entry.conversion_bonus,
+            'activity_bonus': entry.activity_bonus,
+            'total_score': entry.total_score,
+            
+            # Ranking
+            'rank': entry.rank,
+            'rank_change': self._calculate_rank_change(entry.previous_rank, entry.rank),
+            
+            # Display info
+            'performance_level': self._get_performance_level(entry.total_score, entry.total_applications),
+            'last_activity_date': entry.last_activity_at,
+            'computed_at': entry.computed_at,
+        }
     
     def _calculate_broker_metrics(self, broker) -> Dict:
         """Calculate comprehensive metrics for a single broker using annotated data"""
@@ -133,21 +245,7 @@ class BrokerLeaderboardService:
         broker_name = self._get_broker_display_name(broker)
         
         # Recent activity status
-        days_since_activity = None
-        activity_status = "Never Active"
-        
-        if last_activity_date:
-            days_since_activity = (timezone.now() - last_activity_date).days
-            if days_since_activity == 0:
-                activity_status = "Active Today"
-            elif days_since_activity == 1:
-                activity_status = "Active Yesterday"
-            elif days_since_activity <= 7:
-                activity_status = f"Active {days_since_activity} days ago"
-            elif days_since_activity <= 30:
-                activity_status = f"Active {days_since_activity} days ago"
-            else:
-                activity_status = "Inactive (30+ days)"
+        days_since_activity, activity_status = self._get_activity_status(last_activity_date)
         
         # Performance level
         performance_level = self._get_performance_level(total_score, total_applications)
@@ -182,6 +280,22 @@ class BrokerLeaderboardService:
             'last_activity_date': last_activity_date,
         }
     
+    def _get_activity_status(self, last_activity_date):
+        """Days since the broker's last application and a display label"""
+        if not last_activity_date:
+            return None, "Never Active"
+        
+        days_since_activity = (timezone.now() - last_activity_date).days
+        if days_since_activity == 0:
+            activity_status = "Active Today"
+        elif days_since_activity == 1:
+            activity_status = "Active Yesterday"
+        elif days_since_activity <= 30:
+            activity_status = f"Active {days_since_activity} days ago"
+        else:
+            activity_status = "Inactive (30+ days)"
+        return days_since_activity, activity_status
+    
     def _calculate_conversion_bonus(self, conversion_rate: float) -> int:
         """Calculate bonus points for conversion rate"""
         if conversion_rate >= 90:
@@ -262,18 +376,25 @@ class BrokerLeaderboardService:
                 'icon': 'fa-play'
             }
     
-    def _calculate_rank_change(self, broker, current_rank: int) -> str:
-        """Calculate rank change from previous period (placeholder for future implementation)"""
-        # TODO: Implement historical ranking comparison
-        # For now, return neutral
-        return "new"
+    def _calculate_rank_change(self, previous_rank: Optional[int], current_rank: int) -> Union[int, str]:
+        """
+        Places gained (positive) or lost (negative) since the previous daily
+        snapshot, or "new" for brokers that weren't ranked then
+        """
+        if previous_rank is None:
+            return "new"
+        return previous_rank - current_rank
     
     def get_broker_summary_stats(self) -> Dict:
-        """Get overall broker performance summary"""
-        from applications.models import Application
-        
-        brokers = User.objects.filter(is_broker=True, is_active=True)
-        total_brokers = brokers.count()
+        """Get overall broker performance summary from the materialized leaderboard"""
+        totals = BrokerLeaderboardEntry.objects.aggregate(
+            total_brokers=Count('pk'),
+            # Active brokers (created application in last 30 days as of the last refresh)
+            active_brokers=Count('pk', filter=Q(recent_applications__gt=0)),
+            total_applications=Sum('total_applications'),
+            total_approved=Sum('approved_applications'),
+        )
+        total_brokers = totals['total_brokers']
         
         if total_brokers == 0:
             return {
@@ -284,16 +405,8 @@ class BrokerLeaderboardService:
                 'average_conversion_rate': 0,
             }
         
-        # Calculate aggregate stats
-        all_applications = Application.objects.filter(broker__in=brokers)
-        total_applications = all_applications.count()
-        total_approved = all_applications.filter(status='APPROVED').count()
-        
-        # Active brokers (created application in last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        active_brokers = brokers.filter(
-            application_set__created_at__gte=thirty_days_ago
-        ).distinct().count()
+        total_applications = totals['total_applications'] or 0
+        total_approved = totals['total_approved'] or 0
         
         # Calculate stats
         total_revenue = total_applications * self.APPLICATION_FEE
@@ -301,7 +414,7 @@ class BrokerLeaderboardService:
         
         return {
             'total_brokers': total_brokers,
-            'active_brokers': active_brokers,
+            'active_brokers': totals['active_brokers'],
             'total_applications': total_applications,
             'total_revenue': total_revenue,
             'average_conversion_rate': round(avg_conversion_rate, 1),
@@ -10,9 +10,9 @@ from typing import Tuple, Optional, Dict
 from django.core.cache import cache
 from django.conf import settings
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from applications.outbox import Outbox
 
 logger = logging.getLogger(__name__)
 
@@ -145,17 +145,10 @@ class EmailVerificationService:
             else:
                 subject = f"Your {settings.SITE_NAME} Verification Code - {otp_code}"
             
-            # Send email
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            # Queue email; the outbox worker delivers it outside the request
+            Outbox.enqueue_email('otp', email, subject, plain_message, html_body=html_message)
             
-            logger.info(f"Email OTP sent successfully to {email} for {purpose}")
+            logger.info(f"Email OTP queued for {email} for {purpose}")
             remaining_attempts = self.MAX_ATTEMPTS_PER_HOUR - hourly_attempts
             return True, f"Verification code sent to {email}. You have {remaining_attempts} attempts remaining this hour."
             
@@ -0,0 +1,89 @@
+"""
+Broker Leaderboard Models
+Materialized broker performance rankings and the daily rank history behind
+rank movement on the leaderboard.
+"""
+
+from django.db import models
+from django.conf import settings
+
+
+class BrokerLeaderboardEntry(models.Model):
+    """
+    One row per active broker with precomputed metrics, score and rank.
+    Rebuilt nightly (and on demand) by BrokerLeaderboardService.refresh_leaderboard
+    so the leaderboard page never aggregates the applications table.
+    """
+
+    broker = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='leaderboard_entry'
+    )
+    rank = models.PositiveIntegerField()
+    previous_rank = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Rank in the most recent earlier daily snapshot"
+    )
+
+    broker_name = models.CharField(max_length=200)
+    broker_email = models.EmailField()
+
+    # Core metrics
+    total_applications = models.PositiveIntegerField(default=0)
+    approved_applications = models.PositiveIntegerField(default=0)
+    rejected_applications = models.PositiveIntegerField(default=0)
+    pending_applications = models.PositiveIntegerField(default=0)
+    recent_applications = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    conversion_rate = models.DecimalField(max_digits=4, decimal_places=1, default=0)
+    revenue_generated = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # Scoring
+    application_score = models.IntegerField(default=0)
+    approval_score = models.IntegerField(default=0)
+    conversion_bonus = models.IntegerField(default=0)
+    activity_bonus = models.IntegerField(default=0)
+    total_score = models.IntegerField(default=0)
+
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['rank']),
+        ]
+        verbose_name = "Broker Leaderboard Entry"
+        verbose_name_plural = "Broker Leaderboard Entries"
+
+    def __str__(self):
+        return f"#{self.rank} {self.broker_name} ({self.total_score} pts)"
+
+
+class BrokerRankSnapshot(models.Model):
+    """
+    Daily record of each broker's rank and score.
+    """
+
+    broker = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='rank_snapshots'
+    )
+    snapshot_date = models.DateField()
+    rank = models.PositiveIntegerField()
+    total_score = models.IntegerField()
+
+    class Meta:
+        ordering = ['-snapshot_date', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['broker', 'snapshot_date'], name='unique_broker_rank_snapshot_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['snapshot_date', 'rank']),
+        ]
+
+    def __str__(self):
+        return f"{self.snapshot_date}: #{self.rank} broker {self.broker_id}"
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from users.broker_leaderboard import BrokerLeaderboardService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized broker leaderboard and record today\'s rank snapshot'
+
+    def handle(self, *args, **options):
+        ranked = BrokerLeaderboardService().refresh_leaderboard()
+        self.stdout.write(self.style.SUCCESS(f'Broker leaderboard refreshed: {ranked} brokers ranked'))
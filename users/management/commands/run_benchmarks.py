@@ -0,0 +1,139 @@
+"""
+Management command to run the performance benchmark suite.
+
+Seeds synthetic data into a throwaway database (with a private in-memory
+cache) at each requested scale, times the platform's hot paths and writes the
+results as JSON. With --baseline the results are compared against a stored run
+and regressions are reported.
+
+Usage:
+    python manage.py run_benchmarks
+    python manage.py run_benchmarks --sizes 100 500 --repeat 10
+    python manage.py run_benchmarks --save-baseline
+    python manage.py run_benchmarks --baseline benchmarks/baseline.json --fail-on-regression
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from pathlib import Path
+from users.benchmarks import (
+    BENCHMARKS, DEFAULT_REPEAT, DEFAULT_SIZES, DEFAULT_THRESHOLD,
+    compare_results, isolated_cache, isolated_database, run_suite,
+)
+import json
+
+DEFAULT_OUTPUT = 'benchmarks/results.json'
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+
+class Command(BaseCommand):
+    help = 'Run the performance benchmark suite against synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=DEFAULT_SIZES,
+            help='Data scales to benchmark (number of apartments)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=DEFAULT_REPEAT,
+            help='Timed runs per benchmark'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=sorted(BENCHMARKS),
+            help='Run only these benchmarks'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic data'
+        )
+        parser.add_argument(
+            '--output',
+            default=DEFAULT_OUTPUT,
+            help='Where to write the JSON results'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Compare against this results file'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help=f'Also write the results to {DEFAULT_BASELINE}'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help='Allowed median time ratio against the baseline'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when any benchmark regresses'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+
+        self.stdout.write(self.style.WARNING('Creating benchmark database...'))
+        with isolated_database(), isolated_cache():
+            results = run_suite(
+                sizes=options['sizes'],
+                repeat=options['repeat'],
+                names=options['only'],
+                seed=options['seed'],
+                log=self.stdout.write,
+            )
+
+        self._write(options['output'], results)
+        if options['save_baseline']:
+            self._write(DEFAULT_BASELINE, results)
+
+        self.stdout.write('')
+        self.stdout.write(f"{'Benchmark':<32}{'Median ms':>12}{'Min ms':>12}{'Queries':>10}")
+        for key, result in results['results'].items():
+            self.stdout.write(
+                f"{key:<32}{result['median_ms']:>12.1f}{result['min_ms']:>12.1f}{result['queries']:>10}"
+            )
+
+        if baseline is not None:
+            self._report_comparison(results, baseline, options)
+
+    def _report_comparison(self, results, baseline, options):
+        comparisons = compare_results(results, baseline, threshold=options['threshold'])
+        self.stdout.write('')
+        self.stdout.write(f"Compared with baseline from {baseline.get('created_at', 'unknown date')}:")
+
+        for comparison in comparisons:
+            line = (
+                f"{comparison.key:<32}{comparison.baseline_ms:>10.1f} -> {comparison.current_ms:<10.1f}"
+                f"x{comparison.ratio:<8}{comparison.baseline_queries:>4} -> {comparison.current_queries} queries"
+            )
+            self.stdout.write(self.style.ERROR(line) if comparison.regressed else line)
+
+        regressions = [c.key for c in comparisons if c.regressed]
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions'))
+        elif options['fail_on_regression']:
+            raise CommandError(f"Performance regressions: {', '.join(regressions)}")
+        else:
+            self.stdout.write(self.style.WARNING(f"Performance regressions: {', '.join(regressions)}"))
+
+    def _write(self, path, results):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
@@ -0,0 +1,49 @@
+"""
+Session Middleware
+==================
+
+Sliding session expiry without a write on every request.
+
+SESSION_SAVE_EVERY_REQUEST re-saves the session (an UPDATE on django_session
+plus a cache write) on every page view, AJAX filter call and status poll.
+Instead, the session records when its expiry was last extended and is only
+re-saved once less than SESSION_REFRESH_THRESHOLD seconds of it remain, so an
+active user costs at most one session write per
+(SESSION_COOKIE_AGE - SESSION_REFRESH_THRESHOLD) seconds.
+"""
+
+from django.conf import settings
+import time
+
+REFRESHED_AT_KEY = '_refreshed_at'
+
+
+class SessionRefreshMiddleware:
+    """
+    Extend the session expiry when it is close to running out.
+    Must come after SessionMiddleware, so this runs before the session is saved.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        session = getattr(request, 'session', None)
+        # Never create a session for anonymous visitors with nothing stored
+        if session is None or session.is_empty():
+            return response
+
+        # Sessions with an explicit expiry (e.g. browser-length) manage themselves
+        if session.get('_session_expiry') is not None:
+            return response
+
+        now = int(time.time())
+        refreshed_at = session.get(REFRESHED_AT_KEY)
+        threshold = getattr(settings, 'SESSION_REFRESH_THRESHOLD', settings.SESSION_COOKIE_AGE // 2)
+        if refreshed_at is None or settings.SESSION_COOKIE_AGE - (now - refreshed_at) < threshold:
+            # Marks the session modified: SessionMiddleware saves it with a new
+            # expiry date and re-sends the cookie
+            session[REFRESHED_AT_KEY] = now
+        return response
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_populate_user_identity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrokerLeaderboardEntry',
+            fields=[
+                ('broker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rank', models.PositiveIntegerField()),
+                ('previous_rank', models.PositiveIntegerField(blank=True, help_text='Rank in the most recent earlier daily snapshot', null=True)),
+                ('broker_name', models.CharField(max_length=200)),
+                ('broker_email', models.EmailField(max_length=254)),
+                ('total_applications', models.PositiveIntegerField(default=0)),
+                ('approved_applications', models.PositiveIntegerField(default=0)),
+                ('rejected_applications', models.PositiveIntegerField(default=0)),
+                ('pending_applications', models.PositiveIntegerField(default=0)),
+                ('recent_applications', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('conversion_rate', models.DecimalField(decimal_places=1, default=0, max_digits=4)),
+                ('revenue_generated', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('application_score', models.IntegerField(default=0)),
+                ('approval_score', models.IntegerField(default=0)),
+                ('conversion_bonus', models.IntegerField(default=0)),
+                ('activity_bonus', models.IntegerField(default=0)),
+                ('total_score', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Broker Leaderboard Entry',
+                'verbose_name_plural': 'Broker Leaderboard Entries',
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['rank'], name='users_broke_rank_094a2b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BrokerRankSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('rank', models.PositiveIntegerField()),
+                ('total_score', models.IntegerField()),
+                ('broker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-snapshot_date', 'rank'],
+                'indexes': [models.Index(fields=['snapshot_date', 'rank'], name='users_broke_snapsho_02375d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('broker', 'snapshot_date'), name='unique_broker_rank_snapshot_per_day')],
+            },
+        ),
+    ]
@@ -69,3 +69,6 @@ from .profiles_models import BrokerProfile, OwnerProfile, StaffProfile, AdminPro
 # Import SMS models for migrations
 from .sms_models import SMSPreferences, SMSVerificationLog, SMSMessage
 
+
+# Import leaderboard models for migrations
+from .leaderboard_models import BrokerLeaderboardEntry, BrokerRankSnapshot
@@ -0,0 +1,179 @@
+"""
+Platform Statistics Service
+===========================
+
+Headline counts for the admin dashboard: buildings, apartments, applicants,
+pending reviews and the user role distribution.
+
+Each table is counted with a single conditional aggregate query, and every
+counter is cached under its own key with a short TTL. post_save/post_delete
+signals keep the cached counters current between refreshes:
+- New and deleted rows increment/decrement their counters in place
+- Updates that may change a counted field (e.g. an apartment's status) drop
+  that table's counters, so only that table is recounted on the next load
+
+Bulk writes (queryset.update, bulk_create) bypass signals; the TTL bounds how
+long they can be missing, and ?fresh=1 on the dashboard recounts immediately.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from typing import Dict, Optional
+import logging
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+class PlatformStatsService:
+    """
+    Service for computing and caching platform-wide dashboard counters
+    """
+
+    CACHE_PREFIX = 'platform_stats'
+    CACHE_TTL = 120  # Seconds; signals keep counters current in between
+
+    # Counted tables: model label, and for each counter the aggregate filter
+    # plus the equivalent check for a single instance (None = every row)
+    COUNTERS = {
+        'buildings': ('buildings.Building', {
+            'building_count': (None, None),
+        }),
+        'apartments': ('apartments.Apartment', {
+            'total_apartments': (None, None),
+            'available_apartments': (Q(status='available'), lambda a: a.status == 'available'),
+            'rented_apartments': (Q(status='rented'), lambda a: a.status == 'rented'),
+        }),
+        'applicants': ('applicants.Applicant', {
+            'total_applicants': (None, None),
+            'unplaced_applicants': (Q(placement_status='unplaced'), lambda a: a.placement_status == 'unplaced'),
+            'placed_applicants': (Q(placement_status='placed'), lambda a: a.placement_status == 'placed'),
+        }),
+        'applications': ('applications.Application', {
+            'pending_reviews': (
+                Q(status__in=['PENDING', 'COMPLETED']),
+                lambda a: a.status in ('PENDING', 'COMPLETED'),
+            ),
+        }),
+        'users': (User._meta.label, {
+            'broker_count': (Q(is_broker=True), lambda u: u.is_broker),
+            'applicant_count': (Q(is_applicant=True), lambda u: u.is_applicant),
+            'owner_count': (Q(is_owner=True), lambda u: u.is_owner),
+            'staff_count': (Q(is_staff=True, is_superuser=False), lambda u: u.is_staff and not u.is_superuser),
+            'superuser_count': (Q(is_superuser=True), lambda u: u.is_superuser),
+        }),
+    }
+
+    # Fields whose change on update can move a row between counters
+    TRACKED_FIELDS = {
+        'buildings': set(),
+        'apartments': {'status'},
+        'applicants': {'placement_status'},
+        'applications': {'status'},
+        'users': {'is_broker', 'is_applicant', 'is_owner', 'is_staff', 'is_superuser'},
+    }
+
+    @classmethod
+    def get_stats(cls, fresh: bool = False) -> Dict[str, int]:
+        """
+        Return every dashboard counter.
+
+        Cached counters are served from one cache read; only tables with
+        missing counters are recounted (one query each).
+
+        Args:
+            fresh: Ignore the cache and recount every table
+        """
+        keys = {name: cls._key(name) for name in cls._counter_names()}
+        cached = {} if fresh else cls._safe_cache_call(cache.get_many, list(keys.values())) or {}
+
+        stats = {}
+        for table, (_, counters) in cls.COUNTERS.items():
+            values = {name: cached.get(keys[name]) for name in counters}
+            if None in values.values():
+                values = cls.count_table(table)
+                cls._safe_cache_call(
+                    cache.set_many, {keys[name]: value for name, value in values.items()}, cls.CACHE_TTL
+                )
+            stats.update(values)
+        return stats
+
+    @classmethod
+    def count_table(cls, table: str) -> Dict[str, int]:
+        """Count every counter of a table in a single conditional aggregate query."""
+        from django.apps import apps
+
+        label, counters = cls.COUNTERS[table]
+        model = apps.get_model(label)
+        aggregates = {
+            name: Count('pk', filter=condition) if condition is not None else Count('pk')
+            for name, (condition, _) in counters.items()
+        }
+        return model.objects.aggregate(**aggregates)
+
+    @classmethod
+    def record_saved(cls, instance, created: bool, update_fields=None):
+        """Apply a post_save to the cached counters."""
+        table = cls._table_for(instance)
+        if table is None:
+            return
+        if created:
+            cls._adjust(table, instance, 1)
+        elif update_fields is None or cls.TRACKED_FIELDS[table] & set(update_fields):
+            cls.invalidate(table)
+
+    @classmethod
+    def record_deleted(cls, instance):
+        """Apply a post_delete to the cached counters."""
+        table = cls._table_for(instance)
+        if table is not None:
+            cls._adjust(table, instance, -1)
+
+    @classmethod
+    def invalidate(cls, table: Optional[str] = None):
+        """Drop cached counters for one table (or all tables)."""
+        tables = [table] if table else list(cls.COUNTERS)
+        keys = [cls._key(name) for t in tables for name in cls.COUNTERS[t][1]]
+        cls._safe_cache_call(cache.delete_many, keys)
+
+    @classmethod
+    def _adjust(cls, table, instance, delta):
+        for name, (_, matches) in cls.COUNTERS[table][1].items():
+            if matches is not None and not matches(instance):
+                continue
+            try:
+                cache.incr(cls._key(name), delta)
+            except ValueError:
+                # Counter not cached (expired or never loaded); recount on next read
+                cls.invalidate(table)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to update platform stats counter {name}: {e}")
+                cls.invalidate(table)
+                return
+
+    @classmethod
+    def _table_for(cls, instance) -> Optional[str]:
+        label = instance._meta.label
+        for table, (model_label, _) in cls.COUNTERS.items():
+            if model_label == label:
+                return table
+        return None
+
+    @classmethod
+    def _counter_names(cls):
+        for _, counters in cls.COUNTERS.values():
+            yield from counters
+
+    @classmethod
+    def _key(cls, name: str) -> str:
+        return f"{cls.CACHE_PREFIX}:{name}"
+
+    @staticmethod
+    def _safe_cache_call(method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            logger.warning(f"Platform stats cache unavailable: {e}")
+            return None
@@ -0,0 +1,160 @@
+"""
+Public Broker Profile Cache
+===========================
+
+Public broker pages are applicant-facing and widely shared, so most hits
+come from crawlers and link previews asking for the same few brokers.
+
+Everything the page shows (broker and profile details, active listings,
+listing counts) is built into one summary per broker and cached until a
+save touches it:
+- Apartment, ApartmentImage and Building saves/deletes, and changes to a
+  building's brokers, drop the summaries of that building's brokers
+- User and BrokerProfile saves drop the broker's own summary
+
+Each summary carries HTTP validators: Last-Modified is the newest
+last_modified/updated_at behind it and the ETag is a digest of its content.
+With a warm cache, conditional requests (304s) and anonymous page views are
+answered without querying the database.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Profile attributes shown on the page
+PROFILE_FIELDS = (
+    'job_title', 'business_name', 'bio', 'broker_license_number', 'license_state',
+    'specializations', 'linkedin_url', 'website_url',
+)
+
+
+class PublicBrokerProfileService:
+    """
+    Service for building and caching public broker page summaries
+    """
+
+    CACHE_PREFIX = 'public_broker_profile'
+    CACHE_TTL = 60 * 60 * 24  # Seconds; saves drop summaries in between
+    PAGE_CACHE_TTL = 60 * 10  # Rendered anonymous pages
+
+    @classmethod
+    def get_summary(cls, broker_id: int) -> Optional[Dict]:
+        """
+        Return the cached page summary for a broker, building it on a miss.
+        None when the user does not exist or is not a broker.
+        """
+        key = cls._key(broker_id)
+        summary = cls._safe_cache_call(cache.get, key)
+        if summary is None:
+            summary = cls.build_summary(broker_id)
+            if summary is not None:
+                cls._safe_cache_call(cache.set, key, summary, cls.CACHE_TTL)
+        return summary
+
+    @classmethod
+    def build_summary(cls, broker_id: int) -> Optional[Dict]:
+        """Query everything the public page shows for one broker."""
+        from apartments.models import Apartment
+        from .models import User
+        from .profiles_models import BrokerProfile
+
+        broker = User.objects.filter(id=broker_id, is_broker=True).first()
+        if broker is None:
+            return None
+        profile = BrokerProfile.objects.filter(user=broker).first()
+
+        apartments = Apartment.objects.filter(building__brokers=broker)
+        stats = apartments.aggregate(
+            total_listings=Count('pk', filter=Q(status='available')),
+            rented_count=Count('pk', filter=Q(status='rented')),
+            last_modified=Max('last_modified'),
+        )
+
+        listings = []
+        active = (
+            apartments.filter(status='available')
+            .select_related('building').prefetch_related('images')
+            .order_by('-last_modified', '-id')
+        )
+        for apartment in active:
+            images = list(apartment.images.all())
+            listings.append({
+                'id': apartment.id,
+                'unit_number': apartment.unit_number,
+                'rent_price': apartment.rent_price,
+                'bedrooms': apartment.bedrooms,
+                'bathrooms': apartment.bathrooms,
+                'image_url': images[0].image.url if images else '',
+                'building': {
+                    'street_address_1': apartment.building.street_address_1,
+                    'neighborhood': apartment.building.neighborhood,
+                    'city': apartment.building.city,
+                },
+            })
+
+        summary = {
+            'broker': {
+                'id': broker.id,
+                'first_name': broker.first_name,
+                'last_name': broker.last_name,
+                'get_full_name': broker.get_full_name(),
+                'email': broker.email,
+                'phone_number': broker.phone_number,
+            },
+            'profile': None,
+            'listings': listings,
+            'total_listings': stats['total_listings'],
+            'rented_count': stats['rented_count'],
+        }
+        stamps = [stats['last_modified']]
+        if profile is not None:
+            summary['profile'] = {field: getattr(profile, field) for field in PROFILE_FIELDS}
+            summary['profile']['get_profile_photo_url'] = profile.get_profile_photo_url()
+            stamps.append(profile.updated_at)
+
+        stamps = [stamp for stamp in stamps if stamp is not None]
+        summary['last_modified'] = max(stamps) if stamps else None
+        summary['etag'] = hashlib.md5(
+            json.dumps(summary, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return summary
+
+    @classmethod
+    def page_cache_key(cls, summary: Dict, page_number: int) -> str:
+        """Cache key of an anonymous rendered page; changes with the summary's ETag."""
+        return f"{cls.CACHE_PREFIX}:page:{summary['broker']['id']}:{summary['etag']}:{page_number}"
+
+    @classmethod
+    def invalidate(cls, broker_ids: Iterable[int]):
+        """Drop cached summaries; rendered pages are keyed by ETag and age out."""
+        keys = [cls._key(broker_id) for broker_id in set(broker_ids)]
+        if keys:
+            cls._safe_cache_call(cache.delete_many, keys)
+
+    @classmethod
+    def invalidate_buildings(cls, building_ids: Iterable[int]):
+        """Drop the summaries of every broker of these buildings."""
+        from buildings.models import Building
+
+        broker_ids = Building.brokers.through.objects.filter(
+            building_id__in=list(building_ids)
+        ).values_list('user_id', flat=True)
+        cls.invalidate(broker_ids)
+
+    @classmethod
+    def _key(cls, broker_id: int) -> str:
+        return f"{cls.CACHE_PREFIX}:{broker_id}"
+
+    @staticmethod
+    def _safe_cache_call(method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            logger.warning(f"Public profile cache unavailable: {e}")
+            return None
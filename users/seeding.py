@@ -0,0 +1,706 @@
+"""
+Synthetic Data Generators
+=========================
+
+Faker-based generators behind the seed_data command, usable at any scale so
+the same data shapes can back local demos, benchmarks and load tests.
+
+Each generator creates additional rows (calling one twice adds more data), and
+a fixed seed makes the generated data repeatable.
+
+BulkSeedGenerator builds production-sized load-test datasets in chunks with
+bulk inserts (see the seed_load_data command).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from buildings.models import Building, BuildingImage, Amenity as BuildingAmenity
+from apartments.models import Apartment, ApartmentAmenity, ApartmentImage
+from applicants.models import (
+    Applicant, ApplicantActivity, ApplicantCRM, Amenity as ApplicantAmenity,
+    Neighborhood, NeighborhoodPreference,
+)
+from applications.models import Application, ApplicationStatus, RequiredDocumentType
+from users.profiles_models import AdminProfile, BrokerProfile
+from faker import Faker
+import csv
+import datetime
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import random
+import time
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+ADMINS = [
+    ('admin1@doorway.com', 'Admin One'),
+    ('admin2@doorway.com', 'Admin Two'),
+    ('admin3@doorway.com', 'Admin Three')
+]
+BUILDING_AMENITIES = ['Doorman', 'Gym', 'Pool', 'Elevator', 'Laundry', 'Roof Deck', 'Parking']
+APARTMENT_AMENITIES = ['Dishwasher', 'Washer/Dryer', 'Balcony', 'Central AC', 'Fireplace']
+NEIGHBORHOODS = ['Williamsburg', 'Bushwick', 'Bed-Stuy', 'Greenpoint', 'Crown Heights']
+
+
+class SeedDataGenerator:
+    """
+    Creates brokers, buildings, apartments, applicants and applications.
+
+    Args:
+        seed: Seed for Faker and the random choices (None = different data each run)
+        email_domain: Domain for generated applicant emails
+    """
+
+    def __init__(self, seed=None, email_domain='example.com'):
+        self.fake = Faker()
+        self.random = random.Random(seed)
+        if seed is not None:
+            self.fake.seed_instance(seed)
+        self.email_domain = email_domain
+
+        self.brokers = []
+        self.buildings = []
+        self.apartments = []
+        self.applicants = []
+        self.applications = []
+        self.building_amenities = []
+        self.apartment_amenities = []
+        self.applicant_amenities = []
+        self.neighborhoods = []
+
+    def create_admins(self):
+        """Create the admin superusers (skipped when they already exist)"""
+        for email, name in ADMINS:
+            if not User.objects.filter(email=email).exists():
+                user = User.objects.create_superuser(
+                    email=email,
+                    password='password123'
+                )
+                AdminProfile.objects.create(
+                    user=user,
+                    first_name=name.split()[0],
+                    last_name=name.split()[1]
+                )
+        return len(ADMINS)
+
+    def create_brokers(self, count):
+        """Create (or reuse) brokers broker1..brokerN@doorway.com"""
+        start = len(self.brokers)
+        for i in range(start, start + count):
+            email = f'broker{i+1}@doorway.com'
+            if not User.objects.filter(email=email).exists():
+                first = self.fake.first_name()
+                last = self.fake.last_name()
+                broker = User.objects.create_user(
+                    email=email,
+                    password='password123',
+                    is_broker=True
+                )
+                BrokerProfile.objects.create(
+                    user=broker,
+                    first_name=first,
+                    last_name=last,
+                    phone_number=self.fake.phone_number()[:20],
+                    business_name=f"{last} Realty",
+                    business_address_1=self.fake.street_address(),
+                    business_city="New York",
+                    business_zip=self.fake.zipcode(),
+                    broker_license_number=self.fake.uuid4()[:8]
+                )
+                self.brokers.append(broker)
+            else:
+                self.brokers.append(User.objects.get(email=email))
+        return self.brokers[start:]
+
+    def create_reference_data(self):
+        """Create the amenity and neighborhood lookup rows"""
+        self.building_amenities = [
+            BuildingAmenity.objects.get_or_create(name=name)[0] for name in BUILDING_AMENITIES
+        ]
+        self.apartment_amenities = [
+            ApartmentAmenity.objects.get_or_create(name=name)[0] for name in APARTMENT_AMENITIES
+        ]
+        self.neighborhoods = [
+            Neighborhood.objects.get_or_create(name=name)[0] for name in NEIGHBORHOODS
+        ]
+        # Ensure Applicant Amenity model also has these if separate
+        self.applicant_amenities = [
+            ApplicantAmenity.objects.get_or_create(name=name)[0]
+            for name in BUILDING_AMENITIES + APARTMENT_AMENITIES
+        ]
+
+    def create_buildings(self, count):
+        """Create buildings with amenities, assigned brokers and a dummy image"""
+        created = []
+        for _ in range(count):
+            i = len(self.buildings)
+            building = Building.objects.create(
+                name=f"{self.fake.last_name()} Tower",
+                street_address_1=self.fake.street_address(),
+                city="New York",
+                state="NY",
+                zip_code=self.fake.zipcode(),
+                neighborhood=self.random.choice(NEIGHBORHOODS),
+                description=self.fake.text(),
+                pet_policy=self.random.choice(['all_pets', 'no_pets', 'cats_only']),
+                credit_screening_fee=20.00
+            )
+            building.amenities.set(self.random.sample(self.building_amenities, k=self.random.randint(1, 4)))
+            # Assign random brokers
+            building.brokers.set(
+                self.random.sample(self.brokers, k=min(len(self.brokers), self.random.randint(1, 3)))
+            )
+
+            # Dummy Image
+            BuildingImage.objects.create(
+                building=building,
+                image=f"sample_building_{i}.jpg"  # Dummy ID
+            )
+            self.buildings.append(building)
+            created.append(building)
+        return created
+
+    def create_apartments(self, count):
+        """Create available apartments spread over the generated buildings"""
+        created = []
+        for _ in range(count):
+            i = len(self.apartments)
+            building = self.random.choice(self.buildings)
+            bedrooms = self.random.choice([0, 1, 2, 3])
+            rent = 2000 + (bedrooms * 1000) + self.random.randint(-200, 500)
+
+            apt = Apartment.objects.create(
+                building=building,
+                unit_number=f"{self.random.randint(1, 20)}{self.random.choice(['A', 'B', 'C', 'D'])}",
+                bedrooms=bedrooms,
+                bathrooms=max(1, bedrooms // 2),
+                square_feet=400 + (bedrooms * 200),
+                rent_price=rent,
+                deposit_price=rent,
+                status='available',
+                description=self.fake.text()
+            )
+            apt.amenities.set(self.random.sample(self.apartment_amenities, k=self.random.randint(0, 3)))
+
+            # Dummy Image
+            ApartmentImage.objects.create(
+                apartment=apt,
+                image=f"sample_apartment_{i}.jpg"
+            )
+            self.apartments.append(apt)
+            created.append(apt)
+        return created
+
+    def create_applicants(self, count, nudge_count=0, with_preferences=False):
+        """
+        Create applicant users and profiles.
+        The first ``nudge_count`` have no income/budget (used by the nudge feature).
+        ``with_preferences`` adds ranked neighborhood preferences, which
+        apartment matching requires before it scores anything.
+        """
+        created = []
+        for n in range(count):
+            i = len(self.applicants)
+            is_nudge_case = n < nudge_count
+
+            first = self.fake.first_name()
+            last = self.fake.last_name()
+            email = f"applicant_{i}_{first.lower()}@{self.email_domain}"
+
+            # Create User for applicant
+            user = User.objects.create_user(
+                email=email,
+                password='password123',
+                is_applicant=True
+            )
+
+            applicant = Applicant.objects.create(
+                user=user,
+                first_name=first,
+                last_name=last,
+                email=email,
+                phone_number=self.fake.phone_number()[:20],
+                date_of_birth=self.fake.date_of_birth(minimum_age=18, maximum_age=60),
+                annual_income=None if is_nudge_case else self.random.randint(40000, 200000),
+                max_rent_budget=None if is_nudge_case else self.random.randint(1500, 5000),
+                min_bedrooms=self.random.randint(0, 2),
+                max_bedrooms=self.random.randint(2, 4),
+                desired_move_in_date=timezone.now().date() + datetime.timedelta(days=self.random.randint(10, 60))
+            )
+            applicant.amenities.set(self.random.sample(self.applicant_amenities, k=self.random.randint(0, 3)))
+            if with_preferences:
+                for rank, neighborhood in enumerate(
+                    self.random.sample(self.neighborhoods, k=self.random.randint(1, 3)), start=1
+                ):
+                    NeighborhoodPreference.objects.create(
+                        applicant=applicant, neighborhood=neighborhood, preference_rank=rank
+                    )
+            self.applicants.append(applicant)
+            created.append(applicant)
+        return created
+
+    def create_applications(self, count, applicants=None):
+        """Create applications for the given applicants (one each, in order)"""
+        applicants = applicants if applicants is not None else self.applicants
+        created = []
+        for applicant in applicants[:count]:
+            apartment = self.random.choice(self.apartments)
+            status = self.random.choice(ApplicationStatus.values)
+
+            app = Application.objects.create(
+                applicant=applicant,
+                apartment=apartment,
+                status=status,
+                required_documents=[RequiredDocumentType.PHOTO_ID, RequiredDocumentType.PAYSTUB]
+            )
+
+            # Link broker from building
+            if apartment.building.brokers.exists():
+                app.broker = apartment.building.brokers.first()
+                app.save()
+            self.applications.append(app)
+            created.append(app)
+        return created
+
+
+# ---------------------------------------------------------------------------
+# Bulk generation for load testing
+# ---------------------------------------------------------------------------
+
+# Row counts per preset; small mirrors the seed_data command
+SCALE_PRESETS = {
+    'small': {
+        'brokers': 15, 'buildings': 20, 'apartments': 100,
+        'applicants': 150, 'applications': 50, 'activities': 2_000,
+    },
+    'medium': {
+        'brokers': 50, 'buildings': 400, 'apartments': 4_000,
+        'applicants': 10_000, 'applications': 3_000, 'activities': 200_000,
+    },
+    'large': {
+        'brokers': 200, 'buildings': 2_000, 'apartments': 20_000,
+        'applicants': 50_000, 'applications': 15_000, 'activities': 2_000_000,
+    },
+}
+
+LOAD_TEST_EMAIL_DOMAIN = 'loadtest.example.com'
+
+ACTIVITY_DESCRIPTIONS = {
+    'login': 'Logged into the system',
+    'profile_viewed': 'Viewed profile details',
+    'profile_updated': 'Updated profile information',
+    'apartment_viewed': 'Viewed apartment #{n}',
+    'apartment_favorited': 'Saved apartment #{n}',
+    'property_search': 'Searched for properties in {neighborhood}',
+    'application_updated': 'Updated application information',
+    'document_uploaded': 'Uploaded {document}',
+    'email_sent': 'Email sent to applicant',
+    'email_opened': 'Opened email',
+}
+
+# Peak hours: 9-11am, 2-4pm, 7-9pm
+HOUR_WEIGHTS = [0.1] * 7 + [0.3] * 3 + [0.5] * 2 + [0.3] * 2 + [0.5] * 3 + [0.3] * 2 + [0.5] * 3 + [0.2] * 2
+HOUR_CUM_WEIGHTS = list(itertools.accumulate(HOUR_WEIGHTS))
+
+# Faker is slow per call, so every process draws values from fixed pools
+_FAKER_POOLS = {}
+
+
+def _faker_pools(seed):
+    if seed not in _FAKER_POOLS:
+        fake = Faker()
+        fake.seed_instance(seed)
+        _FAKER_POOLS[seed] = {
+            'first': [fake.first_name() for _ in range(300)],
+            'last': [fake.last_name() for _ in range(300)],
+            'street': [fake.street_address() for _ in range(500)],
+            'zip': [fake.zipcode() for _ in range(100)],
+            'phone': [fake.phone_number()[:20] for _ in range(300)],
+            'text': [fake.text() for _ in range(200)],
+        }
+    return _FAKER_POOLS[seed]
+
+
+def _load_shard(args):
+    """Process pool entry point: load a contiguous run of chunks."""
+    generator, phase, chunks = args
+    try:
+        return generator._load_chunks(phase, chunks)
+    finally:
+        connections.close_all()
+
+
+class BulkSeedGenerator:
+    """
+    Chunked bulk loader for load-test datasets.
+
+    Every table is written with one bulk INSERT per chunk, and M2M rows go
+    straight into the through tables. Activities can be streamed with COPY
+    on PostgreSQL. Each chunk draws from its own Random seeded with
+    (seed, table, chunk start), so a seed always produces the same values.
+    With workers > 1 the chunks of each table are split into contiguous
+    shards and loaded by forked processes (row contents stay the same, the
+    IDs assigned to them may interleave differently).
+
+    Args:
+        counts: Rows per table, e.g. SCALE_PRESETS['medium']
+        seed: Seed for all generated values
+        tag: Marks generated emails/license numbers so datasets don't collide (default: s<seed>)
+        chunk_size: Rows per bulk INSERT / transaction
+        workers: Processes used per table
+        use_copy: Load activities with COPY (PostgreSQL only)
+    """
+
+    PHASES = ['brokers', 'buildings', 'apartments', 'applicants', 'applications', 'activities']
+
+    def __init__(self, counts, seed=0, tag=None, chunk_size=2000, workers=1, use_copy=False, log=None):
+        self.counts = counts
+        self.seed = seed
+        self.tag = tag or f"s{seed}"
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.log = log or logger.info
+        # Hashed once; every generated user shares the demo password
+        self.password = make_password('password123')
+        # IDs (and lookups) produced by each phase, in generation order
+        self.refs = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['log'] = None  # Command output wrappers are not picklable
+        return state
+
+    def run(self):
+        """Generate every table in dependency order, then refresh derived data."""
+        if User.objects.filter(email__endswith=f".{self.tag}@{LOAD_TEST_EMAIL_DOMAIN}").exists():
+            raise ValueError(f"Dataset '{self.tag}' already exists; use another seed or tag")
+
+        self._load_reference_data()
+        totals = {}
+        for phase in self.PHASES:
+            count = self.counts.get(phase, 0)
+            if count > 0:
+                totals[phase] = self._run_phase(phase, count)
+        self._finalize()
+        return totals
+
+    def _load_reference_data(self):
+        self.refs['building_amenities'] = [
+            BuildingAmenity.objects.get_or_create(name=name)[0].id for name in BUILDING_AMENITIES
+        ]
+        self.refs['apartment_amenities'] = [
+            ApartmentAmenity.objects.get_or_create(name=name)[0].id for name in APARTMENT_AMENITIES
+        ]
+        self.refs['neighborhoods'] = [
+            Neighborhood.objects.get_or_create(name=name)[0].id for name in NEIGHBORHOODS
+        ]
+        self.refs['applicant_amenities'] = [
+            ApplicantAmenity.objects.get_or_create(name=name)[0].id
+            for name in BUILDING_AMENITIES + APARTMENT_AMENITIES
+        ]
+
+    def _run_phase(self, phase, count):
+        started = time.perf_counter()
+        chunks = [(start, min(start + self.chunk_size, count)) for start in range(0, count, self.chunk_size)]
+
+        if self.workers > 1 and len(chunks) > 1:
+            shard_size = -(-len(chunks) // self.workers)
+            shards = [chunks[i:i + shard_size] for i in range(0, len(chunks), shard_size)]
+            # Forked children must not share the parent's open connection
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+                results = list(pool.map(_load_shard, [(self, phase, shard) for shard in shards]))
+        else:
+            results = [self._load_chunks(phase, chunks)]
+
+        self.refs[phase] = [ref for shard in results for ref in shard]
+        elapsed = time.perf_counter() - started
+        self.log(f"{phase}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-6):,.0f} rows/s)")
+        return count
+
+    def _load_chunks(self, phase, chunks):
+        build = getattr(self, f'_build_{phase}')
+        pools = _faker_pools(self.seed)
+        refs = []
+        for start, stop in chunks:
+            rng = random.Random(f"{self.seed}:{phase}:{start}")
+            with transaction.atomic():
+                refs.extend(build(rng, pools, start, stop))
+        return refs
+
+    # -- Table builders: each loads rows [start, stop) and returns their refs --
+
+    def _build_brokers(self, rng, pools, start, stop):
+        users = []
+        profiles = []
+        for i in range(start, stop):
+            first, last = rng.choice(pools['first']), rng.choice(pools['last'])
+            phone = rng.choice(pools['phone'])
+            user = User(
+                email=f"broker{i}.{self.tag}@{LOAD_TEST_EMAIL_DOMAIN}",
+                password=self.password,
+                is_broker=True,
+                first_name=first,
+                last_name=last,
+                phone_number=phone,
+            )
+            users.append(user)
+            profiles.append(BrokerProfile(
+                user=user,
+                _first_name=first,
+                _last_name=last,
+                _phone_number=phone,
+                business_name=f"{last} Realty",
+                business_address_1=rng.choice(pools['street']),
+                business_city="New York",
+                business_zip=rng.choice(pools['zip']),
+                broker_license_number=f"{self.tag}-{i}",
+                license_state='NY',
+            ))
+        User.objects.bulk_create(users)
+        BrokerProfile.objects.bulk_create(profiles)
+        return [user.id for user in users]
+
+    def _build_buildings(self, rng, pools, start, stop):
+        buildings = [
+            Building(
+                name=f"{rng.choice(pools['last'])} Tower",
+                street_address_1=rng.choice(pools['street']),
+                city="New York",
+                state="NY",
+                zip_code=rng.choice(pools['zip']),
+                neighborhood=rng.choice(NEIGHBORHOODS),
+                description=rng.choice(pools['text']),
+                pet_policy=rng.choice(['all_pets', 'no_pets', 'cats_only']),
+                credit_screening_fee=20.00,
+                latitude=round(rng.uniform(40.57, 40.74), 7),
+                longitude=round(rng.uniform(-74.04, -73.85), 7),
+            )
+            for _ in range(start, stop)
+        ]
+        Building.objects.bulk_create(buildings)
+
+        amenity_rows = []
+        broker_rows = []
+        refs = []
+        broker_ids = self.refs.get('brokers', [])
+        for building in buildings:
+            for amenity_id in rng.sample(self.refs['building_amenities'], k=rng.randint(1, 4)):
+                amenity_rows.append((building.id, amenity_id))
+            brokers = rng.sample(broker_ids, k=min(len(broker_ids), rng.randint(1, 3)))
+            broker_rows.extend((building.id, broker_id) for broker_id in brokers)
+            refs.append((building.id, brokers[0] if brokers else None))
+
+        self._bulk_link(Building, 'amenities', amenity_rows)
+        self._bulk_link(Building, 'brokers', broker_rows)
+        BuildingImage.objects.bulk_create([
+            BuildingImage(building=building, image=f"sample_building_{i}.jpg")
+            for i, building in zip(range(start, stop), buildings)
+        ])
+        return refs
+
+    def _build_apartments(self, rng, pools, start, stop):
+        apartments = []
+        brokers = []
+        for _ in range(start, stop):
+            building_id, broker_id = rng.choice(self.refs['buildings'])
+            bedrooms = rng.choice([0, 1, 2, 3])
+            rent = 2000 + (bedrooms * 1000) + rng.randint(-200, 500)
+            apartments.append(Apartment(
+                building_id=building_id,
+                unit_number=f"{rng.randint(1, 20)}{rng.choice(['A', 'B', 'C', 'D'])}",
+                bedrooms=bedrooms,
+                bathrooms=max(1, bedrooms // 2),
+                square_feet=400 + (bedrooms * 200),
+                rent_price=rent,
+                deposit_price=rent,
+                status=rng.choices(['available', 'rented', 'pending'], weights=[80, 15, 5])[0],
+                description=rng.choice(pools['text']),
+            ))
+            brokers.append(broker_id)
+        Apartment.objects.bulk_create(apartments)
+
+        self._bulk_link(Apartment, 'amenities', [
+            (apartment.id, amenity_id)
+            for apartment in apartments
+            for amenity_id in rng.sample(self.refs['apartment_amenities'], k=rng.randint(0, 3))
+        ])
+        ApartmentImage.objects.bulk_create([
+            ApartmentImage(apartment=apartment, image=f"sample_apartment_{i}.jpg")
+            for i, apartment in zip(range(start, stop), apartments)
+        ])
+        return [(apartment.id, broker_id) for apartment, broker_id in zip(apartments, brokers)]
+
+    def _build_applicants(self, rng, pools, start, stop):
+        today = timezone.now().date()
+        users = []
+        applicants = []
+        for i in range(start, stop):
+            # One in five is missing income/budget, like seed_data's nudge cases
+            is_nudge_case = rng.random() < 0.2
+            first, last = rng.choice(pools['first']), rng.choice(pools['last'])
+            email = f"applicant{i}.{self.tag}@{LOAD_TEST_EMAIL_DOMAIN}"
+            phone = rng.choice(pools['phone'])
+            user = User(
+                email=email,
+                password=self.password,
+                is_applicant=True,
+                first_name=first,
+                last_name=last,
+                phone_number=phone,
+            )
+            users.append(user)
+            applicants.append(Applicant(
+                user=user,
+                _first_name=first,
+                _last_name=last,
+                _email=email,
+                _phone_number=phone,
+                date_of_birth=today - datetime.timedelta(days=rng.randint(18 * 365, 60 * 365)),
+                annual_income=None if is_nudge_case else rng.randint(40000, 200000),
+                max_rent_budget=None if is_nudge_case else rng.randint(1500, 5000),
+                min_bedrooms=rng.randint(0, 2),
+                max_bedrooms=rng.randint(2, 4),
+                desired_move_in_date=today + datetime.timedelta(days=rng.randint(10, 60)),
+            ))
+        User.objects.bulk_create(users)
+        Applicant.objects.bulk_create(applicants)
+        # bulk_create skips the post_save signal that provisions CRM records
+        ApplicantCRM.objects.bulk_create([ApplicantCRM(applicant=applicant) for applicant in applicants])
+
+        self._bulk_link(Applicant, 'amenities', [
+            (applicant.id, amenity_id)
+            for applicant in applicants
+            for amenity_id in rng.sample(self.refs['applicant_amenities'], k=rng.randint(0, 3))
+        ])
+        NeighborhoodPreference.objects.bulk_create([
+            NeighborhoodPreference(applicant_id=applicant.id, neighborhood_id=neighborhood_id, preference_rank=rank)
+            for applicant in applicants
+            for rank, neighborhood_id in enumerate(
+                rng.sample(self.refs['neighborhoods'], k=rng.randint(1, 3)), start=1
+            )
+        ])
+        return [applicant.id for applicant in applicants]
+
+    def _build_applications(self, rng, pools, start, stop):
+        applicant_ids = self.refs['applicants']
+        applications = []
+        for i in range(start, stop):
+            apartment_id, broker_id = rng.choice(self.refs['apartments'])
+            applications.append(Application(
+                applicant_id=applicant_ids[i % len(applicant_ids)],
+                apartment_id=apartment_id,
+                broker_id=broker_id,
+                status=rng.choice(ApplicationStatus.values),
+                required_documents=[RequiredDocumentType.PHOTO_ID, RequiredDocumentType.PAYSTUB],
+            ))
+        Application.objects.bulk_create(applications)
+        return [application.id for application in applications]
+
+    def _build_activities(self, rng, pools, start, stop):
+        applicant_ids = self.refs['applicants']
+        now = timezone.now()
+        types = list(ACTIVITY_DESCRIPTIONS)
+        metadata = json.dumps({'generated': True, 'load_test': self.tag})
+        rows = []
+        for _ in range(start, stop):
+            day = now - datetime.timedelta(days=rng.randint(0, 90))
+            # Weekdays are busier than weekends
+            if day.weekday() >= 5 and rng.random() < 0.5:
+                day -= datetime.timedelta(days=2)
+            created_at = day.replace(
+                hour=rng.choices(range(24), cum_weights=HOUR_CUM_WEIGHTS)[0],
+                minute=rng.randint(0, 59),
+                second=rng.randint(0, 59),
+            )
+            if created_at > now:
+                created_at -= datetime.timedelta(days=1)
+            activity_type = rng.choice(types)
+            description = ACTIVITY_DESCRIPTIONS[activity_type].format(
+                n=rng.randint(100, 999),
+                neighborhood=rng.choice(NEIGHBORHOODS),
+                document=rng.choice(['ID', 'Income proof', 'Reference letter']),
+            )
+            rows.append((rng.choice(applicant_ids), activity_type, description, metadata, created_at))
+
+        # Raw rows keep the historical created_at (auto_now_add would overwrite it)
+        self._insert_rows(
+            ApplicantActivity,
+            ['applicant_id', 'activity_type', 'description', 'metadata', 'created_at'],
+            rows,
+        )
+        return []
+
+    # -- Writers --
+
+    @staticmethod
+    def _bulk_link(model, field_name, pairs):
+        """Insert (source_id, target_id) pairs straight into an M2M through table."""
+        field = model._meta.get_field(field_name)
+        through = field.remote_field.through
+        source, target = f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+        through.objects.bulk_create([through(**{source: s, target: t}) for s, t in pairs])
+
+    def _insert_rows(self, model, columns, rows):
+        """Insert raw rows with COPY (PostgreSQL) or batched multi-row INSERTs."""
+        table = model._meta.db_table
+        quoted = ', '.join(connection.ops.quote_name(column) for column in columns)
+
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                sql = f"COPY {connection.ops.quote_name(table)} ({quoted}) FROM STDIN WITH (FORMAT csv)"
+                raw = cursor.cursor
+                if hasattr(raw, 'copy_expert'):  # psycopg2
+                    raw.copy_expert(sql, buffer)
+                else:  # psycopg 3
+                    with raw.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+                return
+
+            max_params = connection.features.max_query_params or 65535
+            batch = max(1, max_params // len(columns))
+            placeholders = f"({', '.join(['%s'] * len(columns))})"
+            for i in range(0, len(rows), batch):
+                chunk = rows[i:i + batch]
+                cursor.execute(
+                    f"INSERT INTO {connection.ops.quote_name(table)} ({quoted}) "
+                    f"VALUES {', '.join([placeholders] * len(chunk))}",
+                    [value for row in chunk for value in row],
+                )
+
+    def _finalize(self):
+        """Refresh data that bulk inserts bypass (signals, search index, planner stats)."""
+        from apartments.search_indexer import rebuild_search_index
+        from applicants.activity_rollups import ActivityRollupService
+        from users.platform_stats import PlatformStatsService
+
+        PlatformStatsService.invalidate()
+        if 'activities' in self.refs:
+            # Bulk-inserted activities bypass the rollup signal
+            rows = ActivityRollupService.rebuild(applicant_ids=self.refs['applicants'])
+            self.log(f"activity rollups: {rows:,} rows")
+        if self.refs.get('applicants'):
+            updated = Applicant.refresh_profile_completions(
+                Applicant.objects.filter(pk__in=self.refs['applicants'])
+            )
+            self.log(f"profile completion: {updated:,} applicants")
+        if self.refs.get('apartments'):
+            stats = rebuild_search_index()
+            self.log(f"search index: {stats.rows:,} rows in {stats.elapsed:.1f}s")
+        if connection.vendor == 'postgresql':
+            models = (User, Building, Apartment, Applicant, Application, ApplicantActivity)
+            with connection.cursor() as cursor:
+                for table in (model._meta.db_table for model in models):
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
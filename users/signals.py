@@ -1,6 +1,10 @@
 from allauth.account.signals import user_signed_up
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from .models import User
+from .platform_stats import PlatformStatsService
+from .public_profiles import PublicBrokerProfileService
 from applicants.models import Applicant
 
 @receiver(user_signed_up)
@@ -32,3 +36,73 @@ def create_applicant_profile(request, user, **kwargs):
         Applicant.objects.create(user=user)
         user.is_applicant = True
         user.save()
+
+
+def update_platform_stats_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the cached admin dashboard counters current once the save commits."""
+    transaction.on_commit(lambda: PlatformStatsService.record_saved(instance, created, update_fields))
+
+
+def update_platform_stats_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: PlatformStatsService.record_deleted(instance))
+
+
+for _label, _ in PlatformStatsService.COUNTERS.values():
+    post_save.connect(update_platform_stats_on_save, sender=_label, dispatch_uid=f'platform_stats_save_{_label}')
+    post_delete.connect(update_platform_stats_on_delete, sender=_label, dispatch_uid=f'platform_stats_delete_{_label}')
+
+
+def invalidate_public_profile_for_apartment(sender, instance, **kwargs):
+    """An apartment (or its image) changed: refresh its building's broker pages once committed."""
+    apartment = getattr(instance, 'apartment', instance)
+    building_id = apartment.building_id
+    transaction.on_commit(lambda: PublicBrokerProfileService.invalidate_buildings([building_id]))
+
+
+def invalidate_public_profile_for_building(sender, instance, **kwargs):
+    building_id = instance.pk
+    transaction.on_commit(lambda: PublicBrokerProfileService.invalidate_buildings([building_id]))
+
+
+def invalidate_public_profile_for_deleted_building(sender, instance, **kwargs):
+    # The broker links are deleted with the building; capture them first
+    broker_ids = list(instance.brokers.values_list('pk', flat=True))
+    transaction.on_commit(lambda: PublicBrokerProfileService.invalidate(broker_ids))
+
+
+def invalidate_public_profile_for_broker(sender, instance, update_fields=None, **kwargs):
+    if isinstance(instance, User):
+        if update_fields and set(update_fields) <= {'last_login'}:
+            return  # Logins do not change the public page
+        broker_id = instance.pk
+    else:
+        broker_id = instance.user_id
+    transaction.on_commit(lambda: PublicBrokerProfileService.invalidate([broker_id]))
+
+
+def invalidate_public_profile_for_building_brokers(sender, instance, action, reverse, pk_set, **kwargs):
+    """Brokers added to / removed from a building (from either side)."""
+    if action == 'pre_clear':
+        # The rows are gone by post_clear; capture the affected brokers now
+        if reverse:
+            broker_ids = [instance.pk]
+        else:
+            broker_ids = list(instance.brokers.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        broker_ids = [instance.pk] if reverse else list(pk_set)
+    else:
+        return
+    transaction.on_commit(lambda: PublicBrokerProfileService.invalidate(broker_ids))
+
+
+for _label in ('apartments.Apartment', 'apartments.ApartmentImage'):
+    post_save.connect(invalidate_public_profile_for_apartment, sender=_label, dispatch_uid=f'public_profile_save_{_label}')
+    post_delete.connect(invalidate_public_profile_for_apartment, sender=_label, dispatch_uid=f'public_profile_delete_{_label}')
+post_save.connect(invalidate_public_profile_for_building, sender='buildings.Building', dispatch_uid='public_profile_save_building')
+pre_delete.connect(invalidate_public_profile_for_deleted_building, sender='buildings.Building', dispatch_uid='public_profile_delete_building')
+post_save.connect(invalidate_public_profile_for_broker, sender=User, dispatch_uid='public_profile_save_user')
+post_save.connect(invalidate_public_profile_for_broker, sender='users.BrokerProfile', dispatch_uid='public_profile_save_broker_profile')
+m2m_changed.connect(
+    invalidate_public_profile_for_building_brokers, sender='buildings.Building_brokers',
+    dispatch_uid='public_profile_building_brokers',
+)
@@ -10,7 +10,8 @@ from typing import Tuple, Optional, Dict
 from django.core.cache import cache
 from django.conf import settings
 from django.utils import timezone
-from applications.sms_utils import SMSBackend, validate_phone_number
+from applications.outbox import Outbox, get_outbox_provider
+from applications.sms_utils import validate_phone_number
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +29,6 @@ class PhoneVerificationService:
     VERIFICATION_ATTEMPTS_LIMIT = 5
     RATE_LIMIT_WINDOW_HOURS = 1
     
-    def __init__(self):
-        self.sms_backend = SMSBackend()
-    
     def generate_otp(self) -> str:
         """Generate a random 6-digit OTP code"""
         return str(random.randint(100000, 999999))
@@ -101,8 +99,8 @@ class PhoneVerificationService:
             logger.warning(f"Rate limit exceeded for {formatted_phone}: {limit_message}")
             return False, limit_message
         
-        # Check if SMS backend is configured
-        if not self.sms_backend.enabled:
+        # Check if SMS delivery is configured
+        if not get_outbox_provider('sms').enabled:
             return False, "SMS service is not configured. Please contact support."
         
         try:
@@ -136,17 +134,12 @@ class PhoneVerificationService:
             else:
                 message = f"Your {settings.SITE_NAME} verification code is: {otp_code}"
             
-            # Send SMS
-            success, result = self.sms_backend.send_sms(formatted_phone, message)
-            
-            if success:
-                logger.info(f"OTP sent successfully to {formatted_phone} for {purpose}")
-                remaining_attempts = self.MAX_ATTEMPTS_PER_HOUR - hourly_attempts
-                return True, f"Verification code sent. You have {remaining_attempts} attempts remaining this hour."
-            else:
-                # Remove OTP from cache if sending failed
-                cache.delete(keys['otp'])
-                return False, f"Failed to send SMS: {result}"
+            # Queue SMS; the outbox worker delivers it outside the request
+            Outbox.enqueue_sms('otp', formatted_phone, message)
+
+            logger.info(f"OTP queued for {formatted_phone} for {purpose}")
+            remaining_attempts = self.MAX_ATTEMPTS_PER_HOUR - hourly_attempts
+            return True, f"Verification code sent. You have {remaining_attempts} attempts remaining this hour."
                 
         except Exception as e:
             logger.error(f"Error sending OTP to {formatted_phone}: {e}")
@@ -0,0 +1,42 @@
+"""
+Celery Tasks for Users App
+==========================
+
+Periodic background jobs for broker performance reporting and session upkeep.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='users.refresh_broker_leaderboard',
+    ignore_result=True
+)
+def refresh_broker_leaderboard_task():
+    """
+    Rebuild the materialized broker leaderboard and record today's rank
+    snapshot, which is what rank movement is measured against tomorrow.
+    """
+    from .broker_leaderboard import BrokerLeaderboardService
+
+    return BrokerLeaderboardService().refresh_leaderboard()
+
+
+@shared_task(
+    name='users.clear_expired_sessions',
+    ignore_result=True
+)
+def clear_expired_sessions_task():
+    """
+    Delete expired sessions. Sessions are no longer re-saved on every request,
+    so expired rows are only removed here (same as `manage.py clearsessions`).
+    """
+    from importlib import import_module
+    from django.conf import settings
+
+    engine = import_module(settings.SESSION_ENGINE)
+    engine.SessionStore.clear_expired()
+    logger.info("Cleared expired sessions")
@@ -203,8 +203,8 @@ def get_user_profile_completion(user):
         elif user.is_applicant:
             profile = getattr(user, 'applicant_profile', None)
             if profile:
-                completion, _ = ProfileProgressService.calculate_applicant_profile_completion(profile)
-                return completion
+                # Stored on the profile and refreshed as it changes
+                return profile.profile_completion_percentage
     except Exception:
         # If there's any error (missing service, profile, etc.), return 0
         pass
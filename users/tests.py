@@ -1,3 +1,395 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apartments.models import Apartment
+from applicants.models import Applicant, ApplicantActivity
+from applications.models import Application
+from buildings.models import Building
+from .benchmarks import compare_results, isolated_cache, run_suite
+from .broker_leaderboard import BrokerLeaderboardService
+from .middleware import REFRESHED_AT_KEY, SessionRefreshMiddleware
+from .leaderboard_models import BrokerLeaderboardEntry, BrokerRankSnapshot
+from .models import User
+from .platform_stats import PlatformStatsService
+from .public_profiles import PublicBrokerProfileService
+from .seeding import BulkSeedGenerator
+
+
+class PlatformStatsServiceTest(TestCase):
+    """
+    Test the cached admin dashboard counters.
+    Business Logic: The admin landing page must show accurate platform counts
+    without recounting every table on each load.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='testpass123', is_staff=True, is_superuser=True
+        )
+        User.objects.create_user(email='broker@example.com', password='testpass123', is_broker=True)
+        self.building = Building.objects.create(
+            name='Court Street Lofts',
+            street_address_1='200 Court St',
+            city='Brooklyn',
+            state='NY',
+            zip_code='11201',
+        )
+        self.apartment = Apartment.objects.create(
+            building=self.building, unit_number='1A', rent_price=Decimal('3000.00'), status='available'
+        )
+        Apartment.objects.create(
+            building=self.building, unit_number='2A', rent_price=Decimal('3100.00'), status='rented'
+        )
+
+    def test_counts_one_query_per_table_then_serves_from_cache(self):
+        with self.assertNumQueries(len(PlatformStatsService.COUNTERS)):
+            stats = PlatformStatsService.get_stats()
+
+        self.assertEqual(stats['building_count'], 1)
+        self.assertEqual(stats['total_apartments'], 2)
+        self.assertEqual(stats['available_apartments'], 1)
+        self.assertEqual(stats['rented_apartments'], 1)
+        self.assertEqual(stats['broker_count'], 1)
+        self.assertEqual(stats['superuser_count'], 1)
+        self.assertEqual(stats['staff_count'], 0)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(PlatformStatsService.get_stats(), stats)
+
+    def test_signals_keep_cached_counters_current(self):
+        PlatformStatsService.get_stats()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.create(
+                building=self.building, unit_number='3A', rent_price=Decimal('2900.00'), status='available'
+            )
+        # New rows are counted in place, without recounting
+        with self.assertNumQueries(0):
+            stats = PlatformStatsService.get_stats()
+        self.assertEqual(stats['total_apartments'], 3)
+        self.assertEqual(stats['available_apartments'], 2)
+
+        # A status change only recounts the apartments table
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apartment.status = 'rented'
+            self.apartment.save()
+        with self.assertNumQueries(1):
+            stats = PlatformStatsService.get_stats()
+        self.assertEqual(stats['available_apartments'], 1)
+        self.assertEqual(stats['rented_apartments'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apartment.delete()
+        self.assertEqual(PlatformStatsService.get_stats()['rented_apartments'], 1)
+
+    def test_admin_dashboard_fresh_bypasses_cache(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('admin_dashboard'))
+
+        # Bulk updates bypass signals, so only a fresh load sees them
+        Apartment.objects.update(status='rented')
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.context['available_apartments'], 1)
+
+        response = self.client.get(reverse('admin_dashboard'), {'fresh': '1'})
+        self.assertEqual(response.context['available_apartments'], 0)
+        self.assertEqual(response.context['rented_apartments'], 2)
+
+
+class BrokerLeaderboardTest(TestCase):
+    """
+    Test the materialized broker leaderboard.
+    Business Logic: Rankings are computed once per refresh, read cheaply, and
+    rank movement is measured against the previous daily snapshot.
+    """
+
+    def setUp(self):
+        self.service = BrokerLeaderboardService()
+        self.top = User.objects.create_user(email='top@example.com', password='testpass123', is_broker=True)
+        self.second = User.objects.create_user(email='second@example.com', password='testpass123', is_broker=True)
+        self.idle = User.objects.create_user(email='idle@example.com', password='testpass123', is_broker=True)
+
+        for status in ['APPROVED', 'APPROVED', 'REJECTED']:
+            Application.objects.create(broker=self.top, status=status)
+        Application.objects.create(broker=self.second, status='PENDING')
+
+    def test_refresh_materializes_ranked_metrics(self):
+        self.assertEqual(self.service.refresh_leaderboard(), 3)
+
+        top = BrokerLeaderboardEntry.objects.get(broker=self.top)
+        self.assertEqual(top.rank, 1)
+        self.assertEqual(top.total_applications, 3)
+        self.assertEqual(top.approved_applications, 2)
+        self.assertEqual(top.conversion_rate, Decimal('66.7'))
+        self.assertEqual(BrokerLeaderboardEntry.objects.get(broker=self.idle).rank, 3)
+        self.assertEqual(BrokerRankSnapshot.objects.filter(snapshot_date=timezone.localdate()).count(), 3)
+
+        # Reading the top N is a single query
+        with self.assertNumQueries(1):
+            leaderboard = self.service.get_broker_leaderboard(limit=2)
+        self.assertEqual([row['broker'] for row in leaderboard], [self.top, self.second])
+        self.assertEqual(leaderboard[0]['rank_change'], 'new')
+
+    def test_rank_change_uses_previous_snapshot(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        BrokerRankSnapshot.objects.create(broker=self.top, snapshot_date=yesterday, rank=2, total_score=0)
+        BrokerRankSnapshot.objects.create(broker=self.second, snapshot_date=yesterday, rank=1, total_score=0)
+
+        leaderboard = self.service.get_broker_leaderboard(refresh=True)
+        changes = {row['broker']: row['rank_change'] for row in leaderboard}
+        self.assertEqual(changes, {self.top: 1, self.second: -1, self.idle: 'new'})
+
+        # Refreshing again today overwrites today's snapshot instead of adding one
+        self.service.refresh_leaderboard()
+        self.assertEqual(BrokerRankSnapshot.objects.filter(broker=self.top).count(), 2)
+
+    def test_leaderboard_view_reads_materialized_rows(self):
+        admin = User.objects.create_user(email='staff@example.com', password='testpass123', is_staff=True)
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('broker_leaderboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['leaderboard'][0]['broker_email'], 'top@example.com')
+        self.assertEqual(response.context['summary_stats']['total_applications'], 4)
+
+        Application.objects.create(broker=self.idle, status='APPROVED')
+        response = self.client.get(reverse('broker_leaderboard'), {'refresh': '1'})
+        self.assertEqual(response.context['summary_stats']['total_applications'], 5)
+
+
+class PublicBrokerProfileTest(TestCase):
+    """
+    Test the cached public broker page.
+    Business Logic: Shared broker links and crawlers must be answered from
+    cache, and listing changes must show up as soon as they are saved.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.broker = User.objects.create_user(
+            email='public@example.com', password=None, is_broker=True, first_name='Pat', last_name='Lister',
+        )
+        self.building = Building.objects.create(
+            name='Shared Tower', street_address_1='9 Link St', city='New York', state='NY', zip_code='10001',
+        )
+        self.building.brokers.add(self.broker)
+        self.apartments = [
+            Apartment.objects.create(
+                building=self.building, unit_number=unit, rent_price=Decimal('3100'), status=status,
+            )
+            for unit, status in [('1A', 'available'), ('2A', 'available'), ('3A', 'rented')]
+        ]
+        self.url = reverse('public_broker_profile', args=[self.broker.id])
+
+    def test_anonymous_hits_are_served_from_cache_with_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_listings'], 2)
+        self.assertEqual(response.context['rented_count'], 1)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.client.force_login(self.broker)
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_saves_invalidate_the_summary(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apartment = self.apartments[0]
+            apartment.status = 'rented'
+            apartment.save()
+        response = self.client.get(self.url)
+        self.assertEqual((response.context['total_listings'], response.context['rented_count']), (1, 2))
+        self.assertNotEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.building.brokers.remove(self.broker)
+        self.assertEqual(self.client.get(self.url).context['total_listings'], 0)
+
+        self.assertIsNone(PublicBrokerProfileService.get_summary(
+            User.objects.create_user(email='renter@example.com', password=None).id
+        ))
+
+
+class BenchmarkSuiteTest(TestCase):
+    """
+    Test the benchmark harness.
+    Business Logic: Benchmarks must be repeatable on synthetic data and flag
+    slower timings or extra queries against a stored baseline.
+    """
+
+    def test_suite_seeds_scales_and_records_queries(self):
+        results = run_suite(sizes=[10, 5], repeat=2, warmup=0, names=['smart_insights', 'broker_dashboard'],
+                            log=lambda message: None)
+
+        self.assertEqual(results['sizes'], [5, 10])
+        self.assertEqual(
+            set(results['results']),
+            {'smart_insights@5', 'broker_dashboard@5', 'smart_insights@10', 'broker_dashboard@10'},
+        )
+        dashboard = results['results']['broker_dashboard@10']
+        self.assertEqual(dashboard['runs'], 2)
+        self.assertGreater(dashboard['queries'], 0)
+        self.assertLessEqual(dashboard['min_ms'], dashboard['median_ms'])
+
+        # Scales are topped up incrementally rather than reseeded
+        self.assertEqual(Apartment.objects.count(), 10)
+        self.assertEqual(Application.objects.count(), 5)
+
+        with self.assertRaises(ValueError):
+            run_suite(sizes=[5], names=['missing'])
+
+    def test_never_clears_the_broker_cache(self):
+        broker = 'redis://cache.internal:6379/0'
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': broker}}
+        with self.settings(CELERY_BROKER_URL=broker, CACHES=shared):
+            cache.set('celery-task', 'queued')
+            with self.assertRaises(RuntimeError):
+                run_suite(sizes=[5], repeat=1, warmup=0, names=['smart_insights'], log=lambda message: None)
+            self.assertEqual(cache.get('celery-task'), 'queued')
+
+            # A private cache is cleared between runs without touching the shared one
+            with isolated_cache():
+                run_suite(sizes=[5], repeat=1, warmup=0, names=['smart_insights'], log=lambda message: None)
+            self.assertEqual(cache.get('celery-task'), 'queued')
+
+    def test_compare_flags_slower_timings_and_extra_queries(self):
+        def run(median_ms, queries):
+            return {'results': {'search@100': {'median_ms': median_ms, 'queries': queries}}}
+
+        baseline = run(10.0, 5)
+        self.assertFalse(compare_results(run(12.0, 5), baseline)[0].regressed)
+        self.assertTrue(compare_results(run(13.0, 5), baseline)[0].regressed)
+        self.assertTrue(compare_results(run(9.0, 6), baseline)[0].regressed)
+        self.assertFalse(compare_results(run(13.0, 5), baseline, threshold=1.5)[0].regressed)
+        # Benchmarks missing from the baseline are not compared
+        self.assertEqual(compare_results(run(10.0, 5), {'results': {}}), [])
+
+
+class BulkSeedGeneratorTest(TestCase):
+    """
+    Test the bulk load-test data generator.
+    Business Logic: Load-test datasets must be fast to build, complete enough
+    for the matching/dashboard paths, and repeatable for a given seed.
+    """
+
+    COUNTS = {
+        'brokers': 3, 'buildings': 4, 'apartments': 12,
+        'applicants': 10, 'applications': 6, 'activities': 40,
+    }
+
+    def _generate(self, tag, **kwargs):
+        generator = BulkSeedGenerator(self.COUNTS, seed=7, tag=tag, chunk_size=5, log=lambda message: None, **kwargs)
+        generator.run()
+        return generator
+
+    def test_generates_linked_rows_in_chunks(self):
+        generator = self._generate('first', use_copy=True)
+
+        self.assertEqual(User.objects.filter(is_broker=True).count(), 3)
+        self.assertEqual(Building.objects.count(), 4)
+        self.assertEqual(Apartment.objects.count(), 12)
+        self.assertEqual(Applicant.objects.count(), 10)
+        self.assertEqual(ApplicantActivity.objects.count(), 40)
+
+        building = Building.objects.get(id=generator.refs['buildings'][0][0])
+        self.assertTrue(building.amenities.exists())
+        self.assertTrue(building.brokers.exists())
+        self.assertFalse(Application.objects.filter(broker__isnull=True).exists())
+        applicant = Applicant.objects.get(id=generator.refs['applicants'][0])
+        self.assertEqual(applicant.email, 'applicant0.first@loadtest.example.com')
+
+        # Activities keep their generated history instead of auto_now_add
+        oldest = ApplicantActivity.objects.order_by('created_at').first().created_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=1))
+
+        with self.assertRaises(ValueError):
+            self._generate('first')
+
+    def test_same_seed_generates_same_values(self):
+        first = self._generate('first')
+        second = self._generate('second')
+
+        def rents(generator):
+            ids = [apartment_id for apartment_id, _ in generator.refs['apartments']]
+            rows = dict(Apartment.objects.filter(id__in=ids).values_list('id', 'rent_price'))
+            return [rows[apartment_id] for apartment_id in ids]
+
+        self.assertEqual(rents(first), rents(second))
+        self.assertEqual(
+            sorted(ApplicantActivity.objects.filter(applicant_id__in=first.refs['applicants'])
+                   .values_list('description', flat=True)),
+            sorted(ApplicantActivity.objects.filter(applicant_id__in=second.refs['applicants'])
+                   .values_list('description', flat=True)),
+        )
+
+
+@override_settings(SESSION_COOKIE_AGE=1000, SESSION_REFRESH_THRESHOLD=600)
+class SessionRefreshMiddlewareTest(TestCase):
+    """
+    Test sliding session expiry.
+    Business Logic: Active users stay logged in without a session write on
+    every page view.
+    """
+
+    def setUp(self):
+        self.middleware = SessionRefreshMiddleware(lambda request: HttpResponse('ok'))
+
+    def _request(self, data=None):
+        request = RequestFactory().get('/')
+        request.session = SessionStore()
+        request.session.update(data or {})
+        request.session.modified = False
+        return request
+
+    def test_recently_refreshed_session_is_not_saved(self):
+        request = self._request({'user': 1, REFRESHED_AT_KEY: int(time.time()) - 300})
+        self.middleware(request)
+        self.assertFalse(request.session.modified)
+
+    def test_session_is_refreshed_below_threshold(self):
+        request = self._request({'user': 1, REFRESHED_AT_KEY: int(time.time()) - 500})
+        self.middleware(request)
+        self.assertTrue(request.session.modified)
+        self.assertGreaterEqual(request.session[REFRESHED_AT_KEY], int(time.time()) - 1)
+
+        # Sessions from before the middleware get stamped once
+        request = self._request({'user': 1})
+        self.middleware(request)
+        self.assertTrue(request.session.modified)
+
+    def test_anonymous_requests_do_not_create_sessions(self):
+        request = self._request()
+        self.middleware(request)
+        self.assertFalse(request.session.modified)
+
+    def test_logged_in_page_views_skip_session_writes(self):
+        user = User.objects.create_user(email='staff@example.com', password='testpass123', is_staff=True)
+        self.client.force_login(user)
+        self.client.get(reverse('broker_leaderboard'))
+
+        session_key = self.client.session.session_key
+        expire_date = Session.objects.get(session_key=session_key).expire_date
+        self.client.get(reverse('broker_leaderboard'))
+        self.assertEqual(Session.objects.get(session_key=session_key).expire_date, expire_date)
@@ -10,7 +10,11 @@ from django.utils.html import strip_tags
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.conf import settings
-from django.http import HttpResponseForbidden, Http404
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
 import logging
 from .models import User
 from .forms import LoginForm, BrokerRegistrationForm, ApplicantRegistrationForm, StaffRegistrationForm, OwnerRegistrationForm
@@ -301,26 +305,14 @@ def admin_dashboard(request):
     except AdminProfile.DoesNotExist:
         admin_profile = None
     
-    # Import models for statistics
-    from buildings.models import Building
+    # Import models for recent activity
     from applications.models import Application, ApplicationActivity
-    from apartments.models import Apartment
-    from applicants.models import Applicant
     from django.utils import timezone
     from datetime import timedelta
     
-    # Rental Management Statistics
-    building_count = Building.objects.count()
-    available_apartments = Apartment.objects.filter(status='available').count()
-    unplaced_applicants = Applicant.objects.filter(placement_status='unplaced').count()
-    pending_reviews = Application.objects.filter(status__in=['PENDING', 'COMPLETED']).count()
-    
-    # User type distribution
-    broker_count = User.objects.filter(is_broker=True).count()
-    applicant_count = User.objects.filter(is_applicant=True).count()
-    owner_count = User.objects.filter(is_owner=True).count()
-    staff_count = User.objects.filter(is_staff=True, is_superuser=False).count()
-    superuser_count = User.objects.filter(is_superuser=True).count()
+    # Rental management and user distribution counters (cached, ?fresh=1 recounts)
+    from .platform_stats import PlatformStatsService
+    stats = PlatformStatsService.get_stats(fresh=request.GET.get('fresh') == '1')
     
     # Recent activity from application logs
     recent_activities = ApplicationActivity.objects.select_related('application', 'application__applicant').order_by('-timestamp')[:10]
@@ -337,26 +329,12 @@ def admin_dashboard(request):
         'user': request.user,
         'admin_profile': admin_profile,
         'is_admin': True,
-        # Rental Management Statistics
-        'building_count': building_count,
-        'available_apartments': available_apartments,
-        'unplaced_applicants': unplaced_applicants,
-        'pending_reviews': pending_reviews,
-        # User distribution
-        'broker_count': broker_count,
-        'applicant_count': applicant_count,
-        'owner_count': owner_count,
-        'staff_count': staff_count,
-        'superuser_count': superuser_count,
         # Activity data
         'recent_activities': recent_activities,
         'recent_users': recent_users,
         'recent_applications': recent_applications,
-        # Additional apartment and applicant metrics
-        'total_apartments': Apartment.objects.count(),
-        'rented_apartments': Apartment.objects.filter(status='rented').count(),
-        'total_applicants': Applicant.objects.count(),
-        'placed_applicants': Applicant.objects.filter(placement_status='placed').count(),
+        # Rental management statistics and user distribution
+        **stats,
     }
     return render(request, 'users/dashboards/admin_dashboard.html', context)
 
@@ -469,7 +447,8 @@ def broker_dashboard(request):
             Q(_email__icontains=q)
         )
     
-    assigned_applicants_list = list(assigned_applicants_qs.prefetch_related('photos'))
+    # Completion flags for every applicant come from one annotated query
+    assigned_applicants_list = Applicant.bulk_completion_status(assigned_applicants_qs.prefetch_related('photos'))
     
     # Calculate profile completion and matches for each applicant
     for applicant in assigned_applicants_list:
@@ -503,8 +482,7 @@ def broker_dashboard(request):
             applicant.first_photo_url = None
 
         # Calculate profile completion
-        completion_status = applicant.get_field_completion_status()
-        applicant.profile_completion = completion_status['overall_completion_percentage']
+        applicant.profile_completion = applicant.completion_status['overall_completion_percentage']
         
         # Check if can match
         applicant.can_match = bool(applicant.max_rent_budget and applicant.desired_move_in_date)
@@ -616,7 +594,8 @@ def applicant_dashboard(request):
         ).order_by('-created_at')
         
         # Get profile completion status - using the new weighted, context-aware logic
-        completion_status = applicant.get_field_completion_status()
+        # (related-record checks come from one annotated query)
+        completion_status = Applicant.bulk_completion_status(Applicant.objects.filter(pk=applicant.pk))[0].completion_status
         completion_percentage = completion_status['overall_completion_percentage']
 
         # Get next steps based on the most incomplete step
@@ -876,45 +855,79 @@ def admin_create_account(request, account_type):
     })
 
 
+PUBLIC_LISTINGS_PER_PAGE = 12
+PUBLIC_PROFILE_MAX_AGE = 300  # Seconds shared caches may serve anonymous pages
+
+
+def _public_profile_summary(request, broker_id):
+    """Cached page summary, looked up once per request (validators and view share it)."""
+    from .public_profiles import PublicBrokerProfileService
+
+    if not hasattr(request, '_public_profile_summary'):
+        request._public_profile_summary = PublicBrokerProfileService.get_summary(broker_id)
+    return request._public_profile_summary
+
+
+def _public_profile_etag(request, broker_id):
+    summary = _public_profile_summary(request, broker_id)
+    if summary is None:
+        return None
+    # The navigation differs per visitor, so logged-in pages get their own tag
+    return summary['etag'] if not request.user.is_authenticated else f"{summary['etag']}-{request.user.pk}"
+
+
+def _public_profile_last_modified(request, broker_id):
+    summary = _public_profile_summary(request, broker_id)
+    return summary['last_modified'] if summary else None
+
+
+@condition(etag_func=_public_profile_etag, last_modified_func=_public_profile_last_modified)
 def public_broker_profile(request, broker_id):
     """
     Public profile page for a broker.
     Visible to applicants.
+    Business Logic: Served from a cached per-broker summary with ETag /
+    Last-Modified validators; anonymous pages (crawlers, shared links) are
+    cached whole, so a warm hit never queries the database.
     """
-    # Get user and verify they are a broker
-    broker_user = get_object_or_404(User, id=broker_id, is_broker=True)
-    
-    # Get their profile
-    from .profiles_models import BrokerProfile
-    try:
-        broker_profile = BrokerProfile.objects.get(user=broker_user)
-    except BrokerProfile.DoesNotExist:
-        # Fallback if profile missing but user is broker (shouldn't happen)
-        broker_profile = None
-
-    # Get their listings
-    from apartments.models import Apartment
-    # Assuming apartments are linked via building
-    active_listings = Apartment.objects.filter(
-        building__brokers=broker_user,
-        status='available'
-    ).select_related('building').prefetch_related('images')
-    
-    # Statistics
-    total_listings = active_listings.count()
-    rented_count = Apartment.objects.filter(
-        building__brokers=broker_user,
-        status='rented'
-    ).count()
-
+    from .public_profiles import PublicBrokerProfileService
+
+    summary = _public_profile_summary(request, broker_id)
+    if summary is None:
+        raise Http404("Broker not found")
+
+    page_number = request.GET.get('page')
+    anonymous = not request.user.is_authenticated
+    page_key = None
+    if anonymous and (page_number or '1').isdigit():
+        page_key = PublicBrokerProfileService.page_cache_key(summary, int(page_number or 1))
+        html = cache.get(page_key)
+        if html is not None:
+            return _public_profile_response(HttpResponse(html), anonymous)
+
+    page = Paginator(summary['listings'], PUBLIC_LISTINGS_PER_PAGE).get_page(page_number)
     context = {
-        'broker': broker_user,
-        'profile': broker_profile,
-        'active_listings': active_listings,
-        'total_listings': total_listings,
-        'rented_count': rented_count,
+        'broker': summary['broker'],
+        'profile': summary['profile'],
+        'active_listings': page,
+        'page_obj': page,
+        'total_listings': summary['total_listings'],
+        'rented_count': summary['rented_count'],
     }
-    return render(request, 'users/public_profile_broker.html', context)
+    response = render(request, 'users/public_profile_broker.html', context)
+    if page_key:
+        cache.set(page_key, response.content.decode(), PublicBrokerProfileService.PAGE_CACHE_TTL)
+    return _public_profile_response(response, anonymous)
+
+
+def _public_profile_response(response, anonymous):
+    # Logged-in visitors see their own navigation, so only anonymous pages are shareable
+    patch_vary_headers(response, ['Cookie'])
+    if anonymous:
+        patch_cache_control(response, public=True, max_age=PUBLIC_PROFILE_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 @require_superuser_or_staff  
 def broker_leaderboard(request):
@@ -925,8 +938,8 @@ def broker_leaderboard(request):
     
     service = BrokerLeaderboardService()
     
-    # Get leaderboard data
-    leaderboard = service.get_broker_leaderboard(limit=50)
+    # Get leaderboard data (materialized nightly; ?refresh=1 recomputes it now)
+    leaderboard = service.get_broker_leaderboard(limit=50, refresh=request.GET.get('refresh') == '1')
     summary_stats = service.get_broker_summary_stats()
     
     # Get time period for display
@@ -937,6 +950,7 @@ def broker_leaderboard(request):
         'leaderboard': leaderboard,
         'summary_stats': summary_stats,
         'current_date': current_date,
+        'computed_at': leaderboard[0]['computed_at'] if leaderboard else None,
         'total_brokers': len(leaderboard),
         'has_data': len(leaderboard) > 0,
     }